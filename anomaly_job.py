@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Batch anomaly detection over ledger history (NumPy)
+Streams an exported ledger in fixed-size chunks on a process pool, keeps
+per-account running statistics and publishes outliers to the fraud alert feed
+
+Usage:
+    python anomaly_job.py --generate 10000000 --source /tmp/ledger.bin
+    python anomaly_job.py --source /tmp/ledger.bin --checkpoint-dir /tmp/anomaly --url http://localhost:8080
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import urllib.request
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from event_consumers import TOPIC_FRAUD_ALERTS
+
+EXPORT_FORMAT = "ledger-rows-v1"
+# One packed 20-byte row per posting, in posting order
+ROW_DTYPE = np.dtype([("id", "<u8"), ("account", "<u4"), ("amount_cents", "<i8")])
+CHECKPOINT_FILE = "checkpoint.json"
+# Log-amount spread below which an account counts as perfectly regular (stops 1-cent moves scoring infinite)
+MIN_VARIANCE = 0.05 ** 2
+# Synthetic exports mark every row whose id hashes under this rate as an injected outlier
+_OUTLIER_HASH = 2654435761
+
+
+class AnomalyJobError(Exception):
+    pass
+
+
+# ----------------------------------------------------------------------
+# Ledger exports
+# ----------------------------------------------------------------------
+def read_meta(path):
+    """Metadata of an export written by export_ledger or write_synthetic"""
+    try:
+        meta = json.loads(Path(f"{path}.json").read_text())
+    except (OSError, ValueError) as e:
+        raise AnomalyJobError(f"{path}: missing or unreadable metadata ({e})") from None
+    if meta.get("format") != EXPORT_FORMAT:
+        raise AnomalyJobError(f"{path}: unsupported export format {meta.get('format')!r}")
+    return meta
+
+
+def read_chunk(path, chunk, chunk_rows):
+    """Rows of one chunk, read into memory (a memory map would count every page read so far)"""
+    return np.fromfile(path, ROW_DTYPE, count=chunk_rows, offset=chunk * chunk_rows * ROW_DTYPE.itemsize)
+
+
+def iter_chunks(path, chunk_rows=1_000_000):
+    meta = read_meta(path)
+    for chunk in range(-(-meta["rows"] // chunk_rows)):
+        yield read_chunk(path, chunk, chunk_rows)
+
+
+def _write_meta(path, rows, accounts, **extra):
+    Path(f"{path}.json").write_text(json.dumps(dict(format=EXPORT_FORMAT, rows=rows, accounts=accounts, **extra)))
+
+
+def export_ledger(ledger, path):
+    """Write a Ledger's (or ShardedLedger's) journal as an export, in posting order"""
+    txns = sorted(ledger.transactions(), key=lambda t: (t["date"], t["id"]))
+    rows = np.empty(len(txns), ROW_DTYPE)
+    rows["id"] = [t["id"] for t in txns]
+    rows["account"] = [t["account_id"] for t in txns]
+    rows["amount_cents"] = [round(t["amount"] * 100) for t in txns]
+    rows.tofile(path)
+    _write_meta(path, len(rows), int(rows["account"].max()) + 1 if len(rows) else 0)
+    return len(rows)
+
+
+def injected_outliers(ids, rate):
+    """Which synthetic row ids write_synthetic turned into outliers"""
+    return (ids.astype(np.uint64) * np.uint64(_OUTLIER_HASH)) % np.uint64(1 << 32) < np.uint64(rate * (1 << 32))
+
+
+def write_synthetic(path, rows, accounts=100_000, outlier_rate=1e-4, seed=0, chunk_rows=1_000_000):
+    """Made-up history for load testing, written chunk by chunk so memory stays flat.
+
+    Each account's amounts are log-normal around its own typical size; a
+    small fraction of rows (injected_outliers) are 50-500x that size.
+    """
+    rng = np.random.default_rng(seed)
+    typical = rng.uniform(1.5, 6.0, accounts)
+    with open(path, "wb") as f:
+        for start in range(0, rows, chunk_rows):
+            count = min(chunk_rows, rows - start)
+            chunk = np.empty(count, ROW_DTYPE)
+            chunk["id"] = np.arange(start + 1, start + count + 1, dtype=np.uint64)
+            account = rng.integers(0, accounts, count, dtype=np.uint32)
+            amount = np.exp(rng.normal(typical[account], 0.5))
+            spikes = injected_outliers(chunk["id"], outlier_rate)
+            amount[spikes] *= rng.uniform(50, 500, int(spikes.sum()))
+            sign = np.where(rng.random(count) < 0.7, -1, 1)
+            chunk["account"] = account
+            chunk["amount_cents"] = np.maximum(np.rint(amount * 100), 1).astype(np.int64) * sign
+            chunk.tofile(f)
+    _write_meta(path, rows, accounts, synthetic={"seed": seed, "outlier_rate": outlier_rate})
+    return rows
+
+
+# ----------------------------------------------------------------------
+# Scoring (runs in pool workers)
+# ----------------------------------------------------------------------
+def new_state(size):
+    return {"count": np.zeros(size, np.int64), "mean": np.zeros(size), "m2": np.zeros(size)}
+
+
+def score_rows(state, local, amount_cents, threshold, min_history, min_amount_cents, window):
+    """Score one chunk's rows for one partition against and then into the running state.
+
+    local: per-row account index into the state arrays, rows in posting
+    order. Every row is compared with its account's history before it: the
+    state carried in from earlier chunks plus the rows ahead of it in this
+    chunk, found with group-wise cumulative sums after a stable sort by
+    account. Returns (row positions flagged, their z-scores).
+    """
+    n = len(local)
+    if not n:
+        return np.empty(0, np.int64), np.empty(0)
+    order = np.argsort(local, kind="stable")
+    acct = local[order]
+    x = np.log1p(np.abs(amount_cents[order]) / 100.0)
+
+    first = np.empty(n, bool)
+    first[0] = True
+    np.not_equal(acct[1:], acct[:-1], out=first[1:])
+    starts = np.flatnonzero(first)
+    start = starts[np.cumsum(first) - 1]
+
+    count, mean, m2 = state["count"], state["mean"], state["m2"]
+    # Shift by the carried mean so the sums stay small (and the carried m2 combines exactly)
+    shift = mean[acct]
+    d = x - shift
+    before_sum = np.cumsum(d) - d
+    before_sq = np.cumsum(d * d) - d * d
+    before_sum -= before_sum[start]
+    before_sq -= before_sq[start]
+    seen = count[acct] + (np.arange(n) - start)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg = shift + before_sum / seen
+        var = (m2[acct] + before_sq - before_sum * before_sum / seen) / (seen - 1)
+        z = (x - avg) / np.sqrt(np.maximum(var, MIN_VARIANCE))
+    flagged = (seen >= min_history) & (z >= threshold) & (np.abs(amount_cents[order]) >= min_amount_cents)
+
+    # Fold the chunk into the state: per account, everything up to and including its last row
+    ends = np.append(starts[1:], n) - 1
+    accounts = acct[starts]
+    total_sum = before_sum[ends] + d[ends]
+    total_sq = before_sq[ends] + d[ends] * d[ends]
+    total = seen[ends] + 1
+    mean[accounts] = shift[starts] + total_sum / total
+    m2[accounts] += total_sq - total_sum * total_sum / total
+    # Past `window` observations older history is scaled down, so the statistics follow recent behaviour
+    capped = np.minimum(total, window)
+    m2[accounts] *= capped / total
+    count[accounts] = capped
+
+    hits = np.flatnonzero(flagged)
+    return order[hits], z[hits]
+
+
+def run_block(task):
+    """Pool task: one partition's chunks [first, last) from its saved state; writes the next state file"""
+    (source, partition, partitions, first, last, chunk_rows, state_in, state_out, params) = task
+    started = time.perf_counter()
+    meta = read_meta(source)
+    size = (meta["accounts"] - partition + partitions - 1) // partitions
+    if state_in:
+        with np.load(state_in) as saved:
+            state = {name: saved[name] for name in ("count", "mean", "m2")}
+    else:
+        state = new_state(size)
+    found = []
+    scored = 0
+    for chunk in range(first, last):
+        block = read_chunk(source, chunk, chunk_rows)
+        account = block["account"]
+        mine = np.flatnonzero(account % partitions == partition)
+        picked = block[mine]
+        scored += len(picked)
+        hits, z = score_rows(state, picked["account"] // partitions, picked["amount_cents"], **params)
+        found.append((picked[hits], z))
+    tmp = f"{state_out}.tmp.npz"
+    np.savez(tmp, **state)
+    os.replace(tmp, state_out)
+    flagged = np.concatenate([f for f, _ in found]) if found else np.empty(0, ROW_DTYPE)
+    scores = np.concatenate([z for _, z in found]) if found else np.empty(0)
+    return {
+        "partition": partition,
+        "next_chunk": last,
+        "state": state_out,
+        "rows": scored,
+        "ids": flagged["id"].tolist(),
+        "accounts": flagged["account"].tolist(),
+        "amount_cents": flagged["amount_cents"].tolist(),
+        "zscores": scores.tolist(),
+        "seconds": time.perf_counter() - started,
+    }
+
+
+# ----------------------------------------------------------------------
+# Alert feed
+# ----------------------------------------------------------------------
+def bus_publisher(bus):
+    """Publish alerts onto the in-process event bus's fraud alert topic"""
+    def publish(alerts):
+        bus.publish_batch(TOPIC_FRAUD_ALERTS, [(alert["account_id"], alert) for alert in alerts])
+    return publish
+
+
+def http_publisher(url, batch_size=1000, timeout=30):
+    """POST alerts to a running mock backend's /api/v1/fraud/alerts"""
+    def publish(alerts):
+        for i in range(0, len(alerts), batch_size):
+            body = json.dumps({"alerts": alerts[i:i + batch_size]}).encode()
+            request = urllib.request.Request(url.rstrip('/') + '/api/v1/fraud/alerts', data=body,
+                                             headers={"Content-Type": "application/json"})
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                response.read()
+    return publish
+
+
+def file_publisher(path):
+    """Append alerts to a JSON-lines file"""
+    def publish(alerts):
+        with open(path, "a") as f:
+            f.writelines(json.dumps(alert) + "\n" for alert in alerts)
+    return publish
+
+
+# ----------------------------------------------------------------------
+# Job
+# ----------------------------------------------------------------------
+class AnomalyJob:
+    """Chunked, resumable anomaly scoring over a ledger export.
+
+    Accounts are split into partitions (account id mod partitions) so each
+    account's rows are scored in order by one task at a time, carrying its
+    running count, mean and M2 of log amounts from chunk to chunk. A task
+    covers chunks_per_task chunks of one partition; partitions run side by
+    side on the pool. Memory is bounded by the in-flight chunks plus one
+    state array per partition, whatever the length of the history.
+
+    After each task the parent publishes its alerts, then records the
+    partition's next chunk and state file in checkpoint.json. A restarted
+    job resumes from there; alerts of a task cut off between publishing and
+    checkpointing are published again (alert_id makes them idempotent).
+    """
+
+    def __init__(self, source, checkpoint_dir, partitions=None, workers=None, chunk_rows=1_000_000,
+                 chunks_per_task=4, threshold=4.0, min_history=20, min_amount=100.0, window=1000):
+        self.source = str(Path(source).resolve())
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.workers = os.cpu_count() if workers is None else workers
+        self.partitions = partitions or max(1, self.workers) * 2
+        self.chunk_rows = chunk_rows
+        self.chunks_per_task = chunks_per_task
+        self.params = {
+            "threshold": threshold,
+            "min_history": min_history,
+            "min_amount_cents": round(min_amount * 100),
+            "window": window,
+        }
+        self.meta = read_meta(self.source)
+        self.chunks = -(-self.meta["rows"] // chunk_rows)
+        self.stats = {"tasks": 0, "rows": 0, "flagged": 0, "published": 0, "task_seconds": 0.0}
+
+    # -- checkpoint ----------------------------------------------------
+    def _settings(self):
+        return {"source": self.source, "rows": self.meta["rows"], "partitions": self.partitions,
+                "chunk_rows": self.chunk_rows, "params": self.params}
+
+    def load_checkpoint(self):
+        path = self.checkpoint_dir / CHECKPOINT_FILE
+        if not path.exists():
+            return {"settings": self._settings(), "next_chunk": [0] * self.partitions,
+                    "state": [None] * self.partitions, "flagged": 0, "runs": 0}
+        checkpoint = json.loads(path.read_text())
+        if checkpoint["settings"] != self._settings():
+            raise AnomalyJobError(f"{path} was written for a different export or settings; "
+                                  "use a fresh --checkpoint-dir")
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint):
+        path = self.checkpoint_dir / CHECKPOINT_FILE
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(checkpoint))
+        os.replace(tmp, path)
+
+    # -- run -----------------------------------------------------------
+    def _task(self, checkpoint, partition):
+        first = checkpoint["next_chunk"][partition]
+        last = min(first + self.chunks_per_task, self.chunks)
+        state_out = str(self.checkpoint_dir / f"state-{partition}-{last}.npz")
+        return (self.source, partition, self.partitions, first, last, self.chunk_rows,
+                checkpoint["state"][partition], state_out, self.params)
+
+    def _alerts(self, result):
+        now = time.time()
+        threshold = self.params["threshold"]
+        alerts = []
+        for txn_id, account, cents, z in zip(result["ids"], result["accounts"], result["amount_cents"],
+                                             result["zscores"]):
+            alerts.append({
+                "alert_id": f"anomaly-{txn_id}",
+                "account_id": account,
+                "transaction_id": txn_id,
+                "amount": cents / 100,
+                "score": round(min(1.0, z / (2 * threshold)), 2),
+                "zscore": round(z, 2),
+                "risk_level": "high" if z >= 2 * threshold else "medium",
+                "reasons": ["amount_outlier"],
+                "source": "anomaly-batch",
+                "timestamp": now,
+            })
+        return alerts
+
+    def _commit(self, checkpoint, result, publish):
+        alerts = self._alerts(result)
+        if alerts and publish is not None:
+            publish(alerts)
+            self.stats["published"] += len(alerts)
+        partition = result["partition"]
+        previous = checkpoint["state"][partition]
+        checkpoint["next_chunk"][partition] = result["next_chunk"]
+        checkpoint["state"][partition] = result["state"]
+        checkpoint["flagged"] += len(alerts)
+        self._save_checkpoint(checkpoint)
+        if previous and previous != result["state"]:
+            Path(previous).unlink(missing_ok=True)
+        self.stats["tasks"] += 1
+        self.stats["rows"] += result["rows"]
+        self.stats["flagged"] += len(alerts)
+        self.stats["task_seconds"] += result["seconds"]
+        return alerts
+
+    def run(self, publish=None, max_tasks=None, progress=None):
+        """Score the export from the last checkpoint; returns a summary.
+
+        max_tasks stops early (as an interrupted run would), progress is
+        called with the summary after every task.
+        """
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        checkpoint = self.load_checkpoint()
+        checkpoint["runs"] += 1
+        started = time.perf_counter()
+        pending = [p for p in range(self.partitions) if checkpoint["next_chunk"][p] < self.chunks]
+        limit = float("inf") if max_tasks is None else max_tasks
+        submitted = 0
+
+        if self.workers <= 1:
+            while pending and submitted < limit:
+                partition = pending.pop(0)
+                self._commit(checkpoint, run_block(self._task(checkpoint, partition)), publish)
+                submitted += 1
+                if checkpoint["next_chunk"][partition] < self.chunks:
+                    pending.append(partition)
+                if progress:
+                    progress(self.summary(checkpoint, started))
+            return self.summary(checkpoint, started)
+
+        # Spawned workers: forking a process that already runs threads (a server, the bus) is unsafe
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(self.workers, mp_context=context) as pool:
+            running = {}
+            while (pending or running) and (running or submitted < limit):
+                # One task per partition in flight keeps each account's chunks in order
+                while pending and len(running) < self.workers and submitted < limit:
+                    partition = pending.pop(0)
+                    running[pool.submit(run_block, self._task(checkpoint, partition))] = partition
+                    submitted += 1
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    partition = running.pop(future)
+                    self._commit(checkpoint, future.result(), publish)
+                    if checkpoint["next_chunk"][partition] < self.chunks:
+                        pending.append(partition)
+                    if progress:
+                        progress(self.summary(checkpoint, started))
+        return self.summary(checkpoint, started)
+
+    def summary(self, checkpoint, started):
+        elapsed = time.perf_counter() - started
+        # Partitions advance separately; each covers about 1/partitions of a chunk's rows
+        done = sum(min(c * self.chunk_rows, self.meta["rows"]) for c in checkpoint["next_chunk"]) / self.partitions
+        return {
+            "rows": self.meta["rows"],
+            "rows_done": round(done),
+            "complete": all(c >= self.chunks for c in checkpoint["next_chunk"]),
+            "flagged_total": checkpoint["flagged"],
+            "runs": checkpoint["runs"],
+            "this_run": dict(self.stats, seconds=elapsed,
+                             rows_per_sec=self.stats["rows"] / elapsed if elapsed else 0.0),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch anomaly detection over a ledger export")
+    parser.add_argument("--source", required=True, help="Ledger export (rows file with a .json sidecar)")
+    parser.add_argument("--generate", type=int, metavar="ROWS", help="Write a synthetic export of ROWS rows and exit")
+    parser.add_argument("--accounts", type=int, default=100_000, help="Accounts in a generated export")
+    parser.add_argument("--checkpoint-dir", default=None, help="Progress and state files (default: <source>.anomaly)")
+    parser.add_argument("--workers", type=int, default=None, help="Pool processes (default: CPU count; 1 runs inline)")
+    parser.add_argument("--partitions", type=int, default=None)
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000)
+    parser.add_argument("--threshold", type=float, default=4.0, help="z-score of log amount that flags a row")
+    parser.add_argument("--min-history", type=int, default=20, help="Postings an account needs before it is scored")
+    parser.add_argument("--min-amount", type=float, default=100.0, help="Smaller amounts are never flagged")
+    parser.add_argument("--url", help="Publish alerts to this mock backend's fraud alert feed")
+    parser.add_argument("--alerts-file", help="Append alerts to this JSON-lines file")
+    args = parser.parse_args()
+
+    if args.generate:
+        started = time.perf_counter()
+        write_synthetic(args.source, args.generate, args.accounts, chunk_rows=args.chunk_rows)
+        print(f"🧾 Wrote {args.generate:,} rows for {args.accounts:,} accounts to {args.source} "
+              f"in {time.perf_counter() - started:.1f} s")
+        return 0
+
+    publishers = [p for p in (args.url and http_publisher(args.url),
+                              args.alerts_file and file_publisher(args.alerts_file)) if p]
+
+    def publish(alerts):
+        for p in publishers:
+            p(alerts)
+
+    try:
+        job = AnomalyJob(args.source, args.checkpoint_dir or f"{args.source}.anomaly", args.partitions, args.workers,
+                         args.chunk_rows, threshold=args.threshold, min_history=args.min_history,
+                         min_amount=args.min_amount)
+    except AnomalyJobError as e:
+        print(f"❌ {e}")
+        return 1
+
+    def progress(summary):
+        done = summary["rows_done"]
+        print(f"\r🔎 {done:,}/{summary['rows']:,} rows, {summary['flagged_total']:,} flagged, "
+              f"{summary['this_run']['rows_per_sec']:,.0f} rows/s", end="", flush=True)
+
+    print(f"🔎 Scoring {job.meta['rows']:,} rows in {job.chunks} chunks over {job.partitions} partitions, "
+          f"{job.workers} workers ({datetime.now():%H:%M:%S})")
+    try:
+        summary = job.run(publish if publishers else None, progress=progress)
+    except (AnomalyJobError, OSError) as e:
+        print(f"\n❌ {e}")
+        return 1
+    print()
+    run = summary["this_run"]
+    print(f"✅ {run['rows']:,} rows in {run['seconds']:.1f} s ({run['rows_per_sec']:,.0f} rows/s), "
+          f"{summary['flagged_total']:,} flagged in total over {summary['runs']} run(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Batch anomaly detection benchmark
+Generates a synthetic ledger export (100M rows by default), scores it with
+anomaly_job.py on a process pool and reports throughput, peak memory and
+how many of the injected outliers were flagged
+"""
+
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+
+from anomaly_job import AnomalyJob, injected_outliers, iter_chunks, write_synthetic
+
+
+def peak_rss_mb(who):
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch anomaly detection benchmark")
+    parser.add_argument("--rows", type=int, default=100_000_000)
+    parser.add_argument("--accounts", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000)
+    parser.add_argument("--outlier-rate", type=float, default=1e-4)
+    parser.add_argument("--max-rss-mb", type=float, default=1024, help="Peak memory budget per process")
+    parser.add_argument("--dir", default=None, help="Where to write the export (default: a temporary directory)")
+    args = parser.parse_args()
+
+    print("🔎 Batch Anomaly Detection Benchmark")
+    print("=" * 72)
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        source = os.path.join(tmp, "ledger.bin")
+        started = time.perf_counter()
+        write_synthetic(source, args.rows, args.accounts, args.outlier_rate, chunk_rows=args.chunk_rows)
+        generated = time.perf_counter() - started
+        size_gb = os.path.getsize(source) / 1e9
+        print(f"Export: {args.rows:,} rows, {args.accounts:,} accounts, {size_gb:.1f} GB written in {generated:.1f} s")
+
+        job = AnomalyJob(source, os.path.join(tmp, "checkpoint"), workers=args.workers, chunk_rows=args.chunk_rows)
+        flagged = set()
+        summary = job.run(lambda alerts: flagged.update(a["transaction_id"] for a in alerts))
+        run = summary["this_run"]
+
+        injected = hits = 0
+        for chunk in iter_chunks(source, args.chunk_rows):
+            truth = chunk["id"][injected_outliers(chunk["id"], args.outlier_rate)]
+            injected += len(truth)
+            hits += int(np.isin(truth, np.fromiter(flagged, np.uint64, len(flagged))).sum()) if flagged else 0
+
+    worker_rss = peak_rss_mb(resource.RUSAGE_CHILDREN)
+    parent_rss = peak_rss_mb(resource.RUSAGE_SELF)
+    print(f"Job: {job.workers} workers, {job.partitions} partitions, {job.chunks} chunks of {args.chunk_rows:,} rows, "
+          f"{run['tasks']} tasks")
+    print(f"Throughput: {run['rows']:,} rows in {run['seconds']:.1f} s = {run['rows_per_sec']:,.0f} rows/s")
+    workers = f"largest worker {worker_rss:.0f} MB" if job.workers > 1 else "scored inline"
+    print(f"Peak RSS: parent {parent_rss:.0f} MB, {workers} (export is {size_gb * 1000:.0f} MB)")
+    print(f"Flagged {len(flagged):,} rows; {hits:,} of {injected:,} injected outliers "
+          f"({hits / injected if injected else 0:.1%}), precision {hits / len(flagged) if flagged else 0:.1%}")
+
+    ok = summary["complete"] and max(worker_rss, parent_rss) < args.max_rss_mb
+    print("-" * 72)
+    print(f"{'✅' if ok else '❌'} {args.rows:,} rows at {run['rows_per_sec']:,.0f} rows/s with peak memory "
+          f"{max(worker_rss, parent_rss):.0f} MB (budget {args.max_rss_mb:.0f} MB)")
+    print("=" * 72)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    exit(main())
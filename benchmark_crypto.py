@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Crypto pipeline benchmark for the Quantum Banking mock backend
+Measures batch sign/verify throughput per worker count and the cost of
+signing every ledger posting
+"""
+
+import argparse
+import time
+
+from crypto_pipeline import CryptoPipeline, canonical_bytes
+from ledger import Ledger
+
+
+def bench_batches(provider, executor, workers_list, messages, chunk_size):
+    rows = []
+    for workers in workers_list:
+        pipeline = CryptoPipeline(provider, workers=workers, chunk_size=chunk_size, executor=executor)
+        public_key, secret_key = pipeline.generate_signing_keypair()
+        payloads = [f"txn-{i}".encode() * 8 for i in range(messages)]
+        pipeline.sign_batch(secret_key, payloads[:chunk_size])  # warm the pool
+
+        start = time.perf_counter()
+        signatures = pipeline.sign_batch(secret_key, payloads)
+        sign_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = pipeline.verify_batch([(public_key, m, s) for m, s in zip(payloads, signatures)])
+        verify_elapsed = time.perf_counter() - start
+        assert all(results)
+
+        ops = pipeline.status()["operations"]
+        rows.append((workers, messages / sign_elapsed, messages / verify_elapsed,
+                     ops["sign"]["p99_ms"], ops["verify"]["p99_ms"]))
+        pipeline.shutdown()
+    return rows
+
+
+def bench_ledger(provider, postings):
+    """Ledger posting throughput without signing vs. signing every posting inline"""
+    results = {}
+    pipeline = CryptoPipeline(provider)
+    _, secret_key = pipeline.generate_signing_keypair()
+    for label, sign in (("unsigned", False), ("signed", True)):
+        ledger = Ledger()
+        ledger.open_account({"id": 99, "balance": postings * 10})
+        start = time.perf_counter()
+        for i in range(postings):
+            txn = ledger.post(99, -1, f"bench {i}")
+            if sign:
+                pipeline.sign(secret_key, canonical_bytes(txn))
+        results[label] = postings / (time.perf_counter() - start)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PQC signing pipeline benchmark")
+    parser.add_argument("--provider", default=None, help="offline | oqs (default: PQC_PROVIDER or auto)")
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--postings", type=int, default=5000)
+    args = parser.parse_args()
+
+    print("🔐 PQC Signing Pipeline Benchmark")
+    print("=" * 60)
+    print(f"{'workers':>7} {'sign/s':>12} {'verify/s':>12} {'sign p99':>10} {'verify p99':>11}")
+    for workers, sign_rate, verify_rate, sign_p99, verify_p99 in bench_batches(
+            args.provider, args.executor, args.workers, args.messages, args.chunk_size):
+        print(f"{workers:>7} {sign_rate:>12,.0f} {verify_rate:>12,.0f} {sign_p99:>8.3f}ms {verify_p99:>9.3f}ms")
+
+    ledger_rates = bench_ledger(args.provider, args.postings)
+    overhead = (1 - ledger_rates["signed"] / ledger_rates["unsigned"]) * 100
+    print("-" * 60)
+    print(f"Ledger postings/s unsigned: {ledger_rates['unsigned']:,.0f}")
+    print(f"Ledger postings/s signed:   {ledger_rates['signed']:,.0f} ({overhead:.1f}% throughput cost)")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
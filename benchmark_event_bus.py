@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the embedded event bus
+Reports publish/consume events/sec per partition and consumer lag
+"""
+
+import argparse
+import threading
+import time
+
+from event_bus import EventBus
+
+
+def run_scenario(partitions, events, batch_size, consumers, capacity):
+    bus = EventBus(default_partitions=partitions, default_capacity=capacity)
+    topic = "bench.postings"
+    bus.create_topic(topic)
+    group = "bench-consumers"
+    members = [bus.subscribe(group, topic) for _ in range(consumers)]
+    consumed = [0] * consumers
+    lag_samples = []
+    done = threading.Event()
+
+    def consume(index):
+        consumer = members[index]
+        while not done.is_set() or sum(bus.lag(group, topic).values()):
+            records = consumer.poll(batch_size, timeout=0.05)
+            if records:
+                consumed[index] += len(records)
+                consumer.commit()
+            elif done.is_set():
+                break
+
+    threads = [threading.Thread(target=consume, args=(i,)) for i in range(consumers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+
+    payload = {"amount": -12.5, "description": "bench"}
+    chunk = 1000
+    for base in range(0, events, chunk):
+        bus.publish_batch(topic, ((f"acct-{i % 10000}", payload) for i in range(base, min(events, base + chunk))))
+        if base % (chunk * 20) == 0:
+            lag_samples.append(sum(bus.lag(group, topic).values()))
+    publish_elapsed = time.perf_counter() - start
+
+    done.set()
+    for t in threads:
+        t.join()
+    total_elapsed = time.perf_counter() - start
+    for consumer in members:
+        consumer.close()
+
+    return {
+        "partitions": partitions,
+        "consumers": consumers,
+        "published": events,
+        "consumed": sum(consumed),
+        "lost": sum(c.skipped for c in members),
+        "publish_eps": events / publish_elapsed,
+        "consume_eps": sum(consumed) / total_elapsed,
+        "consume_eps_per_partition": sum(consumed) / total_elapsed / partitions,
+        "max_lag": max(lag_samples) if lag_samples else 0,
+        "final_lag": sum(bus.lag(group, topic).values()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event bus throughput benchmark")
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--partitions", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--consumers", type=int, default=2)
+    parser.add_argument("--capacity", type=int, default=1 << 20)
+    args = parser.parse_args()
+
+    print("📈 Event Bus Throughput Benchmark")
+    print("=" * 60)
+    print(f"{'parts':>5} {'cons':>4} {'publish/s':>12} {'consume/s':>12} {'per-part/s':>12} {'max lag':>9} {'lost':>6}")
+    for partitions in args.partitions:
+        r = run_scenario(partitions, args.events, args.batch_size, args.consumers, args.capacity)
+        print(f"{r['partitions']:>5} {r['consumers']:>4} {r['publish_eps']:>12,.0f} {r['consume_eps']:>12,.0f} "
+              f"{r['consume_eps_per_partition']:>12,.0f} {r['max_lag']:>9,} {r['lost']:>6,}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
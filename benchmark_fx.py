@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Multi-currency portfolio total benchmark
+Values a portfolio of thousands of positions in every currency three ways: a
+naive per-position Decimal conversion, one fixed-point pass over integer minor
+units, and the incrementally kept per-currency subtotals; checks each against
+an exact rational reference
+"""
+
+import argparse
+import random
+import time
+from decimal import Decimal, ROUND_HALF_EVEN, localcontext
+from fractions import Fraction
+
+from currency import CURRENCIES, DEFAULT_RATES, FxRateTable, Portfolio, format_minor
+from metrics import percentile
+
+
+def naive_total(positions, rates, target):
+    """What the float code becomes with Decimal dropped in: convert and round every position, then add"""
+    quantum = Decimal(1).scaleb(-CURRENCIES[target])
+    total = Decimal(0)
+    with localcontext() as context:
+        context.prec = 28
+        for currency, amount in positions:
+            total += (amount * rates[target] / rates[currency]).quantize(quantum, ROUND_HALF_EVEN)
+    return total
+
+
+def scan_total(positions, fx, target):
+    """One pass adding integer minor units per currency, then the precomputed cross-rate row"""
+    subtotals = {}
+    for currency, minor in positions:
+        subtotals[currency] = subtotals.get(currency, 0) + minor
+    return fx.total(subtotals, target)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t)
+    return result, sorted(samples)
+
+
+def us(samples, pct):
+    return percentile(samples, pct) * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-currency portfolio total benchmark")
+    parser.add_argument("--positions", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--updates", type=int, default=20_000, help="Position updates between incremental totals")
+    args = parser.parse_args()
+
+    print("💱 Multi-Currency Portfolio Benchmark")
+    print("=" * 72)
+    rng = random.Random(11)
+    t = time.perf_counter()
+    table = FxRateTable()
+    fx = table.current()
+    print(f"Rate table: {len(fx.currencies)} currencies, {len(fx.currencies) ** 2} cross rates built in "
+          f"{(time.perf_counter() - t) * 1000:.2f} ms")
+    currencies = list(fx.currencies)
+    minor_positions = [(rng.choice(currencies), rng.randint(-5 * 10 ** 6, 5 * 10 ** 8)) for _ in range(args.positions)]
+    decimal_positions = [(currency, Decimal(format_minor(minor, currency))) for currency, minor in minor_positions]
+    decimal_rates = {code: Decimal(str(rate)) for code, rate in dict(DEFAULT_RATES, USD="1").items()}
+    portfolio = Portfolio((i, currency, minor) for i, (currency, minor) in enumerate(minor_positions))
+    print(f"Portfolio: {args.positions:,} positions across {len(currencies)} currencies")
+
+    mismatches = {"naive": 0, "fixed-point": 0, "incremental": 0}
+    timings = {"naive": [], "fixed-point": [], "incremental": []}
+    for target in currencies:
+        exact = round(sum(Fraction(minor) * fx.rates[target] / fx.rates[currency] *
+                          Fraction(10) ** (CURRENCIES[target] - CURRENCIES[currency])
+                          for currency, minor in minor_positions))
+        naive, samples = timed(lambda: naive_total(decimal_positions, decimal_rates, target), max(args.repeat // 5, 3))
+        timings["naive"] += samples
+        mismatches["naive"] += int(naive.scaleb(CURRENCIES[target])) != exact
+        scanned, samples = timed(lambda: scan_total(minor_positions, fx, target), args.repeat)
+        timings["fixed-point"] += samples
+        mismatches["fixed-point"] += scanned != exact
+        kept, samples = timed(lambda: portfolio.total(fx, target), args.repeat * 20)
+        timings["incremental"] += samples
+        mismatches["incremental"] += kept != exact
+
+    print(f"{'path':<14} {'p50 us':>12} {'p99 us':>12} {'totals off by >= 1 minor unit':>32}")
+    for name in timings:
+        timings[name].sort()
+        print(f"{name:<14} {us(timings[name], 50):>12,.1f} {us(timings[name], 99):>12,.1f} "
+              f"{mismatches[name]:>20} of {len(currencies)}")
+
+    t = time.perf_counter()
+    for _ in range(args.updates):
+        position = rng.randrange(args.positions)
+        portfolio.set(position, rng.choice(currencies), rng.randint(-5 * 10 ** 6, 5 * 10 ** 8))
+    update_us = (time.perf_counter() - t) / args.updates * 1_000_000
+    print(f"Position updates: {update_us:.2f} us each keep the per-currency subtotals current")
+
+    speedup = us(timings["naive"], 50) / us(timings["fixed-point"], 50)
+    ok = mismatches["fixed-point"] == mismatches["incremental"] == 0 and speedup > 1 and \
+        us(timings["incremental"], 99) < 100
+    print("-" * 72)
+    print(f"{'✅' if ok else '❌'} Fixed-point totals exact and {speedup:.1f}x the naive Decimal path; "
+          f"incremental totals p50 {us(timings['incremental'], 50):.1f} us")
+    print("=" * 72)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    exit(main())
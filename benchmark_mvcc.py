@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Ledger snapshot read benchmark
+Runs balance readers against writer threads doing random transfers, once
+reading through MVCC snapshots and once copying balances under the write lock,
+and reports read throughput, read latency, write throughput and torn reads
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from ledger import Ledger, LedgerError, from_cents, to_cents
+from metrics import percentile
+
+
+def locked_read(ledger):
+    # The read path before snapshots: copy every balance while holding the write lock
+    with ledger._lock:
+        return [dict(account, balance=from_cents(ledger._balances[account_id]))
+                for account_id, account in ledger._accounts.items()]
+
+
+def snapshot_read(ledger):
+    return ledger.accounts()
+
+
+def run(read, args):
+    ledger = Ledger(seed=False, retention=args.retention)
+    for account_id in range(1, args.accounts + 1):
+        ledger.open_account({"id": account_id, "balance": 1000})
+    expected_total = to_cents(1000) * args.accounts
+    stop = threading.Event()
+    writes = [0] * args.writers
+    reads = [[] for _ in range(args.readers)]
+    torn = [0] * args.readers
+
+    def writer(slot):
+        rng = random.Random(slot)
+        while not stop.is_set():
+            source, target = rng.sample(range(1, args.accounts + 1), 2)
+            try:
+                ledger.transfer(source, target, rng.randint(1, 5000) / 100, "benchmark")
+            except LedgerError:
+                pass
+            writes[slot] += 1
+
+    def reader(slot):
+        latencies = reads[slot]
+        while not stop.is_set():
+            started = time.perf_counter()
+            accounts = read(ledger)
+            latencies.append(time.perf_counter() - started)
+            # Transfers conserve money, so any consistent view sums to the opening total
+            if sum(to_cents(a["balance"]) for a in accounts) != expected_total:
+                torn[slot] += 1
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies = sorted(latency for per_reader in reads for latency in per_reader)
+    return {
+        "reads_per_sec": len(latencies) / args.seconds,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "writes_per_sec": sum(writes) / args.seconds,
+        "torn_reads": sum(torn),
+        "versions": ledger.version_stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ledger snapshot read benchmark")
+    parser.add_argument("--accounts", type=int, default=200)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration of each run")
+    parser.add_argument("--retention", type=float, default=1.0, help="Seconds of balance history kept")
+    args = parser.parse_args()
+
+    print("📒 Ledger Snapshot Read Benchmark")
+    print("=" * 72)
+    print(f"{args.accounts} accounts, {args.readers} reader and {args.writers} writer threads, "
+          f"{args.seconds:.0f} s per run")
+    print(f"{'read path':<10} {'reads/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'writes/s':>10} "
+          f"{'torn':>6}")
+    results = {}
+    for label, read in (("lock", locked_read), ("snapshot", snapshot_read)):
+        results[label] = r = run(read, args)
+        print(f"{label:<10} {r['reads_per_sec']:>10,.0f} {r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f} "
+              f"{r['max_ms']:>8.2f} {r['writes_per_sec']:>10,.0f} {r['torn_reads']:>6}")
+    versions = results["snapshot"]["versions"]
+    print(f"Versions: {versions['version']:,} committed, {versions['retained_versions']:,} retained, "
+          f"{versions['collected_versions']:,} collected in {versions['gc_runs']:,} GC runs")
+
+    lock, snapshot = results["lock"], results["snapshot"]
+    speedup = snapshot["reads_per_sec"] / lock["reads_per_sec"]
+    ok = snapshot["torn_reads"] == 0 and lock["torn_reads"] == 0 and speedup >= 1
+    print("-" * 72)
+    print(f"{'✅' if ok else '❌'} Snapshot reads {speedup:.2f}x the lock-based path "
+          f"(p99 {snapshot['p99_ms']:.3f} ms vs {lock['p99_ms']:.3f} ms), no torn reads")
+    print("=" * 72)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    exit(main())
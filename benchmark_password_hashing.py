@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Password hashing benchmark for the Quantum Banking mock backend
+Calibrates the KDF cost for a target latency, measures login (verify)
+throughput against worker pool size and checks that overload is shed
+with fast rejections instead of queueing
+"""
+
+import argparse
+import os
+import threading
+import time
+
+from metrics import LatencyStats
+from password_hasher import ALGORITHMS, HasherBusyError, PasswordHasher, calibrate
+
+
+def bench_logins(workers, executor, algorithm, cost, clients, logins):
+    hasher = PasswordHasher(workers=workers, max_queue=clients, algorithm=algorithm,
+                            cost=cost, executor=executor).start()
+    encoded = hasher.hash("correct horse battery staple")
+    latency = LatencyStats(window_size=clients * logins)
+
+    def client(_):
+        for _ in range(logins):
+            start = time.perf_counter()
+            hasher.verify("correct horse battery staple", encoded)
+            latency.record(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    hasher.shutdown()
+    return clients * logins / elapsed, latency.snapshot()
+
+
+def check_shedding(algorithm, cost, workers, max_queue, burst):
+    """Fire a burst far larger than the queue; excess must be rejected immediately"""
+    hasher = PasswordHasher(workers=workers, max_queue=max_queue, algorithm=algorithm, cost=cost).start()
+    futures, reject_times = [], []
+    for _ in range(burst):
+        start = time.perf_counter()
+        try:
+            futures.append(hasher.hash_async("burst"))
+        except HasherBusyError:
+            reject_times.append(time.perf_counter() - start)
+    for future in futures:
+        future.result()
+    hasher.shutdown()
+    worst_reject = max(reject_times) if reject_times else 0.0
+    return len(futures), len(reject_times), worst_reject
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Password hashing benchmark")
+    parser.add_argument("--algorithm", choices=ALGORITHMS, default="scrypt")
+    parser.add_argument("--target-ms", type=float, default=50, help="calibration target per hash")
+    parser.add_argument("--calibrate-only", action="store_true", help="print the calibrated cost and exit")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--logins", type=int, default=10, help="logins per client")
+    args = parser.parse_args()
+
+    print("🔐 Password Hashing Benchmark")
+    print("=" * 72)
+    cost = calibrate(args.target_ms / 1000, args.algorithm)
+    print(f"🎯 Calibrated {args.algorithm} cost for ~{args.target_ms:.0f} ms/hash: {cost}")
+    if args.calibrate_only:
+        print(f"   PASSWORD_HASH_ALGORITHM={args.algorithm} PASSWORD_HASH_COST={cost}")
+        return 0
+
+    print("-" * 72)
+    print(f"{'executor':>8} {'workers':>7} {'logins/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for executor in ("process", "thread"):
+        for workers in args.workers:
+            rate, snap = bench_logins(workers, executor, args.algorithm, cost, args.clients, args.logins)
+            print(f"{executor:>8} {workers:>7} {rate:>10,.1f} {snap['p50_ms']:>9.1f} "
+                  f"{snap['p99_ms']:>9.1f} {snap['max_ms']:>9.1f}")
+
+    admitted, rejected, worst = check_shedding(args.algorithm, cost, workers=2, max_queue=8, burst=200)
+    shed_ok = admitted <= 10 and worst < 0.005
+    print("-" * 72)
+    print(f"{'✅' if shed_ok else '❌'} Overload: {admitted} admitted, {rejected} rejected "
+          f"(slowest rejection {worst * 1000:.3f} ms)")
+    print("=" * 72)
+    return 0 if shed_ok else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Payment saga latency benchmark
+Compares the dependency-graph saga with the same steps run one after another
+under a downstream fault profile; payment latency should track the critical path
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from fault_injection import FaultInjector
+from ledger import Ledger
+from metrics import percentile
+from payments import PAYMENT_SAGA, PaymentFlow
+from saga import COMPLETED, SagaDefinition, SagaLog, SagaOrchestrator, Step
+
+PROFILES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fault_profiles.json')
+
+
+def sequential(definition):
+    """The same steps chained in topological order: what a non-concurrent orchestrator would do"""
+    steps, previous = [], ()
+    for name in definition.order:
+        step = definition.by_name[name]
+        steps.append(Step(step.name, step.action, step.compensate, after=previous, timeout=step.timeout,
+                          retries=step.retries, pivot=step.pivot))
+        previous = (name,)
+    return SagaDefinition(definition.name, steps)
+
+
+def run_mode(args, chained, log_path):
+    ledger = Ledger(seed=False)
+    for account_id in range(1, args.accounts + 1):
+        ledger.open_account({"id": account_id, "balance": 1_000_000})
+    downstream = FaultInjector(PROFILES_FILE, profile=args.profile, seed=1)
+    definition = PaymentFlow(ledger, downstream=downstream).definition()
+    orchestrator = SagaOrchestrator(SagaLog(log_path), workers=args.concurrency)
+    orchestrator.register(sequential(definition) if chained else definition)
+    orchestrator.start()
+
+    latencies, failures = [], [0]
+    lock = threading.Lock()
+
+    def client(index):
+        own, failed = [], 0
+        for i in range(args.payments // args.concurrency):
+            payment = {"account_id": (index * 7919 + i) % args.accounts + 1, "amount": -12.5}
+            started = time.perf_counter()
+            outcome = orchestrator.run(PAYMENT_SAGA, payment, timeout=60)
+            own.append(time.perf_counter() - started)
+            failed += outcome["status"] != COMPLETED
+        with lock:
+            latencies.extend(own)
+            failures[0] += failed
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    saga = orchestrator.stats()["sagas"][PAYMENT_SAGA]
+    orchestrator.stop()
+    latencies.sort()
+    return {
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "rate": len(latencies) / elapsed,
+        "failed": failures[0],
+        "critical_path_ms": saga["critical_path_ms"],
+        "sum_of_steps_ms": saga["sum_of_steps_ms"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Payment saga critical-path benchmark")
+    parser.add_argument("--profile", default="slow-downstream", help="Fault profile for the downstream stubs")
+    parser.add_argument("--payments", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=40)
+    parser.add_argument("--accounts", type=int, default=1000)
+    args = parser.parse_args()
+
+    print("💸 Payment Saga Latency Benchmark")
+    print("=" * 84)
+    print(f"{args.payments} payments, {args.concurrency} concurrent, downstream profile '{args.profile}', "
+          f"state log on disk")
+    print(f"{'mode':<12} {'p50 ms':>9} {'p99 ms':>9} {'payments/s':>11} {'critical path ms':>17} "
+          f"{'sum of steps ms':>16} {'failed':>7}")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, chained in (("sequential", True), ("saga graph", False)):
+            r = results[name] = run_mode(args, chained, os.path.join(tmp, f"{name}.jsonl"))
+            print(f"{name:<12} {r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['rate']:>11.1f} "
+                  f"{r['critical_path_ms']:>17.1f} {r['sum_of_steps_ms']:>16.1f} {r['failed']:>7}")
+
+    graph = results["saga graph"]
+    # Orchestration overhead on top of the slowest chain of steps should stay small
+    ok = graph["p50_ms"] <= graph["critical_path_ms"] * 1.25 + 5 and graph["p50_ms"] < results["sequential"]["p50_ms"]
+    print("-" * 84)
+    print(f"{'✅' if ok else '❌'} Saga p50 {graph['p50_ms']:.1f} ms vs critical path {graph['critical_path_ms']:.1f} ms "
+          f"(sequential p50 {results['sequential']['p50_ms']:.1f} ms)")
+    print("=" * 84)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    exit(main())
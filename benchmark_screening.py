@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Sanctions screening benchmark
+Builds the watchlist index over synthetic entries (500k by default), reports
+build time and memory, then screening latency per name and batch throughput
+"""
+
+import argparse
+import random
+import string
+import time
+
+from metrics import percentile
+from screening import Screener, synthetic_entries
+
+
+def typo(rng, name):
+    i = rng.randrange(len(name))
+    return name[:i] + rng.choice(string.ascii_lowercase) + name[i + 1:]
+
+
+def query_sets(entries, count, seed=5):
+    """Listed names, listed names with one typo, unlisted names and listed names inside free text"""
+    rng = random.Random(seed)
+    listed = [entries[rng.randrange(len(entries))]["name"] for _ in range(count)]
+    unlisted = [e["name"] for e in synthetic_entries(count, seed=seed + 1000)]
+    return {
+        "exact": listed,
+        "typo": [typo(rng, name) for name in listed],
+        "unlisted": unlisted,
+        "free text": [f"Invoice 4471 payment to {name} via correspondent" for name in listed],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sanctions screening benchmark")
+    parser.add_argument("--entries", type=int, default=500_000)
+    parser.add_argument("--queries", type=int, default=2000, help="Names per query set")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--target-ms", type=float, default=1.0, help="p50 budget per name")
+    args = parser.parse_args()
+
+    print("🛡️  Sanctions Screening Benchmark")
+    print("=" * 72)
+    entries = synthetic_entries(args.entries)
+    screener = Screener(args.threshold)
+    build = screener.load(entries, [f"synthetic:{args.entries}"], measure_memory=True)
+    print(f"Index: {build['entries']} entries, {build['names']} names, {build['vocabulary']} tokens, "
+          f"{build['automaton_states']} automaton states, {build['deletion_keys']} deletion keys")
+    print(f"Build: {build['seconds']:.1f} s under tracemalloc, {build['memory_mb']:.0f} MB")
+    print(f"{'query set':<12} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'matched':>8}")
+
+    worst_p50 = 0.0
+    index = screener.index
+    for label, names in query_sets(entries, args.queries).items():
+        latencies, matched = [], 0
+        for name in names:
+            started = time.perf_counter()
+            matched += bool(index.screen(name))
+            latencies.append(time.perf_counter() - started)
+        latencies.sort()
+        p50 = percentile(latencies, 50) * 1000
+        worst_p50 = max(worst_p50, p50)
+        print(f"{label:<12} {p50:>8.3f} {percentile(latencies, 99) * 1000:>8.3f} {latencies[-1] * 1000:>8.2f} "
+              f"{matched / len(names):>8.1%}")
+
+    names = [name for group in query_sets(entries, args.queries, seed=11).values() for name in group]
+    started = time.perf_counter()
+    screener.screen_batch(names)
+    elapsed = time.perf_counter() - started
+    print(f"Batch: {len(names)} names in {elapsed:.2f} s ({len(names) / elapsed:,.0f} names/s)")
+
+    ok = worst_p50 < args.target_ms
+    print("-" * 72)
+    print(f"{'✅' if ok else '❌'} Worst p50 {worst_p50:.3f} ms per name at {args.entries} entries "
+          f"(target < {args.target_ms} ms)")
+    print("=" * 72)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    exit(main())
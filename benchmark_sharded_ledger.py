@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Transfer throughput benchmark for the sharded ledger
+Runs random transfers against the in-process ledger and 1..N shard workers,
+reporting transfers/sec, cross-shard share, batch latency and balance checks
+"""
+
+import argparse
+import os
+import random
+import threading
+import time
+
+from ledger import Ledger, LedgerError
+from metrics import percentile
+from sharded_ledger import ShardedLedger
+
+OPENING_BALANCE = 1_000_000
+
+
+def open_accounts(ledger, count):
+    for account_id in range(1, count + 1):
+        ledger.open_account({"id": account_id, "balance": OPENING_BALANCE})
+
+
+def total_balance(ledger):
+    return round(sum(account["balance"] for account in ledger.accounts()), 2)
+
+
+def run_clients(submit, clients, batches, batch_size, accounts, seed):
+    latencies = []
+    rejected = [0]
+    lock = threading.Lock()
+
+    def client(index):
+        rng = random.Random(seed + index)
+        own = []
+        failed = 0
+        for _ in range(batches):
+            items = []
+            for _ in range(batch_size):
+                source = rng.randint(1, accounts)
+                target = rng.randint(1, accounts - 1)
+                items.append((source, target + (target >= source), rng.randint(1, 5000) / 100, "bench"))
+            started = time.perf_counter()
+            failed += submit(items)
+            own.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(own)
+            rejected[0] += failed
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, latencies, rejected[0]
+
+
+def bench_in_process(args):
+    ledger = Ledger(seed=False)
+    open_accounts(ledger, args.accounts)
+
+    def submit(items):
+        failed = 0
+        for source, target, amount, description in items:
+            try:
+                ledger.transfer(source, target, amount, description)
+            except LedgerError:
+                failed += 1
+        return failed
+
+    before = total_balance(ledger)
+    elapsed, latencies, rejected = run_clients(submit, args.clients, args.batches, args.batch_size, args.accounts, 1)
+    return elapsed, latencies, rejected, 0.0, before == total_balance(ledger)
+
+
+def bench_sharded(args, shards):
+    ledger = ShardedLedger(shards=shards, seed=False).start()
+    try:
+        open_accounts(ledger, args.accounts)
+
+        def submit(items):
+            return sum(1 for result in ledger.transfer_batch(items) if isinstance(result, LedgerError))
+
+        before = total_balance(ledger)
+        elapsed, latencies, rejected = run_clients(submit, args.clients, args.batches, args.batch_size,
+                                                   args.accounts, 1)
+        counters = ledger.stats()["counters"]
+        committed = counters["local_transfers"] + counters["cross_shard_transfers"]
+        cross = counters["cross_shard_transfers"] / committed if committed else 0.0
+        return elapsed, latencies, rejected, cross, before == total_balance(ledger)
+    finally:
+        ledger.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded ledger transfer throughput benchmark")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--accounts", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--batches", type=int, default=50, help="Batches per client")
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+
+    transfers = args.clients * args.batches * args.batch_size
+    print("📒 Sharded Ledger Transfer Benchmark")
+    print("=" * 78)
+    print(f"{args.accounts:,} accounts, {args.clients} clients x {args.batches} batches x {args.batch_size} transfers "
+          f"= {transfers:,} transfers; {os.cpu_count()} CPUs")
+    print("Shard workers only run in parallel with spare cores; on fewer cores than shards the")
+    print("extra workers add IPC cost without adding throughput")
+    print("-" * 78)
+    print(f"{'ledger':<14} {'transfers/s':>12} {'cross-shard':>12} {'batch p50 ms':>13} {'batch p99 ms':>13} "
+          f"{'rejected':>9} {'balanced':>9}")
+
+    ok = True
+    rows = [("in-process", lambda: bench_in_process(args))]
+    rows += [(f"{shards} shards", lambda shards=shards: bench_sharded(args, shards)) for shards in args.shards]
+    for name, run in rows:
+        elapsed, latencies, rejected, cross, balanced = run()
+        latencies.sort()
+        ok = ok and balanced
+        print(f"{name:<14} {transfers / elapsed:>12,.0f} {cross:>11.1%} {percentile(latencies, 50) * 1000:>13.2f} "
+              f"{percentile(latencies, 99) * 1000:>13.2f} {rejected:>9,} {'✅' if balanced else '❌':>8}")
+    print("=" * 78)
+    print(f"{'✅' if ok else '❌'} Total balance conserved in every run")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    exit(main())
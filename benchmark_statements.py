@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Statement job queue benchmark
+Fills a ledger with thousands of postings per account, then has client threads
+request statements (repeats, mixed priorities and formats) through the job
+queue; reports what a request thread pays to enqueue against generating the
+statement inline, queue wait per priority, job throughput and dedup/cache hits
+"""
+
+import argparse
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+from ledger import Ledger
+from metrics import percentile
+from statements import PRIORITIES, StatementQueue, build_statement, render_csv
+
+
+def fill_ledger(accounts, postings, seed=3):
+    ledger = Ledger(seed=False)
+    for account_id in range(1, accounts + 1):
+        ledger.open_account({"id": account_id, "account_number": f"QB-{account_id:06d}", "balance": 100000})
+    rng = random.Random(seed)
+    categories = ("food", "shopping", "transport", "income", "utilities")
+    for _ in range(postings):
+        ledger.post(rng.randint(1, accounts), rng.randint(-15000, 20000) / 100, "Card purchase", rng.choice(categories))
+    return ledger
+
+
+def ms(samples, pct):
+    return percentile(sorted(samples), pct) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Statement job queue benchmark")
+    parser.add_argument("--accounts", type=int, default=50)
+    parser.add_argument("--postings", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--periods", type=int, default=6, help="Distinct months requested per account")
+    args = parser.parse_args()
+
+    print("🧾 Statement Job Queue Benchmark")
+    print("=" * 72)
+    started = time.perf_counter()
+    ledger = fill_ledger(args.accounts, args.postings)
+    print(f"Ledger: {args.accounts} accounts, {args.postings:,} postings "
+          f"(~{args.postings // args.accounts:,} per statement) in {time.perf_counter() - started:.1f} s")
+    # The current month holds every posting; earlier months are empty but still full jobs
+    now = datetime.now(timezone.utc)
+    periods = [f"{now.year - (now.month - 1 - i < 0):04d}-{(now.month - 1 - i) % 12 + 1:02d}"
+               for i in range(args.periods)]
+
+    inline = []
+    for account_id in range(1, 6):
+        t = time.perf_counter()
+        render_csv(build_statement(ledger, account_id, periods[0]))
+        inline.append(time.perf_counter() - t)
+    print(f"Inline generation (what a request thread would pay): p50 {ms(inline, 50):.1f} ms")
+
+    queue = StatementQueue(ledger, workers=args.workers, max_queue=args.requests, open_period_ttl=3600).start()
+    rng = random.Random(7)
+    # Popular accounts and the latest month are asked for most often, so repeats are common
+    plan = [(min(int(rng.paretovariate(1.2)), args.accounts), periods[min(int(rng.expovariate(1.5)), args.periods - 1)],
+             rng.choices(("csv", "pdf"), (4, 1))[0], rng.choices(list(PRIORITIES), (1, 7, 2))[0])
+            for _ in range(args.requests)]
+    submit_latency, jobs = [], []
+    lock = threading.Lock()
+
+    def client(items):
+        for account_id, period, fmt, priority in items:
+            t = time.perf_counter()
+            job = queue.submit(account_id, period, fmt, priority)
+            elapsed = time.perf_counter() - t
+            with lock:
+                submit_latency.append(elapsed)
+                jobs.append((priority, job))
+            time.sleep(0.001)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(plan[i::args.clients],)) for i in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for _, job in jobs:
+        job.done.wait(600)
+    elapsed = time.perf_counter() - started
+    stats = queue.stats()
+    queue.stop()
+
+    counters = stats["counters"]
+    print(f"Requests: {args.requests:,} from {args.clients} clients on {args.workers} workers in {elapsed:.1f} s "
+          f"({args.requests / elapsed:,.0f} requests/s, {counters['completed'] / elapsed:,.1f} jobs/s)")
+    print(f"Generated {counters['completed']:,} documents; {counters['deduplicated']:,} requests joined a queued job, "
+          f"{counters['cache_hits']:,} were served from cache")
+    print(f"Enqueue: p50 {ms(submit_latency, 50):.3f} ms, p99 {ms(submit_latency, 99):.3f} ms; "
+          f"job run p50 {stats['run_time']['p50_ms']:.1f} ms")
+    print(f"{'priority':<10} {'jobs':>6} {'wait p50 ms':>12} {'wait p99 ms':>12}")
+    waits = {}
+    for name in PRIORITIES:
+        samples = list({job.id: job.queue_seconds for priority, job in jobs
+                        if priority == name and not job.cached and job.queue_seconds is not None}.values())
+        waits[name] = ms(samples, 50)
+        print(f"{name:<10} {len(samples):>6} {waits[name]:>12.1f} {ms(samples, 99):>12.1f}")
+
+    submit_p99 = ms(submit_latency, 99)
+    # Worker threads share the GIL with request threads, so enqueueing is not free, but it must stay
+    # well below what generating the statement on the request thread would cost
+    ok = counters["failed"] == 0 and submit_p99 < ms(inline, 50) and waits["high"] <= waits["low"]
+    print("-" * 72)
+    print(f"{'✅' if ok else '❌'} Enqueue p99 {submit_p99:.3f} ms vs {ms(inline, 50):.1f} ms inline; "
+          f"high-priority wait p50 {waits['high']:.1f} ms vs low {waits['low']:.1f} ms")
+    print("=" * 72)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    exit(main())
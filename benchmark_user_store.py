@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+User store benchmark for the Quantum Banking mock backend
+Measures concurrent registration, bulk seeding and lookup throughput, checks
+email uniqueness and gap-free IDs under racing threads and reports memory
+per user
+"""
+
+import argparse
+import random
+import threading
+import time
+import tracemalloc
+
+from user_store import DuplicateEmailError, UserStore
+
+
+def run_threads(target, threads):
+    workers = [threading.Thread(target=target, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return time.perf_counter() - start
+
+
+def bench_registration(threads, per_thread):
+    """Every thread registers the same email set with varied casing; each email must win exactly once"""
+    store = UserStore()
+    wins = [0] * threads
+    duplicates = [0] * threads
+
+    def register(i):
+        for n in range(per_thread):
+            email = f"User{n}@Example.com" if i % 2 else f"user{n}@example.com"
+            try:
+                store.register(email, "Load", "Tester")
+                wins[i] += 1
+            except DuplicateEmailError:
+                duplicates[i] += 1
+
+    elapsed = run_threads(register, threads)
+    ids = [store.get(i).id for i in range(1, len(store) + 1)]
+    ok = sum(wins) == per_thread and ids == list(range(1, per_thread + 1))
+    return threads * per_thread / elapsed, sum(wins), sum(duplicates), ok
+
+
+def bench_seed(count):
+    store = UserStore()
+    tracemalloc.start()
+    start = time.perf_counter()
+    added = store.bulk_seed(count)
+    elapsed = time.perf_counter() - start
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return store, added, elapsed, traced
+
+
+def bench_lookups(store, lookups):
+    users = len(store)
+    for user_id in range(1, min(users, 10000) + 1):
+        store.add_credential(user_id, f"cred-{user_id}")
+    ids = [random.randint(1, users) for _ in range(lookups)]
+    emails = [store.get(i).email.upper() for i in ids]
+    credentials = [f"cred-{random.randint(1, min(users, 10000))}" for _ in range(lookups)]
+
+    rates = {}
+    for name, fn, keys in (("id", store.get, ids),
+                           ("email", store.get_by_email, emails),
+                           ("credential", store.get_by_credential, credentials)):
+        start = time.perf_counter()
+        for key in keys:
+            fn(key)
+        rates[name] = lookups / (time.perf_counter() - start)
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="User store benchmark")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--per-thread", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1000000, help="users to bulk-seed")
+    parser.add_argument("--lookups", type=int, default=200000)
+    args = parser.parse_args()
+
+    print("👤 User Store Benchmark")
+    print("=" * 60)
+    print(f"{'threads':>7} {'register/s':>12} {'created':>10} {'duplicates':>11}")
+    all_ok = True
+    for threads in args.threads:
+        rate, created, duplicates, ok = bench_registration(threads, args.per_thread)
+        all_ok &= ok
+        print(f"{threads:>7} {rate:>12,.0f} {created:>10,} {duplicates:>11,} {'✅' if ok else '❌'}")
+
+    store, added, elapsed, traced = bench_seed(args.seed)
+    report = store.memory_report()
+    print("-" * 60)
+    print(f"🌱 Seeded {added:,} users in {elapsed:.2f}s ({added / elapsed:,.0f} users/s)")
+    print(f"💾 tracemalloc: {traced / added:,.1f} bytes/user ({traced / 1e6:,.1f} MB total); "
+          f"estimated: {report['bytes_per_user']:,.1f} bytes/user")
+
+    rates = bench_lookups(store, args.lookups)
+    print("🔎 Lookups/s: " + ", ".join(f"{name} {rate:,.0f}" for name, rate in rates.items()))
+    print("=" * 60)
+    return 0 if all_ok and added == args.seed else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Verification stage benchmark for the Quantum Banking mock backend
+Reports verifications/sec for each batch size and worker count with many
+concurrent submitting threads (one per simulated request)
+"""
+
+import argparse
+import threading
+import time
+
+from crypto_pipeline import CryptoPipeline
+from verification_stage import VerificationStage
+
+
+def run(provider, executor, workers, batch_size, max_latency, clients, per_client):
+    pipeline = CryptoPipeline(provider, workers=workers, executor=executor)
+    stage = VerificationStage(pipeline, max_batch_size=batch_size, max_latency=max_latency).start()
+    public_key, secret_key = pipeline.generate_signing_keypair()
+    messages = [f"txn-{i}".encode() * 8 for i in range(per_client)]
+    signatures = pipeline.sign_batch(secret_key, messages)
+    items = [(public_key, m, s) for m, s in zip(messages, signatures)]
+    failures = []
+
+    def client():
+        for item in items:
+            if not stage.verify(*item, timeout=30):
+                failures.append(item)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    stats = stage.stats()
+    stage.stop()
+    pipeline.shutdown()
+    assert not failures, f"{len(failures)} valid signatures rejected"
+    return clients * per_client / elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch signature verification benchmark")
+    parser.add_argument("--provider", default=None)
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--max-latency-ms", type=float, default=2.0)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--per-client", type=int, default=100)
+    args = parser.parse_args()
+
+    print("🛡️  Batch Signature Verification Benchmark")
+    print("=" * 70)
+    print(f"{'workers':>7} {'batch':>6} {'verify/s':>12} {'avg batch':>10} {'wait p50':>10} {'wait p99':>10}")
+    for workers in args.workers:
+        for batch_size in args.batch_sizes:
+            rate, stats = run(args.provider, args.executor, workers, batch_size,
+                              args.max_latency_ms / 1000, args.clients, args.per_client)
+            wait = stats["queue_wait"]
+            print(f"{workers:>7} {batch_size:>6} {rate:>12,.0f} {stats['avg_batch_size']:>10.1f} "
+                  f"{wait['p50_ms']:>8.3f}ms {wait['p99_ms']:>8.3f}ms")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+WebAuthn challenge store benchmark for the Quantum Banking mock backend
+Measures issuance and verification throughput, checks exactly-once
+consumption under racing threads and bounded memory under a flood
+"""
+
+import argparse
+import threading
+import time
+
+from webauthn_challenges import ChallengeStore
+
+
+def run_threads(target, threads):
+    workers = [threading.Thread(target=target, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return time.perf_counter() - start
+
+
+def bench_throughput(threads, per_thread):
+    store = ChallengeStore(max_outstanding=threads * per_thread * 2)
+    issued = [[] for _ in range(threads)]
+
+    def issue(i):
+        bucket = issued[i]
+        for _ in range(per_thread):
+            bucket.append(store.issue()[0])
+
+    def consume(i):
+        for challenge in issued[i]:
+            store.consume(challenge, "login")
+
+    total = threads * per_thread
+    issue_rate = total / run_threads(issue, threads)
+    verify_rate = total / run_threads(consume, threads)
+    return issue_rate, verify_rate, store.stats()
+
+
+def check_exactly_once(threads, challenges):
+    """Every thread tries to consume every challenge; each must succeed exactly once"""
+    store = ChallengeStore(max_outstanding=challenges * 2)
+    pool = [store.issue()[0] for _ in range(challenges)]
+    wins = [0] * threads
+
+    def race(i):
+        for challenge in pool:
+            if store.consume(challenge) is not None:
+                wins[i] += 1
+
+    run_threads(race, threads)
+    return sum(wins)
+
+
+def check_flood(max_outstanding, flood):
+    store = ChallengeStore(max_outstanding=max_outstanding)
+    peak = 0
+    for i in range(flood):
+        store.issue()
+        if i % 1000 == 0:
+            peak = max(peak, store.outstanding())
+    return max(peak, store.outstanding()), store.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WebAuthn challenge store benchmark")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--per-thread", type=int, default=20000)
+    parser.add_argument("--flood", type=int, default=500000)
+    parser.add_argument("--max-outstanding", type=int, default=100000)
+    args = parser.parse_args()
+
+    print("🔑 WebAuthn Challenge Store Benchmark")
+    print("=" * 60)
+    print(f"{'threads':>7} {'issue/s':>12} {'verify/s':>12} {'outstanding':>12}")
+    for threads in args.threads:
+        issue_rate, verify_rate, stats = bench_throughput(threads, args.per_thread)
+        print(f"{threads:>7} {issue_rate:>12,.0f} {verify_rate:>12,.0f} {stats['outstanding']:>12,}")
+
+    wins = check_exactly_once(8, 5000)
+    print("-" * 60)
+    print(f"{'✅' if wins == 5000 else '❌'} Exactly-once: {wins:,} successful consumes for 5,000 challenges across 8 threads")
+
+    peak, stats = check_flood(args.max_outstanding, args.flood)
+    bounded = peak <= stats["max_outstanding"]
+    print(f"{'✅' if bounded else '❌'} Flood: {args.flood:,} unanswered challenges, peak outstanding {peak:,} "
+          f"(cap {stats['max_outstanding']:,}, evicted {stats['evicted']:,})")
+    print("=" * 60)
+    return 0 if wins == 5000 and bounded else 1
+
+
+if __name__ == "__main__":
+    exit(main())
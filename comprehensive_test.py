@@ -4,32 +4,41 @@
 Tests all critical components and endpoints for deployment readiness
 """
 
-import requests
+import argparse
 import json
+import threading
 import time
 from urllib.parse import urljoin
 
+from smoke_runner import add_arguments, pooled_session, print_timings, report, run_checks
+
 class QuantumBankingTester:
-    def __init__(self):
+    def __init__(self, parallel=False, workers=8):
         self.frontend_url = "http://localhost:3001"
         self.backend_url = "http://localhost:8080"
         self.test_results = []
+        self.parallel = parallel
+        self.workers = workers
+        # Keep-alive connections shared by all tests instead of a new handshake per request
+        self.session = pooled_session(workers)
+        self._results_lock = threading.Lock()
         
     def log_test(self, test_name, success, message="", details=None):
         """Log test results"""
         status = "✅ PASS" if success else "❌ FAIL"
-        self.test_results.append({
-            "test": test_name,
-            "success": success,
-            "message": message,
-            "details": details
-        })
-        print(f"{status} {test_name}: {message}")
+        with self._results_lock:
+            self.test_results.append({
+                "test": test_name,
+                "success": success,
+                "message": message,
+                "details": details
+            })
+        report(f"{status} {test_name}: {message}")
         
     def test_frontend_availability(self):
         """Test if frontend is accessible"""
         try:
-            response = requests.get(self.frontend_url, timeout=10)
+            response = self.session.get(self.frontend_url, timeout=10)
             success = response.status_code == 200
             self.log_test(
                 "Frontend Availability", 
@@ -44,7 +53,7 @@ def test_frontend_availability(self):
     def test_backend_health(self):
         """Test backend health endpoint"""
         try:
-            response = requests.get(f"{self.backend_url}/api/v1/health", timeout=5)
+            response = self.session.get(f"{self.backend_url}/api/v1/health", timeout=5)
             success = response.status_code == 200
             data = response.json() if success else None
             self.log_test(
@@ -59,9 +68,11 @@ def test_backend_health(self):
     
     def test_auth_endpoints(self):
         """Test authentication endpoints"""
+        # Emails are unique per backend, so use a fresh one on every run
+        email = f"test+{int(time.time() * 1000)}@example.com"
         endpoints = [
-            ("/api/v1/auth/register/", "POST", {"firstName": "Test", "lastName": "User", "email": "test@example.com", "password": "Test123!"}),
-            ("/api/v1/auth/oauth2/token/", "POST", {"email": "test@example.com", "password": "Test123!"}),
+            ("/api/v1/auth/register/", "POST", {"firstName": "Test", "lastName": "User", "email": email, "password": "Test123!"}),
+            ("/api/v1/auth/oauth2/token/", "POST", {"email": email, "password": "Test123!"}),
             ("/api/v1/auth/me/", "GET", None),
             ("/api/v1/auth/refresh/", "POST", {}),
         ]
@@ -71,9 +82,9 @@ def test_auth_endpoints(self):
             try:
                 url = f"{self.backend_url}{endpoint}"
                 if method == "GET":
-                    response = requests.get(url, timeout=5)
+                    response = self.session.get(url, timeout=5)
                 else:
-                    response = requests.post(url, json=data, timeout=5)
+                    response = self.session.post(url, json=data, timeout=5)
                 
                 success = response.status_code in [200, 201]
                 self.log_test(
@@ -102,7 +113,7 @@ def test_api_endpoints(self):
         all_passed = True
         for endpoint in endpoints:
             try:
-                response = requests.get(f"{self.backend_url}{endpoint}", timeout=5)
+                response = self.session.get(f"{self.backend_url}{endpoint}", timeout=5)
                 success = response.status_code == 200
                 self.log_test(
                     f"API Endpoint {endpoint}",
@@ -120,7 +131,7 @@ def test_api_endpoints(self):
     def test_cors_headers(self):
         """Test CORS configuration"""
         try:
-            response = requests.options(f"{self.backend_url}/api/v1/health")
+            response = self.session.options(f"{self.backend_url}/api/v1/health")
             cors_headers = {
                 'Access-Control-Allow-Origin': response.headers.get('Access-Control-Allow-Origin'),
                 'Access-Control-Allow-Methods': response.headers.get('Access-Control-Allow-Methods'),
@@ -142,7 +153,7 @@ def test_cors_headers(self):
     def test_error_handling(self):
         """Test error handling for non-existent endpoints"""
         try:
-            response = requests.get(f"{self.backend_url}/api/v1/nonexistent", timeout=5)
+            response = self.session.get(f"{self.backend_url}/api/v1/nonexistent", timeout=5)
             success = response.status_code == 404
             self.log_test(
                 "Error Handling",
@@ -158,7 +169,7 @@ def test_data_consistency(self):
         """Test data consistency across endpoints"""
         try:
             # Test accounts endpoint
-            accounts_response = requests.get(f"{self.backend_url}/api/v1/accounts/", timeout=5)
+            accounts_response = self.session.get(f"{self.backend_url}/api/v1/accounts/", timeout=5)
             if accounts_response.status_code != 200:
                 self.log_test("Data Consistency", False, "Accounts endpoint failed")
                 return False
@@ -167,7 +178,7 @@ def test_data_consistency(self):
             has_accounts = len(accounts_data) > 0
             
             # Test transactions endpoint
-            transactions_response = requests.get(f"{self.backend_url}/api/v1/accounts/transactions/?page=1&per_page=10", timeout=5)
+            transactions_response = self.session.get(f"{self.backend_url}/api/v1/accounts/transactions/?page=1&per_page=10", timeout=5)
             if transactions_response.status_code != 200:
                 self.log_test("Data Consistency", False, "Transactions endpoint failed")
                 return False
@@ -190,7 +201,7 @@ def test_performance(self):
         """Test basic performance metrics"""
         try:
             start_time = time.time()
-            response = requests.get(f"{self.backend_url}/api/v1/health", timeout=5)
+            response = self.session.get(f"{self.backend_url}/api/v1/health", timeout=5)
             response_time = (time.time() - start_time) * 1000  # Convert to milliseconds
             
             success = response.status_code == 200 and response_time < 1000  # Less than 1 second
@@ -220,9 +231,9 @@ def run_all_tests(self):
             self.test_performance,
         ]
         
-        for test in tests:
-            test()
-            time.sleep(0.5)  # Brief pause between tests
+        # Each test is independent (auth keeps its register -> login order internally)
+        timings, wall = run_checks(tests, self.parallel, self.workers)
+        print_timings(timings, wall)
         
         # Generate summary
         total_tests = len(self.test_results)
@@ -251,6 +262,9 @@ def run_all_tests(self):
         return failed_tests == 0
 
 if __name__ == "__main__":
-    tester = QuantumBankingTester()
+    parser = argparse.ArgumentParser(description="Comprehensive Quantum Banking smoke test")
+    add_arguments(parser)
+    args = parser.parse_args()
+    tester = QuantumBankingTester(parallel=args.parallel, workers=args.workers)
     success = tester.run_all_tests()
     exit(0 if success else 1)
\ No newline at end of file
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Batch signing/verification pipeline for the Quantum Banking mock backend
+Fans batches out to a worker pool and records measured latency and throughput
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from crypto_provider import get_signature_provider, get_kem_provider, default_provider_name
+from metrics import MetricsRegistry
+
+_worker_providers = {}
+
+
+def _provider(name):
+    provider = _worker_providers.get(name)
+    if provider is None:
+        provider = _worker_providers[name] = get_signature_provider(name)
+    return provider
+
+
+def _sign_chunk(provider_name, secret_key, messages):
+    provider = _provider(provider_name)
+    signatures, durations = [], []
+    clock = time.perf_counter
+    for message in messages:
+        start = clock()
+        signatures.append(provider.sign(secret_key, message))
+        durations.append(clock() - start)
+    return signatures, durations
+
+
+def _verify_chunk(provider_name, items):
+    provider = _provider(provider_name)
+    results, durations = [], []
+    clock = time.perf_counter
+    for public_key, message, signature in items:
+        start = clock()
+        try:
+            ok = bool(provider.verify(public_key, message, signature))
+        except Exception:
+            ok = False
+        results.append(ok)
+        durations.append(clock() - start)
+    return results, durations
+
+
+def canonical_bytes(payload):
+    """Deterministic encoding of a JSON-able payload for signing"""
+    return json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+
+
+def _chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class CryptoPipeline:
+    """Signing, verification and KEM operations with live metrics.
+
+    Single operations run inline on the caller's thread; batches are split
+    into chunks of at most chunk_size and spread across the worker pool.
+    executor="process" sidesteps the GIL for pure-Python providers.
+    """
+
+    def __init__(self, provider_name=None, workers=4, chunk_size=64, executor="thread"):
+        self.provider_name = provider_name or default_provider_name()
+        self.signer = get_signature_provider(self.provider_name)
+        self.kem = get_kem_provider(self.provider_name)
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.executor_kind = executor
+        self.metrics = MetricsRegistry()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._throughput_lock = threading.Lock()
+        self._throughput = {}
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    cls = ProcessPoolExecutor if self.executor_kind == "process" else ThreadPoolExecutor
+                    self._pool = cls(max_workers=self.workers)
+        return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _timed(self, op, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        self.metrics.record(op, time.perf_counter() - start)
+        return result
+
+    def _record_batch(self, op, count, elapsed, durations):
+        self.metrics.get(op).record_many(durations)
+        self.metrics.record(f"{op}_batch", elapsed)
+        with self._throughput_lock:
+            ops, seconds = self._throughput.get(op, (0, 0.0))
+            self._throughput[op] = (ops + count, seconds + elapsed)
+
+    # ------------------------------------------------------------------
+    # Single operations
+    # ------------------------------------------------------------------
+    def generate_signing_keypair(self):
+        return self.signer.generate_keypair()
+
+    def sign(self, secret_key, message):
+        return self._timed("sign", self.signer.sign, secret_key, message)
+
+    def verify(self, public_key, message, signature):
+        return self._timed("verify", self.signer.verify, public_key, message, signature)
+
+    def encapsulate(self, public_key):
+        return self._timed("encapsulate", self.kem.encapsulate, public_key)
+
+    def decapsulate(self, secret_key, ciphertext):
+        return self._timed("decapsulate", self.kem.decapsulate, secret_key, ciphertext)
+
+    # ------------------------------------------------------------------
+    # Batches
+    # ------------------------------------------------------------------
+    def sign_batch(self, secret_key, messages):
+        """Sign messages in parallel; signatures are returned in input order"""
+        start = time.perf_counter()
+        futures = [self.pool.submit(_sign_chunk, self.provider_name, secret_key, chunk)
+                   for chunk in _chunks(list(messages), self.chunk_size)]
+        signatures, durations = [], []
+        for future in futures:
+            sigs, times = future.result()
+            signatures.extend(sigs)
+            durations.extend(times)
+        self._record_batch("sign", len(signatures), time.perf_counter() - start, durations)
+        return signatures
+
+    def verify_batch(self, items):
+        """Verify (public_key, message, signature) triples; returns a bool per item"""
+        start = time.perf_counter()
+        futures = [self.pool.submit(_verify_chunk, self.provider_name, chunk)
+                   for chunk in _chunks(list(items), self.chunk_size)]
+        results, durations = [], []
+        for future in futures:
+            ok, times = future.result()
+            results.extend(ok)
+            durations.extend(times)
+        self._record_batch("verify", len(results), time.perf_counter() - start, durations)
+        return results
+
+    def verify_async(self, items):
+        """Submit one chunk of (public_key, message, signature) triples to the pool.
+
+        The returned future resolves to (results, durations); metrics are
+        recorded when it completes.
+        """
+        items = list(items)
+        start = time.perf_counter()
+        future = self.pool.submit(_verify_chunk, self.provider_name, items)
+
+        def _done(f):
+            if f.cancelled() or f.exception() is not None:
+                return
+            results, durations = f.result()
+            self._record_batch("verify", len(results), time.perf_counter() - start, durations)
+
+        future.add_done_callback(_done)
+        return future
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+    def probe(self, iterations=32):
+        """Run a small measured workload so status has real numbers before any traffic"""
+        public_key, secret_key = self.generate_signing_keypair()
+        messages = [f"probe-{i}".encode() for i in range(iterations)]
+        signatures = self.sign_batch(secret_key, messages)
+        self.verify_batch([(public_key, m, s) for m, s in zip(messages, signatures)])
+        kem_public, kem_secret = self.kem.generate_keypair()
+        for _ in range(iterations):
+            ciphertext, _ = self.encapsulate(kem_public)
+            self.decapsulate(kem_secret, ciphertext)
+
+    def status(self):
+        operations = self.metrics.snapshot()
+        with self._throughput_lock:
+            for op, (ops, seconds) in self._throughput.items():
+                if op in operations:
+                    operations[op]["batch_ops_per_sec"] = ops / seconds if seconds else 0.0
+        return {
+            "provider": self.provider_name,
+            "algorithms": {
+                "key_encapsulation": self.kem.algorithm,
+                "digital_signature": self.signer.algorithm,
+            },
+            "workers": self.workers,
+            "executor": self.executor_kind,
+            "operations": operations,
+        }
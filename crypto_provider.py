@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Pluggable signature and KEM providers for the Quantum Banking mock backend
+Ships an offline stand-in (hashlib/HMAC) and uses liboqs when it is installed
+"""
+
+import hashlib
+import hmac
+import os
+
+try:
+    import oqs  # liboqs-python, optional
+except ImportError:
+    oqs = None
+
+
+class SignatureProvider:
+    """Interface for digital signature schemes"""
+
+    name = None
+    algorithm = None
+
+    def generate_keypair(self):
+        """Return (public_key, secret_key) as bytes"""
+        raise NotImplementedError
+
+    def sign(self, secret_key, message):
+        raise NotImplementedError
+
+    def verify(self, public_key, message, signature):
+        raise NotImplementedError
+
+
+class KEMProvider:
+    """Interface for key encapsulation mechanisms"""
+
+    name = None
+    algorithm = None
+
+    def generate_keypair(self):
+        """Return (public_key, secret_key) as bytes"""
+        raise NotImplementedError
+
+    def encapsulate(self, public_key):
+        """Return (ciphertext, shared_secret)"""
+        raise NotImplementedError
+
+    def decapsulate(self, secret_key, ciphertext):
+        raise NotImplementedError
+
+
+class OfflineSignatureProvider(SignatureProvider):
+    """HMAC-SHA3-256 stand-in for Dilithium-3.
+
+    NOT a real public-key scheme: the "public" key equals the secret key.
+    Signatures are padded with SHAKE-256 output to Dilithium-3's size so
+    payload and hashing costs stay in the right ballpark.
+    """
+
+    name = "offline"
+    algorithm = "Dilithium-3 (offline HMAC-SHA3-256 stand-in)"
+    key_size = 32
+    signature_size = 3293
+
+    def generate_keypair(self):
+        secret = os.urandom(self.key_size)
+        return secret, secret
+
+    def sign(self, secret_key, message):
+        tag = hmac.new(secret_key, message, hashlib.sha3_256).digest()
+        return tag + hashlib.shake_256(tag).digest(self.signature_size - len(tag))
+
+    def verify(self, public_key, message, signature):
+        if len(signature) != self.signature_size:
+            return False
+        return hmac.compare_digest(self.sign(public_key, message), signature)
+
+
+class OfflineKEMProvider(KEMProvider):
+    """HMAC-based stand-in for Kyber-768 (public key equals secret key, NOT secure)"""
+
+    name = "offline"
+    algorithm = "Kyber-768 (offline HMAC-SHA3-256 stand-in)"
+    key_size = 32
+    ciphertext_size = 1088
+
+    def generate_keypair(self):
+        secret = os.urandom(self.key_size)
+        return secret, secret
+
+    def encapsulate(self, public_key):
+        ciphertext = os.urandom(self.ciphertext_size)
+        return ciphertext, self.decapsulate(public_key, ciphertext)
+
+    def decapsulate(self, secret_key, ciphertext):
+        return hmac.new(secret_key, ciphertext, hashlib.sha3_256).digest()
+
+
+class OQSSignatureProvider(SignatureProvider):
+    name = "oqs"
+
+    def __init__(self, algorithm="Dilithium3"):
+        self.algorithm = algorithm
+
+    def generate_keypair(self):
+        with oqs.Signature(self.algorithm) as signer:
+            public_key = signer.generate_keypair()
+            return public_key, signer.export_secret_key()
+
+    def sign(self, secret_key, message):
+        with oqs.Signature(self.algorithm, secret_key) as signer:
+            return signer.sign(message)
+
+    def verify(self, public_key, message, signature):
+        with oqs.Signature(self.algorithm) as verifier:
+            return verifier.verify(message, signature, public_key)
+
+
+class OQSKEMProvider(KEMProvider):
+    name = "oqs"
+
+    def __init__(self, algorithm="Kyber768"):
+        self.algorithm = algorithm
+
+    def generate_keypair(self):
+        with oqs.KeyEncapsulation(self.algorithm) as kem:
+            public_key = kem.generate_keypair()
+            return public_key, kem.export_secret_key()
+
+    def encapsulate(self, public_key):
+        with oqs.KeyEncapsulation(self.algorithm) as kem:
+            return kem.encap_secret(public_key)
+
+    def decapsulate(self, secret_key, ciphertext):
+        with oqs.KeyEncapsulation(self.algorithm, secret_key) as kem:
+            return kem.decap_secret(ciphertext)
+
+
+_SIGNATURE_PROVIDERS = {"offline": OfflineSignatureProvider}
+_KEM_PROVIDERS = {"offline": OfflineKEMProvider}
+if oqs is not None:
+    _SIGNATURE_PROVIDERS["oqs"] = OQSSignatureProvider
+    _KEM_PROVIDERS["oqs"] = OQSKEMProvider
+
+
+def register_signature_provider(name, factory):
+    _SIGNATURE_PROVIDERS[name] = factory
+
+
+def register_kem_provider(name, factory):
+    _KEM_PROVIDERS[name] = factory
+
+
+def default_provider_name():
+    """PQC_PROVIDER if set, else liboqs when available, else the offline stand-in"""
+    return os.environ.get("PQC_PROVIDER") or ("oqs" if oqs is not None else "offline")
+
+
+def get_signature_provider(name=None):
+    name = name or default_provider_name()
+    try:
+        return _SIGNATURE_PROVIDERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown signature provider: {name}") from None
+
+
+def get_kem_provider(name=None):
+    name = name or default_provider_name()
+    try:
+        return _KEM_PROVIDERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown KEM provider: {name}") from None
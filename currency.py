@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Exact multi-currency money for the Quantum Banking mock backend
+Amounts are integers in each currency's minor unit; a versioned in-memory FX
+table precomputes an exact cross-rate matrix so portfolio totals are one
+integer dot product and a single rounding, with no per-position Decimal work
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN, localcontext
+from fractions import Fraction
+
+# ISO 4217 minor-unit exponents of the currencies accounts can be opened in
+CURRENCIES = {
+    "USD": 2, "EUR": 2, "GBP": 2, "JPY": 0, "CHF": 2, "CAD": 2, "AUD": 2, "INR": 2,
+    "CNY": 2, "SGD": 2, "HKD": 2, "SEK": 2, "KWD": 3, "BHD": 3,
+}
+MINOR_SCALE = {code: 10 ** exponent for code, exponent in CURRENCIES.items()}
+BASE_CURRENCY = "USD"
+# Units of each currency per 1 USD; illustrative figures for the mock backend, not market data
+DEFAULT_RATES = {
+    "EUR": "0.9215", "GBP": "0.7893", "JPY": "151.42", "CHF": "0.8834", "CAD": "1.3712", "AUD": "1.5236",
+    "INR": "83.412", "CNY": "7.2405", "SGD": "1.3491", "HKD": "7.8231", "SEK": "10.6120", "KWD": "0.30752",
+    "BHD": "0.37605",
+}
+# Significant digits of the cross rates shown by FxRates.describe(); conversions use the exact ratios
+DISPLAY_DIGITS = 10
+# Largest absolute amount, in whole units of any currency, that to_minor() accepts; anything bigger is a
+# typo or an attack ("1e400"), and would overflow the float amounts in JSON responses
+MAX_AMOUNT = 10 ** 15
+
+
+class CurrencyError(ValueError):
+    pass
+
+
+def minor_exponent(currency):
+    try:
+        return CURRENCIES[currency]
+    except (KeyError, TypeError):
+        raise CurrencyError(f"Unsupported currency: {currency!r}") from None
+
+
+def to_minor(amount, currency=BASE_CURRENCY):
+    """Exact minor units of an amount given as int, str, Decimal or float (by its shortest repr),
+    rounded half-even to the currency's precision; raises CurrencyError beyond MAX_AMOUNT"""
+    exponent = minor_exponent(currency)
+    if isinstance(amount, int) and not isinstance(amount, bool):
+        if abs(amount) > MAX_AMOUNT:
+            raise CurrencyError(f"Amount out of range: {amount!r}")
+        return amount * 10 ** exponent
+    if isinstance(amount, float) and abs(amount) < 1e12:
+        # Amounts with no more decimals than the currency has land within float error of an integer,
+        # which is what the Decimal path would round them to anyway
+        scaled = amount * MINOR_SCALE[currency]
+        nearest = round(scaled)
+        if abs(scaled - nearest) < 1e-6:
+            return nearest
+    try:
+        value = amount if isinstance(amount, Decimal) else Decimal(str(amount).strip())
+    except InvalidOperation:
+        raise CurrencyError(f"Not an amount: {amount!r}") from None
+    if not value.is_finite():
+        raise CurrencyError(f"Not an amount: {amount!r}")
+    if abs(value) > MAX_AMOUNT:
+        raise CurrencyError(f"Amount out of range: {amount!r}")
+    return int(value.scaleb(exponent).to_integral_value(ROUND_HALF_EVEN))
+
+
+def from_minor(minor, currency=BASE_CURRENCY):
+    """Minor units as a float for JSON responses (the nearest float to the exact amount)"""
+    minor_exponent(currency)
+    return minor / MINOR_SCALE[currency]
+
+
+def format_minor(minor, currency=BASE_CURRENCY):
+    """Minor units as an exact decimal string, e.g. 1575050 USD -> '15750.50'"""
+    exponent = minor_exponent(currency)
+    if not exponent:
+        return str(minor)
+    sign = "-" if minor < 0 else ""
+    whole, frac = divmod(abs(minor), 10 ** exponent)
+    return f"{sign}{whole}.{frac:0{exponent}d}"
+
+
+def round_half_even(numerator, denominator):
+    """numerator / denominator (denominator > 0) rounded to the nearest integer, ties to even"""
+    quotient, remainder = divmod(numerator, denominator)
+    twice = 2 * remainder
+    if twice > denominator or (twice == denominator and quotient & 1):
+        quotient += 1
+    return quotient
+
+
+def _rate(value):
+    try:
+        rate = Fraction(Decimal(str(value).strip()))
+    except (InvalidOperation, ValueError):
+        raise CurrencyError(f"Not a rate: {value!r}") from None
+    if rate <= 0:
+        raise CurrencyError(f"Rates must be positive, got {value!r}")
+    return rate
+
+
+class FxRates:
+    """One immutable version of the rate table.
+
+    Each rate is units of a currency per 1 unit of base. At publish time the
+    minor-unit ratio of every currency pair is reduced to an exact fraction,
+    and for every target currency the fractions of all sources are put over
+    one common denominator. Converting a set of per-currency subtotals is
+    then a dot product of Python ints against that row and one rounding.
+    """
+
+    def __init__(self, version, rates, base=BASE_CURRENCY, published_at=None):
+        minor_exponent(base)
+        rates = {code: _rate(value) for code, value in rates.items()}
+        rates[base] = Fraction(1)
+        for code in rates:
+            minor_exponent(code)
+        self.version = version
+        self.base = base
+        self.published_at = time.time() if published_at is None else published_at
+        self.rates = rates
+        self.currencies = tuple(sorted(rates))
+        self.index = {code: i for i, code in enumerate(self.currencies)}
+        # ratio[i][j]: minor units of currency j per minor unit of currency i
+        ratio = [[rates[dst] / rates[src] * Fraction(10) ** (CURRENCIES[dst] - CURRENCIES[src])
+                  for dst in self.currencies] for src in self.currencies]
+        self._pairs = [[(r.numerator, r.denominator) for r in row] for row in ratio]
+        self._denominators = []
+        self._numerators = []
+        for j in range(len(self.currencies)):
+            denominator = math.lcm(*(ratio[i][j].denominator for i in range(len(self.currencies))))
+            self._denominators.append(denominator)
+            self._numerators.append([ratio[i][j].numerator * (denominator // ratio[i][j].denominator)
+                                     for i in range(len(self.currencies))])
+
+    def _position(self, currency):
+        try:
+            return self.index[currency]
+        except KeyError:
+            raise CurrencyError(f"No {currency} rate in FX table version {self.version}") from None
+
+    def convert(self, minor, src, dst):
+        """Minor units of src -> minor units of dst, rounded half-even"""
+        numerator, denominator = self._pairs[self._position(src)][self._position(dst)]
+        return round_half_even(minor * numerator, denominator)
+
+    def convert_many(self, minors, src, dst):
+        numerator, denominator = self._pairs[self._position(src)][self._position(dst)]
+        return [round_half_even(minor * numerator, denominator) for minor in minors]
+
+    def vector(self, subtotals):
+        """{currency: minor units} -> a list aligned with self.currencies"""
+        vector = [0] * len(self.currencies)
+        for currency, minor in subtotals.items():
+            vector[self._position(currency)] += minor
+        return vector
+
+    def total(self, subtotals, currency):
+        """Value of {currency: minor units} (or an aligned vector) in one currency, rounded once"""
+        j = self._position(currency)
+        vector = subtotals if isinstance(subtotals, list) else self.vector(subtotals)
+        return round_half_even(sum(map(int.__mul__, vector, self._numerators[j])), self._denominators[j])
+
+    def totals(self, subtotals):
+        """Value of the subtotals in every currency of the table"""
+        vector = subtotals if isinstance(subtotals, list) else self.vector(subtotals)
+        return {code: round_half_even(sum(map(int.__mul__, vector, self._numerators[j])), self._denominators[j])
+                for j, code in enumerate(self.currencies)}
+
+    def cross_rate(self, src, dst):
+        """Units of dst per unit of src (major units) as a Decimal rounded for display"""
+        ratio = self.rates[self.currencies[self._position(dst)]] / self.rates[self.currencies[self._position(src)]]
+        with localcontext() as context:
+            context.prec = DISPLAY_DIGITS
+            return Decimal(ratio.numerator) / Decimal(ratio.denominator)
+
+    def describe(self, matrix=False):
+        description = {
+            "version": self.version,
+            "base": self.base,
+            "published_at": self.published_at,
+            "currencies": list(self.currencies),
+            "rates": {code: str(self.cross_rate(self.base, code)) for code in self.currencies},
+        }
+        if matrix:
+            description["cross_rates"] = {src: {dst: str(self.cross_rate(src, dst)) for dst in self.currencies}
+                                          for src in self.currencies}
+        return description
+
+
+class FxRateTable:
+    """Versioned FX rates; readers take the current version without locking, publish() swaps in a new one"""
+
+    def __init__(self, rates=None, base=BASE_CURRENCY, history=100):
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=history)
+        self._current = None
+        self.publish(DEFAULT_RATES if rates is None else rates, base)
+
+    def publish(self, rates, base=BASE_CURRENCY, required=()):
+        """Build the next version (cross-rate matrix included) and make it current.
+
+        The table must quote BASE_CURRENCY and every currency in required
+        (the mock backend passes the currencies its ledger holds).
+        """
+        with self._lock:
+            version = self._current.version + 1 if self._current is not None else 1
+            published = FxRates(version, rates, base)
+            missing = {BASE_CURRENCY, *required} - set(published.currencies)
+            if missing:
+                raise CurrencyError(f"FX table has no rate for {', '.join(sorted(missing))}")
+            self._history.append(published)
+            self._current = published
+        return published
+
+    def current(self):
+        return self._current
+
+    def value_in(self, amount, currency, target=BASE_CURRENCY):
+        """An amount of currency (major units) valued in target at the current rates, as a float"""
+        return from_minor(self._current.convert(to_minor(amount, currency), currency, target), target)
+
+    def get(self, version):
+        for rates in reversed(self._history):
+            if rates.version == version:
+                return rates
+        raise CurrencyError(f"FX table version {version} is not retained")
+
+    def at(self, timestamp):
+        """The version that was current at a Unix timestamp"""
+        history = list(self._history)
+        index = bisect_right([rates.published_at for rates in history], timestamp) - 1
+        if index < 0:
+            raise CurrencyError(f"No FX table retained as of {timestamp}")
+        return history[index]
+
+    def stats(self):
+        history = list(self._history)
+        return {
+            "version": self._current.version,
+            "retained_versions": [rates.version for rates in history],
+            "currencies": len(self._current.currencies),
+        }
+
+
+class Portfolio:
+    """Positions kept as exact per-currency running subtotals, so a total never revisits positions"""
+
+    def __init__(self, positions=()):
+        self._positions = {}
+        self._subtotals = {}
+        for position_id, currency, minor in positions:
+            self.set(position_id, currency, minor)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def set(self, position_id, currency, minor):
+        minor_exponent(currency)
+        previous = self._positions.get(position_id)
+        if previous is not None:
+            self._subtotals[previous[0]] -= previous[1]
+        self._positions[position_id] = (currency, minor)
+        self._subtotals[currency] = self._subtotals.get(currency, 0) + minor
+
+    def remove(self, position_id):
+        currency, minor = self._positions.pop(position_id)
+        self._subtotals[currency] -= minor
+
+    def subtotals(self):
+        return dict(self._subtotals)
+
+    def total(self, rates, currency):
+        return rates.total(self._subtotals, currency)
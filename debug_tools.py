@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Live debugging tools for the Quantum Banking mock backend
+On-demand sampling and cProfile sessions with collapsed-stack or pstats
+output, plus thread, queue and memory (tracemalloc) snapshots
+"""
+
+import cProfile
+import gc
+import io
+import marshal
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+MODES = ("sampling", "cprofile")
+FORMATS = {"sampling": ("collapsed", "top"), "cprofile": ("pstats", "raw")}
+
+
+class ProfilerStateError(Exception):
+    pass
+
+
+def check_format(mode, fmt):
+    """Output format to use for a mode (its default when fmt is None)"""
+    if fmt is None:
+        return FORMATS[mode][0]
+    if fmt not in FORMATS[mode]:
+        raise ValueError(f"Format {fmt!r} is not available for {mode} profiles (use {' or '.join(FORMATS[mode])})")
+    return fmt
+
+
+def _thread_label(name):
+    # Handler threads are numbered per connection; fold them so flamegraph roots stay readable
+    return re.sub(r"\d+", "N", name).replace(";", ":").replace(" ", "_")
+
+
+class SamplingProfiler:
+    """Wall-clock sampler over every thread's stack via sys._current_frames().
+
+    Runs on its own thread and costs nothing between sessions. Samples are
+    aggregated into collapsed stacks ("thread;outer;...;leaf count") as
+    consumed by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval=0.005, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.samples = 0
+        self.sample_time = 0.0
+        self._labels = {}
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="debug-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+            self._labels[code] = label
+        return label
+
+    def _run(self):
+        own = threading.get_ident()
+        while self._running:
+            started = time.perf_counter()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(_thread_label(names.get(ident, "unknown")))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+            self.sample_time += time.perf_counter() - started
+            time.sleep(self.interval)
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+    def top(self, limit=40):
+        """Leaf functions by share of samples (where threads were found running or waiting)"""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        lines = [f"{'samples':>8} {'share':>7}  function"]
+        lines += [f"{count:>8} {count / total:>7.1%}  {leaf}" for leaf, count in leaves.most_common(limit)]
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        return {
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+            "avg_sample_cost_ms": self.sample_time / self.samples * 1000 if self.samples else 0.0,
+            "distinct_stacks": len(self.stacks),
+        }
+
+
+class RequestProfiler:
+    """cProfile over request handling.
+
+    cProfile only sees the thread that enabled it, so each request handled
+    during the session runs under its own Profile (begin() on the handler
+    thread, finish() when the response is out) and the results are merged
+    into one pstats.Stats.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self._stats = None
+        self._lock = threading.Lock()
+
+    def begin(self):
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def finish(self, profile):
+        profile.disable()
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+            self.requests += 1
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def pstats_text(self, limit=60, sort="cumulative"):
+        with self._lock:
+            if self._stats is None:
+                return "No requests were handled while profiling\n"
+            out = io.StringIO()
+            self._stats.stream = out
+            self._stats.sort_stats(sort).print_stats(limit)
+            return out.getvalue()
+
+    def raw(self):
+        """Marshalled stats, loadable with pstats.Stats(path) or snakeviz"""
+        with self._lock:
+            return marshal.dumps(self._stats.stats if self._stats is not None else {})
+
+    def summary(self):
+        return {"requests_profiled": self.requests}
+
+
+class ProfileSession:
+    __slots__ = ("mode", "profiler", "started_at", "stopped_at", "seconds")
+
+    def __init__(self, mode, profiler, seconds):
+        self.mode = mode
+        self.profiler = profiler
+        self.seconds = seconds
+        self.started_at = time.time()
+        self.stopped_at = None
+
+    def output(self, fmt=None):
+        """(bytes, content type) in the requested format"""
+        fmt = check_format(self.mode, fmt)
+        if fmt == "collapsed":
+            return self.profiler.collapsed().encode(), "text/plain; charset=utf-8"
+        if fmt == "top":
+            return self.profiler.top().encode(), "text/plain; charset=utf-8"
+        if fmt == "pstats":
+            return self.profiler.pstats_text().encode(), "text/plain; charset=utf-8"
+        return self.profiler.raw(), "application/octet-stream"
+
+    def describe(self):
+        end = self.stopped_at or time.time()
+        return dict(self.profiler.summary(), mode=self.mode, started_at=self.started_at,
+                    stopped_at=self.stopped_at, duration=end - self.started_at, planned_seconds=self.seconds,
+                    formats=list(FORMATS[self.mode]))
+
+
+class ProfilerControl:
+    """One profiling session at a time, started and stopped over HTTP.
+
+    request_profiler is None except during a cProfile session, so the
+    request path only pays for an attribute check while nothing runs.
+    """
+
+    def __init__(self, max_seconds=120):
+        self.max_seconds = max_seconds
+        self.active = None
+        self.last = None
+        self.request_profiler = None
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def start(self, mode="sampling", seconds=None, interval=0.005):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiler mode {mode!r} (use {' or '.join(MODES)})")
+        if seconds is not None and not 0 < seconds <= self.max_seconds:
+            raise ValueError(f"seconds must be between 0 and {self.max_seconds}")
+        if not 0.001 <= interval <= 1:
+            raise ValueError("interval must be between 1 and 1000 ms")
+        with self._lock:
+            if self.active is not None:
+                raise ProfilerStateError(f"A {self.active.mode} session is already running")
+            profiler = SamplingProfiler(interval) if mode == "sampling" else RequestProfiler()
+            self.active = session = ProfileSession(mode, profiler, seconds)
+            profiler.start()
+            if mode == "cprofile":
+                self.request_profiler = profiler
+            if seconds is not None:
+                self._timer = threading.Timer(seconds, self._expire, args=(session,))
+                self._timer.daemon = True
+                self._timer.start()
+        return session
+
+    def stop(self):
+        with self._lock:
+            session = self.active
+            if session is None:
+                raise ProfilerStateError("No profiling session is running")
+            self.active = None
+            self.request_profiler = None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        session.profiler.stop()
+        session.stopped_at = time.time()
+        self.last = session
+        return session
+
+    def _expire(self, session):
+        if self.active is session:
+            try:
+                self.stop()
+            except ProfilerStateError:
+                pass
+
+    def run(self, mode, seconds, interval=0.005):
+        """Profile for seconds on the calling thread and return the finished session"""
+        if not 0 < seconds <= self.max_seconds:
+            raise ValueError(f"seconds must be between 0 and {self.max_seconds}")
+        session = self.start(mode, None, interval)
+        try:
+            time.sleep(seconds)
+        finally:
+            if self.active is session:
+                self.stop()
+        return session
+
+    def status(self):
+        return {
+            "active": self.active.describe() if self.active else None,
+            "last": self.last.describe() if self.last else None,
+            "max_seconds": self.max_seconds,
+        }
+
+
+def thread_report():
+    frames = sys._current_frames()
+    threads = []
+    groups = Counter()
+    for thread in threading.enumerate():
+        frame = frames.get(thread.ident)
+        groups[_thread_label(thread.name)] += 1
+        threads.append({
+            "name": thread.name,
+            "daemon": thread.daemon,
+            "where": f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})"
+                     if frame is not None else None,
+        })
+    return {"count": len(threads), "by_name": dict(groups.most_common()), "threads": threads}
+
+
+def memory_report(top=15):
+    report = {"gc_counts": gc.get_count(), "gc_objects": len(gc.get_objects()),
+              "tracemalloc": tracemalloc.is_tracing()}
+    try:
+        import resource
+        # ru_maxrss is KiB on Linux
+        report["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        pass
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        report.update({
+            "traced_mb": current / 1e6,
+            "traced_peak_mb": peak / 1e6,
+            "top_allocators": [{
+                "where": f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+                "size_kb": stat.size / 1024,
+                "blocks": stat.count,
+            } for stat in snapshot.statistics("lineno")[:top]],
+        })
+    return report
+
+
+def set_tracemalloc(enabled, frames=1):
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    elif not enabled and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return tracemalloc.is_tracing()
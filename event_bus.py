@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Embedded partitioned event bus for the Quantum Banking mock backend
+Local stand-in for Kafka: topics, key-hashed partitions, consumer groups
+with committed offsets and batched polling over bounded ring buffers
+"""
+
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+Record = namedtuple("Record", "topic partition offset key value timestamp")
+
+
+def partition_for(key, num_partitions):
+    """Stable key -> partition mapping (crc32, not the per-process salted hash())"""
+    if key is None:
+        return 0
+    if not isinstance(key, bytes):
+        key = str(key).encode()
+    return zlib.crc32(key) % num_partitions
+
+
+class PartitionLog:
+    """Fixed-capacity ring buffer of records addressed by monotonically increasing offsets.
+
+    Once full, the oldest records are overwritten; readers positioned before
+    the retained window are skipped forward and the gap is counted as lost.
+    """
+
+    def __init__(self, topic, partition, capacity):
+        self.topic = topic
+        self.partition = partition
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self.next_offset = 0
+
+    @property
+    def start_offset(self):
+        return max(0, self.next_offset - self.capacity)
+
+    def append(self, key, value, timestamp):
+        offset = self.next_offset
+        self._slots[offset % self.capacity] = Record(self.topic, self.partition, offset, key, value, timestamp)
+        self.next_offset = offset + 1
+        return offset
+
+    def read(self, offset, max_records):
+        """Return (records, next_offset, skipped) starting at offset"""
+        skipped = 0
+        start = self.start_offset
+        if offset < start:
+            skipped = start - offset
+            offset = start
+        end = min(self.next_offset, offset + max_records)
+        slots, cap = self._slots, self.capacity
+        return [slots[o % cap] for o in range(offset, end)], end, skipped
+
+
+class Topic:
+    def __init__(self, name, num_partitions, capacity):
+        self.name = name
+        self.partitions = [PartitionLog(name, p, capacity) for p in range(num_partitions)]
+        self.cond = threading.Condition()
+
+    @property
+    def num_partitions(self):
+        return len(self.partitions)
+
+
+class EventBus:
+    """In-process event bus with Kafka-like semantics"""
+
+    def __init__(self, default_partitions=4, default_capacity=65536):
+        self.default_partitions = default_partitions
+        self.default_capacity = default_capacity
+        self._topics = {}
+        self._lock = threading.Lock()
+        # (group, topic) -> {partition: committed offset}
+        self._committed = {}
+        # (group, topic) -> [consumer, ...] in join order
+        self._members = {}
+        self._generations = {}
+
+    # ------------------------------------------------------------------
+    # Topics and producing
+    # ------------------------------------------------------------------
+    def create_topic(self, name, partitions=None, capacity=None):
+        with self._lock:
+            topic = self._topics.get(name)
+            if topic is None:
+                topic = Topic(name, partitions or self.default_partitions, capacity or self.default_capacity)
+                self._topics[name] = topic
+            return topic
+
+    def topic(self, name):
+        topic = self._topics.get(name)
+        return topic if topic is not None else self.create_topic(name)
+
+    def publish(self, topic_name, key, value):
+        """Append value to the partition owning key; returns (partition, offset)"""
+        topic = self.topic(topic_name)
+        partition = partition_for(key, topic.num_partitions)
+        with topic.cond:
+            offset = topic.partitions[partition].append(key, value, time.time())
+            topic.cond.notify_all()
+        return partition, offset
+
+    def publish_batch(self, topic_name, items):
+        """Append many (key, value) pairs under a single lock acquisition"""
+        topic = self.topic(topic_name)
+        n = topic.num_partitions
+        now = time.time()
+        with topic.cond:
+            for key, value in items:
+                topic.partitions[partition_for(key, n)].append(key, value, now)
+            topic.cond.notify_all()
+
+    # ------------------------------------------------------------------
+    # Consumer groups
+    # ------------------------------------------------------------------
+    def subscribe(self, group, topic_name, auto_offset_reset="earliest"):
+        """Join a consumer group; partitions are re-balanced across its members"""
+        consumer = Consumer(self, group, self.topic(topic_name), auto_offset_reset)
+        key = (group, topic_name)
+        with self._lock:
+            self._members.setdefault(key, []).append(consumer)
+            self._generations[key] = self._generations.get(key, 0) + 1
+        return consumer
+
+    def leave(self, consumer):
+        key = (consumer.group, consumer.topic.name)
+        with self._lock:
+            members = self._members.get(key, [])
+            if consumer in members:
+                members.remove(consumer)
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+    def _assignment(self, consumer):
+        key = (consumer.group, consumer.topic.name)
+        with self._lock:
+            members = self._members.get(key, [])
+            generation = self._generations.get(key, 0)
+            if consumer not in members:
+                return generation, []
+            index = members.index(consumer)
+            return generation, list(range(index, consumer.topic.num_partitions, len(members)))
+
+    def _generation(self, consumer):
+        return self._generations.get((consumer.group, consumer.topic.name), 0)
+
+    def committed(self, group, topic_name, partition):
+        return self._committed.get((group, topic_name), {}).get(partition)
+
+    def commit(self, group, topic_name, offsets):
+        with self._lock:
+            committed = self._committed.setdefault((group, topic_name), {})
+            for partition, offset in offsets.items():
+                if offset > committed.get(partition, -1):
+                    committed[partition] = offset
+
+    def lag(self, group, topic_name):
+        """Per-partition lag (log end offset minus committed offset) for a group"""
+        topic = self.topic(topic_name)
+        committed = self._committed.get((group, topic_name), {})
+        return {
+            log.partition: log.next_offset - max(committed.get(log.partition, 0), log.start_offset)
+            for log in topic.partitions
+        }
+
+    def stats(self):
+        topics = {}
+        for name, topic in list(self._topics.items()):
+            topics[name] = {
+                "partitions": topic.num_partitions,
+                "end_offsets": [log.next_offset for log in topic.partitions],
+            }
+        groups = {f"{group}/{topic}": sum(self.lag(group, topic).values())
+                  for group, topic in list(self._members)}
+        return {"topics": topics, "consumer_lag": groups}
+
+
+class Consumer:
+    """A consumer group member; not thread-safe, use one per worker thread"""
+
+    def __init__(self, bus, group, topic, auto_offset_reset):
+        self.bus = bus
+        self.group = group
+        self.topic = topic
+        self.auto_offset_reset = auto_offset_reset
+        self.skipped = 0
+        self._generation = -1
+        self._positions = {}
+        self._next_start = 0
+
+    @property
+    def assignment(self):
+        self._maybe_rebalance()
+        return sorted(self._positions)
+
+    def _maybe_rebalance(self):
+        if self._generation == self.bus._generation(self):
+            return
+        self._generation, partitions = self.bus._assignment(self)
+        positions = {}
+        for p in partitions:
+            if p in self._positions:
+                positions[p] = self._positions[p]
+                continue
+            committed = self.bus.committed(self.group, self.topic.name, p)
+            if committed is not None:
+                positions[p] = committed
+            elif self.auto_offset_reset == "latest":
+                positions[p] = self.topic.partitions[p].next_offset
+            else:
+                positions[p] = 0
+        self._positions = positions
+
+    def poll(self, max_records=500, timeout=1.0):
+        """Return up to max_records records across assigned partitions, waiting up to timeout"""
+        self._maybe_rebalance()
+        deadline = time.monotonic() + timeout
+        topic = self.topic
+        with topic.cond:
+            while True:
+                batch = self._fetch(max_records)
+                if batch:
+                    return batch
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                topic.cond.wait(remaining)
+
+    def _fetch(self, max_records):
+        batch = []
+        partitions = list(self._positions)
+        if not partitions:
+            return batch
+        # Rotate the starting partition so one hot partition cannot starve the rest
+        start = self._next_start % len(partitions)
+        self._next_start += 1
+        for partition in partitions[start:] + partitions[:start]:
+            if len(batch) >= max_records:
+                break
+            position = self._positions[partition]
+            log = self.topic.partitions[partition]
+            if position >= log.next_offset:
+                continue
+            records, next_offset, skipped = log.read(position, max_records - len(batch))
+            self.skipped += skipped
+            self._positions[partition] = next_offset
+            batch.extend(records)
+        return batch
+
+    def commit(self):
+        """Commit current positions for the group (at-least-once: commit after processing)"""
+        self.bus.commit(self.group, self.topic.name, dict(self._positions))
+
+    def close(self):
+        self.commit()
+        self.bus.leave(self)
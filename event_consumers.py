@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Event bus consumers for the Quantum Banking mock backend
+Fraud scoring and notification fan-out driven by ledger postings
+"""
+
+import threading
+import time
+from collections import deque
+
+from currency import BASE_CURRENCY, CurrencyError
+from ledger import TOPIC_LEDGER_POSTINGS
+from notification_hub import (
+    EVENT_BALANCE_CHANGED,
+    EVENT_TRANSACTION_POSTED,
+    EVENT_FRAUD_ALERT,
+)
+
+TOPIC_FRAUD_ALERTS = "fraud.alerts"
+
+
+class ConsumerWorker:
+    """Background thread polling one consumer group member in batches"""
+
+    group = None
+    topic = None
+
+    def __init__(self, bus, batch_size=500, poll_timeout=0.5):
+        self.bus = bus
+        self.batch_size = batch_size
+        self.poll_timeout = poll_timeout
+        self.processed = 0
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"consumer-{self.group}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        consumer = self.bus.subscribe(self.group, self.topic)
+        try:
+            while self._running:
+                records = consumer.poll(self.batch_size, self.poll_timeout)
+                if not records:
+                    continue
+                self.handle_batch(records)
+                self.processed += len(records)
+                consumer.commit()
+        finally:
+            consumer.close()
+
+    def handle_batch(self, records):
+        raise NotImplementedError
+
+
+class FraudConsumer(ConsumerWorker):
+    """Rule-based real-time scoring of ledger postings.
+
+    large_amount is in BASE_CURRENCY; postings in other currencies are
+    valued at the current rates of fx (an FxRateTable) before the check.
+    """
+
+    group = "fraud-service"
+    topic = TOPIC_LEDGER_POSTINGS
+
+    def __init__(self, bus, large_amount=5000.0, velocity_window=60.0, velocity_limit=10, fx=None, **kwargs):
+        super().__init__(bus, **kwargs)
+        self.large_amount = large_amount
+        self.fx = fx
+        self.velocity_window = velocity_window
+        self.velocity_limit = velocity_limit
+        self.alerts = deque(maxlen=100)
+        self._recent = {}
+
+    def score(self, account_id, amount, posted_at):
+        recent = self._recent.setdefault(account_id, deque())
+        recent.append(posted_at)
+        while recent and posted_at - recent[0] > self.velocity_window:
+            recent.popleft()
+
+        reasons = []
+        score = 0.1
+        if amount < 0 and -amount >= self.large_amount:
+            reasons.append("large_debit")
+            score += 0.5
+        if len(recent) > self.velocity_limit:
+            reasons.append("high_velocity")
+            score += 0.4
+        return min(score, 1.0), reasons
+
+    def base_amount(self, txn):
+        currency = txn.get("currency", BASE_CURRENCY)
+        if self.fx is None or currency == BASE_CURRENCY:
+            return txn["amount"]
+        try:
+            return self.fx.value_in(txn["amount"], currency)
+        except CurrencyError:
+            # No rate for it (published tables always quote held currencies): score the raw amount
+            return txn["amount"]
+
+    def handle_batch(self, records):
+        for record in records:
+            txn = record.value["transaction"]
+            score, reasons = self.score(record.key, self.base_amount(txn), record.value["posted_at"])
+            if not reasons:
+                continue
+            alert = {
+                "account_id": record.key,
+                "transaction_id": txn["id"],
+                "score": round(score, 2),
+                "risk_level": "high" if score >= 0.5 else "medium",
+                "reasons": reasons,
+                "timestamp": time.time(),
+            }
+            self.alerts.append(alert)
+            self.bus.publish(TOPIC_FRAUD_ALERTS, record.key, alert)
+
+
+class NotificationConsumer(ConsumerWorker):
+    """Forwards ledger postings to the SSE hub"""
+
+    group = "notification-service"
+    topic = TOPIC_LEDGER_POSTINGS
+
+    def __init__(self, bus, hub, **kwargs):
+        super().__init__(bus, **kwargs)
+        self.hub = hub
+
+    def handle_batch(self, records):
+        for record in records:
+            txn = record.value["transaction"]
+            self.hub.publish(EVENT_TRANSACTION_POSTED, txn)
+            self.hub.publish(EVENT_BALANCE_CHANGED, {
+                "account_id": record.key,
+                "balance": record.value["balance"],
+                "delta": txn["amount"],
+                "timestamp": record.value["posted_at"],
+            })
+
+
+class FraudAlertNotificationConsumer(NotificationConsumer):
+    """Forwards fraud alerts to the SSE hub"""
+
+    topic = TOPIC_FRAUD_ALERTS
+
+    def handle_batch(self, records):
+        for record in records:
+            self.hub.publish(EVENT_FRAUD_ALERT, record.value)
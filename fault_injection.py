@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Latency and fault injection for the Quantum Banking mock backend
+Per-route latency distributions, error and timeout injection and bandwidth
+throttling for the downstream service stubs, driven by a profile file and
+delivered from one scheduler thread so delays never hold a server worker
+"""
+
+import heapq
+import itertools
+import json
+import os
+import random
+import socket
+import threading
+import time
+from collections import namedtuple
+
+INJECTED_ERROR = {"error": "Injected fault", "code": "FAULT_INJECTED"}
+
+# What to do to one request: delay before the first byte, optional error status,
+# optional hang (seconds before the connection is dropped), bytes/sec limit
+FaultPlan = namedtuple("FaultPlan", "rule delay error_status hang bandwidth")
+
+
+class FaultProfileError(Exception):
+    pass
+
+
+def sample_latency(spec, rng):
+    """Seconds of delay drawn from a latency spec ({"distribution": ..., ...} in ms)"""
+    if not spec:
+        return 0.0
+    kind = spec.get("distribution", "fixed")
+    if kind == "fixed":
+        ms = spec.get("ms", 0)
+    elif kind == "normal":
+        ms = rng.gauss(spec.get("mean_ms", 0), spec.get("stddev_ms", 0))
+    elif kind == "pareto":
+        # Long tail: most requests near scale_ms, a few orders of magnitude slower
+        ms = spec.get("scale_ms", 1) * rng.paretovariate(spec.get("alpha", 1.5))
+    else:
+        raise FaultProfileError(f"Unknown latency distribution: {kind}")
+    return max(0.0, min(ms, spec.get("max_ms", 60000))) / 1000
+
+
+class _Rule:
+    __slots__ = ("name", "prefix", "methods", "latency", "error_rate", "error_status",
+                 "timeout_rate", "timeout_ms", "bandwidth")
+
+    def __init__(self, spec):
+        if not spec.get("prefix"):
+            raise FaultProfileError(f"Fault rule needs a prefix: {spec}")
+        self.prefix = spec["prefix"]
+        self.name = spec.get("name", self.prefix)
+        self.methods = {m.upper() for m in spec.get("methods", ())} or None
+        self.latency = spec.get("latency")
+        self.error_rate = float(spec.get("error_rate", 0))
+        self.error_status = int(spec.get("error_status", 503))
+        self.timeout_rate = float(spec.get("timeout_rate", 0))
+        self.timeout_ms = float(spec.get("timeout_ms", 30000))
+        kbps = spec.get("bandwidth_kbps")
+        self.bandwidth = float(kbps) * 1000 / 8 if kbps else None
+        sample_latency(self.latency, random.Random(0))  # reject bad specs at load time
+
+
+class DelayedWriter:
+    """Delivers pre-rendered responses on detached sockets from a single thread.
+
+    Jobs sit in a heap ordered by due time. When one is due its bytes are
+    sent with non-blocking writes; a bandwidth limit turns that into a
+    chunk per tick. Sockets are closed after the last byte (or, for an
+    injected hang, when the hang expires without any bytes at all).
+    """
+
+    def __init__(self, tick=0.02, max_jobs=20000):
+        self.tick = tick
+        self.max_jobs = max_jobs
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+        self.counters = {"scheduled": 0, "delivered": 0, "dropped": 0, "hung": 0, "bytes": 0}
+
+    def start(self):
+        with self._cond:
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(target=self._run, name="fault-writer", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            jobs, self._heap = self._heap, []
+            self._cond.notify_all()
+        for _, _, job in jobs:
+            _close(job[0])
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def schedule(self, sock, data, delay, bandwidth=None):
+        """Send data on sock after delay seconds (None data = close without answering)"""
+        if not self._running:
+            self.start()
+        sock.setblocking(False)
+        with self._cond:
+            if len(self._heap) >= self.max_jobs:
+                self.counters["dropped"] += 1
+                _close(sock)
+                return
+            self.counters["scheduled"] += 1
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq),
+                                        [sock, memoryview(data) if data is not None else None, bandwidth]))
+            self._cond.notify()
+
+    def pending(self):
+        return len(self._heap)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                if not self._running:
+                    return
+                _, _, job = heapq.heappop(self._heap)
+            self._step(job)
+
+    def _step(self, job):
+        sock, data, bandwidth = job
+        if data is None:
+            self.counters["hung"] += 1
+            _close(sock)
+            return
+        chunk = data if bandwidth is None else data[:max(1, int(bandwidth * self.tick))]
+        try:
+            sent = sock.send(chunk)
+        except (BlockingIOError, InterruptedError):
+            sent = 0
+        except OSError:
+            self.counters["dropped"] += 1
+            _close(sock)
+            return
+        self.counters["bytes"] += sent
+        job[1] = data = data[sent:]
+        if not len(data):
+            self.counters["delivered"] += 1
+            _close(sock)
+            return
+        # More to send: next chunk on the next tick (throttled) or as soon as the socket drains
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + (self.tick if bandwidth else 0.005),
+                                        next(self._seq), job))
+
+
+def _close(sock):
+    try:
+        sock.shutdown(socket.SHUT_WR)
+    except OSError:
+        pass
+    sock.close()
+
+
+class FaultInjector:
+    """Active fault profile plus the writer that carries out delayed responses.
+
+    The profile file maps profile names to rule lists; one profile is
+    active at a time and can be switched (or the file reloaded) while the
+    server runs. The file is also re-read automatically when it changes.
+    """
+
+    def __init__(self, path=None, profile=None, writer=None, check_interval=1.0, seed=None):
+        self.path = path
+        self.writer = writer or DelayedWriter()
+        self.check_interval = check_interval
+        self._rng = random.Random(seed)
+        self._profiles = {"none": ()}
+        self._active_name = "none"
+        self._file_active = "none"
+        self._rules = ()
+        self._mtime = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.counters = {"planned": 0, "delayed": 0, "errors": 0, "timeouts": 0, "throttled": 0}
+        if path and os.path.exists(path):
+            self.reload()
+        self.set_profile(profile or self._file_active)
+
+    # ------------------------------------------------------------------
+    # Profiles
+    # ------------------------------------------------------------------
+    def reload(self):
+        # Everything is parsed and built before anything is replaced, and the mtime is only recorded once
+        # the whole file loaded, so a bad edit keeps the current profiles and the file is read again on the next check
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            with open(self.path, encoding="utf-8") as f:
+                config = json.load(f)
+            if not isinstance(config, dict):
+                raise ValueError("expected a JSON object")
+            profiles = {"none": ()}
+            for name, profile in config.get("profiles", {}).items():
+                profiles[name] = tuple(_Rule(rule) for rule in profile.get("rules", ()))
+            file_active = config.get("active", "none")
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            raise FaultProfileError(f"{self.path}: {e}") from None
+        with self._lock:
+            self._mtime = mtime
+            self._profiles = profiles
+            self._file_active = file_active
+            # A profile switched to at runtime survives edits to the file as long as it still exists
+            active = self._active_name if self._active_name in profiles else "none"
+        self.set_profile(active)
+
+    def set_profile(self, name):
+        with self._lock:
+            if not isinstance(name, str) or name not in self._profiles:
+                raise FaultProfileError(f"Unknown fault profile: {name}")
+            self._active_name = name
+            # Longest prefix first; the tuple is swapped whole so plan() never sees a partial update
+            self._rules = tuple(sorted(self._profiles[name], key=lambda r: len(r.prefix), reverse=True))
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if not self.path or now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        try:
+            if os.stat(self.path).st_mtime_ns != self._mtime:
+                self.reload()
+        except (OSError, FaultProfileError):
+            pass  # keep the current profile until the file is valid again
+
+    # ------------------------------------------------------------------
+    # Per request
+    # ------------------------------------------------------------------
+    def plan(self, method, path):
+        """FaultPlan for this request, or None when no rule applies"""
+        self._maybe_reload()
+        for rule in self._rules:
+            if path.startswith(rule.prefix) and (rule.methods is None or method in rule.methods):
+                break
+        else:
+            return None
+        rng = self._rng
+        hang = rule.timeout_ms / 1000 if rule.timeout_rate and rng.random() < rule.timeout_rate else None
+        error_status = rule.error_status if rule.error_rate and rng.random() < rule.error_rate else None
+        delay = sample_latency(rule.latency, rng)
+        with self._lock:
+            self.counters["planned"] += 1
+            self.counters["delayed"] += delay > 0
+            self.counters["errors"] += error_status is not None
+            self.counters["timeouts"] += hang is not None
+            self.counters["throttled"] += rule.bandwidth is not None
+        return FaultPlan(rule.name, delay, error_status, hang, rule.bandwidth)
+
+    def deliver(self, sock, response_bytes, plan):
+        """Hand a detached connection and its rendered response to the writer"""
+        if plan.hang is not None:
+            self.writer.schedule(sock, None, plan.hang)
+        else:
+            self.writer.schedule(sock, response_bytes, plan.delay, plan.bandwidth)
+
+    def start(self):
+        self.writer.start()
+        return self
+
+    def stop(self):
+        self.writer.stop()
+
+    def status(self):
+        with self._lock:
+            counters = dict(self.counters)
+            rules = self._rules
+            profiles = sorted(self._profiles)
+        return {
+            "active_profile": self._active_name,
+            "profiles": profiles,
+            "profile_file": self.path,
+            "rules": [{
+                "name": r.name, "prefix": r.prefix, "methods": sorted(r.methods) if r.methods else None,
+                "latency": r.latency, "error_rate": r.error_rate, "error_status": r.error_status,
+                "timeout_rate": r.timeout_rate, "timeout_ms": r.timeout_ms,
+                "bandwidth_kbps": r.bandwidth * 8 / 1000 if r.bandwidth else None,
+            } for r in rules],
+            "counters": counters,
+            "writer": dict(self.writer.counters, pending=self.writer.pending()),
+        }
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Key Management Service stand-in for the Quantum Banking mock backend
+Versioned master keys with rotation and a cached data-key derivation path
+for field-level encryption
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from metrics import LatencyStats
+
+# Random bytes mixed into each data-key derivation, so every derivation issues a distinct key;
+# the nonce is kept with the ciphertext to re-derive its key
+NONCE_BYTES = 16
+DataKey = namedtuple("DataKey", "key_id version context nonce key")
+
+
+class KMSError(Exception):
+    pass
+
+
+class KeyVersion:
+    __slots__ = ("version", "material", "created_at", "state")
+
+    def __init__(self, version, material, state):
+        self.version = version
+        self.material = material
+        self.created_at = time.time()
+        self.state = state  # pending -> active -> retired
+
+    def describe(self):
+        return {"version": self.version, "state": self.state, "created_at": self.created_at}
+
+
+class _Entry:
+    __slots__ = ("value", "loaded_at", "uses", "refreshing")
+
+    def __init__(self, value, loaded_at):
+        self.value = value
+        self.loaded_at = loaded_at
+        self.uses = 0
+        self.refreshing = False
+
+
+class DataKeyCache:
+    """LRU + TTL cache with single-flight loading and refresh-ahead.
+
+    Concurrent misses for the same key share one loader call. Entries older
+    than refresh_ahead * ttl are served as-is while a background reload
+    replaces them, so hot keys never expire on the request path. An entry
+    is also dropped after max_uses hits when a usage limit is configured;
+    the next lookup then loads (for KMS data keys: derives) a fresh value.
+    """
+
+    def __init__(self, max_entries=10000, ttl=300.0, refresh_ahead=0.8, max_uses=None, refresh_workers=2):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.max_uses = max_uses
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="kms-refresh")
+        self.counters = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0,
+                         "expirations": 0, "refreshes": 0, "load_errors": 0}
+
+    def get(self, cache_key, loader):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                age = now - entry.loaded_at
+                exhausted = self.max_uses is not None and entry.uses >= self.max_uses
+                if age < self.ttl and not exhausted:
+                    entry.uses += 1
+                    self._entries.move_to_end(cache_key)
+                    self.counters["hits"] += 1
+                    if age >= self.ttl * self.refresh_ahead and not entry.refreshing:
+                        entry.refreshing = True
+                        self._refresher.submit(self._refresh, cache_key, loader)
+                    return entry.value
+                del self._entries[cache_key]
+                self.counters["expirations"] += 1
+
+            flight = self._inflight.get(cache_key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[cache_key] = Future()
+                self.counters["misses"] += 1
+            else:
+                self.counters["coalesced"] += 1
+
+        if not leader:
+            return flight.result()
+        try:
+            value = loader()
+        except Exception as e:
+            with self._lock:
+                self.counters["load_errors"] += 1
+                del self._inflight[cache_key]
+            flight.set_exception(e)
+            raise
+        with self._lock:
+            self._store(cache_key, value)
+            del self._inflight[cache_key]
+        flight.set_result(value)
+        return value
+
+    def peek(self, cache_key):
+        """Cached value without counting a use, or None"""
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            return entry.value if entry is not None else None
+
+    def put(self, cache_key, value):
+        with self._lock:
+            self._store(cache_key, value)
+
+    def _store(self, cache_key, value):
+        self._entries[cache_key] = _Entry(value, time.monotonic())
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def _refresh(self, cache_key, loader):
+        try:
+            value = loader()
+        except Exception:
+            with self._lock:
+                self.counters["load_errors"] += 1
+                entry = self._entries.get(cache_key)
+                if entry is not None:
+                    entry.refreshing = False
+            return
+        with self._lock:
+            self.counters["refreshes"] += 1
+            self._store(cache_key, value)
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries)
+
+    def invalidate(self, predicate):
+        with self._lock:
+            for cache_key in [k for k in self._entries if predicate(k)]:
+                del self._entries[cache_key]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            size = len(self._entries)
+        lookups = counters["hits"] + counters["misses"] + counters["coalesced"]
+        counters.update({
+            "size": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "max_uses": self.max_uses,
+            "hit_rate": (counters["hits"] / lookups) if lookups else 0.0,
+        })
+        return counters
+
+    def shutdown(self):
+        self._refresher.shutdown(wait=False)
+
+
+class KeyManagementService:
+    """Versioned master keys and cached per-context data keys.
+
+    Data keys are derived from the active master key version and a random
+    per-derivation nonce with PBKDF2-HMAC-SHA256, so a key dropped from the
+    cache (max_uses, TTL) is replaced by a different one; the version and
+    nonce re-derive any earlier key. derivation_iterations (and optionally
+    fetch_latency, to mimic a Vault/HSM round trip) set the cost a cache
+    miss pays.
+    """
+
+    def __init__(self, cache=None, derivation_iterations=20000, fetch_latency=0.0,
+                 rotation_interval=None, warm_contexts=1000):
+        self.cache = cache if cache is not None else DataKeyCache()
+        self.derivation_iterations = derivation_iterations
+        self.fetch_latency = fetch_latency
+        self.rotation_interval = rotation_interval
+        self.warm_contexts = warm_contexts
+        self.derivation = LatencyStats()
+        self._keys = {}
+        self._active = {}
+        self._lock = threading.Lock()
+        self._rotator = None
+        self._stop = threading.Event()
+        self._last_rotation = {}
+        self.warmup_failures = 0
+
+    # ------------------------------------------------------------------
+    # Master keys
+    # ------------------------------------------------------------------
+    def create_key(self, key_id):
+        with self._lock:
+            if key_id not in self._keys:
+                self._keys[key_id] = [KeyVersion(1, os.urandom(32), "active")]
+                self._active[key_id] = 1
+                self._last_rotation[key_id] = time.monotonic()
+        return self.describe_key(key_id)
+
+    def _version(self, key_id, version):
+        if not isinstance(version, int) or version < 1:
+            raise KMSError(f"Unknown key version: {key_id} v{version}")
+        try:
+            return self._keys[key_id][version - 1]
+        except (KeyError, IndexError):
+            raise KMSError(f"Unknown key version: {key_id} v{version}") from None
+
+    def active_version(self, key_id):
+        try:
+            return self._active[key_id]
+        except KeyError:
+            raise KMSError(f"Unknown key: {key_id}") from None
+
+    def describe_key(self, key_id):
+        with self._lock:
+            if key_id not in self._keys:
+                raise KMSError(f"Unknown key: {key_id}")
+            return {
+                "key_id": key_id,
+                "active_version": self._active[key_id],
+                "versions": [v.describe() for v in self._keys[key_id]],
+            }
+
+    def list_keys(self):
+        return [self.describe_key(key_id) for key_id in list(self._keys)]
+
+    def rotate(self, key_id, background=True):
+        """Add a new key version and switch to it once hot data keys are pre-derived.
+
+        Until warm-up finishes, callers keep using the previous version from
+        cache, so rotation never forces a burst of synchronous derivations.
+        """
+        with self._lock:
+            if key_id not in self._keys:
+                raise KMSError(f"Unknown key: {key_id}")
+            if any(v.state == "pending" for v in self._keys[key_id]):
+                raise KMSError(f"Rotation already in progress for {key_id}")
+            version = KeyVersion(len(self._keys[key_id]) + 1, os.urandom(32), "pending")
+            self._keys[key_id].append(version)
+            self._last_rotation[key_id] = time.monotonic()
+
+        if background:
+            threading.Thread(target=self._finish_rotation, args=(key_id, version),
+                             name=f"kms-rotate-{key_id}", daemon=True).start()
+        else:
+            self._finish_rotation(key_id, version)
+        return {"key_id": key_id, "version": version.version, "state": version.state}
+
+    def _finish_rotation(self, key_id, version):
+        previous = self._active[key_id]
+        hot = [context for (kid, ver, context) in reversed(self.cache.keys())
+               if kid == key_id and ver == previous][:self.warm_contexts]
+        try:
+            for context in hot:
+                self.cache.get((key_id, version.version, context),
+                               lambda c=context: self._derive(key_id, version, c))
+        except Exception:
+            # Warm-up only saves cold misses; a version left pending would block every later rotation
+            self.warmup_failures += 1
+        with self._lock:
+            self._version(key_id, previous).state = "retired"
+            version.state = "active"
+            self._active[key_id] = version.version
+
+    # ------------------------------------------------------------------
+    # Data keys
+    # ------------------------------------------------------------------
+    def _derive(self, key_id, key_version, context, nonce=None):
+        start = time.perf_counter()
+        if self.fetch_latency:
+            time.sleep(self.fetch_latency)
+        nonce = nonce or os.urandom(NONCE_BYTES)
+        salt = f"{key_id}:{key_version.version}:{context}:".encode() + nonce
+        key = hashlib.pbkdf2_hmac("sha256", key_version.material, salt, self.derivation_iterations, 32)
+        self.derivation.record(time.perf_counter() - start)
+        return DataKey(key_id, key_version.version, context, nonce, key)
+
+    def data_key(self, key_id, context, version=None, nonce=None):
+        """Data key for (key_id, context); the active version unless one is given. Pass the version and
+        nonce a key was issued with to get that same key back (decrypt path)"""
+        version = version or self.active_version(key_id)
+        key_version = self._version(key_id, version)
+        if nonce is None:
+            return self.cache.get((key_id, version, context),
+                                  lambda: self._derive(key_id, key_version, context))
+        if not isinstance(nonce, bytes) or len(nonce) != NONCE_BYTES:
+            raise KMSError(f"Data key nonce must be {NONCE_BYTES} bytes")
+        # Usually still the cached key; older ones are re-derived without replacing it
+        cached = self.cache.peek((key_id, version, context))
+        if cached is not None and cached.nonce == nonce:
+            return cached
+        return self._derive(key_id, key_version, context, nonce)
+
+    # ------------------------------------------------------------------
+    # Scheduled rotation
+    # ------------------------------------------------------------------
+    def start(self):
+        if self.rotation_interval and self._rotator is None:
+            self._stop.clear()
+            self._rotator = threading.Thread(target=self._rotation_loop, name="kms-rotation", daemon=True)
+            self._rotator.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._rotator:
+            self._rotator.join(timeout=5)
+            self._rotator = None
+        self.cache.shutdown()
+
+    def _rotation_loop(self):
+        while not self._stop.wait(min(self.rotation_interval, 1.0)):
+            now = time.monotonic()
+            for key_id, rotated_at in list(self._last_rotation.items()):
+                if now - rotated_at >= self.rotation_interval:
+                    try:
+                        self.rotate(key_id, background=False)
+                    except KMSError:
+                        pass
+
+    def metrics(self):
+        return {
+            "cache": self.cache.stats(),
+            "derivation": self.derivation.snapshot(),
+            "derivation_iterations": self.derivation_iterations,
+            "rotation_interval_seconds": self.rotation_interval,
+            "rotation_warmup_failures": self.warmup_failures,
+            "keys": len(self._keys),
+        }
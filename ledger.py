@@ -0,0 +1,550 @@
+#!/usr/bin/env python3
+"""
+In-memory ledger for the Quantum Banking mock backend
+Holds account balances and posted transactions; every posting is
+published to the event bus for the fraud and notification consumers.
+Balances are multi-versioned so readers take snapshots instead of the write lock,
+and held as exact integer minor units of each account's currency
+"""
+
+import itertools
+import math
+import threading
+import time
+import uuid
+from bisect import bisect_right
+from collections import deque
+from datetime import datetime, timezone
+
+from currency import BASE_CURRENCY, MINOR_SCALE, CurrencyError, format_minor, from_minor, to_minor
+
+TOPIC_LEDGER_POSTINGS = "ledger.postings"
+
+# Old balance versions stay readable (as-of reads) for this many seconds
+SNAPSHOT_RETENTION_SECONDS = 300
+# Commits between garbage collection passes over the version chains
+GC_INTERVAL = 256
+
+SEED_ACCOUNTS = [
+    {"id": 1, "account_number": "QB-001-2024", "balance": 15750.50,
+     "currency": "USD", "account_type": "checking", "status": "active"},
+    {"id": 2, "account_number": "QB-002-2024", "balance": 5280.75,
+     "currency": "USD", "account_type": "savings", "status": "active"},
+]
+
+SEED_TRANSACTIONS = [
+    {"id": 1, "account_id": 1, "amount": -45.99, "currency": "USD", "description": "Coffee Shop Purchase",
+     "date": "2024-10-27T10:30:00Z", "category": "food", "status": "completed"},
+    {"id": 2, "account_id": 1, "amount": 2500.00, "currency": "USD", "description": "Salary Deposit",
+     "date": "2024-10-25T09:00:00Z", "category": "income", "status": "completed"},
+    {"id": 3, "account_id": 1, "amount": -120.00, "currency": "USD", "description": "Grocery Store",
+     "date": "2024-10-26T15:45:00Z", "category": "shopping", "status": "completed"},
+    {"id": 4, "account_id": 1, "amount": -89.99, "currency": "USD", "description": "Gas Station",
+     "date": "2024-10-24T08:20:00Z", "category": "transport", "status": "completed"},
+]
+
+
+def to_cents(amount):
+    return to_minor(amount, BASE_CURRENCY)
+
+
+def from_cents(cents):
+    return cents / 100
+
+
+def parse_as_of(value):
+    """Unix seconds or an ISO-8601 timestamp (naive means UTC) -> Unix seconds"""
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        pass
+    else:
+        if not math.isfinite(seconds):
+            raise LedgerError(f"as_of must be a finite number of Unix seconds, got {value!r}")
+        return seconds
+    try:
+        moment = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        raise LedgerError(f"as_of must be Unix seconds or an ISO-8601 timestamp, got {value!r}") from None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+class LedgerError(Exception):
+    pass
+
+
+class SnapshotTooOldError(LedgerError):
+    pass
+
+
+class _Version:
+    """One committed balance of an account; chains run newest to oldest (cents None: account gone)"""
+
+    __slots__ = ("version", "cents", "account", "older")
+
+    def __init__(self, version, cents, account, older):
+        self.version = version
+        self.cents = cents
+        self.account = account
+        self.older = older
+
+
+class _CommitLock:
+    """The ledger's write lock; whatever the holder changed becomes visible as one version on release"""
+
+    __slots__ = ("_lock", "_on_release")
+
+    def __init__(self, on_release):
+        self._lock = threading.Lock()
+        self._on_release = on_release
+
+    def __enter__(self):
+        self._lock.acquire()
+
+    def __exit__(self, *exc_info):
+        try:
+            self._on_release()
+        finally:
+            self._lock.release()
+
+
+class LedgerSnapshot:
+    """A pinned point-in-time view of every balance; close() (or leave the with block) to let GC move on"""
+
+    def __init__(self, ledger, version, committed_at, journal_length, token):
+        self.version = version
+        self.committed_at = committed_at
+        self._ledger = ledger
+        self._journal_length = journal_length
+        self._token = token
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        with self._ledger._snapshot_lock:
+            self._ledger._readers.pop(self._token, None)
+
+    def accounts(self, account_ids=None):
+        return self._ledger._accounts_at(self.version, account_ids)
+
+    def balance(self, account_id):
+        return self._ledger._balance_at(self.version, account_id)
+
+    def subtotals(self, account_ids=None):
+        return self._ledger._subtotals_at(self.version, account_ids)
+
+    def transactions(self, account_id=None):
+        # The journal is append-only, so its first journal_length entries are exactly this version's
+        txns = self._ledger._transactions[:self._journal_length]
+        if account_id is not None:
+            txns = [t for t in txns if t.get("account_id") == account_id]
+        return txns
+
+    def to_dict(self, account_ids=None):
+        accounts = self.accounts(account_ids)
+        subtotals = self.subtotals(account_ids)
+        # A plain sum only means something within one currency; mixed holdings are valued at current FX rates
+        total = subtotals.get(BASE_CURRENCY, 0)
+        if set(subtotals) - {BASE_CURRENCY}:
+            fx = self._ledger.fx
+            total = fx.current().total(subtotals, BASE_CURRENCY) if fx is not None else None
+        return {
+            "version": self.version,
+            "as_of": datetime.fromtimestamp(self.committed_at, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            "accounts": accounts,
+            "balances_by_currency": {code: format_minor(minor, code) for code, minor in sorted(subtotals.items())},
+            "total_balance": None if total is None else from_cents(total),
+            "total_currency": BASE_CURRENCY,
+        }
+
+
+class Ledger:
+    """Account balances (integer minor units) and an append-only transaction journal.
+
+    Writers mutate _balances under _lock and mark the accounts they touched in
+    _dirty; releasing the lock appends one version to each touched account's
+    chain in _heads. Latest-balance reads walk the chains without any lock;
+    snapshot() pins a version (under the small _snapshot_lock) for as-of reads
+    and multi-call views. Versions older than the oldest pinned snapshot and
+    the retention window are unlinked every GC_INTERVAL commits.
+
+    Amounts are given in the account's own currency; transfers between
+    currencies are converted at the current version of the fx rate table.
+    """
+
+    def __init__(self, bus=None, seed=True, retention=SNAPSHOT_RETENTION_SECONDS, fx=None):
+        self.bus = bus
+        self.retention = retention
+        self.fx = fx
+        self._lock = _CommitLock(self._install_versions)
+        self._accounts = {}
+        self._balances = {}
+        self._transactions = []
+        self._next_txn_id = 1
+        self._held = {}
+        self._prepared = {}
+        self._dirty = set()
+        self._heads = {}
+        # (version, account_id, node) for every node that superseded an older one, oldest first
+        self._superseded = deque()
+        self._version = 0
+        # Commit time and journal length of every version from _log_base on (versions are consecutive)
+        self._log_base = 0
+        self._commit_log = [(round(time.time(), 6), 0)]
+        self._snapshot_lock = threading.Lock()
+        self._readers = {}
+        self._reader_ids = itertools.count()
+        self._since_gc = 0
+        self._retained = 0
+        self._collected = 0
+        self._gc_runs = 0
+        if seed:
+            self._seed()
+
+    def _seed(self):
+        for txn in SEED_TRANSACTIONS:
+            self._transactions.append(dict(txn))
+            self._next_txn_id = max(self._next_txn_id, txn["id"] + 1)
+        for account in SEED_ACCOUNTS:
+            self.open_account(dict(account))
+
+    def open_account(self, account):
+        account = dict(account)
+        account.setdefault("currency", BASE_CURRENCY)
+        try:
+            balance = to_minor(account.get("balance", 0), account["currency"])
+        except CurrencyError as e:
+            raise LedgerError(str(e)) from None
+        with self._lock:
+            self._accounts[account["id"]] = account
+            self._balances[account["id"]] = balance
+            self._dirty.add(account["id"])
+        return account["id"]
+
+    def snapshot(self, as_of=None):
+        """Pin the latest committed version, or the one in effect at Unix time as_of"""
+        with self._snapshot_lock:
+            if as_of is None:
+                version = self._version
+            else:
+                index = bisect_right(self._commit_log, (as_of, float("inf"))) - 1
+                if index < 0:
+                    raise SnapshotTooOldError(f"No balances retained as of {as_of} "
+                                              f"(history is kept for {self.retention} s)")
+                version = min(self._log_base + index, self._version)
+            committed_at, journal_length = self._commit_log[version - self._log_base]
+            token = next(self._reader_ids)
+            self._readers[token] = version
+        return LedgerSnapshot(self, version, committed_at, journal_length, token)
+
+    def accounts(self, as_of=None):
+        if as_of is None:
+            return self._read_latest(self._accounts_at)
+        with self.snapshot(as_of) as snapshot:
+            return snapshot.accounts()
+
+    def currency(self, account_id):
+        account = self._accounts.get(account_id)
+        if account is None:
+            raise LedgerError(f"Unknown account: {account_id}")
+        return account["currency"]
+
+    def balance(self, account_id, as_of=None):
+        if as_of is None:
+            return self._read_latest(self._balance_at, account_id)
+        with self.snapshot(as_of) as snapshot:
+            return snapshot.balance(account_id)
+
+    def _read_latest(self, read, *args):
+        # Optimistic read without pinning: GC publishes its horizon (_log_base) before unlinking
+        # anything below it, so if the horizon is still at or below our version nothing we walked was cut
+        while True:
+            version = self._version
+            result = read(version, *args)
+            if self._log_base <= version:
+                return result
+
+    def _accounts_at(self, version, account_ids=None):
+        heads = self._heads
+        nodes = list(heads.values()) if account_ids is None else [heads.get(i) for i in account_ids]
+        accounts = []
+        for node in nodes:
+            while node is not None and node.version > version:
+                node = node.older
+            if node is not None and node.cents is not None:
+                accounts.append(dict(node.account, balance=node.cents / MINOR_SCALE[node.account["currency"]]))
+        return accounts
+
+    def _subtotals_at(self, version, account_ids=None):
+        heads = self._heads
+        nodes = list(heads.values()) if account_ids is None else [heads.get(i) for i in account_ids]
+        subtotals = {}
+        for node in nodes:
+            while node is not None and node.version > version:
+                node = node.older
+            if node is not None and node.cents is not None:
+                currency = node.account["currency"]
+                subtotals[currency] = subtotals.get(currency, 0) + node.cents
+        return subtotals
+
+    def _balance_at(self, version, account_id):
+        node = self._heads.get(account_id)
+        while node is not None and node.version > version:
+            node = node.older
+        if node is None or node.cents is None:
+            raise LedgerError(f"Unknown account: {account_id}")
+        return node.cents / MINOR_SCALE[node.account["currency"]]
+
+    def transactions(self, account_id=None):
+        with self._lock:
+            txns = list(self._transactions)
+        if account_id is not None:
+            txns = [t for t in txns if t.get("account_id") == account_id]
+        return txns
+
+    def post(self, account_id, amount, description="", category="other"):
+        """Apply a signed amount to an account and journal it; returns the transaction"""
+        cents = self._minor(account_id, amount)
+        with self._lock:
+            self._check(account_id, cents)
+            txn = self._journal(account_id, cents, description, category)
+            new_balance = self._balances[account_id]
+        self._publish(txn, new_balance)
+        return txn
+
+    def transfer(self, from_account_id, to_account_id, amount, description=""):
+        """Move a positive amount (in the source account's currency) between two accounts atomically;
+        returns both legs"""
+        cents = self._minor(from_account_id, amount)
+        if cents <= 0:
+            raise LedgerError("Transfer amount must be positive")
+        if from_account_id == to_account_id:
+            raise LedgerError("Cannot transfer to the same account")
+        transfer_id = new_transfer_id()
+        with self._lock:
+            if to_account_id not in self._balances:
+                raise LedgerError(f"Unknown account: {to_account_id}")
+            self._check(from_account_id, -cents)
+            credited, fx = self._convert(cents, from_account_id, to_account_id)
+            debit, credit = self._journal_legs([(from_account_id, -cents, description, "transfer"),
+                                                (to_account_id, credited, description, "transfer")], transfer_id)
+            if fx is not None:
+                debit["fx"] = credit["fx"] = fx
+            balances = self._balances[from_account_id], self._balances[to_account_id]
+        self._publish(debit, balances[0])
+        self._publish(credit, balances[1])
+        return {"transfer_id": transfer_id, "debit": debit, "credit": credit}
+
+    def hold(self, account_id, amount, description="", category="other", hold_id=None):
+        """Reserve a posting without applying it; capture() applies it, release() drops it"""
+        hold_id = hold_id or new_transfer_id()
+        self.prepare(hold_id, [(account_id, self._minor(account_id, amount), description, category)])
+        return hold_id
+
+    def capture(self, account_id, hold_id):
+        """Apply a held posting; returns the transaction (None if already captured or released)"""
+        legs = self.commit(hold_id)
+        for txn, balance in legs:
+            self._publish(txn, balance)
+        return legs[0][0] if legs else None
+
+    def release(self, account_id, hold_id):
+        return self.abort(hold_id)
+
+    def prepare(self, transfer_id, legs):
+        """Validate and reserve (account_id, cents, description, category) legs, or raise LedgerError"""
+        with self._lock:
+            for account_id, cents, _, _ in legs:
+                self._check(account_id, cents)
+            for account_id, cents, _, _ in legs:
+                if cents < 0:
+                    self._held[account_id] = self._held.get(account_id, 0) - cents
+            self._prepared[transfer_id] = legs
+        return True
+
+    def commit(self, transfer_id):
+        """Journal prepared legs; returns [(txn, balance cents)], empty if already resolved"""
+        with self._lock:
+            legs = self._prepared.get(transfer_id)
+            if legs is None:
+                return []
+            balances = {account_id: self._balances[account_id] for account_id, _, _, _ in legs}
+            # Journaled before the hold is dropped, so a failed commit leaves it prepared
+            txns = self._journal_legs(legs, transfer_id)
+            del self._prepared[transfer_id]
+            self._release(legs)
+            results = []
+            for (account_id, cents, _, _), txn in zip(legs, txns):
+                balances[account_id] += cents
+                results.append((txn, balances[account_id]))
+            return results
+
+    def abort(self, transfer_id):
+        with self._lock:
+            legs = self._prepared.pop(transfer_id, None)
+            if legs is not None:
+                self._release(legs)
+        return legs is not None
+
+    def in_doubt(self):
+        with self._lock:
+            return list(self._prepared)
+
+    def collect_versions(self):
+        """Unlink balance versions no snapshot can reach any more; returns how many were dropped"""
+        with self._lock:
+            return self._collect()
+
+    def version_stats(self):
+        with self._snapshot_lock:
+            pinned = list(self._readers.values())
+            oldest = self._commit_log[0][0]
+        return {
+            "version": self._version,
+            "oldest_version": self._log_base,
+            "oldest_as_of": oldest,
+            "retention_seconds": self.retention,
+            "retained_versions": self._retained,
+            "collected_versions": self._collected,
+            "gc_runs": self._gc_runs,
+            "open_snapshots": len(pinned),
+            "oldest_pinned_version": min(pinned, default=None),
+        }
+
+    # Caller holds self._lock for the helpers below
+    def _install_versions(self):
+        if not self._dirty:
+            return
+        version = self._version + 1
+        for account_id in self._dirty:
+            self._heads[account_id] = head = _Version(version, self._balances.get(account_id),
+                                                      self._accounts.get(account_id), self._heads.get(account_id))
+            if head.older is not None or head.cents is None:
+                self._superseded.append((version, account_id, head))
+        self._retained += len(self._dirty)
+        self._dirty.clear()
+        # Heads first, then the log entry, then the version number: a reader can only pin complete versions
+        # Whole microseconds, so the ISO as_of in LedgerSnapshot.to_dict() reads back the same version
+        self._commit_log.append((max(round(time.time(), 6), self._commit_log[-1][0]), len(self._transactions)))
+        self._version = version
+        self._since_gc += 1
+        if self._since_gc >= GC_INTERVAL:
+            self._collect()
+
+    def _collect(self):
+        self._since_gc = 0
+        self._gc_runs += 1
+        with self._snapshot_lock:
+            horizon = min(self._readers.values(), default=self._version)
+            # The version in effect retention seconds ago must stay readable
+            cutoff = bisect_right(self._commit_log, (time.time() - self.retention, float("inf"))) - 1
+            horizon = min(horizon, self._log_base + max(cutoff, 0))
+            del self._commit_log[:horizon - self._log_base]
+            self._log_base = horizon
+        # A node at or below the horizon is what every pinned version sees, so whatever it superseded can go;
+        # each superseded version is unlinked exactly once, oldest first
+        dropped = 0
+        superseded = self._superseded
+        while superseded and superseded[0][0] <= horizon:
+            _, account_id, node = superseded.popleft()
+            if node.older is not None:
+                node.older = None
+                dropped += 1
+            if node.cents is None and self._heads.get(account_id) is node:
+                del self._heads[account_id]
+                dropped += 1
+        self._retained -= dropped
+        self._collected += dropped
+        return dropped
+
+    def _minor(self, account_id, amount):
+        account = self._accounts.get(account_id)
+        return to_minor(amount, BASE_CURRENCY if account is None else account["currency"])
+
+    def _convert(self, cents, from_account_id, to_account_id):
+        """(credited minor units, fx details or None) for moving cents out of one account into another"""
+        source = self._accounts[from_account_id]["currency"]
+        target = self._accounts[to_account_id]["currency"]
+        if source == target:
+            return cents, None
+        if self.fx is None:
+            raise LedgerError(f"No FX rates configured for a {source} to {target} transfer")
+        rates = self.fx.current()
+        try:
+            credited = rates.convert(cents, source, target)
+        except CurrencyError as e:
+            raise LedgerError(str(e)) from None
+        if credited <= 0:
+            raise LedgerError(f"Transfer amount is below one minor unit of {target}")
+        return credited, {"pair": f"{source}/{target}", "rate": str(rates.cross_rate(source, target)),
+                          "rate_version": rates.version}
+
+    def _available(self, account_id):
+        return self._balances[account_id] - self._held.get(account_id, 0)
+
+    def _release(self, legs):
+        for account_id, cents, _, _ in legs:
+            if cents < 0:
+                remaining = self._held[account_id] + cents
+                if remaining:
+                    self._held[account_id] = remaining
+                else:
+                    del self._held[account_id]
+
+    def _check(self, account_id, cents):
+        if account_id not in self._balances:
+            raise LedgerError(f"Unknown account: {account_id}")
+        if cents < 0 and self._available(account_id) + cents < 0:
+            raise LedgerError("Insufficient funds")
+
+    def _next_id(self):
+        txn_id = self._next_txn_id
+        self._next_txn_id += 1
+        return txn_id
+
+    def _journal(self, account_id, cents, description, category, transfer_id=None):
+        return self._journal_legs([(account_id, cents, description, category)], transfer_id)[0]
+
+    def _journal_legs(self, legs, transfer_id=None):
+        # Every entry is built before any balance changes, so a leg that fails leaves the ledger as it was
+        date = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        txns = []
+        for account_id, cents, description, category in legs:
+            currency = self._accounts[account_id]["currency"]
+            txn = {
+                "id": None,
+                "account_id": account_id,
+                "amount": from_minor(cents, currency),
+                "currency": currency,
+                "description": description,
+                "date": date,
+                "category": category,
+                "status": "completed",
+            }
+            if transfer_id is not None:
+                txn["transfer_id"] = transfer_id
+            txns.append(txn)
+        for (account_id, cents, _, _), txn in zip(legs, txns):
+            txn["id"] = self._next_id()
+            self._balances[account_id] += cents
+            self._dirty.add(account_id)
+            self._transactions.append(txn)
+        return txns
+
+    def _publish(self, txn, balance_cents):
+        if self.bus is not None:
+            self.bus.publish(TOPIC_LEDGER_POSTINGS, txn["account_id"], {
+                "transaction": txn,
+                "balance": from_minor(balance_cents, txn["currency"]),
+                "posted_at": time.time(),
+            })
+
+
+def new_transfer_id():
+    return uuid.uuid4().hex[:20]
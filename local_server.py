@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+In-process mock backend for tests and benchmarks
+Serves mock_backend on a free localhost port with request logging muted,
+optionally swapping module globals (stores, hubs, stubs) while it runs
+"""
+
+import http.client
+import json
+import threading
+
+
+class Reply:
+    __slots__ = ("status", "headers", "body")
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class LocalServer:
+    """mock_backend on ('localhost', 0); keyword arguments replace mock_backend globals until exit"""
+
+    def __init__(self, **overrides):
+        self.overrides = overrides
+        self.server = None
+        self.port = None
+
+    def __enter__(self):
+        import mock_backend
+        self.mb = mock_backend
+        self._previous = {name: getattr(mock_backend, name) for name in self.overrides}
+        self._previous_log = mock_backend.MockBankingHandler.log_message
+        for name, value in self.overrides.items():
+            setattr(mock_backend, name, value)
+        mock_backend.MockBankingHandler.log_message = lambda *args: None
+        self.server = mock_backend.MockBankingServer(('localhost', 0), mock_backend.MockBankingHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.port = self.server.server_address[1]
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        self.mb.MockBankingHandler.log_message = self._previous_log
+        for name, value in self._previous.items():
+            setattr(self.mb, name, value)
+
+    def request(self, method, path, body=None, headers=None, timeout=10):
+        """One request on a fresh connection; dict and list bodies are sent as JSON"""
+        headers = dict(headers or {})
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body)
+            headers.setdefault("Content-Type", "application/json")
+        conn = http.client.HTTPConnection('localhost', self.port, timeout=timeout)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            return Reply(response.status, response.headers, response.read())
+        finally:
+            conn.close()
+
+    def call(self, method, path, body=None, **kwargs):
+        """(status, decoded JSON body)"""
+        reply = self.request(method, path, body, **kwargs)
+        return reply.status, reply.json()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Lightweight in-process latency metrics for the Quantum Banking mock backend
+Bounded sample windows with percentile and throughput snapshots
+"""
+
+import threading
+import time
+from collections import deque
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, int(round(pct / 100.0 * len(sorted_samples))) - 1))
+    return sorted_samples[index]
+
+
+class LatencyStats:
+    """Recent latency samples (seconds) for one operation.
+
+    Keeps at most window_size samples so memory stays constant; ops/sec is
+    the samples recorded in the last rate_window seconds divided by the time
+    they span, from the start of the first to the end of the last. A batch
+    recorded in one go therefore counts over its own duration, and the rate
+    does not decay while the operation is idle.
+    """
+
+    def __init__(self, window_size=4096, rate_window=60.0):
+        self.rate_window = rate_window
+        self._samples = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._samples.append((now, seconds))
+            self.count += 1
+            self.total += seconds
+
+    def record_many(self, durations, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for seconds in durations:
+                self._samples.append((now, seconds))
+                self.total += seconds
+            self.count += len(durations)
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self._lock:
+            samples = list(self._samples)
+            count, total = self.count, self.total
+        latencies = sorted(s for _, s in samples)
+        recent = [(t, s) for t, s in samples if now - t <= self.rate_window]
+        span = (max(t for t, _ in recent) - min(t - s for t, s in recent)) if recent else 0.0
+        return {
+            "count": count,
+            "avg_ms": (total / count * 1000) if count else 0.0,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "max_ms": (latencies[-1] * 1000) if latencies else 0.0,
+            "ops_per_sec": (len(recent) / span) if span > 0 else 0.0,
+        }
+
+
+class MetricsRegistry:
+    """Named LatencyStats created on first use"""
+
+    def __init__(self, **stats_kwargs):
+        self._stats_kwargs = stats_kwargs
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        stats = self._stats.get(name)
+        if stats is None:
+            with self._lock:
+                stats = self._stats.setdefault(name, LatencyStats(**self._stats_kwargs))
+        return stats
+
+    def record(self, name, seconds):
+        self.get(name).record(seconds)
+
+    def snapshot(self):
+        return {name: stats.snapshot() for name, stats in list(self._stats.items())}
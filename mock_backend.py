@@ -4,96 +4,285 @@
 Provides basic API endpoints for development without Docker
 """
 
+import base64
+import hashlib
+import hmac
+import io
 import json
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import os
+import secrets
+import signal
+import sys
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import threading
 import time
 
+from crypto_pipeline import CryptoPipeline, canonical_bytes
+from currency import BASE_CURRENCY, CurrencyError, FxRateTable, format_minor, from_minor, to_minor
+from debug_tools import ProfilerControl, ProfilerStateError, check_format, memory_report, set_tracemalloc, thread_report
+from event_bus import EventBus
+from fault_injection import FaultInjector, FaultProfileError, INJECTED_ERROR
+from event_consumers import FraudConsumer, NotificationConsumer, FraudAlertNotificationConsumer, TOPIC_FRAUD_ALERTS
+from kms import KeyManagementService, DataKeyCache, KMSError, NONCE_BYTES
+from ledger import Ledger, LedgerError, SnapshotTooOldError, parse_as_of
+from notification_hub import NotificationHub
+from password_hasher import PasswordHasher, HasherBusyError
+from payments import PAYMENT_SAGA, PaymentFlow, parse_timeouts
+from route_table import HotRouteTable, DEFAULT_DIRECTORY
+from saga import COMPLETED as SAGA_COMPLETED, SagaLog, SagaOrchestrator
+from screening import DEFAULT_LISTS, Screener
+from sharded_ledger import ShardedLedger, TransferInDoubtError
+from statements import COMPLETED as JOB_COMPLETED, StatementError, StatementQueue, StatementQueueFullError, \
+    UnknownAccountError
+from tracing import Tracer, BatchSpanExporter, NOOP_TRACE
+from user_store import UserStore, UserStoreError, DuplicateEmailError, DuplicateCredentialError, InvalidUserError
+from verification_stage import VerificationStage
+from webauthn_challenges import ChallengeStore
+
+# Shared SSE fan-out hub for /api/v1/notifications/stream
+notification_hub = NotificationHub()
+# Embedded stand-in for Kafka; ledger postings feed the fraud and notification consumers
+event_bus = EventBus()
+# Versioned FX rates for cross-currency transfers and portfolio totals; FX_RATES_FILE is {"base": ..., "rates": {...}}
+fx_rates_config = {}
+if os.environ.get('FX_RATES_FILE'):
+    with open(os.environ['FX_RATES_FILE']) as fx_rates_json:
+        fx_rates_config = json.load(fx_rates_json)
+fx_rates = FxRateTable(fx_rates_config.get('rates'), fx_rates_config.get('base', BASE_CURRENCY),
+                       history=int(os.environ.get('FX_RATE_HISTORY', 100)))
+# LEDGER_SHARDS > 0 spreads accounts over that many ledger worker processes behind a router
+ledger_shards = int(os.environ.get('LEDGER_SHARDS', 0))
+# The in-process ledger keeps old balance versions this long for ?as_of= reads
+ledger = ShardedLedger(event_bus, shards=ledger_shards) if ledger_shards else \
+    Ledger(event_bus, retention=float(os.environ.get('LEDGER_SNAPSHOT_RETENTION', 300)), fx=fx_rates)
+fraud_consumer = FraudConsumer(event_bus, fx=fx_rates)
+consumers = [
+    fraud_consumer,
+    NotificationConsumer(event_bus, notification_hub),
+    FraudAlertNotificationConsumer(event_bus, notification_hub),
+]
+# Signing/KEM pipeline behind /api/v1/pqc/status and optional transaction signing
+crypto_pipeline = CryptoPipeline(workers=int(os.environ.get('PQC_WORKERS', 4)))
+sign_transactions = os.environ.get('PQC_SIGN_TRANSACTIONS', 'false').lower() == 'true'
+transaction_public_key, transaction_signing_key = crypto_pipeline.generate_signing_keypair()
+# Incoming client signatures are verified in micro-batches before reaching the ledger
+require_signatures = os.environ.get('PQC_REQUIRE_SIGNATURES', 'false').lower() == 'true'
+verification_stage = VerificationStage(
+    crypto_pipeline,
+    max_batch_size=int(os.environ.get('PQC_VERIFY_MAX_BATCH', 64)),
+    max_latency=float(os.environ.get('PQC_VERIFY_MAX_LATENCY_MS', 2)) / 1000
+)
+# Seconds a request waits for its signature verdicts before giving up with 503
+verification_timeout = float(os.environ.get('PQC_VERIFY_TIMEOUT', 10))
+VERIFY_BUSY_RESPONSE = {"error": "Signature verification is busy, please retry shortly", "code": "SERVICE_BUSY"}
+
+# Users indexed by ID, case-folded email and WebAuthn credential ID
+user_store = UserStore()
+demo_user = user_store.register("demo@quantumbank.com", "Demo", "User", kyc_status="verified")
+demo_user.last_login = "2024-10-27T10:30:00Z"
+# The credential the challenge endpoint advertises for users without one of their own
+user_store.add_credential(demo_user.id, "mock_credential_id")
+if int(os.environ.get('USER_STORE_SEED_COUNT', 0)):
+    user_store.bulk_seed(int(os.environ['USER_STORE_SEED_COUNT']))
+
+# scrypt/PBKDF2 runs in a worker pool; a full queue sheds auth requests with 503
+password_hasher = PasswordHasher(
+    workers=int(os.environ.get('PASSWORD_HASH_WORKERS', 0)) or None,
+    max_queue=int(os.environ.get('PASSWORD_HASH_MAX_QUEUE', 64)),
+    algorithm=os.environ.get('PASSWORD_HASH_ALGORITHM', 'scrypt'),
+    cost=int(os.environ['PASSWORD_HASH_COST']) if os.environ.get('PASSWORD_HASH_COST') else None
+)
+password_hash_target_ms = float(os.environ.get('PASSWORD_HASH_TARGET_MS', 0))
+AUTH_BUSY_RESPONSE = {"error": "Authentication is busy, please retry shortly", "code": "SERVICE_BUSY"}
+
+# Static mock responses loaded from mock_routes/ and reloaded when the files change
+mock_routes = HotRouteTable(
+    os.environ.get('MOCK_ROUTES_DIR', DEFAULT_DIRECTORY),
+    poll_interval=float(os.environ.get('MOCK_ROUTES_POLL_INTERVAL', 0.5))
+)
+mock_routes.reload()
+
+# Latency/fault profiles for the downstream service stubs; delayed responses leave the worker thread
+fault_injector = FaultInjector(
+    os.environ.get('FAULT_PROFILES_FILE',
+                   os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fault_profiles.json')),
+    profile=os.environ.get('FAULT_PROFILE') or None
+)
+
+# Sanctions/watchlist index behind /api/v1/compliance/screen and the payment saga's compliance step;
+# SANCTIONS_LISTS is a path-separated list of CSV files or directories of them
+screener = Screener(threshold=float(os.environ.get('SANCTIONS_FUZZY_THRESHOLD', 0.8)))
+screener.load_files(
+    [p for p in os.environ.get('SANCTIONS_LISTS', str(DEFAULT_LISTS)).split(os.pathsep) if p],
+    synthetic=int(os.environ.get('SANCTIONS_SYNTHETIC_ENTRIES', 0)),
+    measure_memory=True
+)
+
+# Statement documents are built off the request threads; identical requests share a job, results are cached
+statement_queue = StatementQueue(
+    ledger,
+    workers=int(os.environ.get('STATEMENT_WORKERS', 2)),
+    max_queue=int(os.environ.get('STATEMENT_MAX_QUEUE', 1000)),
+    cache_size=int(os.environ.get('STATEMENT_CACHE_SIZE', 256)),
+    open_period_ttl=float(os.environ.get('STATEMENT_OPEN_PERIOD_TTL', 60))
+)
+
+# Payment saga behind POST /api/v1/transactions: funds hold, fraud and compliance run in parallel, then
+# post, audit and notify; the state log (when set) lets a restarted server finish or undo cut-off payments
+saga_orchestrator = SagaOrchestrator(
+    SagaLog(os.environ.get('PAYMENT_SAGA_LOG') or None,
+            fsync=os.environ.get('PAYMENT_SAGA_FSYNC', 'false').lower() == 'true'),
+    workers=int(os.environ.get('PAYMENT_SAGA_WORKERS', 16))
+)
+saga_orchestrator.register(PaymentFlow(ledger, event_bus, downstream=fault_injector, screen=screener.matches,
+                                       timeouts=parse_timeouts(os.environ.get('PAYMENT_STEP_TIMEOUTS_MS')),
+                                       fx=fx_rates).definition())
+SAGA_FAILURE_STATUS = {"STEP_TIMEOUT": 504, "STEP_ERROR": 502}
+
+# Per-request traces (traceparent in/out); head-sampled or slow/failed requests are exported in batches
+tracer = Tracer(
+    BatchSpanExporter(os.environ.get('TRACE_EXPORT_FILE') or None,
+                      flush_interval=float(os.environ.get('TRACE_EXPORT_INTERVAL', 1.0))),
+    sample_rate=float(os.environ.get('TRACE_SAMPLE_RATE', 0.01)),
+    tail_latency=float(os.environ.get('TRACE_TAIL_LATENCY_MS', 500) or 0) / 1000 or None,
+    enabled=os.environ.get('TRACING_ENABLED', 'true').lower() == 'true'
+)
+
+# Admin-only /debug/ endpoints (live profiling, thread/queue/memory state); off unless enabled
+debug_endpoints_enabled = os.environ.get('DEBUG_ENDPOINTS_ENABLED', 'false').lower() == 'true'
+debug_admin_token = os.environ.get('DEBUG_ADMIN_TOKEN') or (secrets.token_urlsafe(24) if debug_endpoints_enabled else None)
+profiler = ProfilerControl(max_seconds=int(os.environ.get('DEBUG_PROFILE_MAX_SECONDS', 120)))
+
+# One-time WebAuthn challenges
+webauthn_challenges = ChallengeStore(
+    ttl=float(os.environ.get('WEBAUTHN_CHALLENGE_TTL', 120)),
+    max_outstanding=int(os.environ.get('WEBAUTHN_MAX_OUTSTANDING_CHALLENGES', 100000))
+)
+
+def extract_webauthn_challenge(body):
+    """Challenge from the request body, or from a credential's clientDataJSON"""
+    if body.get("challenge"):
+        return body["challenge"]
+    response = body.get("response")
+    client_data = response.get("clientDataJSON") if isinstance(response, dict) else None
+    if not isinstance(client_data, str) or not client_data:
+        return None
+    try:
+        decoded = base64.urlsafe_b64decode(client_data + '=' * (-len(client_data) % 4))
+        return json.loads(decoded).get("challenge")
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+def transaction_payload(body):
+    """Fields covered by a client transaction signature"""
+    return {field: body.get(field) for field in ("account_id", "amount", "description", "category")}
+
+# Data keys for field-level encryption, cached per (key, version, context)
+kms = KeyManagementService(
+    cache=DataKeyCache(
+        max_entries=int(os.environ.get('KMS_CACHE_SIZE', 10000)),
+        ttl=float(os.environ.get('KMS_CACHE_TTL', 300)),
+        max_uses=int(os.environ['KMS_DATA_KEY_MAX_USES']) if os.environ.get('KMS_DATA_KEY_MAX_USES') else None
+    ),
+    derivation_iterations=int(os.environ.get('KMS_DERIVATION_ITERATIONS', 20000)),
+    rotation_interval=float(os.environ['KMS_ROTATION_INTERVAL']) if os.environ.get('KMS_ROTATION_INTERVAL') else None
+)
+for key_id in ('pii-fields', 'transactions'):
+    kms.create_key(key_id)
+KMS_KEY_ID_INVALID = {"error": "key_id must be a non-empty string", "code": "VALIDATION_ERROR"}
+
+class MockBankingServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # SSE clients reconnect in bursts; the default backlog of 5 drops most of them
+    request_queue_size = 4096
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._detached_requests = set()
+
+    def detach_request(self, request):
+        """Keep a connection open after its handler returns (ownership moves elsewhere)"""
+        self._detached_requests.add(request)
+
+    def shutdown_request(self, request):
+        if request in self._detached_requests:
+            self._detached_requests.discard(request)
+            return
+        super().shutdown_request(request)
+
 class MockBankingHandler(BaseHTTPRequestHandler):
+    # FaultPlan for the request being handled, set by inject_fault()
+    fault = None
+    # Trace for the request being handled, started once the request line and headers are parsed
+    trace = NOOP_TRACE
+    # (RequestProfiler, cProfile.Profile) while a cProfile debug session covers this request
+    profile = None
+
+    def handle_one_request(self):
+        self.trace = NOOP_TRACE
+        self.profile = None
+        try:
+            super().handle_one_request()
+        finally:
+            self.trace.finish()
+            if self.profile is not None:
+                request_profiler, profile = self.profile
+                request_profiler.finish(profile)
+
+    def parse_request(self):
+        start_ns = time.time_ns()
+        # Profiling starts here rather than in handle_one_request so keep-alive idle time is left out
+        request_profiler = profiler.request_profiler
+        if request_profiler is not None:
+            self.profile = request_profiler, request_profiler.begin()
+        if not super().parse_request():
+            return False
+        self.trace = tracer.start(f"{self.command} {urlparse(self.path).path}",
+                                  self.headers.get('traceparent'), start_ns)
+        return True
+
     def do_GET(self):
         path = urlparse(self.path).path
         query_params = parse_qs(urlparse(self.path).query)
         
-        # Handle CORS preflight
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
-        self.end_headers()
+        if path == '/api/v1/notifications/stream':
+            self.handle_notification_stream()
+            return
+        if path.startswith('/debug/') and self.handle_debug('GET', path, query_params, {}):
+            return
+        self.trace.phase("route")
+        if self.inject_fault('GET', path) or self.send_fixture('GET', path):
+            return
+        self.trace.phase("logic")
         
         # Route handling
         if path == '/api/v1/health':
             response = {"status": "healthy", "service": "mock-backend", "timestamp": time.time()}
         elif path == '/api/v1/auth/me/' or path == '/api/v1/auth/me':
-            response = {
-                "id": "1",
-                "email": "demo@quantumbank.com",
-                "firstName": "Demo",
-                "lastName": "User",
-                "kycStatus": "verified",
-                "isActive": True,
-                "lastLogin": "2024-10-27T10:30:00Z"
-            }
-        elif path == '/api/v1/accounts/' or path == '/api/v1/accounts':
-            response = [
-                {
-                    "id": 1,
-                    "account_number": "QB-001-2024",
-                    "balance": 15750.50,
-                    "currency": "USD",
-                    "account_type": "checking",
-                    "status": "active"
-                },
-                {
-                    "id": 2,
-                    "account_number": "QB-002-2024", 
-                    "balance": 5280.75,
-                    "currency": "USD",
-                    "account_type": "savings",
-                    "status": "active"
-                }
-            ]
+            response = demo_user.to_dict()
+        elif path == '/api/v1/users/stats':
+            response = user_store.stats()
+        elif path == '/api/v1/auth/password-hashing/stats':
+            response = password_hasher.stats()
+        elif path in ('/api/v1/accounts/', '/api/v1/accounts', '/api/v1/accounts/snapshot'):
+            status, response = self.read_accounts(query_params)
+            if status != 200:
+                self.send_json(response, status)
+                return
+            if path != '/api/v1/accounts/snapshot':
+                response = response["accounts"]
+        elif path == '/api/v1/accounts/portfolio':
+            status, response = self.portfolio_value(query_params)
+            if status != 200:
+                self.send_json(response, status)
+                return
         elif path.startswith('/api/v1/accounts/transactions'):
             # Handle paginated transactions
             page = int(query_params.get('page', [1])[0])
             per_page = int(query_params.get('per_page', [10])[0])
             
-            all_transactions = [
-                {
-                    "id": 1,
-                    "amount": -45.99,
-                    "description": "Coffee Shop Purchase",
-                    "date": "2024-10-27T10:30:00Z",
-                    "category": "food",
-                    "status": "completed"
-                },
-                {
-                    "id": 2,
-                    "amount": 2500.00,
-                    "description": "Salary Deposit",
-                    "date": "2024-10-25T09:00:00Z",
-                    "category": "income",
-                    "status": "completed"
-                },
-                {
-                    "id": 3,
-                    "amount": -120.00,
-                    "description": "Grocery Store",
-                    "date": "2024-10-26T15:45:00Z",
-                    "category": "shopping",
-                    "status": "completed"
-                },
-                {
-                    "id": 4,
-                    "amount": -89.99,
-                    "description": "Gas Station",
-                    "date": "2024-10-24T08:20:00Z",
-                    "category": "transport",
-                    "status": "completed"
-                }
-            ]
+            all_transactions = ledger.transactions()
             
             start_idx = (page - 1) * per_page
             end_idx = start_idx + per_page
@@ -105,12 +294,6 @@ def do_GET(self):
                 "next": f"/api/v1/accounts/transactions/?page={page + 1}&per_page={per_page}" if end_idx < len(all_transactions) else None,
                 "previous": f"/api/v1/accounts/transactions/?page={page - 1}&per_page={per_page}" if page > 1 else None
             }
-        elif path.startswith('/api/v1/accounts/quick-actions'):
-            response = [
-                {"id": "transfer", "name": "Transfer Money", "icon": "arrow-right"},
-                {"id": "pay", "name": "Pay Bills", "icon": "credit-card"},
-                {"id": "deposit", "name": "Mobile Deposit", "icon": "camera"}
-            ]
         elif path == '/api/v1/transactions':
             response = {
                 "transactions": [
@@ -133,57 +316,133 @@ def do_GET(self):
                 ]
             }
         elif path == '/api/v1/pqc/status':
+            if not crypto_pipeline.metrics.get('encapsulate').count:
+                crypto_pipeline.probe()
+            pqc_status = crypto_pipeline.status()
+            operations = pqc_status["operations"]
             response = {
                 "pqc_enabled": True,
-                "algorithms": {
-                    "key_encapsulation": "Kyber-768",
-                    "digital_signature": "Dilithium-3"
-                },
+                "provider": pqc_status["provider"],
+                "algorithms": pqc_status["algorithms"],
                 "performance": {
-                    "avg_encryption_time": "2.3ms",
-                    "avg_decryption_time": "1.8ms"
-                }
+                    "avg_encryption_time": f"{operations['encapsulate']['avg_ms']:.3f}ms",
+                    "avg_decryption_time": f"{operations['decapsulate']['avg_ms']:.3f}ms",
+                    "operations": operations
+                },
+                "transaction_signing": sign_transactions,
+                "workers": pqc_status["workers"],
+                "verification_stage": verification_stage.stats()
             }
         elif path.startswith('/api/v1/auth/webauthn/challenge'):
             # Handle WebAuthn challenge requests
             challenge_type = query_params.get('type', ['login'])[0]
+            challenge, expires_at = webauthn_challenges.issue(
+                'register' if challenge_type == 'register' else 'login',
+                query_params.get('user_id', [None])[0]
+            )
             response = {
-                "challenge": "mock_challenge_12345",
+                "challenge": challenge,
+                "timeout": int(webauthn_challenges.ttl * 1000),
+                "expiresAt": expires_at,
                 "rpId": "localhost",
                 "allowCredentials": [] if challenge_type == 'register' else [
-                    {
-                        "id": "mock_credential_id",
-                        "type": "public-key"
-                    }
+                    {"id": credential_id, "type": "public-key"}
+                    for credential_id in (getattr(user_store.get(query_params.get('user_id', [None])[0]),
+                                                  'credential_ids', None) or ("mock_credential_id",))
                 ]
             }
         # Handle service health checks
         elif path.endswith('/health/auth') or path.endswith('/health'):
             response = {"status": "healthy", "service": "mock-service"}
         # Handle missing endpoints that frontend expects
-        elif path.startswith('/api/v1/pqc/') or path.startswith('/api/v1/kms/'):
+        elif path == '/api/v1/kms/keys':
+            response = {"keys": kms.list_keys()}
+        elif path.startswith('/api/v1/kms/keys/'):
+            try:
+                response = kms.describe_key(path[len('/api/v1/kms/keys/'):].strip('/'))
+            except KMSError as e:
+                self.send_json({"error": str(e), "code": "KEY_NOT_FOUND"}, 404)
+                return
+        elif path == '/api/v1/kms/metrics':
+            response = kms.metrics()
+        elif path.startswith('/api/v1/kms/'):
+            response = {
+                "pqc_enabled": True,
+                "algorithms": {"kyber": "768", "dilithium": "3"},
+                "status": "operational",
+                "keys": len(kms.list_keys()),
+                "cache_hit_rate": kms.cache.stats()["hit_rate"]
+            }
+        elif path.startswith('/api/v1/pqc/'):
             response = {
                 "pqc_enabled": True,
                 "algorithms": {"kyber": "768", "dilithium": "3"},
                 "status": "operational"
             }
+        elif path.startswith('/api/v1/events/stats'):
+            response = event_bus.stats()
+        elif path == '/api/v1/payments/sagas':
+            response = saga_orchestrator.stats()
+        elif path == '/api/v1/compliance/screening':
+            response = screener.stats()
         elif path.startswith('/api/v1/fraud/'):
-            response = {"risk_level": "low", "score": 0.1, "alerts": []}
-        elif path.startswith('/api/v1/compliance/'):
-            response = {"status": "compliant", "kyc_status": "verified"}
-        elif path.startswith('/api/v1/notifications/'):
-            response = {"notifications": [], "unread_count": 0}
+            alerts = list(fraud_consumer.alerts)
+            response = {
+                "risk_level": alerts[-1]["risk_level"] if alerts else "low",
+                "score": alerts[-1]["score"] if alerts else 0.1,
+                "alerts": alerts
+            }
+        elif path == '/api/v1/routes/status':
+            response = mock_routes.status()
+        elif path == '/api/v1/faults':
+            response = fault_injector.status()
+        elif path == '/api/v1/ledger/shards':
+            response = ledger.stats() if ledger_shards else {"sharded": False, "shards": 1}
+        elif path == '/api/v1/statements/stats':
+            response = statement_queue.stats()
+        elif path.startswith('/api/v1/statements/jobs/'):
+            job_id, _, rest = path[len('/api/v1/statements/jobs/'):].strip('/').partition('/')
+            job = statement_queue.get(job_id)
+            if job is None or rest not in ('', 'result'):
+                self.send_json({"error": "Statement job not found", "code": "JOB_NOT_FOUND"}, 404)
+                return
+            if rest == 'result':
+                if job.status != JOB_COMPLETED:
+                    self.send_json(dict(job.to_dict(), error=job.error or "Statement is not ready yet",
+                                        code="STATEMENT_NOT_READY"), 409)
+                else:
+                    self.send_body(job.document, content_type=job.content_type)
+                return
+            response = self.statement_job(job)
+        elif path == '/api/v1/ledger/versions':
+            response = {"mvcc": False} if ledger_shards else dict(ledger.version_stats(), mvcc=True)
+        elif path == '/api/v1/fx/rates':
+            version = query_params.get('version', [None])[0]
+            try:
+                version = None if version is None else int(version)
+            except ValueError:
+                self.send_json({"error": "version must be an integer", "code": "VALIDATION_ERROR"}, 400)
+                return
+            try:
+                rates = fx_rates.current() if version is None else fx_rates.get(version)
+            except CurrencyError as e:
+                self.send_json({"error": str(e), "code": "FX_VERSION_NOT_FOUND"}, 404)
+                return
+            response = rates.describe(matrix=query_params.get('matrix', ['false'])[0].lower() == 'true')
+        elif path == '/api/v1/traces':
+            response = dict(tracer.stats(), recent=tracer.exporter.recent_trace_ids())
+        elif path.startswith('/api/v1/traces/'):
+            spans = tracer.exporter.get_trace(path[len('/api/v1/traces/'):].strip('/'))
+            if spans is None:
+                self.send_json({"error": "Trace not found or not sampled", "code": "TRACE_NOT_FOUND"}, 404)
+                return
+            response = {"spans": spans}
         else:
             # Properly return 404 for unknown endpoints
-            self.send_response(404)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            response = {"error": "Endpoint not found", "path": path}
-            self.wfile.write(json.dumps(response).encode())
+            self.send_json({"error": "Endpoint not found", "path": path}, 404)
             return
             
-        self.wfile.write(json.dumps(response).encode())
+        self.send_json(response)
     
     def do_POST(self):
         content_length = int(self.headers.get('Content-Length', 0))
@@ -195,57 +454,73 @@ def do_POST(self):
             request_body = {}
         
         path = urlparse(self.path).path
+        if path.startswith('/debug/') and self.handle_debug('POST', path, parse_qs(urlparse(self.path).query),
+                                                            request_body if isinstance(request_body, dict) else {}):
+            return
+        self.trace.phase("route")
+        if self.inject_fault('POST', path) or self.send_fixture('POST', path):
+            return
+        self.trace.phase("logic")
         
-        # Handle CORS
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
-        self.end_headers()
+        status = 200
         
         # Route handling
         if path == '/api/v1/auth/oauth2/token/' or path == '/api/v1/auth/login':
-            response = {
-                "user": {
-                    "id": "1",
-                    "email": request_body.get("email", "demo@quantumbank.com"),
-                    "firstName": "Demo",
-                    "lastName": "User",
-                    "kycStatus": "verified",
-                    "isActive": True,
-                    "lastLogin": "2024-10-27T10:30:00Z"
-                },
-                "token": "mock_jwt_token_12345"
-            }
+            user = user_store.get_by_email(request_body.get("email", demo_user.email))
+            password = str(request_body.get("password", ""))
+            try:
+                # Seeded/demo users have no password; unknown users still pay for one verification
+                valid = (user is not None and user.password_hash is None) or \
+                    password_hasher.verify(password, user.password_hash if user else None)
+            except HasherBusyError:
+                valid = None
+            if valid is None:
+                status, response = 503, AUTH_BUSY_RESPONSE
+            elif not valid or not user.is_active:
+                status = 401
+                response = {"error": "Invalid email or password", "code": "INVALID_CREDENTIALS"}
+            else:
+                response = {
+                    "user": user.to_dict(),
+                    "token": f"mock_jwt_token_{user.id}"
+                }
+                user_store.update_last_login(user.id, time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()))
         elif path == '/api/v1/auth/register/' or path == '/api/v1/auth/register':
             # Handle user registration
-            print(f"📝 Registration request: {request_body}")
+            print(f"📝 Registration request: { {k: v for k, v in request_body.items() if k != 'password'} }")
             
             # Validate required fields
             required_fields = ['email', 'password', 'firstName', 'lastName']
             missing_fields = [field for field in required_fields if not request_body.get(field)]
             
             if missing_fields:
-                self.send_response(400)
+                status = 400
                 response = {
                     "error": f"Missing required fields: {', '.join(missing_fields)}",
                     "code": "VALIDATION_ERROR"
                 }
+            elif user_store.get_by_email(request_body["email"]) is not None:
+                status = 409
+                response = {"error": "An account with this email already exists", "code": "EMAIL_EXISTS"}
             else:
-                response = {
-                    "user": {
-                        "id": "2",
-                        "email": request_body.get("email"),
-                        "firstName": request_body.get("firstName"),
-                        "lastName": request_body.get("lastName"),
-                        "kycStatus": "pending",
-                        "isActive": True,
-                        "lastLogin": None
-                    },
-                    "token": "mock_jwt_token_67890"
-                }
-                print(f"✅ Registration successful for: {request_body.get('email')}")
+                try:
+                    password_hash = password_hasher.hash(str(request_body["password"]))
+                    user = user_store.register(request_body["email"], request_body["firstName"],
+                                               request_body["lastName"], password_hash)
+                except HasherBusyError:
+                    status, response = 503, AUTH_BUSY_RESPONSE
+                except DuplicateEmailError:
+                    status = 409
+                    response = {"error": "An account with this email already exists", "code": "EMAIL_EXISTS"}
+                except InvalidUserError as e:
+                    status = 400
+                    response = {"error": str(e), "code": "VALIDATION_ERROR"}
+                else:
+                    response = {
+                        "user": user.to_dict(),
+                        "token": f"mock_jwt_token_{user.id}"
+                    }
+                    print(f"✅ Registration successful for: {user.email} (id {user.id})")
         elif path == '/api/v1/auth/refresh/' or path == '/api/v1/auth/refresh':
             response = {
                 "token": "mock_refreshed_jwt_token_12345"
@@ -254,30 +529,531 @@ def do_POST(self):
             response = {"message": "Successfully logged out"}
         elif path.startswith('/api/v1/auth/webauthn/verify'):
             # Handle WebAuthn verification
-            response = {
-                "user": {
-                    "id": "1",
-                    "email": "demo@quantumbank.com",
-                    "firstName": "Demo",
-                    "lastName": "User",
-                    "kycStatus": "verified",
-                    "isActive": True
-                },
-                "token": "mock_webauthn_token_12345"
-            }
+            issued = webauthn_challenges.consume(extract_webauthn_challenge(request_body), 'login')
+            credential_id = request_body.get("credentialId") or request_body.get("id")
+            user = user_store.get_by_credential(credential_id)
+            if issued is None:
+                status = 400
+                response = {"error": "Invalid, expired or already used challenge", "code": "CHALLENGE_INVALID"}
+            elif not credential_id:
+                status = 400
+                response = {"error": "credentialId is required", "code": "VALIDATION_ERROR"}
+            elif user is None:
+                status = 401
+                response = {"error": "Unknown credential", "code": "CREDENTIAL_UNKNOWN"}
+            elif issued["user_id"] is not None and str(issued["user_id"]) != str(user.id):
+                # A challenge issued for one user must not log in with another user's credential
+                status = 400
+                response = {"error": "Challenge was issued for a different user", "code": "CHALLENGE_USER_MISMATCH"}
+            else:
+                response = {
+                    "user": user.to_dict(),
+                    "token": f"mock_webauthn_token_{user.id}"
+                }
         elif path.startswith('/api/v1/auth/webauthn/enroll'):
             # Handle WebAuthn enrollment
-            response = {"message": "Biometric enrollment successful"}
+            issued = webauthn_challenges.consume(extract_webauthn_challenge(request_body), 'register')
+            credential_id = request_body.get("credentialId") or request_body.get("id")
+            if issued is None:
+                status = 400
+                response = {"error": "Invalid, expired or already used challenge", "code": "CHALLENGE_INVALID"}
+            else:
+                response = {"message": "Biometric enrollment successful"}
+                if credential_id:
+                    try:
+                        user_store.add_credential(issued["user_id"] or request_body.get("user_id") or demo_user.id,
+                                                  credential_id)
+                    except DuplicateCredentialError as e:
+                        status = 409
+                        response = {"error": str(e), "code": "CREDENTIAL_EXISTS"}
+                    except InvalidUserError as e:
+                        status = 400
+                        response = {"error": str(e), "code": "VALIDATION_ERROR"}
+                    except UserStoreError as e:
+                        status = 404
+                        response = {"error": str(e), "code": "USER_NOT_FOUND"}
+        elif path == '/api/v1/kms/keys':
+            if not request_body.get("key_id"):
+                status = 400
+                response = {"error": "Missing required fields: key_id", "code": "VALIDATION_ERROR"}
+            elif not isinstance(request_body["key_id"], str):
+                status, response = 400, KMS_KEY_ID_INVALID
+            else:
+                response = kms.create_key(request_body["key_id"])
+        elif path.startswith('/api/v1/kms/keys/') and path.rstrip('/').endswith('/rotate'):
+            key_id = path[len('/api/v1/kms/keys/'):].rstrip('/')[:-len('/rotate')]
+            try:
+                response = kms.rotate(key_id)
+            except KMSError as e:
+                status = 409 if "in progress" in str(e) else 404
+                response = {"error": str(e), "code": "ROTATION_FAILED"}
+        elif path == '/api/v1/faults/profile':
+            profile = request_body.get("profile", "none")
+            if not isinstance(profile, str):
+                status = 400
+                response = {"error": "profile must be a profile name", "code": "VALIDATION_ERROR"}
+            else:
+                try:
+                    fault_injector.set_profile(profile)
+                    response = fault_injector.status()
+                except FaultProfileError as e:
+                    status = 404
+                    response = {"error": str(e), "code": "PROFILE_NOT_FOUND"}
+        elif path == '/api/v1/faults/reload':
+            try:
+                fault_injector.reload()
+                response = fault_injector.status()
+            except FaultProfileError as e:
+                status = 422
+                response = {"error": str(e), "code": "PROFILE_INVALID"}
+        elif path == '/api/v1/fx/rates':
+            if not isinstance(request_body.get("rates"), dict):
+                status = 400
+                response = {"error": "rates must be an object of currency: units per base", "code": "VALIDATION_ERROR"}
+            else:
+                try:
+                    # Every currency an account is held in must stay convertible
+                    held = {account.get("currency", BASE_CURRENCY) for account in ledger.accounts()}
+                    response = fx_rates.publish(request_body["rates"], request_body.get("base", BASE_CURRENCY),
+                                                required=held).describe()
+                except CurrencyError as e:
+                    status = 400
+                    response = {"error": str(e), "code": "VALIDATION_ERROR"}
+        elif path == '/api/v1/routes/reload':
+            mock_routes.reload(force=True)
+            response = mock_routes.status()
+            if response["last_error"]:
+                status = 422
+        elif path.startswith('/api/v1/kms/data-key'):
+            status, response = self.issue_data_key(request_body)
+        elif path == '/api/v1/transfers':
+            status, response = self.create_transfer(request_body)
+        elif path == '/api/v1/fraud/alerts':
+            # Alerts from batch jobs (anomaly_job.py --url) join the real-time ones on the fraud alert feed
+            alerts = request_body.get("alerts")
+            keyed = None
+            if isinstance(alerts, list):
+                try:
+                    # Alerts are keyed by account like the real-time ones, so account_id must be an account id
+                    keyed = [(int(alert["account_id"]), dict(alert, account_id=int(alert["account_id"])))
+                             for alert in alerts]
+                except (KeyError, TypeError, ValueError, OverflowError):
+                    pass
+            if keyed is None:
+                status = 400
+                response = {"error": "alerts must be a list of objects with an integer account_id",
+                            "code": "VALIDATION_ERROR"}
+            else:
+                event_bus.publish_batch(TOPIC_FRAUD_ALERTS, keyed)
+                response = {"published": len(keyed)}
+        elif path == '/api/v1/compliance/screen':
+            status, response = self.screen_names([request_body.get("name")], request_body.get("threshold"))
+            if status == 200:
+                response = response["results"][0]
+        elif path == '/api/v1/compliance/screen/batch':
+            names = request_body.get("names")
+            if not isinstance(names, list):
+                status = 400
+                response = {"error": "names must be a list", "code": "VALIDATION_ERROR"}
+            else:
+                status, response = self.screen_names(names, request_body.get("threshold"))
+        elif path.startswith('/api/v1/accounts/') and path.rstrip('/').endswith('/statements'):
+            status, response = self.request_statement(path.strip('/').split('/')[3], request_body)
+        elif path == '/api/v1/ledger/rebalance':
+            if not ledger_shards:
+                status = 409
+                response = {"error": "Ledger is not sharded (set LEDGER_SHARDS)", "code": "LEDGER_NOT_SHARDED"}
+            else:
+                try:
+                    response = ledger.rebalance(int(request_body.get("shards") or ledger.num_shards))
+                except (LedgerError, ValueError, TypeError) as e:
+                    status = 400
+                    response = {"error": str(e), "code": "REBALANCE_FAILED"}
         elif path == '/api/v1/transactions':
-            response = {
-                "id": 5,
-                "message": "Transaction created successfully",
-                "status": "pending"
-            }
+            verdicts = [None]
+            if request_body.get("signature") is not None:
+                verdicts = self.verify_transaction_signatures([request_body])
+            if verdicts is None:
+                status, response = 503, VERIFY_BUSY_RESPONSE
+            else:
+                status, response = self.create_transaction(request_body, verdicts[0])
+        elif path == '/api/v1/transactions/batch':
+            items = request_body.get("transactions", [])
+            verdicts = None
+            if isinstance(items, list):
+                verdicts = self.verify_transaction_signatures(
+                    [item for item in items if isinstance(item, dict) and item.get("signature") is not None])
+            if not isinstance(items, list):
+                status = 400
+                response = {"error": "transactions must be a list", "code": "VALIDATION_ERROR"}
+            elif verdicts is None:
+                status, response = 503, VERIFY_BUSY_RESPONSE
+            else:
+                verdicts = iter(verdicts)
+                # Start every saga before waiting on any so the batch takes as long as its slowest payment
+                started = []
+                for item in items:
+                    if not isinstance(item, dict):
+                        started.append((400, {"error": "Transaction must be an object", "code": "VALIDATION_ERROR"}))
+                    else:
+                        verified = next(verdicts) if item.get("signature") is not None else None
+                        started.append(self.submit_transaction(item, verified))
+                results = []
+                for index, (item_status, item_response) in enumerate(map(self.transaction_result, started)):
+                    results.append(dict(item_response, index=index, accepted=item_status == 200))
+                accepted = sum(1 for r in results if r["accepted"])
+                response = {"results": results, "accepted": accepted, "rejected": len(results) - accepted}
         else:
             response = {"message": "Success", "path": path, "body": request_body}
             
-        self.wfile.write(json.dumps(response).encode())
+        self.send_json(response, status)
+    
+    def verify_transaction_signatures(self, items):
+        """Verify client signatures through the micro-batching stage; one bool per item, or None when the
+        verdicts did not arrive within verification_timeout or the verifier failed"""
+        futures = []
+        for item in items:
+            try:
+                public_key = base64.b64decode(item.get("public_key", ""), validate=True)
+                signature = base64.b64decode(item["signature"], validate=True)
+            except (ValueError, TypeError):
+                futures.append(None)
+                continue
+            futures.append(verification_stage.submit(public_key, canonical_bytes(transaction_payload(item)), signature))
+        deadline = time.monotonic() + verification_timeout
+        with self.trace.span("verify_signatures", count=len(futures)):
+            try:
+                return [bool(f.result(timeout=max(0.0, deadline - time.monotonic()))) if f is not None else False
+                        for f in futures]
+            except Exception as e:
+                # Late verdicts and a crashed verifier (e.g. BrokenProcessPool) both get a 503
+                if not isinstance(e, TimeoutError):
+                    print(f"⚠️  Signature verification failed: {e!r}")
+                return None
+    
+    def create_transaction(self, request_body, verified=None):
+        """Run one payment saga; returns (status, response)"""
+        return self.transaction_result(self.submit_transaction(request_body, verified))
+    
+    def submit_transaction(self, request_body, verified=None):
+        """Check the request and start its payment saga; returns (status, response) if rejected up front"""
+        if verified is False:
+            return 400, {"error": "Invalid transaction signature", "code": "SIGNATURE_INVALID"}
+        if verified is None and require_signatures:
+            return 400, {"error": "Transaction signature required", "code": "SIGNATURE_REQUIRED"}
+        if request_body.get("amount") is None:
+            return 400, {"error": "Missing required fields: amount", "code": "VALIDATION_ERROR"}
+        payment = {
+            "account_id": request_body.get("account_id", 1),
+            "amount": request_body["amount"],
+            "description": request_body.get("description", ""),
+            "category": request_body.get("category", "other"),
+            "counterparty": request_body.get("counterparty"),
+        }
+        return saga_orchestrator.submit(PAYMENT_SAGA, payment), bool(verified)
+    
+    def transaction_result(self, started):
+        """Wait for a saga started by submit_transaction; returns (status, response)"""
+        future, verified = started
+        if isinstance(future, int):
+            return started
+        with self.trace.span("payment.saga"):
+            outcome = future.result(timeout=30)
+        for step in outcome["steps"]:
+            self.trace.add_span(f"saga.{step['step']}", step["start_ns"], step["end_ns"], outcome=step["outcome"])
+        txn = outcome["results"].get("post")
+        if txn is None:
+            return SAGA_FAILURE_STATUS.get(outcome["code"], 400), {
+                "error": outcome["error"],
+                "code": outcome["code"],
+                "saga_id": outcome["saga_id"],
+                "failed_step": outcome["failed_step"],
+            }
+        response = {
+            "id": txn["id"],
+            "message": "Transaction created successfully",
+            "status": txn["status"],
+            "signature_verified": verified,
+            "saga_id": outcome["saga_id"],
+        }
+        if outcome["status"] != SAGA_COMPLETED:
+            # Posted; audit/notification are still being retried
+            response["saga_status"] = outcome["status"]
+        if sign_transactions:
+            signature = crypto_pipeline.sign(transaction_signing_key, canonical_bytes(txn))
+            response["signature"] = base64.b64encode(signature).decode()
+        return 200, response
+    
+    def issue_data_key(self, request_body):
+        """Data key for key_id/context; "version" and "nonce" (hex) from an earlier response re-derive
+        that key. Returns (status, response)"""
+        key_id = request_body.get("key_id", "pii-fields")
+        version = request_body.get("version")
+        if not isinstance(key_id, str) or not key_id:
+            return 400, KMS_KEY_ID_INVALID
+        if version is not None and (not isinstance(version, int) or isinstance(version, bool)):
+            return 400, {"error": "version must be an integer", "code": "VALIDATION_ERROR"}
+        try:
+            nonce = bytes.fromhex(request_body["nonce"]) if request_body.get("nonce") is not None else None
+            if nonce is not None and len(nonce) != NONCE_BYTES:
+                raise ValueError
+        except (TypeError, ValueError):
+            return 400, {"error": f"nonce must be {NONCE_BYTES} bytes of hex", "code": "VALIDATION_ERROR"}
+        try:
+            data_key = kms.data_key(key_id, str(request_body.get("context", "")), version, nonce)
+        except KMSError as e:
+            return 404, {"error": str(e), "code": "KEY_NOT_FOUND"}
+        return 200, {
+            "key_id": data_key.key_id,
+            "version": data_key.version,
+            "context": data_key.context,
+            "nonce": data_key.nonce.hex(),
+            "fingerprint": hashlib.sha256(data_key.key).hexdigest()[:16]
+        }
+
+    def create_transfer(self, request_body):
+        """Move funds between two accounts; returns (status, response)"""
+        missing = [field for field in ("from_account_id", "to_account_id", "amount") if request_body.get(field) is None]
+        if missing:
+            return 400, {"error": f"Missing required fields: {', '.join(missing)}", "code": "VALIDATION_ERROR"}
+        try:
+            with self.trace.span("ledger.transfer"):
+                result = ledger.transfer(
+                    int(request_body["from_account_id"]),
+                    int(request_body["to_account_id"]),
+                    request_body["amount"],
+                    request_body.get("description", "")
+                )
+        except TransferInDoubtError as e:
+            # Accepted but not yet applied on every shard: neither a success nor safe to retry
+            return 202, {"transfer_id": e.transfer_id, "error": str(e), "code": "TRANSFER_IN_DOUBT"}
+        except (LedgerError, ValueError, TypeError) as e:
+            return 400, {"error": str(e), "code": "TRANSFER_REJECTED"}
+        return 200, dict(result, message="Transfer completed successfully")
+    
+    def read_accounts(self, query_params):
+        """Balances from one ledger snapshot (latest, or ?as_of=), optionally only ?ids=1,2"""
+        as_of = query_params.get('as_of', [None])[0]
+        ids = query_params.get('ids', [None])[0]
+        if ledger_shards:
+            if as_of is not None:
+                return 400, {"error": "as_of reads need the in-process ledger (LEDGER_SHARDS=0)",
+                             "code": "SNAPSHOTS_UNSUPPORTED"}
+            accounts = ledger.accounts()
+            return 200, {"accounts": accounts if ids is None else
+                         [a for a in accounts if str(a["id"]) in ids.split(',')]}
+        try:
+            account_ids = None if ids is None else [int(i) for i in ids.split(',') if i]
+            with ledger.snapshot(None if as_of is None else parse_as_of(as_of)) as snapshot:
+                return 200, snapshot.to_dict(account_ids)
+        except CurrencyError as e:
+            # Mixed-currency totals need a rate for every currency held; a ValueError, but not the caller's
+            return 422, {"error": str(e), "code": "FX_RATE_MISSING"}
+        except ValueError:
+            return 400, {"error": "ids must be comma-separated account ids", "code": "VALIDATION_ERROR"}
+        except SnapshotTooOldError as e:
+            return 410, {"error": str(e), "code": "SNAPSHOT_TOO_OLD"}
+        except LedgerError as e:
+            return 400, {"error": str(e), "code": "VALIDATION_ERROR"}
+
+    def portfolio_value(self, query_params):
+        """Value every account in ?currency= from one ledger snapshot and one FX table version (?fx_version=)"""
+        currency = query_params.get('currency', [BASE_CURRENCY])[0].upper()
+        as_of = query_params.get('as_of', [None])[0]
+        fx_version = query_params.get('fx_version', [None])[0]
+        try:
+            rates = fx_rates.current() if fx_version is None else fx_rates.get(int(fx_version))
+            if ledger_shards:
+                if as_of is not None:
+                    return 400, {"error": "as_of reads need the in-process ledger (LEDGER_SHARDS=0)",
+                                 "code": "SNAPSHOTS_UNSUPPORTED"}
+                ledger_version, subtotals = None, {BASE_CURRENCY: sum(to_minor(a["balance"]) for a in ledger.accounts())}
+            else:
+                with ledger.snapshot(None if as_of is None else parse_as_of(as_of)) as snapshot:
+                    ledger_version, subtotals = snapshot.version, snapshot.subtotals()
+            total = rates.total(subtotals, currency)
+        except SnapshotTooOldError as e:
+            return 410, {"error": str(e), "code": "SNAPSHOT_TOO_OLD"}
+        except (LedgerError, ValueError) as e:
+            return 400, {"error": str(e), "code": "VALIDATION_ERROR"}
+        return 200, {
+            "currency": currency,
+            "total": from_minor(total, currency),
+            "total_exact": format_minor(total, currency),
+            "balances_by_currency": {code: format_minor(minor, code) for code, minor in sorted(subtotals.items())},
+            "ledger_version": ledger_version,
+            "fx_version": rates.version,
+        }
+
+    def request_statement(self, account_id, request_body):
+        """Queue a statement for POST /api/v1/accounts/<id>/statements; returns (status, response)"""
+        try:
+            job = statement_queue.submit(int(account_id), request_body.get("period"),
+                                         request_body.get("format", "csv"), request_body.get("priority", "normal"))
+        except ValueError:
+            return 400, {"error": "Account id must be an integer", "code": "VALIDATION_ERROR"}
+        except UnknownAccountError as e:
+            return 404, {"error": str(e), "code": "ACCOUNT_NOT_FOUND"}
+        except StatementError as e:
+            return 400, {"error": str(e), "code": "VALIDATION_ERROR"}
+        except StatementQueueFullError as e:
+            return 503, {"error": str(e), "code": "SERVICE_BUSY"}
+        return (200 if job.status == JOB_COMPLETED else 202), self.statement_job(job)
+
+    def statement_job(self, job):
+        response = job.to_dict()
+        response["status_url"] = f"/api/v1/statements/jobs/{job.id}"
+        response["result_url"] = f"/api/v1/statements/jobs/{job.id}/result"
+        return response
+
+    def screen_names(self, names, threshold=None):
+        """Screen payee names against the loaded watchlists; returns (status, response)"""
+        if not all(isinstance(name, str) and name.strip() for name in names):
+            return 400, {"error": "Every name must be a non-empty string", "code": "VALIDATION_ERROR"}
+        try:
+            threshold = None if threshold is None else float(threshold)
+            if threshold is not None and not 0 < threshold <= 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            return 400, {"error": "threshold must be a number in (0, 1]", "code": "VALIDATION_ERROR"}
+        with self.trace.span("compliance.screen", count=len(names)):
+            results = screener.screen_batch(names, threshold)
+        matches = sum(1 for r in results if r["match"])
+        return 200, {"results": results, "screened": len(results), "matches": matches}
+    
+    def handle_debug(self, method, path, query_params, body):
+        """Admin-only profiling and runtime state; returns False (plain 404) unless enabled"""
+        if not debug_endpoints_enabled:
+            return False
+        self.trace.phase("logic")
+        supplied = self.headers.get('Authorization', '').encode()
+        if not hmac.compare_digest(supplied, f"Bearer {debug_admin_token}".encode()):
+            self.send_json({"error": "Admin token required", "code": "ADMIN_TOKEN_REQUIRED"}, 401)
+            return True
+
+        def param(name, default=None):
+            return body.get(name, query_params.get(name, [default])[0])
+
+        try:
+            interval = float(param('interval_ms', 5)) / 1000
+            if path == '/debug/stats' and method == 'GET':
+                self.send_json(debug_stats(int(param('top', 15))))
+            elif path == '/debug/tracemalloc' and method == 'POST':
+                tracing = set_tracemalloc(str(param('action', 'start')) == 'start', int(param('frames', 1)))
+                self.send_json({"tracemalloc": tracing})
+            elif path == '/debug/profile' and method == 'GET' and param('seconds') is None:
+                self.send_json(profiler.status())
+            elif path == '/debug/profile' and method == 'GET':
+                mode = param('mode', 'sampling')
+                fmt = check_format(mode, param('format')) if mode in ('sampling', 'cprofile') else None
+                self.send_profile(profiler.run(mode, float(param('seconds')), interval), fmt)
+            elif path == '/debug/profile/start' and method == 'POST':
+                seconds = param('seconds')
+                profiler.start(param('mode', 'sampling'), float(seconds) if seconds is not None else None, interval)
+                self.send_json(profiler.status())
+            elif path == '/debug/profile/stop' and method == 'POST':
+                self.send_profile(profiler.stop(), param('format'))
+            elif path == '/debug/profile/result' and method == 'GET':
+                if profiler.last is None:
+                    self.send_json({"error": "No finished profiling session", "code": "PROFILE_NOT_FOUND"}, 404)
+                else:
+                    self.send_profile(profiler.last, param('format'))
+            else:
+                self.send_json({"error": "Endpoint not found", "path": path}, 404)
+        except ProfilerStateError as e:
+            self.send_json({"error": str(e), "code": "PROFILER_STATE"}, 409)
+        except (ValueError, TypeError) as e:
+            self.send_json({"error": str(e), "code": "VALIDATION_ERROR"}, 400)
+        return True
+
+    def send_profile(self, session, fmt):
+        output, content_type = session.output(fmt)
+        self.send_body(output, content_type=content_type)
+
+    def send_json(self, response, status=200):
+        self.trace.phase("serialize")
+        self.send_body(json.dumps(response).encode(), status)
+
+    def send_body(self, body, status=200, content_type='application/json'):
+        self.trace.phase("write")
+        self.trace.set_status(status)
+        if self.fault is not None:
+            self.trace.set("fault.rule", self.fault.rule)
+            self.trace.set("fault.delay_ms", round(self.fault.delay * 1000, 3))
+            # Render into a buffer; the fault writer sends it when the injected delay is up
+            wfile, self.wfile = self.wfile, io.BytesIO()
+            try:
+                self.write_body(body, status, content_type)
+                rendered = self.wfile.getvalue()
+            finally:
+                self.wfile = wfile
+            self.release_connection()
+            fault_injector.deliver(self.connection, rendered, self.fault)
+            return
+        self.write_body(body, status, content_type)
+
+    def write_body(self, body, status, content_type='application/json'):
+        self.send_response(status)
+        self.send_header('Content-type', content_type)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        if self.fault is not None:
+            self.send_header('Connection', 'close')
+        if self.trace.traceparent is not None:
+            self.send_header('traceparent', self.trace.traceparent)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def release_connection(self):
+        """Stop serving this connection here; whoever it was handed to now owns the socket"""
+        self.server.detach_request(self.connection)
+        self.close_connection = True
+
+    def inject_fault(self, method, path):
+        """Apply the active fault profile; returns True when the request is already answered"""
+        self.fault = fault_injector.plan(method, path)
+        if self.fault is None:
+            return False
+        if self.fault.hang is not None:
+            # Never answer; the connection is dropped once the injected timeout expires
+            self.release_connection()
+            fault_injector.deliver(self.connection, None, self.fault)
+            return True
+        if self.fault.error_status is not None:
+            self.send_json(INJECTED_ERROR, self.fault.error_status)
+            return True
+        return False
+
+    def send_fixture(self, method, path):
+        """Answer from the hot-reloadable route table; fixture routes take precedence over built-ins"""
+        route = mock_routes.current().match(method, path)
+        if route is None:
+            return False
+        self.send_body(route.body, route.status)
+        return True
+    
+    def handle_notification_stream(self):
+        """Hand the connection over to the SSE hub and release this worker thread"""
+        last_event_id = self.headers.get('Last-Event-ID')
+        if last_event_id is None:
+            last_event_id = parse_qs(urlparse(self.path).query).get('lastEventId', [None])[0]
+        try:
+            last_event_id = int(last_event_id) if last_event_id is not None else None
+        except ValueError:
+            last_event_id = None
+
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('X-Accel-Buffering', 'no')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.flush()
+
+        # The hub owns the socket from here on; the server must not close it
+        self.release_connection()
+        notification_hub.subscribe(self.connection, last_event_id)
     
     def do_OPTIONS(self):
         self.send_response(200)
@@ -290,18 +1066,87 @@ def log_message(self, format, *args):
         # Custom logging to show API calls
         print(f"🌐 API Call: {format % args}")
 
+def debug_stats(top=15):
+    """Threads, queue depths and memory for /debug/stats"""
+    return {
+        "threads": thread_report(),
+        "queues": {
+            "verification_stage": verification_stage.stats()["queued"],
+            "statement_jobs": statement_queue.stats()["queued"],
+            "fault_writer": fault_injector.writer.pending(),
+            "trace_exporter": tracer.exporter.pending(),
+            "event_bus_lag": event_bus.stats()["consumer_lag"],
+            "notification_subscribers": notification_hub.subscriber_count,
+            "password_hash_rejected": password_hasher.stats()["rejected"],
+        },
+        "memory": memory_report(top),
+        "profiler": profiler.status(),
+    }
+
+def raise_open_file_limit():
+    """Lift the soft descriptor limit so thousands of SSE clients can stay connected"""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or hard > soft:
+        target = 65536 if hard == resource.RLIM_INFINITY else hard
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        except (ValueError, OSError):
+            pass
+
 def run_server():
-    server = HTTPServer(('localhost', 8080), MockBankingHandler)
+    raise_open_file_limit()
+    # Supervisors stop us with SIGTERM; exit through the same cleanup as Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    if password_hash_target_ms:
+        cost = password_hasher.calibrate(password_hash_target_ms / 1000)
+        print(f"🔐 Password hashing calibrated: {password_hasher.algorithm} cost {cost} for ~{password_hash_target_ms:.0f} ms")
+    # Fork the hashing workers before any other threads exist
+    password_hasher.start()
+    if ledger_shards:
+        ledger.start()
+        print(f"📒 Ledger sharded over {ledger_shards} worker processes")
+    print(f"💱 FX rates: version {fx_rates.current().version}, {len(fx_rates.current().currencies)} currencies "
+          f"(base {fx_rates.current().base})")
+    build = screener.build
+    memory = f", {build['memory_mb']:.1f} MB" if build["memory_mb"] is not None else ""
+    print(f"🛡️  Sanctions index: {build['entries']} entries in {build['seconds']:.2f} s{memory}")
+    # Resumes payments the saga log says were cut off, so the ledger must be up first
+    saga_orchestrator.start()
+    notification_hub.start()
+    verification_stage.start()
+    statement_queue.start()
+    kms.start()
+    mock_routes.start()
+    fault_injector.start()
+    tracer.start_exporter()
+    for consumer in consumers:
+        consumer.start()
+    # MOCK_BACKEND_PORT moves the server off 8080 (start-local-dev.py --backend-port sets it)
+    port = int(os.environ.get('MOCK_BACKEND_PORT', 8080))
+    server = MockBankingServer(('localhost', port), MockBankingHandler)
     print("🚀 Mock Quantum Banking Backend Server")
     print("=" * 40)
-    print("🌐 Server running on: http://localhost:8080")
+    print(f"🌐 Server running on: http://localhost:{port}")
     print("📋 Available endpoints:")
     print("   GET  /api/v1/health")
     print("   GET  /api/v1/auth/user") 
     print("   POST /api/v1/auth/login")
-    print("   GET  /api/v1/accounts")
+    print("   GET  /api/v1/accounts, /api/v1/accounts/snapshot (?as_of=)")
+    print("   GET  /api/v1/accounts/portfolio?currency=EUR, GET/POST /api/v1/fx/rates")
     print("   GET  /api/v1/transactions")
+    print("   POST /api/v1/transfers")
+    print("   POST /api/v1/accounts/<id>/statements, GET /api/v1/statements/jobs/<job_id>[/result]")
+    print("   POST /api/v1/compliance/screen, /api/v1/compliance/screen/batch")
     print("   GET  /api/v1/pqc/status")
+    print("   GET  /api/v1/notifications/stream (SSE)")
+    if debug_endpoints_enabled:
+        print("   GET  /debug/stats, /debug/profile?seconds=N (admin)")
+        if not os.environ.get('DEBUG_ADMIN_TOKEN'):
+            print(f"🔑 Debug admin token: {debug_admin_token}")
     print("=" * 40)
     print("✅ Ready to serve requests!")
     print("Press Ctrl+C to stop the server")
@@ -310,6 +1155,22 @@ def run_server():
         server.serve_forever()
     except KeyboardInterrupt:
         print("\n⏹️  Server stopped")
+    finally:
+        saga_orchestrator.stop()
+        for consumer in consumers:
+            consumer.stop()
+        verification_stage.stop()
+        statement_queue.stop()
+        kms.stop()
+        mock_routes.stop()
+        fault_injector.stop()
+        if profiler.active is not None:
+            profiler.stop()
+        tracer.stop()
+        notification_hub.stop()
+        password_hasher.shutdown()
+        if ledger_shards:
+            ledger.close()
 
 if __name__ == "__main__":
     run_server()
\ No newline at end of file
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Server-Sent Events fan-out hub for the Quantum Banking mock backend
+Pushes balance changes, transaction postings and fraud alerts to many
+connected clients from a single selector thread (no thread per client)
+"""
+
+import json
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+
+EVENT_BALANCE_CHANGED = "balance.changed"
+EVENT_TRANSACTION_POSTED = "transaction.posted"
+EVENT_FRAUD_ALERT = "fraud.alert"
+
+HEARTBEAT_FRAME = b": heartbeat\n\n"
+
+
+def encode_event(event_id, event_type, data):
+    """Encode one SSE frame; done once per event and shared by every subscriber"""
+    payload = json.dumps(data, separators=(",", ":"))
+    return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n".encode()
+
+
+class _Subscriber:
+    __slots__ = ("sock", "fd", "chunks", "pending", "writing", "closed", "connected_at", "replay_from")
+
+    def __init__(self, sock, fd):
+        self.sock = sock
+        self.fd = fd
+        self.chunks = deque()
+        self.pending = 0
+        self.writing = False
+        self.closed = False
+        self.connected_at = time.time()
+        # Last replayed event id while the subscriber is catching up, None once it is live
+        self.replay_from = None
+
+
+class NotificationHub:
+    """In-process SSE fan-out hub.
+
+    Publishers on any thread call publish(); the hub thread owns every
+    subscriber socket, encodes each event once and queues the shared bytes
+    on every subscriber. A subscriber whose unsent backlog would exceed
+    max_pending_bytes is disconnected instead of being buffered forever;
+    a resuming subscriber is fed its replay as that backlog drains.
+    While the hub is not running, published events only go to the bounded
+    replay buffer; the first subscriber starts the hub.
+    """
+
+    def __init__(self, replay_size=1024, max_pending_bytes=64 * 1024,
+                 heartbeat_interval=15.0, retry_ms=3000):
+        self.replay_size = replay_size
+        self.max_pending_bytes = max_pending_bytes
+        self.heartbeat_interval = heartbeat_interval
+        self.retry_ms = retry_ms
+
+        self._replay = deque(maxlen=replay_size)
+        self._ops = deque()
+        self._subscribers = {}
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+
+        self._id_lock = threading.Lock()
+        self._next_id = 1
+        self._thread = None
+        self._running = False
+
+        self.stats = {
+            "published": 0,
+            "delivered_bytes": 0,
+            "connected_total": 0,
+            "slow_consumer_disconnects": 0,
+            "client_disconnects": 0,
+            "heartbeats": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Public API (any thread)
+    # ------------------------------------------------------------------
+    def start(self):
+        # Under _id_lock so publish() sees the switch atomically with its event id
+        with self._id_lock:
+            if self._running:
+                return self
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="notification-hub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        self._wake()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def publish(self, event_type, data):
+        """Queue an event for fan-out and return its event id"""
+        with self._id_lock:
+            event_id = self._next_id
+            self._next_id += 1
+            frame = encode_event(event_id, event_type, data)
+            if not self._running:
+                # Nobody to fan out to: keep it for replay only, so the ops queue never grows unattended
+                self._replay.append((event_id, frame))
+                self.stats["published"] += 1
+                return event_id
+            # Queued under the lock so events reach the replay buffer and subscribers in id order
+            self._ops.append(("event", event_id, frame))
+        self._wake()
+        return event_id
+
+    def subscribe(self, sock, last_event_id=None):
+        """Hand over a connected socket whose SSE response headers were already sent.
+
+        The hub takes ownership of the socket and closes it on disconnect.
+        """
+        if not self._running:
+            self.start()
+        self._ops.append(("subscribe", sock, last_event_id))
+        self._wake()
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def snapshot(self):
+        snap = dict(self.stats)
+        snap["subscribers"] = len(self._subscribers)
+        snap["replay_buffered"] = len(self._replay)
+        snap["last_event_id"] = self._next_id - 1
+        return snap
+
+    # ------------------------------------------------------------------
+    # Hub thread
+    # ------------------------------------------------------------------
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            # Wake pipe already full (or closed) - the loop will drain the ops anyway
+            pass
+
+    def _run(self):
+        next_heartbeat = time.monotonic() + self.heartbeat_interval
+        while self._running:
+            timeout = max(0.0, next_heartbeat - time.monotonic())
+            for key, mask in self._selector.select(timeout):
+                if key.data is None:
+                    self._drain_wake()
+                    continue
+                sub = key.data
+                if mask & selectors.EVENT_READ and not sub.closed:
+                    self._on_readable(sub)
+                if mask & selectors.EVENT_WRITE and not sub.closed:
+                    self._flush(sub)
+                    if sub.replay_from is not None and not sub.chunks:
+                        self._catch_up(sub)
+
+            self._process_ops()
+
+            if time.monotonic() >= next_heartbeat:
+                self._heartbeat()
+                next_heartbeat = time.monotonic() + self.heartbeat_interval
+
+        for sub in list(self._subscribers.values()):
+            self._disconnect(sub)
+
+    def _drain_wake(self):
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def _process_ops(self):
+        ops = self._ops
+        while ops:
+            op = ops.popleft()
+            if op[0] == "event":
+                _, event_id, frame = op
+                self._replay.append((event_id, frame))
+                self.stats["published"] += 1
+                for sub in list(self._subscribers.values()):
+                    # Catching-up subscribers read this event from the replay buffer in turn
+                    if sub.replay_from is None:
+                        self._enqueue(sub, frame)
+            else:
+                _, sock, last_event_id = op
+                self._add_subscriber(sock, last_event_id)
+
+    def _add_subscriber(self, sock, last_event_id):
+        try:
+            sock.setblocking(False)
+            fd = sock.fileno()
+        except OSError:
+            return
+        sub = _Subscriber(sock, fd)
+        self._subscribers[fd] = sub
+        self._selector.register(sock, selectors.EVENT_READ, sub)
+        self.stats["connected_total"] += 1
+
+        self._enqueue(sub, f"retry: {self.retry_ms}\n\n".encode())
+        if last_event_id is not None:
+            self._replay_since(sub, last_event_id)
+
+    def _replay_since(self, sub, last_event_id):
+        sub.replay_from = last_event_id
+        self._catch_up(sub)
+
+    def _catch_up(self, sub):
+        """Send replayed events up to max_pending_bytes at a time; the rest follows as the socket drains.
+
+        A resume can replay far more than max_pending_bytes, so the replay
+        is metered here rather than counted against the slow-consumer limit.
+        """
+        while sub.replay_from is not None and not sub.closed:
+            if self._replay and sub.replay_from < self._replay[0][0] - 1:
+                # Client missed events that fell out of the bounded buffer
+                self._queue(sub, encode_event(sub.replay_from, "stream.reset",
+                                              {"reason": "replay_window_exceeded",
+                                               "oldest_event_id": self._replay[0][0]}))
+            for event_id, frame in self._replay:
+                if event_id <= sub.replay_from:
+                    continue
+                if sub.pending and sub.pending + len(frame) > self.max_pending_bytes:
+                    break
+                self._queue(sub, frame)
+                sub.replay_from = event_id
+            else:
+                # Caught up: from here on the subscriber gets live events
+                sub.replay_from = None
+            self._flush(sub)
+            if sub.chunks:
+                return
+
+    def _heartbeat(self):
+        self.stats["heartbeats"] += 1
+        for sub in list(self._subscribers.values()):
+            if sub.replay_from is None:
+                self._enqueue(sub, HEARTBEAT_FRAME)
+
+    def _enqueue(self, sub, frame):
+        """Queue a frame for a subscriber; returns False if it was disconnected"""
+        if sub.pending + len(frame) > self.max_pending_bytes:
+            self.stats["slow_consumer_disconnects"] += 1
+            self._disconnect(sub)
+            return False
+        self._queue(sub, frame)
+        if not sub.writing:
+            self._flush(sub)
+        return not sub.closed
+
+    @staticmethod
+    def _queue(sub, frame):
+        sub.chunks.append(memoryview(frame))
+        sub.pending += len(frame)
+
+    def _flush(self, sub):
+        chunks = sub.chunks
+        try:
+            while chunks:
+                chunk = chunks[0]
+                sent = sub.sock.send(chunk)
+                sub.pending -= sent
+                self.stats["delivered_bytes"] += sent
+                if sent < len(chunk):
+                    chunks[0] = chunk[sent:]
+                    break
+                chunks.popleft()
+        except BlockingIOError:
+            pass
+        except OSError:
+            self.stats["client_disconnects"] += 1
+            self._disconnect(sub)
+            return
+
+        want_write = bool(chunks)
+        if want_write != sub.writing:
+            sub.writing = want_write
+            events = selectors.EVENT_READ | (selectors.EVENT_WRITE if want_write else 0)
+            self._selector.modify(sub.sock, events, sub)
+
+    def _on_readable(self, sub):
+        try:
+            data = sub.sock.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self.stats["client_disconnects"] += 1
+            self._disconnect(sub)
+
+    def _disconnect(self, sub):
+        if sub.closed:
+            return
+        sub.closed = True
+        if self._subscribers.get(sub.fd) is sub:
+            del self._subscribers[sub.fd]
+            try:
+                self._selector.unregister(sub.sock)
+            except (KeyError, ValueError):
+                pass
+        sub.chunks.clear()
+        sub.pending = 0
+        try:
+            sub.sock.close()
+        except OSError:
+            pass
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Off-thread password hashing for the Quantum Banking mock backend
+Runs scrypt/PBKDF2 in a worker pool behind a bounded queue so KDF work never
+blocks request threads, and calibrates the KDF cost to a target latency
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from metrics import LatencyStats
+
+ALGORITHMS = ("scrypt", "pbkdf2_sha256")
+DEFAULT_COST = {"scrypt": 2 ** 14, "pbkdf2_sha256": 200000}
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+
+class HasherBusyError(Exception):
+    """The hashing queue is full; callers should shed the request (HTTP 503)"""
+
+
+def _b64(data):
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _unb64(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _derive(algorithm, cost, password, salt):
+    if algorithm == "scrypt":
+        return hashlib.scrypt(password.encode(), salt=salt, n=cost, r=SCRYPT_R, p=SCRYPT_P,
+                              maxmem=256 * SCRYPT_R * cost, dklen=32)
+    if algorithm == "pbkdf2_sha256":
+        return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, cost, 32)
+    raise ValueError(f"Unknown password hash algorithm: {algorithm}")
+
+
+def _hash_password(algorithm, cost, password):
+    """Encoded hash "<algorithm>$<cost>$<salt>$<key>"; runs in a pool worker"""
+    salt = os.urandom(16)
+    return f"{algorithm}${cost}${_b64(salt)}${_b64(_derive(algorithm, cost, password, salt))}"
+
+
+def _verify_password(password, encoded):
+    try:
+        algorithm, cost, salt, key = encoded.split("$")
+        derived = _derive(algorithm, int(cost), password, _unb64(salt))
+    except ValueError:
+        return False
+    return hmac.compare_digest(derived, _unb64(key))
+
+
+def parse_hash(encoded):
+    """(algorithm, cost) of an encoded hash"""
+    algorithm, cost, _, _ = encoded.split("$")
+    return algorithm, int(cost)
+
+
+def calibrate(target_latency=0.1, algorithm="scrypt", max_cost=None):
+    """Smallest KDF cost whose single hash takes at least target_latency on this machine.
+
+    scrypt's N must be a power of two, so it doubles; PBKDF2 iterations are
+    scaled linearly from a measured sample.
+    """
+    if algorithm == "scrypt":
+        cost, max_cost = 2 ** 10, max_cost or 2 ** 20
+        while cost < max_cost:
+            start = time.perf_counter()
+            _hash_password(algorithm, cost, "calibration")
+            if time.perf_counter() - start >= target_latency:
+                break
+            cost *= 2
+        return min(cost, max_cost)
+    if algorithm == "pbkdf2_sha256":
+        sample = 20000
+        start = time.perf_counter()
+        _hash_password(algorithm, sample, "calibration")
+        cost = int(sample * target_latency / max(time.perf_counter() - start, 1e-6))
+        return min(max(cost, 1000), max_cost or 10 ** 8)
+    raise ValueError(f"Unknown password hash algorithm: {algorithm}")
+
+
+class PasswordHasher:
+    """Password hashing and verification on a dedicated worker pool.
+
+    At most workers + max_queue operations are admitted at once; beyond
+    that submit raises HasherBusyError immediately instead of queueing, so
+    a login storm is shed at the door rather than growing latency without
+    bound. executor="process" keeps the KDF off the server's GIL entirely.
+    """
+
+    def __init__(self, workers=None, max_queue=64, algorithm="scrypt", cost=None, executor="process"):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown password hash algorithm: {algorithm}")
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.algorithm = algorithm
+        self.cost = cost or DEFAULT_COST[algorithm]
+        self.executor_kind = executor
+        self._slots = threading.BoundedSemaphore(self.workers + max_queue)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        self._dummy_hash = None
+        self.counters = {"hashed": 0, "verified": 0, "rejected": 0, "errors": 0}
+        self.latency = LatencyStats()
+        self.queue_wait = LatencyStats()
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    if self.executor_kind == "process":
+                        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                         initargs=(os.getpid(),))
+                    else:
+                        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def start(self):
+        """Spin the workers up now (before the server starts other threads) rather than on first login"""
+        self._dummy_hash = self.pool.submit(_hash_password, self.algorithm, self.cost,
+                                            os.urandom(16).hex()).result()
+        return self
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def calibrate(self, target_latency=0.1):
+        """Re-tune the cost for target_latency; existing hashes keep verifying with their own cost"""
+        self.cost = calibrate(target_latency, self.algorithm)
+        self._dummy_hash = None
+        return self.cost
+
+    def dummy_hash(self):
+        """Hash compared against for unknown users so their timing matches real accounts"""
+        if self._dummy_hash is None:
+            self._dummy_hash = _hash_password(self.algorithm, self.cost, os.urandom(16).hex())
+        return self._dummy_hash
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+    def _submit(self, counter, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            raise HasherBusyError("Password hashing queue is full")
+        enqueued = time.perf_counter()
+        try:
+            future = self.pool.submit(_timed_call, fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._done(f, counter, enqueued))
+        return future
+
+    def _done(self, future, counter, enqueued):
+        self._slots.release()
+        if future.exception() is not None:
+            self._count("errors")
+            return
+        _, started, elapsed = future.result()
+        self.latency.record(elapsed)
+        # perf_counter is system-wide on Linux, so worker start times are comparable
+        self.queue_wait.record(max(0.0, started - enqueued))
+        self._count(counter)
+
+    def _count(self, name):
+        with self._counter_lock:
+            self.counters[name] += 1
+
+    # ------------------------------------------------------------------
+    # Hash / verify
+    # ------------------------------------------------------------------
+    def hash_async(self, password):
+        return self._submit("hashed", _hash_password, self.algorithm, self.cost, password)
+
+    def verify_async(self, password, encoded):
+        """Verify against encoded; an unknown user passes None and still pays one verification"""
+        if encoded is None:
+            encoded = self.dummy_hash()
+        return self._submit("verified", _verify_password, password, encoded)
+
+    def hash(self, password, timeout=None):
+        return self.hash_async(password).result(timeout)[0]
+
+    def verify(self, password, encoded, timeout=None):
+        return self.verify_async(password, encoded).result(timeout)[0]
+
+    def needs_rehash(self, encoded):
+        return parse_hash(encoded) != (self.algorithm, self.cost)
+
+    def stats(self):
+        with self._counter_lock:
+            counters = dict(self.counters)
+        counters.update({
+            "algorithm": self.algorithm,
+            "cost": self.cost,
+            "workers": self.workers,
+            "executor": self.executor_kind,
+            "max_queue": self.max_queue,
+            "latency": self.latency.snapshot(),
+            "queue_wait": self.queue_wait.snapshot(),
+        })
+        return counters
+
+
+def _init_worker(parent_pid):
+    # Ctrl+C is handled by the server process, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # A worker never sees EOF on its task queue if the server is killed, so watch for orphaning
+    threading.Thread(target=_exit_with_parent, args=(parent_pid,), daemon=True).start()
+
+
+def _exit_with_parent(parent_pid):
+    while os.getppid() == parent_pid:
+        time.sleep(1.0)
+    os._exit(0)
+
+
+def _timed_call(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, started, time.perf_counter() - started
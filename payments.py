@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Payment saga for the Quantum Banking mock backend
+validate → (reserve funds ∥ fraud scoring ∥ compliance screening) → post →
+(audit ∥ notify); the downstream stubs' fault profiles apply to each call
+"""
+
+import asyncio
+import time
+
+from currency import BASE_CURRENCY
+from ledger import LedgerError, to_cents
+from saga import SagaDefinition, Step, StepFailed
+
+PAYMENT_SAGA = "payment"
+TOPIC_AUDIT_EVENTS = "audit.events"
+TOPIC_PAYMENTS = "payments.completed"
+
+# Seconds; each step's downstream call (and its fault profile latency) must fit inside
+DEFAULT_TIMEOUTS = {
+    "validate": 0.5,
+    "reserve_funds": 1.0,
+    "fraud_check": 1.0,
+    "compliance_check": 2.0,
+    "post": 2.0,
+    "audit": 1.0,
+    "notify": 1.0,
+}
+
+
+class DownstreamError(Exception):
+    pass
+
+
+def parse_timeouts(spec):
+    """Step timeouts from "fraud_check=500,compliance_check=1500" (milliseconds)"""
+    timeouts = dict(DEFAULT_TIMEOUTS)
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        name, _, ms = item.partition("=")
+        if name not in timeouts:
+            raise ValueError(f"Unknown payment step: {name}")
+        timeouts[name] = float(ms) / 1000
+    return timeouts
+
+
+class PaymentFlow:
+    """Steps of the payment saga over a Ledger (or ShardedLedger).
+
+    Funds are held rather than posted while fraud and compliance run, so a
+    decline only has to release the hold. Posting the held amount is the
+    pivot: after it the audit record and notification are retried until
+    they go through instead of reversing the payment. large_amount is in
+    BASE_CURRENCY; payments from other currencies are valued at fx rates.
+    """
+
+    def __init__(self, ledger, bus=None, downstream=None, screen=None, large_amount=5000.0, decline_score=0.9,
+                 timeouts=None, fx=None):
+        self.ledger = ledger
+        self.fx = fx
+        self.bus = bus
+        self.downstream = downstream
+        self.screen = screen
+        self.large_amount = large_amount
+        self.decline_score = decline_score
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+
+    def definition(self):
+        t = self.timeouts
+        return SagaDefinition(PAYMENT_SAGA, [
+            Step("validate", self.validate, timeout=t["validate"]),
+            Step("reserve_funds", self.reserve_funds, self.release_funds, after=("validate",),
+                 timeout=t["reserve_funds"]),
+            Step("fraud_check", self.fraud_check, after=("validate",), timeout=t["fraud_check"], retries=1),
+            Step("compliance_check", self.compliance_check, after=("validate",), timeout=t["compliance_check"],
+                 retries=1),
+            Step("post", self.post, after=("reserve_funds", "fraud_check", "compliance_check"), timeout=t["post"],
+                 pivot=True),
+            Step("audit", self.audit, after=("post",), timeout=t["audit"], retries=3),
+            Step("notify", self.notify, after=("post",), timeout=t["notify"], retries=3),
+        ])
+
+    async def _call_downstream(self, path):
+        """Stand-in for an HTTP call to a downstream service, shaped by the active fault profile"""
+        plan = self.downstream.plan("POST", path) if self.downstream is not None else None
+        if plan is None:
+            return
+        if plan.hang is not None:
+            await asyncio.sleep(plan.hang)
+        if plan.delay:
+            await asyncio.sleep(plan.delay)
+        if plan.error_status is not None:
+            raise DownstreamError(f"{path} returned {plan.error_status}")
+
+    # ------------------------------------------------------------------
+    # Steps
+    # ------------------------------------------------------------------
+    def validate(self, state):
+        payment = state.payload
+        try:
+            # Parsed to cents here so "NaN", "inf" and out-of-range amounts fail validation, not a later step
+            cents = to_cents(payment["amount"])
+            account_id = int(payment["account_id"])
+        except (KeyError, TypeError, ValueError, OverflowError):
+            raise StepFailed("account_id and a numeric amount are required", "VALIDATION_ERROR") from None
+        if not cents:
+            raise StepFailed("Amount must be non-zero", "VALIDATION_ERROR")
+        try:
+            balance = self.ledger.balance(account_id)
+            currency = self.ledger.currency(account_id)
+        except (KeyError, LedgerError):
+            raise StepFailed(f"Unknown account: {account_id}", "VALIDATION_ERROR") from None
+        return {"balance": balance, "currency": currency}
+
+    def reserve_funds(self, state):
+        payment = state.payload
+        try:
+            return {"hold_id": self.ledger.hold(int(payment["account_id"]), payment["amount"],
+                                                payment.get("description", ""), payment.get("category", "other"),
+                                                hold_id=state.saga_id)}
+        except LedgerError as e:
+            raise StepFailed(str(e), "INSUFFICIENT_FUNDS") from None
+
+    def release_funds(self, state, result):
+        self.ledger.release(int(state.payload["account_id"]), result["hold_id"])
+
+    async def fraud_check(self, state):
+        await self._call_downstream("/api/v1/fraud/score")
+        amount = float(state.payload["amount"])
+        currency = state.results["validate"].get("currency", BASE_CURRENCY)
+        if self.fx is not None and currency != BASE_CURRENCY:
+            amount = self.fx.value_in(state.payload["amount"], currency)
+        score, reasons = 0.1, []
+        if amount < 0 and -amount >= self.large_amount:
+            reasons.append("large_debit")
+            score = 0.6 if -amount < 4 * self.large_amount else 0.95
+        if score >= self.decline_score:
+            raise StepFailed("Payment declined by fraud screening", "FRAUD_DECLINED")
+        return {"score": score, "reasons": reasons}
+
+    async def compliance_check(self, state):
+        await self._call_downstream("/api/v1/compliance/screen")
+        name = state.payload.get("counterparty") or ""
+        if name and self.screen is not None and self.screen(name):
+            raise StepFailed("Counterparty matches a sanctions list entry", "COMPLIANCE_HIT")
+        return {"screened": bool(name)}
+
+    def post(self, state):
+        txn = self.ledger.capture(int(state.payload["account_id"]), state.results["reserve_funds"]["hold_id"])
+        if txn is None:
+            # Already captured before a crash; find the journal entry instead of posting twice
+            txn = next((t for t in self.ledger.transactions(int(state.payload["account_id"]))
+                        if t.get("transfer_id") == state.saga_id), None)
+        if txn is None:
+            raise StepFailed("Funds hold was released before posting", "HOLD_EXPIRED")
+        return txn
+
+    async def audit(self, state):
+        if self.bus is not None:
+            txn = state.results["post"]
+            self.bus.publish(TOPIC_AUDIT_EVENTS, txn["account_id"], {
+                "type": "payment.posted",
+                "saga_id": state.saga_id,
+                "transaction_id": txn["id"],
+                "amount": txn["amount"],
+                "fraud": state.results.get("fraud_check"),
+                "compliance": state.results.get("compliance_check"),
+                "timestamp": time.time(),
+            })
+        return True
+
+    async def notify(self, state):
+        await self._call_downstream("/api/v1/notifications/payment")
+        if self.bus is not None:
+            txn = state.results["post"]
+            self.bus.publish(TOPIC_PAYMENTS, txn["account_id"], {"saga_id": state.saga_id, "transaction": txn})
+        return True
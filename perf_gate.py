@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Performance regression gate for the Quantum Banking mock backend
+Records per-endpoint/scenario baselines, reruns the suite, compares the runs
+with Welch confidence intervals and fails on significant regressions
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+from local_server import LocalServer
+from metrics import percentile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BASELINE_DIR = os.path.join(ROOT, "perf_baselines")
+
+Scenario = namedtuple("Scenario", "endpoint name method path clients body")
+
+SCENARIOS = [
+    Scenario("health", "single_client", "GET", "/api/v1/health", 1, None),
+    Scenario("accounts", "single_client", "GET", "/api/v1/accounts", 1, None),
+    Scenario("accounts_transactions", "single_client", "GET", "/api/v1/accounts/transactions/?page=1&per_page=10", 1, None),
+    Scenario("accounts_transactions", "concurrent_8", "GET", "/api/v1/accounts/transactions/?page=1&per_page=10", 8, None),
+    Scenario("auth_login", "single_client", "POST", "/api/v1/auth/login", 1, {"email": "demo@quantumbank.com"}),
+]
+
+# metric -> True when higher is better; gated metrics can fail the build, the rest are reported only
+METRICS = {"p50_ms": False, "p95_ms": False, "rps": True}
+GATED_METRICS = ("p50_ms", "rps")
+
+# Two-sided 95% Student t critical values; conservative (next lower df) between entries
+T_975 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262,
+         10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 30: 2.042, 60: 2.000}
+
+
+def scenario_key(scenario):
+    return f"{scenario.endpoint}/{scenario.name}"
+
+
+def baseline_path(scenario, directory=BASELINE_DIR):
+    return os.path.join(directory, scenario.endpoint, f"{scenario.name}.json")
+
+
+# ----------------------------------------------------------------------
+# Measurement
+# ----------------------------------------------------------------------
+def measure(port, scenario, requests_per_client):
+    """One run: every client sends requests_per_client requests on a keep-alive connection"""
+    body = json.dumps(scenario.body) if scenario.body is not None else None
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    latencies = [[] for _ in range(scenario.clients)]
+    errors = []
+
+    def client(i):
+        conn = http.client.HTTPConnection('localhost', port, timeout=30)
+        samples = latencies[i]
+        try:
+            for _ in range(requests_per_client):
+                t0 = time.perf_counter()
+                conn.request(scenario.method, scenario.path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                samples.append(time.perf_counter() - t0)
+                if response.status >= 400:
+                    errors.append(response.status)
+                if response.will_close:
+                    conn.close()
+        finally:
+            conn.close()
+
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(scenario.clients)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    wall = time.perf_counter() - start
+    if errors:
+        raise RuntimeError(f"{scenario_key(scenario)}: {len(errors)} error responses (first {errors[0]})")
+    samples = sorted(s for bucket in latencies for s in bucket)
+    return {
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "rps": len(samples) / wall,
+    }
+
+
+def run_suite(scenarios, runs, requests_per_client, warmup=50, progress=print):
+    """{scenario key: [run metrics, ...]}; runs are interleaved across scenarios so drift hits all alike"""
+    results = {scenario_key(s): [] for s in scenarios}
+    with LocalServer() as target:
+        for scenario in scenarios:
+            measure(target.port, scenario._replace(clients=1), warmup)
+        for run in range(runs):
+            for scenario in scenarios:
+                results[scenario_key(scenario)].append(measure(target.port, scenario, requests_per_client))
+            progress(f"   run {run + 1}/{runs} done")
+    return results
+
+
+# ----------------------------------------------------------------------
+# Statistics
+# ----------------------------------------------------------------------
+def t_critical(df):
+    if df >= 120:
+        return 1.96
+    eligible = [k for k in T_975 if k <= max(1, math.floor(df))]
+    return T_975[max(eligible)]
+
+
+def welch_interval(baseline, current):
+    """95% confidence interval for mean(current) - mean(baseline), unequal variances"""
+    mean_b, mean_c = statistics.fmean(baseline), statistics.fmean(current)
+    var_b = statistics.variance(baseline) if len(baseline) > 1 else 0.0
+    var_c = statistics.variance(current) if len(current) > 1 else 0.0
+    diff = mean_c - mean_b
+    se_b, se_c = var_b / len(baseline), var_c / len(current)
+    se = math.sqrt(se_b + se_c)
+    if se == 0:
+        return diff, diff, diff
+    denominator = (se_b ** 2 / (len(baseline) - 1) if len(baseline) > 1 else 0) + \
+                  (se_c ** 2 / (len(current) - 1) if len(current) > 1 else 0)
+    df = (se_b + se_c) ** 2 / denominator if denominator else 1
+    margin = t_critical(df) * se
+    return diff, diff - margin, diff + margin
+
+
+def compare_metric(baseline, current, higher_is_better, threshold):
+    """Relative change with its confidence interval and a verdict.
+
+    A change only counts when the whole interval sits on one side of zero
+    (the difference is significant) and the point estimate is beyond the
+    threshold; everything else is noise.
+    """
+    mean_b = statistics.fmean(baseline)
+    diff, low, high = welch_interval(baseline, current)
+    change, ci = diff / mean_b, (low / mean_b, high / mean_b)
+    worse = -change if higher_is_better else change
+    worse_ci = (-ci[1], -ci[0]) if higher_is_better else ci
+    if worse > threshold and worse_ci[0] > 0:
+        verdict = "regressed"
+    elif -worse > threshold and worse_ci[1] < 0:
+        verdict = "improved"
+    else:
+        verdict = "unchanged"
+    return {
+        "baseline_mean": mean_b,
+        "current_mean": statistics.fmean(current),
+        "change": change,
+        "ci_low": ci[0],
+        "ci_high": ci[1],
+        "verdict": verdict,
+    }
+
+
+# ----------------------------------------------------------------------
+# Baselines
+# ----------------------------------------------------------------------
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=ROOT, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "host": platform.node(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "git_commit": commit,
+    }
+
+
+def save_baseline(scenario, runs, requests_per_client, directory=BASELINE_DIR, env=None):
+    path = baseline_path(scenario, directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    document = {
+        "endpoint": scenario.endpoint,
+        "scenario": scenario.name,
+        "method": scenario.method,
+        "path": scenario.path,
+        "clients": scenario.clients,
+        "requests_per_client": requests_per_client,
+        "recorded_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        "environment": env or environment(),
+        "runs": [{metric: round(value, 4) for metric, value in run.items()} for run in runs],
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_baseline(scenario, directory=BASELINE_DIR):
+    try:
+        with open(baseline_path(scenario, directory), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def record_reference(ref, scenarios, runs, requests_per_client, directory):
+    """Record baselines for another commit (checked out in a temporary worktree) into directory"""
+    with tempfile.TemporaryDirectory() as tmp:
+        worktree = os.path.join(tmp, "reference")
+        subprocess.run(["git", "worktree", "add", "--detach", worktree, ref], cwd=ROOT, check=True,
+                       capture_output=True, timeout=120)
+        try:
+            command = [sys.executable, "perf_gate.py", "record", "--runs", str(runs),
+                       "--requests", str(requests_per_client), "--baseline-dir", directory]
+            for scenario in scenarios:
+                command += ["--scenario", scenario_key(scenario)]
+            subprocess.run(command, cwd=worktree, check=True)
+        finally:
+            subprocess.run(["git", "worktree", "remove", "--force", worktree], cwd=ROOT, capture_output=True,
+                           timeout=120)
+
+
+def compare_suite(scenarios, current, threshold, directory=BASELINE_DIR):
+    """[(scenario, baseline document or None, {metric: comparison})]"""
+    rows = []
+    for scenario in scenarios:
+        baseline = load_baseline(scenario, directory)
+        comparisons = {}
+        if baseline is not None:
+            for metric, higher_is_better in METRICS.items():
+                comparisons[metric] = compare_metric([run[metric] for run in baseline["runs"]],
+                                                     [run[metric] for run in current[scenario_key(scenario)]],
+                                                     higher_is_better, threshold)
+        rows.append((scenario, baseline, comparisons))
+    return rows
+
+
+def failed(rows):
+    return [(scenario, metric) for scenario, _, comparisons in rows for metric, c in comparisons.items()
+            if metric in GATED_METRICS and c["verdict"] == "regressed"]
+
+
+# ----------------------------------------------------------------------
+# Reporting
+# ----------------------------------------------------------------------
+VERDICT_MARKS = {"regressed": "❌ regressed", "improved": "🚀 improved", "unchanged": "✅ unchanged"}
+
+
+def render_report(rows, threshold, env):
+    lines = [
+        "# Performance comparison",
+        "",
+        f"Threshold: {threshold:.0%} change, significant at 95% confidence (Welch). "
+        f"Gated metrics: {', '.join(GATED_METRICS)}.",
+        "",
+        "| Endpoint / scenario | Metric | Baseline | Current | Change | 95% CI | Result |",
+        "|---|---|---:|---:|---:|---|---|",
+    ]
+    hosts = set()
+    for scenario, baseline, comparisons in rows:
+        key = f"`{scenario.method} {scenario.path}` ({scenario.name})"
+        if baseline is None:
+            lines.append(f"| {key} | | | | | | ⚠️ no baseline |")
+            continue
+        hosts.add(baseline["environment"].get("host"))
+        for metric, c in comparisons.items():
+            result = VERDICT_MARKS[c["verdict"]] if metric in GATED_METRICS else c["verdict"] + " (info)"
+            lines.append(f"| {key} | {metric} | {c['baseline_mean']:.3f} | {c['current_mean']:.3f} | "
+                         f"{c['change']:+.1%} | {c['ci_low']:+.1%} … {c['ci_high']:+.1%} | {result} |")
+    lines.append("")
+    if hosts - {env["host"]}:
+        lines.append(f"⚠️ Baselines were recorded on {', '.join(sorted(h for h in hosts if h))}, "
+                     f"this run is on {env['host']}; re-record baselines on the CI runner for a like-for-like gate.")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def print_rows(rows):
+    print(f"{'scenario':<42} {'metric':<7} {'baseline':>10} {'current':>10} {'change':>8} {'95% CI':>19}  result")
+    for scenario, baseline, comparisons in rows:
+        key = scenario_key(scenario)
+        if baseline is None:
+            print(f"{key:<42} ⚠️  no baseline (run: python perf_gate.py record)")
+            continue
+        for metric, c in comparisons.items():
+            result = VERDICT_MARKS[c["verdict"]] if metric in GATED_METRICS else c["verdict"]
+            print(f"{key:<42} {metric:<7} {c['baseline_mean']:>10.3f} {c['current_mean']:>10.3f} "
+                  f"{c['change']:>+8.1%} {c['ci_low']:>+9.1%}…{c['ci_high']:>+8.1%}  {result}")
+
+
+def select(names):
+    if not names:
+        return SCENARIOS
+    chosen = [s for s in SCENARIOS if scenario_key(s) in names or s.endpoint in names]
+    unknown = set(names) - {scenario_key(s) for s in chosen} - {s.endpoint for s in chosen}
+    if unknown:
+        raise SystemExit(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+    return chosen
+
+
+def run_gate(args, scenarios):
+    """Measure the working tree, then record it or compare it with args.baseline_dir; returns the exit code"""
+    if getattr(args, "fault_profile", None):
+        import mock_backend
+        mock_backend.fault_injector.set_profile(args.fault_profile)
+        print(f"⚠️  Fault profile active: {args.fault_profile}")
+    current = run_suite(scenarios, args.runs, args.requests)
+
+    if args.command == "record":
+        env = environment()
+        for scenario in scenarios:
+            path = save_baseline(scenario, current[scenario_key(scenario)], args.requests, args.baseline_dir, env)
+            p50 = statistics.fmean(run["p50_ms"] for run in current[scenario_key(scenario)])
+            print(f"💾 {scenario_key(scenario):<42} p50 {p50:.3f} ms -> {os.path.relpath(path)}")
+        return 0
+
+    rows = compare_suite(scenarios, current, args.threshold, args.baseline_dir)
+    print("-" * 100)
+    print_rows(rows)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(render_report(rows, args.threshold, environment()))
+        print(f"📝 Report written to {args.report}")
+    if args.json_report:
+        with open(args.json_report, "w", encoding="utf-8") as f:
+            json.dump([{"scenario": scenario_key(s), "baseline": b is not None, "metrics": c} for s, b, c in rows],
+                      f, indent=2)
+    regressions = failed(rows)
+    print("=" * 100)
+    if regressions:
+        print(f"❌ {len(regressions)} significant regression(s) beyond {args.threshold:.0%}: "
+              + ", ".join(f"{scenario_key(s)} {m}" for s, m in regressions))
+        return 1
+    print(f"✅ No significant regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Performance regression gate")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("record", "run the suite and store the results as baselines"),
+                            ("compare", "run the suite and compare it with the stored baselines")):
+        command = sub.add_parser(name, help=help_text)
+        command.add_argument("--scenario", action="append", help="endpoint or endpoint/scenario (repeatable)")
+        command.add_argument("--runs", type=int, default=10, help="independent runs per scenario")
+        command.add_argument("--requests", type=int, default=500, help="requests per client per run")
+        command.add_argument("--baseline-dir", default=BASELINE_DIR)
+    compare = sub.choices["compare"]
+    compare.add_argument("--threshold", type=float, default=float(os.environ.get("PERF_THRESHOLD", 0.15)),
+                         help="relative change that counts as a regression (default 0.15)")
+    compare.add_argument("--against", metavar="GIT_REF",
+                         help="measure this commit in the same session and compare with it instead of the stored "
+                              "baselines (like-for-like on any machine)")
+    compare.add_argument("--report", help="write a markdown diff report to this file")
+    compare.add_argument("--json", dest="json_report", help="write the comparison as JSON to this file")
+    compare.add_argument("--fault-profile", help="run under a fault_profiles.json profile (checks the gate trips)")
+    sub.add_parser("list", help="show scenarios and their baselines")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for scenario in SCENARIOS:
+            baseline = load_baseline(scenario)
+            recorded = f"recorded {baseline['recorded_at']} ({len(baseline['runs'])} runs)" if baseline else "no baseline"
+            print(f"{scenario_key(scenario):<42} {scenario.method:<5} {scenario.path:<50} {recorded}")
+        return 0
+
+    scenarios = select(args.scenario)
+    print("📏 Performance Regression Gate")
+    print("=" * 100)
+    print(f"{len(scenarios)} scenarios x {args.runs} runs x {args.requests} requests per client")
+    if getattr(args, "against", None):
+        # The reference baselines only live for this run, however it ends
+        with tempfile.TemporaryDirectory() as reference:
+            print(f"📐 Measuring {args.against} first (temporary worktree)")
+            try:
+                record_reference(args.against, scenarios, args.runs, args.requests, reference)
+            except (OSError, subprocess.SubprocessError) as e:
+                print(f"❌ Could not measure {args.against}: {e}")
+                return 2
+            args.baseline_dir = reference
+            print("📐 Measuring the working tree")
+            return run_gate(args, scenarios)
+    return run_gate(args, scenarios)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Ledger shard rebalancing tool
+Shows the slot layout of a running sharded mock backend and moves slots
+to a new worker count, or previews the moves a resize would make
+"""
+
+import argparse
+import json
+import sys
+import urllib.error
+import urllib.request
+from collections import Counter
+
+from sharded_ledger import NUM_SLOTS, even_slot_map, plan_rebalance
+
+
+def call(url, path, body=None, timeout=300):
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(url.rstrip('/') + path, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read() or b"{}")
+
+
+def show_layout(stats):
+    print(f"📒 {stats['shards']} shards, {stats['slots']} slots")
+    for shard in stats["per_shard"]:
+        print(f"   shard {shard['shard']:>3} (pid {shard['pid']}): {shard['slots']:>4} slots "
+              f"{shard['accounts']:>8} accounts {shard['transactions']:>9} transactions")
+    counters = stats["counters"]
+    print(f"   transfers: {counters['local_transfers']} local, {counters['cross_shard_transfers']} cross-shard, "
+          f"{counters['aborted']} aborted; {counters['slots_moved']} slots moved so far")
+
+
+def preview(current, target):
+    """Slot moves for a resize from an evenly spread layout"""
+    old = even_slot_map(current)
+    new = plan_rebalance(old, target)
+    moves = Counter((a, b) for a, b in zip(old, new) if a != b)
+    print(f"🔍 {current} → {target} shards moves {sum(moves.values())} of {NUM_SLOTS} slots")
+    for (source, dest), count in sorted(moves.items()):
+        print(f"   shard {source} → shard {dest}: {count} slots")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebalance the mock backend's sharded ledger")
+    parser.add_argument("--url", default="http://localhost:8080", help="Mock backend base URL")
+    parser.add_argument("--shards", type=int, help="Target worker count (default: even out the current ones)")
+    parser.add_argument("--status", action="store_true", help="Only show the current layout")
+    parser.add_argument("--preview", nargs=2, type=int, metavar=("FROM", "TO"),
+                        help="Print the slot moves for a resize without contacting the server")
+    args = parser.parse_args()
+
+    if args.preview:
+        preview(*args.preview)
+        return 0
+    try:
+        stats = call(args.url, "/api/v1/ledger/shards")
+    except (urllib.error.URLError, OSError) as e:
+        print(f"❌ Cannot reach {args.url}: {e}")
+        return 1
+    if not stats.get("sharded"):
+        print("❌ The ledger is not sharded (start the backend with LEDGER_SHARDS > 0)")
+        return 1
+    show_layout(stats)
+    if args.status:
+        return 0
+
+    result = call(args.url, "/api/v1/ledger/rebalance", {"shards": args.shards or stats["shards"]})
+    if "error" in result:
+        print(f"❌ Rebalance failed: {result['error']}")
+        return 1
+    print(f"✅ {result['from_shards']} → {result['to_shards']} shards: moved {result['slots_moved']} slots "
+          f"({result['accounts_moved']} accounts) in {result['seconds'] * 1000:.0f} ms")
+    show_layout(call(args.url, "/api/v1/ledger/shards"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Hot-reloadable route and fixture table for the Quantum Banking mock backend
+Loads mock responses from JSON files in a watched directory and swaps in a
+freshly built table whenever they change, without restarting the server
+
+A definition file holds {"routes": [...]}; each route has a "method", either
+an exact "path" or a "prefix", an optional "status" (default 200) and either
+an inline "body" or a "fixture" file path relative to the definition file.
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+
+from metrics import LatencyStats
+
+DEFAULT_DIRECTORY = Path(__file__).resolve().parent / "mock_routes"
+
+
+class RouteDefinitionError(Exception):
+    pass
+
+
+class Route:
+    __slots__ = ("method", "path", "prefix", "status", "body", "source")
+
+    def __init__(self, method, path, prefix, status, body, source):
+        self.method = method
+        self.path = path
+        self.prefix = prefix
+        self.status = status
+        self.body = body  # pre-encoded JSON bytes
+        self.source = source
+
+
+class RouteTable:
+    """Immutable snapshot of every loaded route; never modified after construction"""
+
+    def __init__(self, routes=(), version=0, signature=()):
+        self.version = version
+        self.signature = signature
+        self.loaded_at = time.time()
+        self.routes = tuple(routes)
+        self._exact = {}
+        prefixes = []
+        for route in self.routes:
+            if route.path is not None:
+                self._exact.setdefault((route.method, route.path), route)
+            else:
+                prefixes.append(route)
+        # Longest prefix wins
+        self._prefixes = sorted(prefixes, key=lambda r: len(r.prefix), reverse=True)
+
+    def match(self, method, path):
+        route = self._exact.get((method, path))
+        if route is None and path.endswith('/'):
+            route = self._exact.get((method, path.rstrip('/')))
+        if route is not None:
+            return route
+        for route in self._prefixes:
+            if route.method == method and path.startswith(route.prefix):
+                return route
+        return None
+
+    def __len__(self):
+        return len(self.routes)
+
+
+def _load_file(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            definition = json.load(f)
+    except (OSError, ValueError) as e:
+        raise RouteDefinitionError(f"{path}: {e}") from None
+    entries = definition.get("routes") if isinstance(definition, dict) else None
+    if not isinstance(entries, list):
+        raise RouteDefinitionError(f"{path}: expected an object with a \"routes\" list")
+
+    routes = []
+    for i, entry in enumerate(entries):
+        where = f"{path} route #{i + 1}"
+        if not isinstance(entry, dict) or ("path" in entry) == ("prefix" in entry):
+            raise RouteDefinitionError(f"{where}: needs exactly one of \"path\" or \"prefix\"")
+        target = entry.get("path", entry.get("prefix"))
+        if not isinstance(target, str) or not target.startswith("/"):
+            raise RouteDefinitionError(f"{where}: \"path\"/\"prefix\" must be a string starting with /")
+        if not isinstance(entry.get("method", "GET"), str):
+            raise RouteDefinitionError(f"{where}: \"method\" must be a string")
+        status = entry.get("status", 200)
+        if isinstance(status, bool) or not isinstance(status, int) or not 100 <= status <= 599:
+            raise RouteDefinitionError(f"{where}: \"status\" must be an HTTP status code, got {status!r}")
+        if "fixture" in entry:
+            if not isinstance(entry["fixture"], str):
+                raise RouteDefinitionError(f"{where}: \"fixture\" must be a file path")
+            fixture = path.parent / entry["fixture"]
+            try:
+                body = fixture.read_bytes()
+                json.loads(body)
+            except (OSError, ValueError) as e:
+                raise RouteDefinitionError(f"{where}: fixture {fixture}: {e}") from None
+        elif "body" in entry:
+            body = json.dumps(entry["body"]).encode()
+        else:
+            raise RouteDefinitionError(f"{where}: needs a \"body\" or a \"fixture\"")
+        routes.append(Route(entry.get("method", "GET").upper(), entry.get("path"),
+                            entry.get("prefix"), status, body, str(path)))
+    return routes
+
+
+class HotRouteTable:
+    """Route table that follows a directory of definition files.
+
+    Readers call current() once per request and keep using that snapshot,
+    so an in-flight request always finishes against the version it started
+    with. A reload builds a complete new RouteTable off to the side and
+    publishes it with a single reference assignment, which is atomic, so
+    new requests see either the old table or the new one and never wait.
+    A definition that fails to parse leaves the current table in place.
+    """
+
+    def __init__(self, directory, poll_interval=0.5):
+        self.directory = Path(directory)
+        self.poll_interval = poll_interval
+        self._table = RouteTable()
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.reloads = 0
+        self.last_error = None
+        self._failed_signature = None
+        self.reload_latency = LatencyStats()
+        self.detect_latency = LatencyStats()
+
+    def current(self):
+        return self._table
+
+    def _signature(self):
+        if not self.directory.is_dir():
+            return ()
+        entries = []
+        for path in sorted(self.directory.rglob("*.json")):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((str(path), stat.st_mtime_ns, stat.st_size))
+        return tuple(entries)
+
+    def reload(self, force=False):
+        """Rebuild and swap the table if any file changed; returns True if a new table was published"""
+        with self._reload_lock:
+            signature = self._signature()
+            if not force and signature in (self._table.signature, self._failed_signature):
+                return False
+            start = time.perf_counter()
+            try:
+                routes = []
+                # Definitions are the top-level files; fixtures live in subdirectories
+                for path in sorted(self.directory.glob("*.json")) if self.directory.is_dir() else ():
+                    routes.extend(_load_file(path))
+            except RouteDefinitionError as e:
+                self.last_error = str(e)
+                # Remember the broken signature so it is not re-parsed every poll
+                self._failed_signature = signature
+                return False
+            self._table = RouteTable(routes, self._table.version + 1, signature)
+            self.reload_latency.record(time.perf_counter() - start)
+            if signature:
+                newest = max(mtime for _, mtime, _ in signature) / 1e9
+                self.detect_latency.record(max(0.0, time.time() - newest))
+            self.last_error = None
+            self.reloads += 1
+            return True
+
+    def start(self):
+        self.reload()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="route-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.reload()
+            except Exception as e:  # keep watching whatever happens to one reload
+                self.last_error = str(e)
+
+    def status(self):
+        table = self._table
+        return {
+            "directory": str(self.directory),
+            "version": table.version,
+            "routes": len(table),
+            "files": len(table.signature),
+            "loaded_at": table.loaded_at,
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+            "poll_interval_seconds": self.poll_interval,
+            "reload_latency": self.reload_latency.snapshot(),
+            "change_to_swap_latency": self.detect_latency.snapshot(),
+        }
@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+Saga orchestrator for the Quantum Banking mock backend
+Runs a saga's steps on an asyncio loop as a dependency graph (independent
+steps concurrently), with per-step timeouts, compensation on failure and a
+JSON-lines state log replayed for crash recovery
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import MetricsRegistry
+
+RUNNING = "running"
+COMPENSATING = "compensating"
+COMPLETED = "completed"
+COMPENSATED = "compensated"
+# Compensation itself failed, or a step after the pivot kept failing; recover() picks these up
+STUCK = "stuck"
+FINISHED = (COMPLETED, COMPENSATED)
+
+
+class SagaError(Exception):
+    pass
+
+
+class StepFailed(Exception):
+    """Raised by a step to fail the saga with a machine-readable code (e.g. a fraud decline)"""
+
+    def __init__(self, message, code="STEP_FAILED"):
+        super().__init__(message)
+        self.code = code
+
+
+class Step:
+    """One saga step.
+
+    action(state) and compensate(state, result) are coroutine functions or
+    plain (blocking) functions; plain ones run on the orchestrator's thread
+    pool. Results must be JSON-serialisable so they can be logged.
+    A timed-out blocking action cannot be interrupted: the saga waits for
+    it before compensating so a late success is still undone. Steps after
+    the pivot are never compensated; they are retried instead.
+    """
+
+    __slots__ = ("name", "action", "compensate", "after", "timeout", "retries", "blocking", "pivot")
+
+    def __init__(self, name, action, compensate=None, after=(), timeout=1.0, retries=0, pivot=False):
+        self.name = name
+        self.action = action
+        self.compensate = compensate
+        self.after = tuple(after)
+        self.timeout = timeout
+        self.retries = retries
+        self.blocking = not asyncio.iscoroutinefunction(action)
+        self.pivot = pivot
+
+
+class SagaDefinition:
+    def __init__(self, name, steps):
+        self.name = name
+        self.steps = list(steps)
+        self.by_name = {step.name: step for step in self.steps}
+        if len(self.by_name) != len(self.steps):
+            raise SagaError(f"Saga {name} has duplicate step names")
+        for step in self.steps:
+            missing = [dep for dep in step.after if dep not in self.by_name]
+            if missing:
+                raise SagaError(f"Step {step.name} depends on unknown steps: {missing}")
+        self.order = self._topological_order()
+        pivots = [step.name for step in self.steps if step.pivot]
+        if len(pivots) > 1:
+            raise SagaError(f"Saga {name} has more than one pivot step: {pivots}")
+        self.pivot = pivots[0] if pivots else None
+
+    def _topological_order(self):
+        order, done = [], set()
+        while len(order) < len(self.steps):
+            ready = [s.name for s in self.steps if s.name not in done and all(d in done for d in s.after)]
+            if not ready:
+                raise SagaError(f"Saga {self.name} has a dependency cycle")
+            order.extend(ready)
+            done.update(ready)
+        return order
+
+    def critical_path(self, durations):
+        """Longest dependency chain given per-step durations; what one saga should take end to end"""
+        finish = {}
+        for name in self.order:
+            step = self.by_name[name]
+            finish[name] = max((finish[dep] for dep in step.after), default=0.0) + durations.get(name, 0.0)
+        return max(finish.values(), default=0.0)
+
+
+class SagaState:
+    __slots__ = ("saga_id", "definition", "payload", "status", "results", "compensated", "failed_step",
+                 "error", "code", "started_at", "timings", "inflight")
+
+    def __init__(self, saga_id, definition, payload, started_at=None):
+        self.saga_id = saga_id
+        self.definition = definition
+        self.payload = payload
+        self.status = RUNNING
+        self.results = {}          # step -> result, in completion order
+        self.compensated = set()
+        self.failed_step = None
+        self.error = None
+        self.code = None
+        self.started_at = started_at or time.time()
+        self.timings = []          # (step, start_ns, end_ns, outcome)
+        self.inflight = {}         # blocking step -> executor future still running
+
+    def outcome(self):
+        return {
+            "saga_id": self.saga_id,
+            "saga": self.definition,
+            "status": self.status,
+            "results": dict(self.results),
+            "failed_step": self.failed_step,
+            "error": self.error,
+            "code": self.code,
+            "compensated": sorted(self.compensated),
+            "steps": [{"step": step, "start_ns": start, "end_ns": end, "outcome": outcome}
+                      for step, start, end, outcome in self.timings],
+        }
+
+
+class SagaLog:
+    """Append-only JSON-lines record of saga progress.
+
+    Every transition is written (and flushed) before the saga moves on, so
+    after a crash replay() knows which steps finished and which sagas never
+    did. Finished sagas are dropped when the log is compacted at startup.
+    Without a path the log is in memory only.
+    """
+
+    def __init__(self, path=None, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        self.writes = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    def replay(self):
+        """Unfinished sagas from the file as SagaState objects; compacts the file to just those"""
+        states = {}
+        if self.path and os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn final write
+                    self._apply(states, entry)
+        unfinished = {saga_id: s for saga_id, s in states.items() if s.status not in FINISHED}
+        if self.path:
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for state in unfinished.values():
+                    for entry in self._entries(state):
+                        f.write(json.dumps(entry) + "\n")
+            os.replace(tmp, self.path)
+        return list(unfinished.values())
+
+    @staticmethod
+    def _apply(states, entry):
+        event, saga_id = entry["event"], entry["saga"]
+        if event == "started":
+            states[saga_id] = SagaState(saga_id, entry["definition"], entry["payload"], entry["t"])
+            return
+        state = states.get(saga_id)
+        if state is None:
+            return
+        if event == "step_done":
+            state.results[entry["step"]] = entry.get("result")
+        elif event == "compensated":
+            state.compensated.add(entry["step"])
+        elif event == "status":
+            state.status = entry["status"]
+            state.failed_step = entry.get("step")
+            state.error = entry.get("error")
+
+    @staticmethod
+    def _entries(state):
+        yield {"saga": state.saga_id, "event": "started", "definition": state.definition,
+               "payload": state.payload, "t": state.started_at}
+        for step, result in state.results.items():
+            yield {"saga": state.saga_id, "event": "step_done", "step": step, "result": result}
+        for step in state.compensated:
+            yield {"saga": state.saga_id, "event": "compensated", "step": step}
+        yield {"saga": state.saga_id, "event": "status", "status": state.status, "step": state.failed_step,
+               "error": state.error}
+
+    def record(self, saga_id, event, **data):
+        if not self.path:
+            return
+        line = json.dumps(dict(data, saga=saga_id, event=event)) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.writes += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class SagaOrchestrator:
+    """Runs registered sagas on a dedicated event loop thread.
+
+    Callers on server threads use run() or submit(); steps of one saga
+    start as soon as their dependencies finish, so a saga takes as long
+    as its critical path rather than the sum of its steps.
+    """
+
+    def __init__(self, log=None, workers=16, compensation_retries=3, compensation_timeout=5.0):
+        self.log = log or SagaLog()
+        self.workers = workers
+        self.compensation_retries = compensation_retries
+        self.compensation_timeout = compensation_timeout
+        self.definitions = {}
+        self.metrics = MetricsRegistry()
+        self.counters = {"started": 0, COMPLETED: 0, COMPENSATED: 0, STUCK: 0, "timeouts": 0,
+                         "recovered": 0, "in_flight": 0}
+        self._stuck = {}
+        self._start_lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._executor = None
+
+    def register(self, definition):
+        self.definitions[definition.name] = definition
+        return definition
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def start(self):
+        """Start the loop thread and resume any sagas the log says were cut off"""
+        with self._start_lock:
+            if self._loop is not None:
+                return self
+            self._start_loop()
+        self.recover(self.log.replay())
+        return self
+
+    def _start_loop(self):
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="saga-step")
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(self._executor)
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, args=(ready,), name="saga-orchestrator", daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def _run_loop(self, ready):
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(ready.set)
+        self._loop.run_forever()
+
+    def stop(self):
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+        self._executor.shutdown(wait=False)
+        self.log.close()
+        self._loop = self._thread = self._executor = None
+
+    # ------------------------------------------------------------------
+    # Running sagas
+    # ------------------------------------------------------------------
+    def submit(self, name, payload):
+        """concurrent.futures.Future resolving to the saga outcome dict"""
+        if self._loop is None:
+            self.start()
+        definition = self.definitions.get(name)
+        if definition is None:
+            raise SagaError(f"Unknown saga: {name}")
+        state = SagaState(uuid.uuid4().hex[:20], name, payload)
+        return asyncio.run_coroutine_threadsafe(self._start(definition, state), self._loop)
+
+    def run(self, name, payload, timeout=None):
+        return self.submit(name, payload).result(timeout)
+
+    async def _start(self, definition, state):
+        self.counters["started"] += 1
+        self.log.record(state.saga_id, "started", definition=definition.name, payload=state.payload,
+                        t=state.started_at)
+        return await self._execute(definition, state)
+
+    async def _execute(self, definition, state):
+        started = time.perf_counter()
+        self.counters["in_flight"] += 1
+        try:
+            failure = await self._forward(definition, state)
+            if failure is not None:
+                step, error, code = failure
+                state.failed_step, state.error, state.code = step, error, code
+                if definition.pivot is not None and definition.pivot in state.results:
+                    # Past the point of no return: leave it for recover() to roll forward
+                    self._set_status(state, STUCK)
+                else:
+                    self._set_status(state, COMPENSATING)
+                    await self._compensate(definition, state)
+            else:
+                self._set_status(state, COMPLETED)
+        finally:
+            self.counters["in_flight"] -= 1
+        self.counters[state.status] += 1
+        if state.status == STUCK:
+            self._stuck[state.saga_id] = state
+        self.metrics.record(f"{definition.name}.{state.status}", time.perf_counter() - started)
+        return state.outcome()
+
+    def _set_status(self, state, status):
+        state.status = status
+        self.log.record(state.saga_id, "status", status=status, step=state.failed_step, error=state.error)
+
+    async def _forward(self, definition, state):
+        """Run outstanding steps as their dependencies complete; returns (step, error, code) on failure"""
+        pending = [definition.by_name[name] for name in definition.order if name not in state.results]
+        running = {}
+        failure = None
+        while pending or running:
+            if failure is None:
+                for step in [s for s in pending if all(dep in state.results for dep in s.after)]:
+                    pending.remove(step)
+                    running[asyncio.ensure_future(self._run_step(state, step))] = step
+            if not running:
+                break
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                step = running.pop(task)
+                if task.cancelled():
+                    continue
+                error = task.exception()
+                if error is None:
+                    self._step_done(state, step.name, task.result())
+                elif failure is None:
+                    code = getattr(error, "code", "STEP_TIMEOUT" if isinstance(error, asyncio.TimeoutError)
+                                   else "STEP_ERROR")
+                    failure = (step.name, str(error) or f"{step.name} timed out after {step.timeout}s", code)
+                    for other in running:
+                        other.cancel()
+            if failure is not None:
+                pending = []
+        if failure is not None and state.inflight:
+            # Blocking actions cannot be cancelled; a late success still needs compensating
+            for name, future in list(state.inflight.items()):
+                try:
+                    self._step_done(state, name, await future)
+                except Exception:
+                    pass
+            state.inflight.clear()
+        return failure
+
+    def _step_done(self, state, name, result):
+        state.results[name] = result
+        self.log.record(state.saga_id, "step_done", step=name, result=result)
+
+    async def _run_step(self, state, step):
+        attempts = step.retries + 1
+        for attempt in range(attempts):
+            start_ns = time.time_ns()
+            try:
+                result = await self._call(state, step.name, step.action, step.timeout, state)
+            except StepFailed:
+                # A decision, not a fault: retrying would give the same answer
+                self._timing(state, step.name, start_ns, "failed")
+                raise
+            except asyncio.CancelledError:
+                self._timing(state, step.name, start_ns, "cancelled")
+                raise
+            except Exception as e:
+                timed_out = isinstance(e, asyncio.TimeoutError)
+                self.counters["timeouts"] += timed_out
+                self._timing(state, step.name, start_ns, "timeout" if timed_out else "error")
+                # A timed-out blocking call may still land, so running it again could apply it twice
+                if attempt + 1 == attempts or (timed_out and step.blocking):
+                    raise
+                continue
+            self._timing(state, step.name, start_ns, "ok")
+            return result
+
+    async def _call(self, state, name, function, timeout, *args):
+        if asyncio.iscoroutinefunction(function):
+            return await asyncio.wait_for(function(*args), timeout)
+        future = self._loop.run_in_executor(None, function, *args)
+        state.inflight[name] = future
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            raise
+        except Exception:
+            del state.inflight[name]
+            raise
+        del state.inflight[name]
+        return result
+
+    def _timing(self, state, name, start_ns, outcome):
+        end_ns = time.time_ns()
+        state.timings.append((name, start_ns, end_ns, outcome))
+        self.metrics.record(f"{state.definition}.step.{name}", (end_ns - start_ns) / 1e9)
+
+    async def _compensate(self, definition, state):
+        """Undo completed steps newest first; STUCK if any compensation keeps failing"""
+        for name in reversed(list(state.results)):
+            step = definition.by_name[name]
+            if step.compensate is None or name in state.compensated:
+                continue
+            for attempt in range(self.compensation_retries):
+                start_ns = time.time_ns()
+                try:
+                    # Blocking compensations run to completion; retrying one that timed out could undo twice
+                    blocking = not asyncio.iscoroutinefunction(step.compensate)
+                    await self._call(state, f"{name}.compensate", step.compensate,
+                                     None if blocking else self.compensation_timeout, state, state.results[name])
+                except Exception:
+                    self._timing(state, f"{name}.compensate", start_ns, "error")
+                    await asyncio.sleep(0.01 * (attempt + 1))
+                    continue
+                self._timing(state, f"{name}.compensate", start_ns, "ok")
+                state.compensated.add(name)
+                self.log.record(state.saga_id, "compensated", step=name)
+                break
+            else:
+                self._set_status(state, STUCK)
+                return
+        self._set_status(state, COMPENSATED)
+
+    # ------------------------------------------------------------------
+    # Recovery
+    # ------------------------------------------------------------------
+    def recover(self, states=None):
+        """Finish sagas cut off by a crash (states from the log) or left STUCK.
+
+        Sagas past their pivot roll forward through the remaining steps;
+        the rest are compensated. Returns counts by final status.
+        """
+        if states is None:
+            states, self._stuck = list(self._stuck.values()), {}
+        outcomes = {}
+        for state in states:
+            definition = self.definitions.get(state.definition)
+            if definition is None:
+                continue
+            state.status = RUNNING
+            future = asyncio.run_coroutine_threadsafe(self._resume(definition, state), self._loop)
+            status = future.result()["status"]
+            outcomes[status] = outcomes.get(status, 0) + 1
+            self.counters["recovered"] += 1
+        return outcomes
+
+    async def _resume(self, definition, state):
+        if definition.pivot is not None and definition.pivot in state.results:
+            return await self._execute(definition, state)
+        self.counters["in_flight"] += 1
+        try:
+            self._set_status(state, COMPENSATING)
+            await self._compensate(definition, state)
+        finally:
+            self.counters["in_flight"] -= 1
+        self.counters[state.status] += 1
+        return state.outcome()
+
+    def stats(self):
+        latency = self.metrics.snapshot()
+        sagas = {}
+        for name, definition in self.definitions.items():
+            means = {step: latency[f"{name}.step.{step}"]["avg_ms"]
+                     for step in definition.by_name if f"{name}.step.{step}" in latency}
+            sagas[name] = {
+                "steps": {step: {"after": list(definition.by_name[step].after),
+                                 "timeout_ms": definition.by_name[step].timeout * 1000}
+                          for step in definition.order},
+                "critical_path_ms": definition.critical_path(means),
+                "sum_of_steps_ms": sum(means.values()),
+            }
+        return {"counters": dict(self.counters), "stuck": len(self._stuck), "sagas": sagas, "latency": latency,
+                "log_writes": self.log.writes}
@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Sanctions and watchlist screening for the Quantum Banking mock backend
+Token-level Aho-Corasick automaton for exact list names anywhere in a payee
+string plus edit-distance and phonetic token keys for fuzzy (misspelt,
+transliterated, reordered) names
+"""
+
+import csv
+import itertools
+import math
+import random
+import re
+import threading
+import time
+import tracemalloc
+import unicodedata
+from array import array
+from collections import Counter
+from pathlib import Path
+
+from metrics import LatencyStats
+
+DEFAULT_LISTS = Path(__file__).resolve().parent / "watchlists"
+TOKEN_BITS = 22
+MAX_TOKENS = 1 << TOKEN_BITS
+# Shorter tokens only match exactly; one edit changes too much of them to mean the same name
+MIN_FUZZY_LENGTH = 4
+# Row ids a fuzzy lookup counts before it switches to scoring the remaining candidates one by one
+PROBE_BUDGET = 4000
+MIN_TOKEN_SIMILARITY = 0.6
+PHONETIC_SIMILARITY = 0.75
+# Legal forms, titles and connectives carry no identity; "Acme Trading Ltd" screens as "acme trading"
+NOISE_TOKENS = frozenset({
+    "the", "of", "and", "for", "mr", "mrs", "ms", "dr", "co", "corp", "corporation", "company", "inc", "ltd",
+    "limited", "llc", "plc", "sa", "ag", "gmbh", "bv", "nv", "srl", "jsc", "pjsc", "ooo", "fze", "group",
+})
+_SEPARATORS = re.compile(r"[\W_]+")
+# Letters transliterations commonly swap share a class (Qaddafi/Kadhafi, Ivanov/Ivanoff); vowels, h and y drop
+_PHONETIC_CLASSES = str.maketrans("bpfvwckqxgjszdt", "ppfffkkkkkjsstt", "aeiouyh")
+
+
+class WatchlistError(Exception):
+    pass
+
+
+def tokenize(name):
+    """Case-folded, accent-free tokens with noise words dropped (kept if nothing else is left)"""
+    text = unicodedata.normalize("NFKD", name.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    tokens = _SEPARATORS.sub(" ", text).split()
+    significant = [t for t in tokens if t not in NOISE_TOKENS]
+    return significant or tokens
+
+
+def phonetic_key(token):
+    """Consonant skeleton: letters mapped to their class, vowels dropped (a leading one kept as 0), repeats merged"""
+    key = [token[0].translate(_PHONETIC_CLASSES) or "0"]
+    for c in token[1:].translate(_PHONETIC_CLASSES):
+        if c != key[-1]:
+            key.append(c)
+    return "".join(key)
+
+
+def edit_distance(a, b):
+    """Levenshtein distance (tokens are short, so the plain two-row table is fast enough)"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def _add(index, key, token_id):
+    present = index.get(key)
+    if present is None:
+        index[key] = token_id
+    elif isinstance(present, tuple):
+        index[key] = present + (token_id,)
+    else:
+        index[key] = (present, token_id)
+
+
+def _ids(value):
+    if value is None:
+        return ()
+    return value if isinstance(value, tuple) else (value,)
+
+
+def load_watchlist(path):
+    """Entries from a CSV file with id,name[,list][,aliases] columns (aliases separated by ';')"""
+    path = Path(path)
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            entries = []
+            for row in csv.DictReader(f):
+                if not row.get("name"):
+                    continue
+                entries.append({
+                    "id": row.get("id") or f"{path.stem}-{len(entries) + 1}",
+                    "name": row["name"].strip(),
+                    "list": row.get("list") or path.stem,
+                    "aliases": [a.strip() for a in (row.get("aliases") or "").split(";") if a.strip()],
+                })
+            return entries
+    except (OSError, csv.Error, UnicodeDecodeError) as e:
+        raise WatchlistError(f"{path}: {e}") from None
+
+
+_ONSETS = ("b", "br", "ch", "d", "dr", "f", "g", "gh", "h", "j", "k", "kh", "kr", "l", "m", "n", "p", "q", "r",
+           "s", "sh", "st", "t", "th", "ts", "v", "w", "y", "z", "zh", "")
+_VOWELS = ("a", "e", "i", "o", "u", "ai", "ou", "ei", "ia", "y", "aa", "ie")
+_CODAS = ("", "", "", "n", "r", "l", "s", "m", "k", "t", "d", "v", "sh", "kh", "ng", "ov", "ev", "in", "an")
+_ORG_WORDS = ("trading", "shipping", "holdings", "petroleum", "logistics", "industries", "bank", "finance",
+              "maritime", "export", "mining", "aviation", "chemicals", "energy", "metals", "investment")
+
+
+def _word(rng, syllables):
+    return "".join(rng.choice(_ONSETS) + rng.choice(_VOWELS) + rng.choice(_CODAS)
+                   for _ in range(syllables)).capitalize()
+
+
+def synthetic_entries(count, seed=0):
+    """Made-up list entries for load testing.
+
+    Person names draw given and family names from pools with a Zipf-like
+    skew, as real lists repeat common names; about a third are companies.
+    """
+    rng = random.Random(seed)
+    given = [_word(rng, rng.randint(1, 3)) for _ in range(max(50, count // 100))]
+    family = [_word(rng, rng.randint(2, 3)) for _ in range(max(200, count // 4))]
+    weights = [list(itertools.accumulate(1 / (rank + 10) for rank in range(len(pool)))) for pool in (given, family)]
+
+    def name():
+        if rng.random() < 0.3:
+            return f"{_word(rng, rng.randint(2, 3))} {rng.choice(_ORG_WORDS).capitalize()} " \
+                   f"{rng.choice(('LLC', 'Ltd', 'FZE', 'JSC'))}"
+        first = rng.choices(given, cum_weights=weights[0], k=1 + (rng.random() < 0.3))
+        return " ".join(first + rng.choices(family, cum_weights=weights[1]))
+
+    return [{"id": f"SYN-{i}", "name": name(), "list": "SYNTHETIC",
+             "aliases": [name()] if rng.random() < 0.1 else []} for i in range(count)]
+
+
+class WatchlistIndex:
+    """Immutable screening index over a set of list entries.
+
+    Exact: every name (and alias) is a token sequence in an Aho-Corasick
+    automaton, so one pass over a payee string finds all listed names it
+    contains. Transitions live in one dict keyed by (state << TOKEN_BITS) |
+    token id, failure and output links in flat arrays.
+
+    Fuzzy: each query token is expanded to the vocabulary tokens one edit
+    away (deletion-neighbourhood keys) or sounding alike (phonetic keys),
+    and names are scored by how well their tokens cover the query, in any
+    order. Only the rows of the rarest query tokens are read: a name that
+    reaches the threshold has to match at least one of them.
+    """
+
+    def __init__(self, entries, threshold=0.8):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.entries = []
+        self._row_entry = array("I")
+        self._row_name = []
+        self._row_offsets = array("I", [0])
+        self._row_tokens = array("I")
+        self._vocab = {}
+        self._goto = {}
+        self._terminal = {}
+        token_rows = []
+        parent, token, depth = array("i", [0]), array("i", [0]), array("H", [0])
+
+        for entry in entries:
+            index = len(self.entries)
+            self.entries.append(entry)
+            for name in [entry["name"], *entry.get("aliases", ())]:
+                tokens = tokenize(name)
+                if not tokens:
+                    continue
+                row = len(self._row_name)
+                self._row_entry.append(index)
+                self._row_name.append(name)
+                state = 0
+                for tok in tokens:
+                    token_id = self._vocab.get(tok)
+                    if token_id is None:
+                        token_id = self._vocab[tok] = len(token_rows)
+                        if token_id >= MAX_TOKENS:
+                            raise WatchlistError(f"More than {MAX_TOKENS} distinct tokens")
+                        token_rows.append(array("I"))
+                    if not token_rows[token_id] or token_rows[token_id][-1] != row:
+                        token_rows[token_id].append(row)
+                    self._row_tokens.append(token_id)
+                    key = state << TOKEN_BITS | token_id
+                    nxt = self._goto.get(key)
+                    if nxt is None:
+                        nxt = self._goto[key] = len(parent)
+                        parent.append(state)
+                        token.append(token_id)
+                        depth.append(depth[state] + 1)
+                    state = nxt
+                self._terminal[state] = self._terminal.get(state, ()) + (row,)
+                self._row_offsets.append(len(self._row_tokens))
+        self._token_rows = token_rows
+        self._words = list(self._vocab)
+        self._fail, self._output = self._link(parent, token, depth)
+        self._deletions, self._phonetic = self._neighbourhoods()
+
+    def _link(self, parent, token, depth):
+        """Failure links (longest proper suffix that is also a trie path) and output links"""
+        states = len(parent)
+        fail = array("i", bytes(4 * states))
+        output = array("i", [-1]) * states
+        goto, terminal = self._goto, self._terminal
+        for state in sorted(range(1, states), key=depth.__getitem__):
+            p = parent[state]
+            if p:
+                token_id = token[state]
+                f = fail[p]
+                while True:
+                    nxt = goto.get(f << TOKEN_BITS | token_id)
+                    if nxt is not None or not f:
+                        fail[state] = nxt or 0
+                        break
+                    f = fail[f]
+            f = fail[state]
+            output[state] = f if f in terminal else output[f]
+        return fail, output
+
+    def _neighbourhoods(self):
+        """Vocabulary keyed by single-character deletions and by phonetic key (token ids, tuples on collision)"""
+        deletions, phonetic = {}, {}
+        for tok, token_id in self._vocab.items():
+            if len(tok) >= MIN_FUZZY_LENGTH:
+                for key in {tok[:i] + tok[i + 1:] for i in range(len(tok))}:
+                    _add(deletions, key, token_id)
+                _add(phonetic, phonetic_key(tok), token_id)
+        return deletions, phonetic
+
+    def __len__(self):
+        return len(self.entries)
+
+    def similar_tokens(self, tok):
+        """{token id: similarity} for vocabulary tokens within one edit of tok or with its phonetic key"""
+        vocab, deletions = self._vocab, self._deletions
+        found = {}
+        token_id = vocab.get(tok)
+        if token_id is not None:
+            found[token_id] = 1.0
+        if len(tok) < MIN_FUZZY_LENGTH:
+            return found
+        # A list token minus one letter equals tok (letter dropped), tok minus one letter is a list token
+        # (letter added), or both minus one letter agree (letter changed, or two adjacent ones swapped)
+        near = set(_ids(deletions.get(tok)))
+        for key in {tok[:i] + tok[i + 1:] for i in range(len(tok))}:
+            near.update(_ids(deletions.get(key)))
+            if key in vocab:
+                near.add(vocab[key])
+        words = self._words
+        for other in near:
+            if other not in found:
+                score = 1 - edit_distance(tok, words[other]) / max(len(tok), len(words[other]))
+                if score >= MIN_TOKEN_SIMILARITY:
+                    found[other] = score
+        for other in _ids(self._phonetic.get(phonetic_key(tok))):
+            if found.get(other, 0) < PHONETIC_SIMILARITY:
+                found[other] = PHONETIC_SIMILARITY
+        return found
+
+    def exact(self, tokens):
+        """Rows whose full token sequence appears contiguously in tokens"""
+        goto, fail, output, terminal, vocab = self._goto, self._fail, self._output, self._terminal, self._vocab
+        rows = set()
+        state = 0
+        for tok in tokens:
+            token_id = vocab.get(tok)
+            if token_id is None:
+                state = 0
+                continue
+            while True:
+                nxt = goto.get(state << TOKEN_BITS | token_id)
+                if nxt is not None:
+                    state = nxt
+                    break
+                if not state:
+                    break
+                state = fail[state]
+            hit = state if state in terminal else output[state]
+            while hit > 0:
+                rows.update(terminal[hit])
+                hit = output[hit]
+        return rows
+
+    def fuzzy(self, tokens, threshold=None):
+        """(row, score) for rows whose tokens match the query's at least threshold well.
+
+        score = 2 * sum of each query token's best similarity in the row /
+        (query tokens + row tokens), a Dice coefficient over tokens where an
+        exact token counts 1 and a near one its edit or phonetic similarity.
+        """
+        t = threshold or self.threshold
+        n = len(tokens)
+        if not n:
+            return []
+        matches = {}
+        expansions = []
+        for i, tok in enumerate(tokens):
+            similar = self.similar_tokens(tok)
+            expansions.append(similar)
+            for token_id, score in similar.items():
+                matches.setdefault(token_id, []).append((i, score))
+        # Each query token adds at most 1, so a row needs `need` of them matched, one of them among
+        # the n - need + 1 with the fewest rows. Rows are counted per matched query token, cheapest
+        # first; past those, only while the lists stay short next to them
+        token_rows = self._token_rows
+        cost = sorted((sum(len(token_rows[token_id]) for token_id in similar), i)
+                      for i, similar in enumerate(expansions))
+        need = math.ceil(t * (n + 1) / 2 - 1e-9)
+        probe = n - need + 1
+        budget = max(PROBE_BUDGET, 4 * sum(size for size, _ in cost[:probe]))
+        counts = Counter()
+        read = 0
+        for position, (size, i) in enumerate(cost):
+            if position >= probe and read + size > budget:
+                break
+            for token_id in expansions[i]:
+                counts.update(token_rows[token_id])
+            read += size
+            unread = n - position - 1
+        # Dice >= t bounds the row length; the slack keeps exact ratios like 2 of 3 tokens at t=0.8 in range
+        low, high = n * t / (2 - t) - 1e-9, n * (2 - t) / t + 1e-9
+        offsets, row_tokens = self._row_offsets, self._row_tokens
+        results = []
+        for row, count in counts.items():
+            if count + unread < need:
+                continue
+            start, stop = offsets[row], offsets[row + 1]
+            m = stop - start
+            if not low <= m <= high:
+                continue
+            best = [0.0] * n
+            for token_id in row_tokens[start:stop]:
+                for i, score in matches.get(token_id, ()):
+                    if score > best[i]:
+                        best[i] = score
+            score = 2 * sum(best) / (n + m)
+            if score >= t - 1e-9:
+                results.append((row, score))
+        return results
+
+    def screen(self, name, threshold=None, limit=10):
+        tokens = tokenize(name)
+        hits = {row: (1.0, "exact") for row in self.exact(tokens)}
+        for row, score in self.fuzzy(tokens, threshold):
+            if row not in hits:
+                hits[row] = (score, "fuzzy")
+        best = {}
+        for row, (score, kind) in hits.items():
+            entry = self._row_entry[row]
+            if entry not in best or score > best[entry][0]:
+                best[entry] = (score, kind, row)
+        ranked = sorted(best.items(), key=lambda item: -item[1][0])[:limit]
+        return [{
+            "entry_id": self.entries[entry]["id"],
+            "name": self.entries[entry]["name"],
+            "matched_name": self._row_name[row],
+            "list": self.entries[entry].get("list"),
+            "score": round(score, 3),
+            "match_type": kind,
+        } for entry, (score, kind, row) in ranked]
+
+    def describe(self):
+        return {
+            "entries": len(self.entries),
+            "names": len(self._row_name),
+            "automaton_states": len(self._fail),
+            "vocabulary": len(self._vocab),
+            "deletion_keys": len(self._deletions),
+            "phonetic_keys": len(self._phonetic),
+            "threshold": self.threshold,
+        }
+
+
+class Screener:
+    """Current watchlist index plus screening metrics; rebuilt indexes are swapped in whole"""
+
+    def __init__(self, threshold=0.8):
+        self.threshold = threshold
+        self.index = WatchlistIndex((), threshold)
+        self.build = {"seconds": 0.0, "memory_mb": None, "sources": []}
+        self.latency = LatencyStats()
+        self.screened = 0
+        self.matched = 0
+        self._lock = threading.Lock()
+
+    def load(self, entries, sources=(), measure_memory=False):
+        """Build an index from entries and swap it in; returns the build report"""
+        measure = measure_memory and not tracemalloc.is_tracing()
+        if measure:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            index = WatchlistIndex(entries, self.threshold)
+            seconds = time.perf_counter() - started
+            memory = tracemalloc.get_traced_memory()[0] / 1e6 if measure else None
+        finally:
+            if measure:
+                tracemalloc.stop()
+        self.index = index
+        self.build = dict(index.describe(), seconds=seconds, memory_mb=memory, sources=list(sources))
+        return self.build
+
+    def load_files(self, paths, synthetic=0, measure_memory=False):
+        entries, sources = [], []
+        for path in paths:
+            path = Path(path)
+            for file in sorted(path.glob("*.csv")) if path.is_dir() else [path]:
+                entries.extend(load_watchlist(file))
+                sources.append(str(file))
+        if synthetic:
+            entries.extend(synthetic_entries(synthetic))
+            sources.append(f"synthetic:{synthetic}")
+        return self.load(entries, sources, measure_memory)
+
+    def screen(self, name, threshold=None):
+        started = time.perf_counter()
+        hits = self.index.screen(name, threshold)
+        elapsed = time.perf_counter() - started
+        self.latency.record(elapsed)
+        with self._lock:
+            self.screened += 1
+            self.matched += bool(hits)
+        return {"name": name, "match": bool(hits), "hits": hits, "elapsed_ms": elapsed * 1000}
+
+    def screen_batch(self, names, threshold=None):
+        return [self.screen(name, threshold) for name in names]
+
+    def matches(self, name):
+        return self.screen(name)["match"]
+
+    def stats(self):
+        return {
+            "index": self.build,
+            "screened": self.screened,
+            "matched": self.matched,
+            "latency": self.latency.snapshot(),
+        }
@@ -0,0 +1,643 @@
+#!/usr/bin/env python3
+"""
+Account-sharded ledger for the Quantum Banking mock backend
+Accounts hash to fixed slots owned by ledger worker processes; a router in
+the server process dispatches over pipes, runs two-phase commit for
+cross-shard transfers and moves slots between workers to rebalance
+"""
+
+import itertools
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from multiprocessing.connection import Connection
+
+from currency import BASE_CURRENCY
+from event_bus import partition_for
+from ledger import (SEED_ACCOUNTS, SEED_TRANSACTIONS, TOPIC_LEDGER_POSTINGS, Ledger, LedgerError, from_cents,
+                    new_transfer_id, to_cents)
+from metrics import MetricsRegistry
+
+NUM_SLOTS = 256
+# Transaction IDs are seq * stride + shard so shards never hand out the same ID
+TXN_ID_STRIDE = 1024
+SHARD_OPS = {"open_account", "post", "transfer_local", "prepare", "commit", "abort", "balance", "accounts",
+             "transactions", "append_journal", "export_slot", "import_slot", "in_doubt", "stats"}
+
+
+class NotOwnerError(LedgerError):
+    """The shard no longer (or not yet) owns the account's slot; the router re-routes"""
+
+
+class ShardUnavailableError(LedgerError):
+    pass
+
+
+class TransferInDoubtError(LedgerError):
+    """Commit was decided but not every shard acknowledged it; recover() finishes the transfer"""
+
+    def __init__(self, transfer_id):
+        super().__init__(f"Transfer {transfer_id} is in doubt: not every shard acknowledged the commit")
+        self.transfer_id = transfer_id
+
+
+def slot_for(account_id):
+    return partition_for(account_id, NUM_SLOTS)
+
+
+def even_slot_map(shards):
+    return [slot % shards for slot in range(NUM_SLOTS)]
+
+
+def plan_rebalance(slot_map, shards):
+    """New slot -> shard map for `shards` workers that moves as few slots as possible"""
+    quota = {shard: NUM_SLOTS // shards + (1 if shard < NUM_SLOTS % shards else 0) for shard in range(shards)}
+    new_map = list(slot_map)
+    homeless = []
+    for slot, owner in enumerate(slot_map):
+        if owner < shards and quota[owner] > 0:
+            quota[owner] -= 1
+        else:
+            homeless.append(slot)
+    for slot in homeless:
+        shard = max(quota, key=quota.get)
+        quota[shard] -= 1
+        new_map[slot] = shard
+    return new_map
+
+
+# ----------------------------------------------------------------------
+# Worker side
+# ----------------------------------------------------------------------
+class LedgerShard(Ledger):
+    """One worker's share of the ledger: owned slots plus prepared 2PC holds.
+
+    A prepared debit reserves funds (they stop counting as available) until
+    the coordinator commits or aborts; a prepared credit is only applied on
+    commit. Slots with prepared legs cannot be exported.
+    """
+
+    def __init__(self, shard_id, slots):
+        super().__init__(bus=None, seed=False)
+        self.shard_id = shard_id
+        self.slots = set(slots)
+        self._seq = 0
+
+    def _next_id(self):
+        self._seq += 1
+        return self._seq * TXN_ID_STRIDE + self.shard_id
+
+    def _owned(self, account_id):
+        if slot_for(account_id) not in self.slots:
+            raise NotOwnerError(f"Account {account_id} is not on shard {self.shard_id}")
+
+    def open_account(self, account):
+        self._owned(account["id"])
+        return super().open_account(account)
+
+    def balance(self, account_id):
+        self._owned(account_id)
+        if account_id not in self._balances:
+            raise LedgerError(f"Unknown account: {account_id}")
+        return super().balance(account_id)
+
+    def post(self, account_id, cents, description="", category="other"):
+        self._owned(account_id)
+        with self._lock:
+            self._check(account_id, cents)
+            txn = self._journal(account_id, cents, description, category)
+            return txn, self._balances[account_id]
+
+    def transfer_local(self, transfer_id, from_account_id, to_account_id, cents, description):
+        self._owned(from_account_id)
+        self._owned(to_account_id)
+        with self._lock:
+            if to_account_id not in self._balances:
+                raise LedgerError(f"Unknown account: {to_account_id}")
+            self._check(from_account_id, -cents)
+            debit, credit = self._journal_legs([(from_account_id, -cents, description, "transfer"),
+                                                (to_account_id, cents, description, "transfer")], transfer_id)
+            return [(debit, self._balances[from_account_id]), (credit, self._balances[to_account_id])]
+
+    def prepare(self, transfer_id, legs):
+        """Vote on a cross-shard transfer: validate and reserve, or raise LedgerError (vote no)"""
+        for account_id, _, _, _ in legs:
+            self._owned(account_id)
+        return super().prepare(transfer_id, legs)
+
+    def append_journal(self, txns):
+        with self._lock:
+            self._transactions.extend(txns)
+
+    def export_slot(self, slot):
+        """Hand over a slot's accounts and journal; the shard stops serving it"""
+        with self._lock:
+            if any(slot_for(account_id) == slot for legs in self._prepared.values() for account_id, *_ in legs):
+                raise LedgerError(f"Slot {slot} has transfers in flight")
+            self.slots.discard(slot)
+            ids = {account_id for account_id in self._accounts if slot_for(account_id) == slot}
+            accounts = [(self._accounts.pop(i), self._balances.pop(i)) for i in ids]
+            self._dirty.update(ids)
+            moved = [t for t in self._transactions if t.get("account_id") in ids]
+            if moved:
+                self._transactions = [t for t in self._transactions if t.get("account_id") not in ids]
+        return {"accounts": accounts, "transactions": moved}
+
+    def import_slot(self, slot, data):
+        with self._lock:
+            for account, balance in data["accounts"]:
+                self._accounts[account["id"]] = account
+                self._balances[account["id"]] = balance
+                self._dirty.add(account["id"])
+            self._transactions.extend(data["transactions"])
+            self.slots.add(slot)
+        return len(data["accounts"])
+
+    def stats(self):
+        with self._lock:
+            return {"shard": self.shard_id, "pid": os.getpid(), "slots": len(self.slots),
+                    "accounts": len(self._accounts), "transactions": len(self._transactions),
+                    "prepared": len(self._prepared)}
+
+
+def _apply(shard, op, args):
+    if op not in SHARD_OPS:
+        return "error", f"Unknown shard operation: {op}"
+    try:
+        return "ok", getattr(shard, op)(*args)
+    except NotOwnerError as e:
+        return "moved", str(e)
+    except LedgerError as e:
+        return "error", str(e)
+
+
+def shard_worker(shard_id, read_fd, write_fd):
+    """Worker loop: (request id, op, args) in, (request id, status, result) out; exits on EOF"""
+    # Ctrl+C goes to the whole process group; the router decides when workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    reader = Connection(read_fd, writable=False)
+    writer = Connection(write_fd, readable=False)
+    shard = None
+    while True:
+        try:
+            message = reader.recv()
+        except (EOFError, OSError):
+            return
+        if message is None:
+            return
+        request_id, op, args = message
+        if op == "init":
+            shard = LedgerShard(shard_id, args[0])
+            result = ("ok", True)
+        elif op == "batch":
+            result = ("ok", [_apply(shard, sub_op, sub_args) for sub_op, sub_args in args[0]])
+        else:
+            result = _apply(shard, op, args)
+        writer.send((request_id,) + result)
+
+
+# ----------------------------------------------------------------------
+# Router side
+# ----------------------------------------------------------------------
+def _unwrap(status, payload):
+    if status == "ok":
+        return payload
+    if status == "moved":
+        raise NotOwnerError(payload)
+    raise LedgerError(payload)
+
+
+class ShardClient:
+    """Pipe connection to one worker; many threads can have requests in flight at once"""
+
+    def __init__(self, shard_id, slots):
+        self.shard_id = shard_id
+        parent_read, child_write = os.pipe()
+        child_read, parent_write = os.pipe()
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--shard-worker", str(shard_id),
+             str(child_read), str(child_write)],
+            pass_fds=(child_read, child_write), close_fds=True)
+        os.close(child_read)
+        os.close(child_write)
+        self._reader = Connection(parent_read, writable=False)
+        self._writer = Connection(parent_write, readable=False)
+        self._send_lock = threading.Lock()
+        self._pending = {}
+        self._ids = itertools.count()
+        self._closed = False
+        self._thread = threading.Thread(target=self._read_loop, name=f"ledger-shard-{shard_id}-reader", daemon=True)
+        self._thread.start()
+        self.call("init", list(slots))
+
+    def call_async(self, op, *args):
+        future = Future()
+        with self._send_lock:
+            if self._closed:
+                raise ShardUnavailableError(f"Ledger shard {self.shard_id} is not running")
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            try:
+                self._writer.send((request_id, op, args))
+            except OSError as e:
+                self._pending.pop(request_id, None)
+                raise ShardUnavailableError(f"Ledger shard {self.shard_id}: {e}") from None
+        return future
+
+    def call(self, op, *args, timeout=30):
+        return _unwrap(*self.call_async(op, *args).result(timeout))
+
+    def _read_loop(self):
+        while True:
+            try:
+                request_id, status, payload = self._reader.recv()
+            except (EOFError, OSError):
+                break
+            future = self._pending.pop(request_id, None)
+            if future is not None:
+                future.set_result((status, payload))
+        with self._send_lock:
+            self._closed = True
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_result(("error", f"Ledger shard {self.shard_id} exited"))
+
+    def close(self, timeout=5):
+        with self._send_lock:
+            if not self._closed:
+                try:
+                    self._writer.send(None)
+                except OSError:
+                    pass
+            self._closed = True
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self._writer.close()
+        self._thread.join(timeout)
+        self._reader.close()
+
+
+class ShardedLedger:
+    """Drop-in for Ledger that spreads accounts over worker processes.
+
+    Accounts hash to one of NUM_SLOTS slots and the slot map says which
+    worker owns each slot. Same-shard transfers are a single worker call;
+    cross-shard transfers use two-phase commit with the router as
+    coordinator, batched so one message per shard carries every leg of a
+    batch. Decisions are logged before phase two and in-doubt transfers
+    are resolved by recover() (presumed abort).
+    """
+
+    MOVE_RETRIES = 200
+
+    def __init__(self, bus=None, shards=4, seed=True, slot_map=None, decision_log_size=100000):
+        if not 1 <= shards <= TXN_ID_STRIDE:
+            raise ValueError(f"shards must be between 1 and {TXN_ID_STRIDE}")
+        self.bus = bus
+        self.num_shards = shards
+        self.seed = seed
+        self._slot_map = list(slot_map) if slot_map else even_slot_map(shards)
+        self._clients = {}
+        self._decisions = OrderedDict()
+        self._decision_log_size = decision_log_size
+        self._started = False
+        self._start_lock = threading.Lock()
+        self._rebalance_lock = threading.Lock()
+        self.metrics = MetricsRegistry()
+        self.counters = {"posts": 0, "local_transfers": 0, "cross_shard_transfers": 0, "aborted": 0,
+                         "in_doubt": 0, "rejected": 0, "rerouted": 0, "slots_moved": 0}
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def start(self):
+        with self._start_lock:
+            if self._started:
+                return self
+            for shard in range(self.num_shards):
+                self._clients[shard] = ShardClient(shard, self._owned_slots(shard))
+            self._started = True
+        if self.seed:
+            for account in SEED_ACCOUNTS:
+                self.open_account(dict(account))
+            for txn in SEED_TRANSACTIONS:
+                self._call_account(txn["account_id"], "append_journal", [dict(txn)])
+        return self
+
+    def close(self):
+        with self._start_lock:
+            clients, self._clients = self._clients, {}
+            self._started = False
+        for client in clients.values():
+            client.close()
+
+    def _owned_slots(self, shard):
+        return [slot for slot, owner in enumerate(self._slot_map) if owner == shard]
+
+    def _ensure_started(self):
+        if not self._started:
+            self.start()
+
+    # ------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------
+    def shard_for(self, account_id):
+        return self._slot_map[slot_for(account_id)]
+
+    def _call_async(self, shard, op, *args):
+        """call_async on a shard; one stopped by a rebalance after routing counts as having moved"""
+        client = self._clients.get(shard)
+        try:
+            if client is None:
+                raise NotOwnerError(f"Ledger shard {shard} was removed")
+            return client.call_async(op, *args)
+        except ShardUnavailableError:
+            if shard in self._clients:
+                raise
+            raise NotOwnerError(f"Ledger shard {shard} was removed") from None
+
+    def _call_account(self, account_id, op, *args):
+        """Call the shard owning account_id, following the slot if it is mid-move"""
+        self._ensure_started()
+        for attempt in range(self.MOVE_RETRIES):
+            try:
+                return _unwrap(*self._call_async(self.shard_for(account_id), op, *args).result(30))
+            except NotOwnerError:
+                self.counters["rerouted"] += 1
+                time.sleep(min(0.001 * (attempt + 1), 0.05))
+        raise LedgerError(f"Account {account_id} is being moved, retry later")
+
+    def _gather(self, op, *args):
+        self._ensure_started()
+        futures = [client.call_async(op, *args) for client in list(self._clients.values())]
+        return [_unwrap(*f.result(30)) for f in futures]
+
+    # ------------------------------------------------------------------
+    # Ledger interface
+    # ------------------------------------------------------------------
+    def open_account(self, account):
+        # Shards exchange plain cents and publish from_cents balances, so the sharded ledger is single-currency
+        if account.get("currency", BASE_CURRENCY) != BASE_CURRENCY:
+            raise LedgerError(f"Sharded ledger only holds {BASE_CURRENCY} accounts")
+        return self._call_account(account["id"], "open_account", dict(account))
+
+    def accounts(self):
+        return sorted((a for part in self._gather("accounts") for a in part), key=lambda a: a["id"])
+
+    def balance(self, account_id):
+        return self._call_account(account_id, "balance", account_id)
+
+    def currency(self, account_id):
+        # open_account only admits BASE_CURRENCY accounts
+        return BASE_CURRENCY
+
+    def transactions(self, account_id=None):
+        if account_id is not None:
+            return self._call_account(account_id, "transactions", account_id)
+        return sorted((t for part in self._gather("transactions") for t in part), key=lambda t: (t["date"], t["id"]))
+
+    def post(self, account_id, amount, description="", category="other"):
+        start = time.perf_counter()
+        txn, balance = self._call_account(account_id, "post", account_id, to_cents(amount), description, category)
+        self.metrics.record("post", time.perf_counter() - start)
+        self.counters["posts"] += 1
+        self._publish([(txn, balance)])
+        return txn
+
+    def hold(self, account_id, amount, description="", category="other", hold_id=None):
+        hold_id = hold_id or new_transfer_id()
+        self._call_account(account_id, "prepare", hold_id, [(account_id, to_cents(amount), description, category)])
+        return hold_id
+
+    def capture(self, account_id, hold_id):
+        legs = self._call_account(account_id, "commit", hold_id)
+        self._publish(legs)
+        return legs[0][0] if legs else None
+
+    def release(self, account_id, hold_id):
+        return self._call_account(account_id, "abort", hold_id)
+
+    def transfer(self, from_account_id, to_account_id, amount, description=""):
+        result = self.transfer_batch([(from_account_id, to_account_id, amount, description)])[0]
+        if isinstance(result, LedgerError):
+            raise result
+        return result
+
+    def transfer_batch(self, items):
+        """Run many transfers with one round trip per shard per phase.
+
+        items are (from_account_id, to_account_id, amount, description);
+        returns, in order, the transfer dict or the LedgerError that
+        rejected it (TransferInDoubtError when a shard missed the commit).
+        Transfers caught by a slot move are retried.
+        """
+        self._ensure_started()
+        results = [None] * len(items)
+        todo = []
+        for index, (from_id, to_id, amount, description) in enumerate(items):
+            cents = to_cents(amount)
+            if cents <= 0:
+                results[index] = LedgerError("Transfer amount must be positive")
+            elif from_id == to_id:
+                results[index] = LedgerError("Cannot transfer to the same account")
+            else:
+                todo.append((index, new_transfer_id(), from_id, to_id, cents, description))
+        for attempt in range(self.MOVE_RETRIES):
+            if not todo:
+                break
+            if attempt:
+                self.counters["rerouted"] += len(todo)
+                time.sleep(min(0.001 * attempt, 0.05))
+            todo = self._transfer_round(todo, results)
+        for index, *_ in todo:
+            results[index] = LedgerError("Accounts are being moved, retry later")
+        self.counters["rejected"] += sum(1 for r in results
+                                         if isinstance(r, LedgerError) and not isinstance(r, TransferInDoubtError))
+        return results
+
+    def _transfer_round(self, todo, results):
+        start = time.perf_counter()
+        # Phase one: local transfers and prepares, one batch message per shard
+        batches = {}
+        plan = []
+        for index, transfer_id, from_id, to_id, cents, description in todo:
+            source, target = self.shard_for(from_id), self.shard_for(to_id)
+            if source == target:
+                batches.setdefault(source, []).append(("transfer_local", (transfer_id, from_id, to_id, cents, description)))
+                plan.append((source, len(batches[source]) - 1, None, None))
+            else:
+                batches.setdefault(source, []).append(("prepare", (transfer_id, [(from_id, -cents, description, "transfer")])))
+                batches.setdefault(target, []).append(("prepare", (transfer_id, [(to_id, cents, description, "transfer")])))
+                plan.append((source, len(batches[source]) - 1, target, len(batches[target]) - 1))
+        replies = self._send_batches(batches)
+
+        retry = []
+        decisions = {}
+        local = cross = 0
+        for (index, transfer_id, from_id, to_id, cents, description), (source, i, target, j) in zip(todo, plan):
+            if target is None:
+                status, payload = replies[source][i]
+                if status == "ok":
+                    results[index] = self._transfer_result(transfer_id, payload)
+                    local += 1
+                elif status == "moved":
+                    retry.append((index, transfer_id, from_id, to_id, cents, description))
+                else:
+                    results[index] = LedgerError(payload)
+                continue
+            votes = (replies[source][i], replies[target][j])
+            decision = "commit" if all(status == "ok" for status, _ in votes) else "abort"
+            decisions[transfer_id] = (decision, source, target, index, votes)
+            if decision == "abort":
+                if any(status == "moved" for status, _ in votes):
+                    retry.append((index, transfer_id, from_id, to_id, cents, description))
+                else:
+                    results[index] = LedgerError(next(payload for status, payload in votes if status == "error"))
+
+        # Phase two: log every decision, then one commit/abort batch per shard
+        if decisions:
+            for transfer_id, (decision, *_) in decisions.items():
+                self._log_decision(transfer_id, decision)
+            phase_two = {}
+            for transfer_id, (decision, source, target, _, _) in decisions.items():
+                for shard in (source, target):
+                    phase_two.setdefault(shard, []).append((decision, (transfer_id,)))
+            outcomes = self._send_batches(phase_two)
+            legs = {}
+            acks = {}
+            for shard, ops in phase_two.items():
+                for (op, (transfer_id,)), (status, payload) in zip(ops, outcomes[shard]):
+                    if op == "commit" and status == "ok":
+                        legs.setdefault(transfer_id, []).extend(payload)
+                        acks[transfer_id] = acks.get(transfer_id, 0) + 1
+            for transfer_id, (decision, _, _, index, _) in decisions.items():
+                if decision == "abort":
+                    self.counters["aborted"] += 1
+                elif acks.get(transfer_id) == 2:
+                    results[index] = self._transfer_result(transfer_id, legs[transfer_id])
+                    cross += 1
+                else:
+                    # The decision is logged, so recover() commits the legs still prepared
+                    self._publish(legs.get(transfer_id, []))
+                    results[index] = TransferInDoubtError(transfer_id)
+                    self.counters["in_doubt"] += 1
+
+        self.counters["local_transfers"] += local
+        self.counters["cross_shard_transfers"] += cross
+        self.metrics.record("transfer_batch", time.perf_counter() - start)
+        return retry
+
+    def _send_batches(self, batches):
+        futures = {}
+        for shard, ops in batches.items():
+            try:
+                futures[shard] = self._call_async(shard, "batch", ops)
+            except NotOwnerError as e:
+                futures[shard] = Future()
+                futures[shard].set_result(("moved", str(e)))
+        replies = {}
+        for shard, future in futures.items():
+            status, payload = future.result(30)
+            # A dead shard fails every operation in its batch
+            replies[shard] = payload if status == "ok" else [(status, payload)] * len(batches[shard])
+        return replies
+
+    def _transfer_result(self, transfer_id, legs):
+        self._publish(legs)
+        debit = next((txn for txn, _ in legs if txn["amount"] < 0), None)
+        credit = next((txn for txn, _ in legs if txn["amount"] > 0), None)
+        return {"transfer_id": transfer_id, "debit": debit, "credit": credit}
+
+    def _log_decision(self, transfer_id, decision):
+        self._decisions[transfer_id] = decision
+        while len(self._decisions) > self._decision_log_size:
+            self._decisions.popitem(last=False)
+
+    def _publish(self, legs):
+        if self.bus is None:
+            return
+        for txn, balance in legs:
+            self.bus.publish(TOPIC_LEDGER_POSTINGS, txn["account_id"], {
+                "transaction": txn,
+                "balance": from_cents(balance),
+                "posted_at": time.time(),
+            })
+
+    def recover(self):
+        """Resolve transfers left prepared on any shard: logged decision, else abort"""
+        resolved = {"commit": 0, "abort": 0}
+        for shard, client in list(self._clients.items()):
+            for transfer_id in client.call("in_doubt"):
+                decision = self._decisions.get(transfer_id, "abort")
+                if decision == "commit":
+                    self._publish(client.call("commit", transfer_id))
+                else:
+                    client.call("abort", transfer_id)
+                resolved[decision] += 1
+        return resolved
+
+    # ------------------------------------------------------------------
+    # Rebalancing
+    # ------------------------------------------------------------------
+    def rebalance(self, shards=None, progress=None):
+        """Move slots so `shards` workers own an even share, starting or stopping workers as needed"""
+        self._ensure_started()
+        shards = shards or self.num_shards
+        if not 1 <= shards <= TXN_ID_STRIDE:
+            raise ValueError(f"shards must be between 1 and {TXN_ID_STRIDE}")
+        with self._rebalance_lock:
+            start = time.perf_counter()
+            for shard in range(self.num_shards, shards):
+                self._clients[shard] = ShardClient(shard, [])
+            new_map = plan_rebalance(self._slot_map, shards)
+            moves = [(slot, self._slot_map[slot], owner) for slot, owner in enumerate(new_map)
+                     if owner != self._slot_map[slot]]
+            accounts_moved = 0
+            for done, (slot, source, target) in enumerate(moves, 1):
+                accounts_moved += self._move_slot(slot, source, target)
+                if progress is not None:
+                    progress(done, len(moves))
+            for shard in range(shards, self.num_shards):
+                self._clients.pop(shard).close()
+            previous, self.num_shards = self.num_shards, shards
+            return {"from_shards": previous, "to_shards": shards, "slots_moved": len(moves),
+                    "accounts_moved": accounts_moved, "seconds": time.perf_counter() - start}
+
+    def _move_slot(self, slot, source, target):
+        for attempt in range(self.MOVE_RETRIES):
+            try:
+                data = self._clients[source].call("export_slot", slot)
+                break
+            except LedgerError:
+                # Transfers prepared on this slot; they resolve within one round trip
+                time.sleep(min(0.001 * (attempt + 1), 0.05))
+        else:
+            raise LedgerError(f"Slot {slot} stayed busy; rebalance stopped part way")
+        moved = self._clients[target].call("import_slot", slot, data)
+        # Requests that reached the old owner in between got NotOwnerError and retry against this
+        self._slot_map[slot] = target
+        self.counters["slots_moved"] += 1
+        return moved
+
+    def stats(self):
+        per_shard = self._gather("stats") if self._started else []
+        return {
+            "sharded": True,
+            "shards": self.num_shards,
+            "slots": NUM_SLOTS,
+            "per_shard": per_shard,
+            "counters": dict(self.counters),
+            "latency": self.metrics.snapshot(),
+        }
+
+
+if __name__ == "__main__" and len(sys.argv) == 5 and sys.argv[1] == "--shard-worker":
+    shard_worker(int(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4]))
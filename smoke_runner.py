@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Shared runner for the smoke test scripts
+Pooled HTTP session, optional concurrent execution of independent checks
+and per-check / wall-clock timing report
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_print_lock = threading.Lock()
+
+
+def pooled_session(pool_size=10):
+    """One keep-alive connection pool shared by every check (and thread)"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def report(line):
+    """print() that keeps lines whole when checks run on several threads"""
+    with _print_lock:
+        print(line, flush=True)
+
+
+def _timed(check):
+    start = time.perf_counter()
+    try:
+        result = check()
+    except Exception as e:
+        report(f"❌ {check.__name__}: {e}")
+        result = False
+    return result, time.perf_counter() - start
+
+
+def run_checks(checks, parallel=False, workers=8):
+    """Run independent checks, serially or on a thread pool.
+
+    Returns ([(name, result, seconds)], wall_seconds) in the order the
+    checks were given, whichever order they finished in.
+    """
+    start = time.perf_counter()
+    if parallel:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="smoke") as pool:
+            outcomes = list(pool.map(_timed, checks))
+    else:
+        outcomes = [_timed(check) for check in checks]
+    wall = time.perf_counter() - start
+    return [(check.__name__, result, seconds) for check, (result, seconds) in zip(checks, outcomes)], wall
+
+
+def print_timings(timings, wall):
+    print("\n⏱️  Timings")
+    print("-" * 60)
+    for name, result, seconds in sorted(timings, key=lambda t: t[2], reverse=True):
+        mark = "✅" if result is not False else "❌"
+        print(f"   {mark} {name:<40} {seconds * 1000:>9.1f} ms")
+    serial = sum(seconds for _, _, seconds in timings)
+    print("-" * 60)
+    print(f"   Sum of checks: {serial * 1000:.1f} ms, wall clock: {wall * 1000:.1f} ms "
+          f"({serial / wall if wall else 1:.1f}x)")
+
+
+def add_arguments(parser):
+    parser.add_argument("--parallel", action="store_true", help="run independent checks concurrently")
+    parser.add_argument("--workers", type=int, default=8, help="worker threads in --parallel mode")
@@ -1,163 +1,237 @@
 #!/usr/bin/env python3
 """
 Local Development Server for Quantum Banking App
-Runs a simplified version without Docker dependencies
+Runs a simplified version without Docker dependencies: starts the mock
+backend and the React frontend in parallel, waits for each health check,
+and restarts either one if it crashes
 """
 
+import argparse
+import os
+import shutil
+import signal
 import subprocess
 import sys
-import time
 import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def run_frontend():
-    """Start the React frontend"""
-    print("🚀 Starting React Frontend...")
+ROOT = Path(__file__).resolve().parent
+
+
+class Service:
+    """A supervised child process with an HTTP readiness probe"""
+
+    def __init__(self, name, command, health_url, cwd=ROOT, startup_timeout=60.0, env=None):
+        self.name = name
+        self.command = command
+        self.health_url = health_url
+        self.cwd = cwd
+        self.startup_timeout = startup_timeout
+        self.env = env
+        self.process = None
+        self.started_at = None
+        self.ready_after = None
+        self.restarts = 0
+        self.crash_times = []
+        self.restart_at = None
+
+    def start(self):
+        # Own process group, so stopping npm also stops the dev server it spawned
+        env = dict(os.environ, **self.env) if self.env else None
+        self.process = subprocess.Popen(self.command, cwd=self.cwd, env=env, start_new_session=True)
+        self.started_at = time.monotonic()
+        self.ready_after = None
+
+    def exited(self):
+        return self.process is not None and self.process.poll() is not None
+
+    def stop(self, timeout=5.0):
+        if self.process is None or self.process.poll() is not None:
+            return
+        self._signal(signal.SIGTERM)
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self._signal(signal.SIGKILL)
+            self.process.wait()
+
+    def _signal(self, signum):
+        try:
+            os.killpg(self.process.pid, signum)
+        except ProcessLookupError:
+            pass
+
+
+def probe(url, timeout=1.0):
+    """True once the service answers; any non-5xx status counts as up"""
     try:
-        subprocess.run([
-            "npm", "run", "dev"
-        ], cwd="frontend", check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Frontend failed to start: {e}")
-
-def run_mock_backend():
-    """Start a mock backend server"""
-    print("🔧 Starting Mock Backend Server...")
-    
-    # Create a simple mock server
-    mock_server_code = '''
-import json
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
-import threading
-import time
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status < 500
+    except urllib.error.HTTPError as e:
+        return e.code < 500
+    except (urllib.error.URLError, OSError):
+        return False
 
-class MockBankingHandler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
-        path = urlparse(self.path).path
-        
-        if path == '/api/v1/health':
-            response = {"status": "healthy", "service": "mock-backend"}
-        elif path == '/api/v1/auth/user':
-            response = {
-                "id": 1,
-                "username": "demo_user",
-                "email": "demo@quantumbank.com",
-                "first_name": "Demo",
-                "last_name": "User"
-            }
-        elif path == '/api/v1/accounts':
-            response = {
-                "accounts": [
-                    {
-                        "id": 1,
-                        "account_number": "QB-001-2024",
-                        "balance": 15750.50,
-                        "currency": "USD",
-                        "account_type": "checking"
-                    }
-                ]
-            }
-        elif path == '/api/v1/transactions':
-            response = {
-                "transactions": [
-                    {
-                        "id": 1,
-                        "amount": -45.99,
-                        "description": "Coffee Shop Purchase",
-                        "date": "2024-10-27T10:30:00Z",
-                        "category": "food"
-                    },
-                    {
-                        "id": 2,
-                        "amount": 2500.00,
-                        "description": "Salary Deposit",
-                        "date": "2024-10-25T09:00:00Z",
-                        "category": "income"
-                    }
-                ]
-            }
-        else:
-            response = {"error": "Not found"}
-            
-        self.wfile.write(json.dumps(response).encode())
-    
-    def do_POST(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
-        path = urlparse(self.path).path
-        
-        if path == '/api/v1/auth/login':
-            response = {
-                "access_token": "mock_jwt_token_12345",
-                "token_type": "Bearer",
-                "expires_in": 3600
-            }
+
+def wait_until_ready(service, initial_delay=0.05, max_delay=2.0):
+    """Poll the health URL with exponential backoff; returns seconds to ready or None"""
+    delay = initial_delay
+    deadline = service.started_at + service.startup_timeout
+    while time.monotonic() < deadline:
+        if service.exited():
+            return None
+        if probe(service.health_url) and not service.exited():
+            service.ready_after = time.monotonic() - service.started_at
+            return service.ready_after
+        time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+        delay = min(delay * 2, max_delay)
+    return None
+
+
+def start_all(services):
+    """Spawn every service at once and wait for them in parallel (as long as the slowest one)"""
+    busy = [service for service in services if probe(service.health_url)]
+    if busy:
+        for service in busy:
+            print(f"❌ {service.name}: something is already answering on {service.health_url}; stop it first")
+        return None
+    start = time.monotonic()
+    for service in services:
+        print(f"🚀 Starting {service.name}...")
+        service.start()
+    with ThreadPoolExecutor(max_workers=len(services)) as pool:
+        results = list(pool.map(wait_until_ready, services))
+    for service, ready in zip(services, results):
+        if ready is None:
+            reason = "exited" if service.exited() else f"not ready after {service.startup_timeout:.0f}s"
+            print(f"❌ {service.name}: {reason} ({service.health_url})")
         else:
-            response = {"message": "Success"}
-            
-        self.wfile.write(json.dumps(response).encode())
-    
-    def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
-        self.end_headers()
-
-def run_server():
-    server = HTTPServer(('localhost', 8080), MockBankingHandler)
-    print("🌐 Mock Backend running on http://localhost:8080")
-    server.serve_forever()
+            print(f"✅ {service.name}: ready in {ready:.2f}s ({service.health_url})")
+    print(f"⏱️  Startup took {time.monotonic() - start:.2f}s")
+    return all(ready is not None for ready in results)
+
+
+def schedule_restart(service, max_restarts, window):
+    """Plan the restart of a crashed service unless it is crash-looping; returns False when giving up"""
+    now = time.monotonic()
+    service.crash_times = [t for t in service.crash_times if now - t < window] + [now]
+    if len(service.crash_times) > max_restarts:
+        print(f"❌ {service.name} crashed {len(service.crash_times)} times in {window:.0f}s; giving up")
+        return False
+    # Back off 1s, 2s, 4s... between consecutive crashes; supervise() keeps watching the others meanwhile
+    delay = min(2 ** (len(service.crash_times) - 1), 30)
+    service.restart_at = now + delay
+    print(f"⏳ Restarting {service.name} in {delay}s")
+    return True
+
+
+def restart(service):
+    service.restart_at = None
+    service.restarts += 1
+    print(f"🔄 Restarting {service.name} (restart #{service.restarts})...")
+    service.start()
+    threading.Thread(target=lambda: _report_restart(service), daemon=True).start()
+
+
+def _report_restart(service):
+    ready = wait_until_ready(service)
+    if ready is not None:
+        print(f"✅ {service.name}: ready again in {ready:.2f}s")
+
+
+def supervise(services, max_restarts, window, interval=0.5):
+    active = list(services)
+    while active:
+        time.sleep(interval)
+        for service in list(active):
+            if service.restart_at is not None:
+                if time.monotonic() >= service.restart_at:
+                    restart(service)
+            elif service.exited():
+                print(f"⚠️  {service.name} exited with code {service.process.returncode}")
+                if not schedule_restart(service, max_restarts, window):
+                    active.remove(service)
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def install_signal_handlers(handler=_interrupt):
+    """Handle SIGTERM/SIGHUP like Ctrl+C; the children run in their own sessions and would outlive the launcher"""
+    for signum in (signal.SIGTERM, signal.SIGHUP):
+        signal.signal(signum, handler)
+
+
+def build_services(args):
+    services = [Service(
+        "Mock Backend",
+        [sys.executable, str(ROOT / "mock_backend.py")],
+        f"http://localhost:{args.backend_port}/api/v1/health",
+        startup_timeout=args.startup_timeout,
+        env={"MOCK_BACKEND_PORT": str(args.backend_port)},
+    )]
+    frontend_dir = ROOT / "frontend"
+    npm = shutil.which("npm")
+    if args.backend_only:
+        pass
+    elif not frontend_dir.is_dir() or npm is None:
+        missing = "frontend/ directory" if not frontend_dir.is_dir() else "npm"
+        print(f"⚠️  Skipping frontend: {missing} not found")
+    else:
+        services.append(Service(
+            "React Frontend",
+            [npm, "run", "dev", "--", "--port", str(args.frontend_port), "--strictPort"],
+            f"http://localhost:{args.frontend_port}/",
+            cwd=frontend_dir,
+            startup_timeout=args.startup_timeout,
+        ))
+    return services
 
-if __name__ == "__main__":
-    run_server()
-'''
-    
-    # Write the mock server to a file
-    with open("mock_backend.py", "w") as f:
-        f.write(mock_server_code)
-    
-    # Start the mock server
-    try:
-        subprocess.Popen([sys.executable, "mock_backend.py"])
-        print("✅ Mock backend started on http://localhost:8080")
-    except Exception as e:
-        print(f"❌ Failed to start mock backend: {e}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Quantum Banking local development launcher")
+    parser.add_argument("--backend-only", action="store_true", help="do not start the frontend")
+    parser.add_argument("--backend-port", type=int, default=8080, help="port the mock backend listens on")
+    parser.add_argument("--frontend-port", type=int, default=3000, help="port the frontend dev server listens on")
+    parser.add_argument("--startup-timeout", type=float, default=60.0, help="seconds per service")
+    parser.add_argument("--max-restarts", type=int, default=5, help="crashes tolerated per window")
+    parser.add_argument("--restart-window", type=float, default=60.0, help="crash-loop window in seconds")
+    args = parser.parse_args()
+
     print("🏦 Quantum Banking - Local Development Setup")
     print("=" * 50)
-    
-    # Start mock backend in a separate thread
-    backend_thread = threading.Thread(target=run_mock_backend, daemon=True)
-    backend_thread.start()
-    
-    # Give backend time to start
-    time.sleep(2)
-    
-    print("\n🎯 Services Status:")
-    print("✅ Frontend: http://localhost:3000")
-    print("✅ Mock Backend: http://localhost:8080")
-    print("\n📝 Note: This is a simplified development setup.")
-    print("For full functionality, install Docker and run: docker compose up")
-    
-    print("\n🔄 Starting services...")
-    
-    # Keep the script running
+    os.chdir(ROOT)
+    services = build_services(args)
+    install_signal_handlers()
     try:
-        while True:
-            time.sleep(1)
+        ready = start_all(services)
+        if ready is None:
+            return 1
+        print("\n🎯 Services Status:")
+        for service in services:
+            state = "✅" if service.ready_after is not None else "❌"
+            print(f"{state} {service.name}: {service.health_url.rsplit('/api/', 1)[0]}")
+        print("\n📝 Note: This is a simplified development setup.")
+        print("For full functionality, install Docker and run: docker compose up")
+        if not ready:
+            print("⚠️  Some services are not ready yet; they stay supervised")
+        print("Press Ctrl+C to stop all services")
+        supervise(services, args.max_restarts, args.restart_window)
+        return 1
     except KeyboardInterrupt:
         print("\n⏹️  Shutting down local development server...")
+        return 0
+    finally:
+        # A second signal must not cut the cleanup short
+        install_signal_handlers(signal.SIG_IGN)
+        for service in services:
+            service.stop()
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Background statement generation for the Quantum Banking mock backend
+Monthly account statements (CSV or PDF) are built by a worker pool fed from a
+priority queue; identical requests share one job and finished documents are cached
+"""
+
+import csv
+import heapq
+import io
+import itertools
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timezone
+
+from currency import BASE_CURRENCY, format_minor, to_minor
+from ledger import LedgerError
+from metrics import LatencyStats
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+PDF_LINES_PER_PAGE = 64
+
+QUEUED, RUNNING, COMPLETED, FAILED = "queued", "running", "completed", "failed"
+
+
+class StatementError(Exception):
+    pass
+
+
+class UnknownAccountError(StatementError):
+    pass
+
+
+class StatementQueueFullError(Exception):
+    """Too many statement jobs are waiting; callers should shed the request (HTTP 503)"""
+
+
+def parse_period(period=None, now=None):
+    """'YYYY-MM' -> (period, first instant, first instant of the next month) as ISO strings;
+    defaults to the last complete month"""
+    if period is None:
+        today = datetime.fromtimestamp(now or time.time(), timezone.utc)
+        year, month = (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+    else:
+        try:
+            year, month = (int(part) for part in str(period).split("-"))
+        except ValueError:
+            raise StatementError(f"period must look like 2024-10, got {period!r}") from None
+        if not 1 <= month <= 12 or not 1970 <= year <= 9999:
+            raise StatementError(f"period must look like 2024-10, got {period!r}")
+    next_year, next_month = (year, month + 1) if month < 12 else (year + 1, 1)
+    return f"{year:04d}-{month:02d}", f"{year:04d}-{month:02d}-01T00:00:00Z", \
+        f"{next_year:04d}-{next_month:02d}-01T00:00:00Z"
+
+
+def read_account(ledger, account_id):
+    """(account, transactions) from one ledger snapshot where the ledger has them"""
+    if hasattr(ledger, "snapshot"):
+        with ledger.snapshot() as snapshot:
+            accounts = snapshot.accounts([account_id])
+            txns = snapshot.transactions(account_id)
+    else:
+        accounts = [a for a in ledger.accounts() if a["id"] == account_id]
+        txns = ledger.transactions(account_id)
+    if not accounts:
+        raise UnknownAccountError(f"Unknown account: {account_id}")
+    return accounts[0], txns
+
+
+def build_statement(ledger, account_id, period):
+    """Opening/closing balances, lines with running balances and per-category totals for one month"""
+    period, start, end = parse_period(period)
+    account, txns = read_account(ledger, account_id)
+    # Dates are fixed-width UTC ISO strings, so string order is time order
+    lines = sorted((t for t in txns if start <= t["date"] < end), key=lambda t: (t["date"], t["id"]))
+    currency = account.get("currency", BASE_CURRENCY)
+    later = sum(to_minor(t["amount"], currency) for t in txns if t["date"] >= end)
+    closing = to_minor(account["balance"], currency) - later
+    balance = opening = closing - sum(to_minor(t["amount"], currency) for t in lines)
+    rows, credits, debits, categories = [], 0, 0, defaultdict(int)
+    for txn in lines:
+        cents = to_minor(txn["amount"], currency)
+        balance += cents
+        if cents >= 0:
+            credits += cents
+        else:
+            debits -= cents
+        categories[txn.get("category", "other")] += cents
+        rows.append((txn["date"], txn["id"], txn.get("description", ""), txn.get("category", "other"), cents, balance))
+    return {
+        "account_id": account_id,
+        "account_number": account.get("account_number", str(account_id)),
+        "currency": currency,
+        "period": period,
+        "opening_cents": opening,
+        "closing_cents": closing,
+        "credits_cents": credits,
+        "debits_cents": debits,
+        "categories": dict(sorted(categories.items())),
+        "rows": rows,
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+
+
+def render_csv(statement):
+    currency = statement["currency"]
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["account", statement["account_number"], "period", statement["period"],
+                     "currency", statement["currency"]])
+    writer.writerow(["opening_balance", format_minor(statement["opening_cents"], currency),
+                     "closing_balance", format_minor(statement["closing_cents"], currency)])
+    writer.writerow(["date", "transaction_id", "description", "category", "amount", "balance"])
+    for date, txn_id, description, category, cents, balance in statement["rows"]:
+        writer.writerow([date, txn_id, description, category, format_minor(cents, currency), format_minor(balance, currency)])
+    writer.writerow(["total_credits", format_minor(statement["credits_cents"], currency),
+                     "total_debits", format_minor(statement["debits_cents"], currency)])
+    for category, cents in statement["categories"].items():
+        writer.writerow(["category_total", category, format_minor(cents, currency)])
+    return out.getvalue().encode()
+
+
+def statement_text(statement):
+    """Fixed-width lines of the printable statement"""
+    currency = statement["currency"]
+    lines = [
+        "Quantum Banking - Account Statement",
+        f"Account {statement['account_number']}    Period {statement['period']}    Currency {statement['currency']}",
+        f"Generated {statement['generated_at']}",
+        "",
+        f"Opening balance {format_minor(statement['opening_cents'], currency):>16}",
+        "",
+        f"{'Date':<11} {'Description':<34} {'Category':<12} {'Amount':>12} {'Balance':>13}",
+    ]
+    for date, _, description, category, cents, balance in statement["rows"]:
+        lines.append(f"{date[:10]:<11} {description[:34]:<34} {category[:12]:<12} {format_minor(cents, currency):>12} "
+                     f"{format_minor(balance, currency):>13}")
+    lines += [
+        "",
+        f"Total credits   {format_minor(statement['credits_cents'], currency):>16}",
+        f"Total debits    {format_minor(statement['debits_cents'], currency):>16}",
+        f"Closing balance {format_minor(statement['closing_cents'], currency):>16}",
+    ]
+    return lines
+
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def render_pdf(statement):
+    """A minimal multi-page PDF (Courier text, no dependencies)"""
+    lines = statement_text(statement)
+    pages = [lines[i:i + PDF_LINES_PER_PAGE] for i in range(0, len(lines), PDF_LINES_PER_PAGE)]
+    # Objects 1-3 are the catalog, page tree and font; each page adds a page and a content stream
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages)))
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode(),
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>"]
+    for i, page in enumerate(pages):
+        text = "\n".join(f"({_pdf_escape(line)}) Tj T*" for line in page)
+        stream = f"BT /F1 9 Tf 11.5 TL 36 806 Td\n{text}\nET".encode("latin-1", "replace")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> "
+                       f"/Contents {5 + 2 * i} 0 R >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+FORMATS = {"csv": ("text/csv", render_csv), "pdf": ("application/pdf", render_pdf)}
+
+
+class StatementJob:
+    __slots__ = ("id", "key", "priority", "status", "submitted_at", "enqueued", "queue_seconds", "run_seconds",
+                 "finished_at", "cached", "error", "document", "done")
+
+    def __init__(self, key, priority):
+        self.id = uuid.uuid4().hex[:20]
+        self.key = key
+        self.priority = priority
+        self.status = QUEUED
+        self.submitted_at = time.time()
+        self.enqueued = time.monotonic()
+        self.queue_seconds = self.run_seconds = self.finished_at = None
+        self.cached = False
+        self.error = None
+        self.document = None
+        self.done = threading.Event()
+
+    @property
+    def content_type(self):
+        return FORMATS[self.key[2]][0]
+
+    def to_dict(self):
+        account_id, period, fmt = self.key
+        return {
+            "job_id": self.id,
+            "account_id": account_id,
+            "period": period,
+            "format": fmt,
+            "priority": next(name for name, rank in PRIORITIES.items() if rank == self.priority),
+            "status": self.status,
+            "cached": self.cached,
+            "submitted_at": self.submitted_at,
+            "finished_at": self.finished_at,
+            "queue_ms": None if self.queue_seconds is None else self.queue_seconds * 1000,
+            "run_ms": None if self.run_seconds is None else self.run_seconds * 1000,
+            "size_bytes": None if self.document is None else len(self.document),
+            "error": self.error,
+        }
+
+
+class StatementQueue:
+    """Statement jobs on a priority queue drained by a pool of worker threads.
+
+    Jobs run highest priority first, then in submission order. A request
+    for an (account, period, format) that is already queued or running
+    joins that job (raising its priority if asked for a higher one), and
+    one whose document is cached completes at once. Documents for past
+    months never change and stay cached until evicted; the current month
+    is cached for open_period_ttl seconds. Beyond max_queue waiting jobs
+    submit raises StatementQueueFullError.
+    """
+
+    def __init__(self, ledger, workers=2, max_queue=1000, cache_size=256, open_period_ttl=60.0, max_jobs=1000):
+        self.ledger = ledger
+        self.workers = workers
+        self.max_queue = max_queue
+        self.cache_size = cache_size
+        self.open_period_ttl = open_period_ttl
+        self.max_jobs = max_jobs
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self._queued = 0
+        self._busy = 0
+        self._jobs = OrderedDict()
+        self._inflight = {}
+        self._cache = OrderedDict()
+        self._threads = []
+        self._running = False
+        self.counters = {"submitted": 0, "deduplicated": 0, "cache_hits": 0, "completed": 0, "failed": 0,
+                         "rejected": 0}
+        self.queue_wait = LatencyStats()
+        self.run_time = LatencyStats()
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return self
+            self._running = True
+            self._threads = [threading.Thread(target=self._run, name=f"statement-worker-{i}", daemon=True)
+                             for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def submit(self, account_id, period=None, fmt="csv", priority="normal"):
+        """Queue (or join, or answer from cache) a statement job; returns the job"""
+        if not isinstance(fmt, str) or fmt not in FORMATS:
+            raise StatementError(f"format must be one of {', '.join(FORMATS)}")
+        if not isinstance(priority, str) or priority not in PRIORITIES:
+            raise StatementError(f"priority must be one of {', '.join(PRIORITIES)}")
+        key = (account_id, parse_period(period)[0], fmt)
+        try:
+            self.ledger.balance(account_id)
+        except (KeyError, LedgerError):
+            raise UnknownAccountError(f"Unknown account: {account_id}") from None
+        # Built before taking the lock: uuid4() reads os.urandom, which would let the GIL go mid-section
+        new_job = StatementJob(key, PRIORITIES[priority])
+        rank = new_job.priority
+        with self._cond:
+            self.counters["submitted"] += 1
+            document = self._cached(key)
+            if document is not None:
+                self.counters["cache_hits"] += 1
+                job = new_job
+                job.status, job.cached, job.document, job.finished_at = COMPLETED, True, document, time.time()
+                job.queue_seconds = job.run_seconds = 0.0
+                job.done.set()
+                self._remember(job)
+                return job
+            job = self._inflight.get(key)
+            if job is not None:
+                self.counters["deduplicated"] += 1
+                if job.status == QUEUED and rank < job.priority:
+                    # The old heap entry goes stale and is skipped when popped
+                    job.priority = rank
+                    heapq.heappush(self._heap, (rank, next(self._seq), job))
+                    self._cond.notify()
+                return job
+            if self._queued >= self.max_queue:
+                self.counters["rejected"] += 1
+                raise StatementQueueFullError("Statement queue is full")
+            job = new_job
+            self._inflight[key] = job
+            self._remember(job)
+            heapq.heappush(self._heap, (rank, next(self._seq), job))
+            self._queued += 1
+            self._cond.notify()
+        if not self._running:
+            self.start()
+        return job
+
+    def get(self, job_id):
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id, timeout=None):
+        job = self.get(job_id)
+        if job is not None:
+            job.done.wait(timeout)
+        return job
+
+    def stats(self):
+        with self._cond:
+            by_priority = defaultdict(int)
+            for rank, _, job in self._heap:
+                if job.status == QUEUED and job.priority == rank:
+                    by_priority[rank] += 1
+            stats = {
+                "workers": self.workers,
+                "busy": self._busy,
+                "queued": self._queued,
+                "queued_by_priority": {name: by_priority[rank] for name, rank in PRIORITIES.items()},
+                "max_queue": self.max_queue,
+                "cached_documents": len(self._cache),
+                "tracked_jobs": len(self._jobs),
+                "counters": dict(self.counters),
+            }
+        stats["queue_wait"] = self.queue_wait.snapshot()
+        stats["run_time"] = self.run_time.snapshot()
+        stats["jobs_per_sec"] = stats["run_time"]["ops_per_sec"]
+        return stats
+
+    # ------------------------------------------------------------------
+    # Caller holds self._cond for the helpers below
+    # ------------------------------------------------------------------
+    def _cached(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        document, expires = entry
+        if expires is not None and expires <= time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return document
+
+    def _store(self, key, document):
+        if not self.cache_size:
+            return
+        _, _, end = parse_period(key[1])
+        closed = end <= datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        self._cache[key] = (document, None if closed else time.monotonic() + self.open_period_ttl)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _remember(self, job):
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.max_jobs:
+            oldest = next(iter(self._jobs.values()))
+            if not oldest.done.is_set():
+                break
+            self._jobs.popitem(last=False)
+
+    def _next_job(self):
+        while True:
+            while self._running and not self._heap:
+                self._cond.wait()
+            if not self._running:
+                return None
+            rank, _, job = heapq.heappop(self._heap)
+            if job.status == QUEUED and job.priority == rank:
+                return job
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+    def _run(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                if job is None:
+                    return
+                job.status = RUNNING
+                self._queued -= 1
+                self._busy += 1
+            started = time.monotonic()
+            job.queue_seconds = started - job.enqueued
+            self.queue_wait.record(job.queue_seconds)
+            account_id, period, fmt = job.key
+            try:
+                document = FORMATS[fmt][1](build_statement(self.ledger, account_id, period))
+            except Exception as e:
+                document, error = None, f"{type(e).__name__}: {e}"
+            else:
+                error = None
+            job.run_seconds = time.monotonic() - started
+            self.run_time.record(job.run_seconds)
+            with self._cond:
+                self._busy -= 1
+                del self._inflight[job.key]
+                if error is None:
+                    job.status, job.document = COMPLETED, document
+                    self._store(job.key, document)
+                    self.counters["completed"] += 1
+                else:
+                    job.status, job.error = FAILED, error
+                    self.counters["failed"] += 1
+                job.finished_at = time.time()
+            job.done.set()
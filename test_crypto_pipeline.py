@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Crypto pipeline tests
+Covers the offline signature and KEM providers, provider selection and
+fallback, ordered sign/verify batches on thread and process pools, async
+verification metrics and the latency/throughput statistics
+"""
+
+import time
+
+import pytest
+
+import crypto_provider
+from crypto_pipeline import CryptoPipeline, canonical_bytes
+from crypto_provider import (OfflineKEMProvider, OfflineSignatureProvider, get_kem_provider, get_signature_provider,
+                             register_kem_provider, register_signature_provider)
+from metrics import LatencyStats, MetricsRegistry, percentile
+
+
+class ExplodingSignatureProvider(OfflineSignatureProvider):
+    name = "exploding"
+
+    def verify(self, public_key, message, signature):
+        if message == b"boom":
+            raise RuntimeError("provider crashed")
+        return super().verify(public_key, message, signature)
+
+
+register_signature_provider("exploding", ExplodingSignatureProvider)
+register_kem_provider("exploding", OfflineKEMProvider)
+
+
+def test_offline_providers():
+    signer = get_signature_provider("offline")
+    public_key, secret_key = signer.generate_keypair()
+    signature = signer.sign(secret_key, b"payload")
+    assert len(signature) == signer.signature_size and signer.verify(public_key, b"payload", signature)
+    assert not signer.verify(public_key, b"tampered", signature)
+    assert not signer.verify(public_key, b"payload", signature[:-1])
+    kem = get_kem_provider("offline")
+    kem_public, kem_secret = kem.generate_keypair()
+    ciphertext, shared = kem.encapsulate(kem_public)
+    assert len(ciphertext) == kem.ciphertext_size and kem.decapsulate(kem_secret, ciphertext) == shared
+    assert canonical_bytes({"b": 1, "a": [2]}) == b'{"a":[2],"b":1}'
+
+
+def test_provider_selection_falls_back_to_offline(monkeypatch):
+    monkeypatch.delenv("PQC_PROVIDER", raising=False)
+    monkeypatch.setattr(crypto_provider, "oqs", None)
+    assert crypto_provider.default_provider_name() == "offline"
+    assert CryptoPipeline(workers=1).provider_name == "offline"
+    monkeypatch.setattr(crypto_provider, "oqs", object())
+    assert crypto_provider.default_provider_name() == "oqs"
+    monkeypatch.setenv("PQC_PROVIDER", "exploding")
+    assert isinstance(get_signature_provider(), ExplodingSignatureProvider)
+    for lookup in (get_signature_provider, get_kem_provider):
+        with pytest.raises(ValueError):
+            lookup("no-such-provider")
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_batches_keep_input_order(executor):
+    pipeline = CryptoPipeline("offline", workers=3, chunk_size=7, executor=executor)
+    try:
+        public_key, secret_key = pipeline.generate_signing_keypair()
+        messages = [canonical_bytes({"n": n}) for n in range(50)]
+        signatures = pipeline.sign_batch(secret_key, messages)
+        assert signatures == [pipeline.signer.sign(secret_key, m) for m in messages]
+        items = [(public_key, m, s) for m, s in zip(messages, signatures)]
+        items[3] = (public_key, b"tampered", signatures[3])
+        items[40] = (public_key, messages[40], signatures[40][:10])
+        results = pipeline.verify_batch(items)
+        assert results == [n not in (3, 40) for n in range(50)]
+        operations = pipeline.status()["operations"]
+        assert operations["sign"]["count"] == 50 and operations["verify"]["count"] == 50
+        assert operations["sign_batch"]["count"] == 1 and operations["verify"]["batch_ops_per_sec"] > 0
+    finally:
+        pipeline.shutdown()
+
+
+def test_verify_errors_and_async_metrics():
+    pipeline = CryptoPipeline("exploding", workers=2, chunk_size=4)
+    try:
+        public_key, secret_key = pipeline.generate_signing_keypair()
+        good = pipeline.sign(secret_key, b"ok")
+        # A provider exception fails that item only
+        assert pipeline.verify_batch([(public_key, b"ok", good), (public_key, b"boom", good)]) == [True, False]
+        results, durations = pipeline.verify_async([(public_key, b"ok", good)] * 3).result(5)
+        assert results == [True] * 3 and len(durations) == 3
+        deadline = time.monotonic() + 2
+        while pipeline.status()["operations"]["verify"]["count"] < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert pipeline.status()["operations"]["verify"]["count"] == 5
+        pipeline.probe(iterations=4)
+        assert {"sign", "verify", "encapsulate", "decapsulate"} <= set(pipeline.status()["operations"])
+    finally:
+        pipeline.shutdown()
+
+
+def test_latency_stats():
+    assert percentile([], 50) == 0.0 and percentile([1, 2, 3, 4], 50) == 2 and percentile([1, 2, 3, 4], 99) == 4
+    stats = LatencyStats(window_size=100)
+    now = time.monotonic()
+    # One batch of 100 ops that took 10 ms is 10000 ops/sec, not "ops since the batch"
+    stats.record_many([0.01] * 100, now=now)
+    snap = stats.snapshot()
+    assert snap["count"] == 100 and snap["avg_ms"] == pytest.approx(10.0)
+    assert snap["ops_per_sec"] == pytest.approx(10000)
+    time.sleep(0.05)
+    assert stats.snapshot()["ops_per_sec"] == pytest.approx(10000)
+
+    steady = LatencyStats()
+    for n in range(10):
+        steady.record(0.001, now=now - 1 + n * 0.1)
+    # Ten 1 ms ops spread from now - 1.001 to now - 0.1
+    assert steady.snapshot()["ops_per_sec"] == pytest.approx(10 / 0.901)
+    assert LatencyStats(rate_window=0.5).snapshot()["ops_per_sec"] == 0.0
+
+    registry = MetricsRegistry(window_size=10)
+    for n in range(20):
+        registry.record("op", n / 1000)
+    assert registry.get("op") is registry.get("op") and registry.snapshot()["op"]["max_ms"] == pytest.approx(19)
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Crypto Pipeline")
+    print("=" * 35)
+    for test in (test_offline_providers, test_verify_errors_and_async_metrics, test_latency_stats):
+        test()
+        print(f"✅ {test.__name__}")
+    for executor in ("thread", "process"):
+        test_batches_keep_input_order(executor)
+        print(f"✅ test_batches_keep_input_order[{executor}]")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Multi-currency tests
+Covers exact minor-unit parsing and formatting, cross-rate totals against an
+exact rational reference, FX table versions, multi-currency ledger accounts
+and transfers, and the FX and portfolio endpoints
+"""
+
+import random
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from currency import (CURRENCIES, MAX_AMOUNT, CurrencyError, FxRateTable, FxRates, Portfolio, format_minor, from_minor,
+                      to_minor)
+from ledger import Ledger, LedgerError
+from local_server import LocalServer
+from statements import build_statement, render_csv
+
+
+def test_minor_units_are_exact():
+    assert to_minor(0.1 + 0.2) == 30 and to_minor("15750.50") == 1575050 and to_minor(-45.99) == -4599
+    # Half-even at the currency's precision, whatever float rounding would have done
+    assert [to_minor(v) for v in ("1.005", "1.015", 2.675, "-0.125")] == [100, 102, 268, -12]
+    assert to_minor("150.5", "JPY") == 150 and to_minor(151.5, "JPY") == 152 and to_minor(7, "JPY") == 7
+    assert to_minor("1.2345", "KWD") == 1234 and to_minor(3, "KWD") == 3000
+    assert format_minor(1575050) == "15750.50" and format_minor(-5) == "-0.05"
+    assert format_minor(1234, "KWD") == "1.234" and format_minor(-1500, "JPY") == "-1500"
+    assert from_minor(1234, "KWD") == 1.234
+    for bad in ("abc", "nan", float("inf"), None, "1e400", 1e300, -10 ** 16, Decimal("1e16")):
+        with pytest.raises(CurrencyError):
+            to_minor(bad)
+    assert to_minor(MAX_AMOUNT, "KWD") == MAX_AMOUNT * 1000 and to_minor(f"-{MAX_AMOUNT}") == -MAX_AMOUNT * 100
+    with pytest.raises(ValueError):
+        to_minor(1, "XYZ")
+
+
+def test_cross_rate_totals_match_exact_reference():
+    rates = FxRateTable().current()
+    rng = random.Random(5)
+    positions = [(i, rng.choice(rates.currencies), rng.randint(-10 ** 7, 10 ** 9)) for i in range(3000)]
+    portfolio = Portfolio(positions)
+    for target in rates.currencies:
+        exact = sum(Fraction(minor) * rates.rates[target] / rates.rates[currency] *
+                    Fraction(10) ** (CURRENCIES[target] - CURRENCIES[currency]) for _, currency, minor in positions)
+        # round() on a Fraction rounds half to even, like the table's one rounding step
+        assert portfolio.total(rates, target) == round(exact)
+        assert rates.totals(portfolio.subtotals())[target] == round(exact)
+
+    portfolio.set(0, "JPY", 10 ** 6)
+    portfolio.remove(1)
+    assert sum(portfolio.subtotals().values()) == sum(m for _, _, m in positions[2:]) + 10 ** 6
+    assert rates.convert(100, "USD", "JPY") == 151 and rates.convert(1000, "USD", "KWD") == 3075
+    assert rates.convert_many([100, 200], "EUR", "EUR") == [100, 200]
+    assert str(rates.cross_rate("USD", "EUR")) == "0.9215" and str(rates.cross_rate("EUR", "EUR")) == "1"
+    with pytest.raises(CurrencyError):
+        rates.total({"XYZ": 1}, "USD")
+
+
+def test_rate_table_versions():
+    table = FxRateTable({"EUR": "0.5"}, history=2)
+    first = table.current()
+    assert first.version == 1 and first.currencies == ("EUR", "USD")
+    second = table.publish({"EUR": "0.25", "GBP": 1})
+    assert table.current() is second and second.convert(400, "EUR", "USD") == 1600
+    # Readers holding an older version keep converting at its rates
+    assert first.convert(400, "EUR", "USD") == 800 and table.get(1) is first
+    assert table.at(second.published_at) is second
+    with pytest.raises(CurrencyError):
+        table.at(first.published_at - 60)
+    table.publish({"EUR": "0.5"})
+    assert table.stats()["retained_versions"] == [2, 3]
+    with pytest.raises(CurrencyError):
+        table.get(1)
+    for bad in ({"EUR": 0}, {"EUR": "x"}, {"XYZ": 1}, {5: 1}):
+        with pytest.raises(CurrencyError):
+            FxRates(9, bad)
+    for base in (["USD"], 5, None, "XYZ"):
+        with pytest.raises(CurrencyError):
+            FxRates(9, {"EUR": 1}, base)
+    # Every table must quote the base currency and the currencies held
+    assert table.publish({"USD": "2", "JPY": "300"}, base="EUR").convert(100, "USD", "EUR") == 50
+    for rates, base, required in (({"GBP": 1}, "EUR", ()), ({"EUR": 1}, "USD", {"JPY"})):
+        with pytest.raises(CurrencyError):
+            table.publish(rates, base, required)
+    assert table.current().version == 4 and table.value_in("300", "JPY") == 2.0
+
+
+def test_multi_currency_ledger():
+    ledger = Ledger(fx=FxRateTable({"EUR": "0.9", "JPY": "150"}))
+    ledger.open_account({"id": 3, "account_number": "QB-003-2024", "balance": "1000.00", "currency": "EUR"})
+    ledger.open_account({"id": 4, "account_number": "QB-004-2024", "balance": 0, "currency": "JPY"})
+    legs = ledger.transfer(1, 3, "100.01", "To euro savings")
+    assert legs["debit"]["amount"] == -100.01 and legs["credit"]["amount"] == 90.01
+    assert legs["credit"]["currency"] == "EUR" and legs["credit"]["fx"] == {"pair": "USD/EUR", "rate": "0.9",
+                                                                             "rate_version": 1}
+    # 10 EUR at 150/0.9 is 1666.67 yen
+    ledger.transfer(3, 4, 10)
+    assert ledger.balance(3) == 1080.01 and ledger.balance(4) == 1667
+    with ledger.snapshot() as snapshot:
+        assert snapshot.subtotals() == {"USD": 1575050 - 10001 + 528075, "EUR": 108001, "JPY": 1667}
+        view = snapshot.to_dict()
+        assert view["balances_by_currency"] == {"EUR": "1080.01", "JPY": "1667", "USD": "20931.24"}
+        # 20931.24 + 1080.01 / 0.9 + 1667 / 150 = 22142.364..., rounded once at the end
+        assert view["total_balance"] == 22142.36
+    statement = render_csv(build_statement(ledger, 4, ledger.transactions(4)[0]["date"][:7])).decode()
+    assert "currency,JPY" in statement and ",1667\r\n" in statement
+
+    with pytest.raises(LedgerError):
+        Ledger(seed=False).open_account({"id": 1, "currency": "XYZ"})
+    # A rejected amount leaves no trace: no journal entry, no balance change, no new version
+    version, journal = ledger.version_stats()["version"], len(ledger.transactions())
+    for bad in ("1e400", 10 ** 16):
+        with pytest.raises(CurrencyError):
+            ledger.post(1, bad)
+        with pytest.raises(CurrencyError):
+            ledger.transfer(1, 3, bad)
+        with pytest.raises(CurrencyError):
+            ledger.hold(1, bad)
+    assert ledger.version_stats()["version"] == version and len(ledger.transactions()) == journal
+    assert ledger.balance(1) == 15750.50 - 100.01
+
+    plain = Ledger()
+    plain.open_account({"id": 3, "balance": 0, "currency": "EUR"})
+    with pytest.raises(LedgerError):
+        plain.transfer(1, 3, 5)
+    assert plain.snapshot().to_dict()["total_balance"] is None
+
+
+def test_fx_and_portfolio_endpoints():
+    with LocalServer() as server:
+        status, rates = server.call("GET", "/api/v1/fx/rates?matrix=true")
+        assert status == 200 and rates["base"] == "USD" and rates["cross_rates"]["EUR"]["EUR"] == "1"
+        status, published = server.call("POST", "/api/v1/fx/rates", {"rates": dict(rates["rates"], EUR="0.5")})
+        assert status == 200 and published["version"] == rates["version"] + 1
+        assert server.call("POST", "/api/v1/fx/rates", {"rates": {"EUR": -1}})[0] == 400
+        assert server.call("POST", "/api/v1/fx/rates", {})[0] == 400
+        for bad in ({"rates": {"EUR": 1}, "base": ["EUR"]}, {"rates": {"GBP": 1}, "base": "EUR"}):
+            status, rejected = server.call("POST", "/api/v1/fx/rates", bad)
+            assert status == 400 and rejected["code"] == "VALIDATION_ERROR", bad
+
+        status, usd = server.call("GET", "/api/v1/accounts/portfolio")
+        assert status == 200 and usd["fx_version"] == published["version"]
+        status, eur = server.call("GET", "/api/v1/accounts/portfolio?currency=eur")
+        assert status == 200 and eur["currency"] == "EUR" and eur["ledger_version"] is not None
+        assert to_minor(eur["total_exact"], "EUR") == round(Fraction(to_minor(usd["total_exact"]), 2))
+        status, old = server.call("GET", f"/api/v1/accounts/portfolio?currency=EUR&fx_version={rates['version']}")
+        assert status == 200 and old["fx_version"] == rates["version"] and old["total"] != eur["total"]
+        assert server.call("GET", "/api/v1/accounts/portfolio?currency=XYZ")[1]["code"] == "VALIDATION_ERROR"
+        assert server.call("GET", "/api/v1/accounts/portfolio?as_of=0")[0] == 410
+        assert server.call("GET", "/api/v1/fx/rates?version=999999")[0] == 404
+        status, rejected = server.call("GET", "/api/v1/fx/rates?version=abc")
+        assert status == 400 and rejected["code"] == "VALIDATION_ERROR"
+
+        balance = server.mb.ledger.balance(1)
+        for amount in ("1e400", 10 ** 16):
+            status, rejected = server.call("POST", "/api/v1/transfers",
+                                           {"from_account_id": 1, "to_account_id": 2, "amount": amount})
+            assert status == 400 and rejected["code"] == "TRANSFER_REJECTED"
+            status, rejected = server.call("POST", "/api/v1/transactions", {"account_id": 1, "amount": amount})
+            assert status == 400 and rejected["code"] == "VALIDATION_ERROR"
+        assert server.mb.ledger.balance(1) == balance
+
+        # A table without a rate for a currency accounts are held in is rejected
+        held = Ledger(seed=False)
+        held.open_account({"id": 3, "balance": 1, "currency": "JPY"})
+        server.mb.ledger, ledger = held, server.mb.ledger
+        try:
+            status, rejected = server.call("POST", "/api/v1/fx/rates", {"rates": {"EUR": "0.9"}})
+            assert status == 400 and "JPY" in rejected["error"]
+            assert server.call("POST", "/api/v1/fx/rates", {"rates": rates["rates"]})[0] == 200
+        finally:
+            server.mb.ledger = ledger
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Multi-Currency")
+    print("=" * 35)
+    for test in (test_minor_units_are_exact, test_cross_rate_totals_match_exact_reference, test_rate_table_versions,
+                 test_multi_currency_ledger, test_fx_and_portfolio_endpoints):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Debug endpoint tests for the mock backend
+Covers the disabled default, admin token check, sampling and cProfile
+sessions and the /debug/stats snapshot
+"""
+
+import json
+
+from local_server import LocalServer
+
+TOKEN = "test-admin-token"
+
+
+class MockServer(LocalServer):
+    def __init__(self, enabled=True):
+        super().__init__(debug_endpoints_enabled=enabled, debug_admin_token=TOKEN)
+
+    def __exit__(self, *exc_info):
+        super().__exit__(*exc_info)
+        if self.mb.profiler.active is not None:
+            self.mb.profiler.stop()
+
+    def request(self, method, path, body=None, token=TOKEN):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        reply = super().request(method, path, body, headers=headers, timeout=30)
+        return reply.status, reply.body
+
+
+def test_disabled_by_default_and_admin_only():
+    with MockServer(enabled=False) as mock:
+        assert mock.request("GET", "/debug/stats")[0] == 404
+    with MockServer() as mock:
+        assert mock.request("GET", "/debug/stats", token=None)[0] == 401
+        assert mock.request("GET", "/debug/stats", token="wrong")[0] == 401
+        assert mock.request("GET", "/debug/stats")[0] == 200
+
+
+def test_sampling_profile_returns_collapsed_stacks():
+    with MockServer() as mock:
+        status, body = mock.request("GET", "/debug/profile?seconds=0.3&interval_ms=2")
+        assert status == 200
+        lines = body.decode().splitlines()
+        assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+        assert any(line.startswith("Thread-N_(serve_forever);") for line in lines)
+        assert mock.request("GET", "/debug/profile?seconds=1000")[0] == 400
+
+
+def test_cprofile_session_over_requests():
+    with MockServer() as mock:
+        assert mock.request("POST", "/debug/profile/start", {"mode": "cprofile", "seconds": 30})[0] == 200
+        assert mock.request("POST", "/debug/profile/start", {"mode": "sampling"})[0] == 409
+        for _ in range(5):
+            mock.request("GET", "/api/v1/accounts", token=None)
+        status, body = mock.request("POST", "/debug/profile/stop")
+        assert status == 200 and b"do_GET" in body and b"function calls" in body
+        assert mock.request("POST", "/debug/profile/stop")[0] == 409
+        assert mock.request("GET", "/debug/profile/result?format=collapsed")[0] == 400
+        status, body = mock.request("GET", "/debug/profile")
+        assert json.loads(body)["last"]["requests_profiled"] >= 5
+        assert mock.mb.profiler.request_profiler is None
+
+
+def test_stats_snapshot():
+    with MockServer() as mock:
+        assert json.loads(mock.request("POST", "/debug/tracemalloc", {"action": "start"})[1])["tracemalloc"]
+        try:
+            stats = json.loads(mock.request("GET", "/debug/stats?top=3")[1])
+        finally:
+            mock.request("POST", "/debug/tracemalloc", {"action": "stop"})
+    assert stats["threads"]["count"] >= 2
+    assert {"verification_stage", "fault_writer", "trace_exporter"} <= set(stats["queues"])
+    assert len(stats["memory"]["top_allocators"]) <= 3 and stats["memory"]["tracemalloc"]
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Debug Endpoints")
+    print("=" * 35)
+    for test in (test_disabled_by_default_and_admin_only, test_sampling_profile_returns_collapsed_stacks,
+                 test_cprofile_session_over_requests, test_stats_snapshot):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Event bus tests
+Covers key-stable partitioning and per-key order, ring buffer overwrite,
+consumer group rebalancing and committed offsets, lag, blocking polls and
+the fraud and notification consumers fed by ledger postings, with the fraud
+threshold applied in the base currency
+"""
+
+import threading
+import time
+
+from currency import FxRateTable
+from event_bus import EventBus, PartitionLog, partition_for
+from event_consumers import TOPIC_FRAUD_ALERTS, FraudAlertNotificationConsumer, FraudConsumer, NotificationConsumer
+from ledger import TOPIC_LEDGER_POSTINGS, Ledger
+from notification_hub import NotificationHub
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_partitioning_and_per_key_order():
+    assert partition_for("acct-7", 8) == partition_for(b"acct-7", 8) and partition_for(7, 8) == partition_for("7", 8)
+    assert partition_for(None, 8) == 0 and len({partition_for(k, 4) for k in range(100)}) == 4
+    bus = EventBus(default_partitions=4)
+    for n in range(50):
+        bus.publish("orders", n % 5, {"key": n % 5, "n": n})
+    bus.publish_batch("orders", [(n % 5, {"key": n % 5, "n": n}) for n in range(50, 100)])
+    records = bus.subscribe("g", "orders").poll(1000, timeout=0)
+    assert len(records) == 100
+    for key in range(5):
+        assert [r.value["n"] for r in records if r.key == key] == list(range(key, 100, 5))
+        assert {r.partition for r in records if r.key == key} == {partition_for(key, 4)}
+
+
+def test_ring_buffer_skips_overwritten_records():
+    log = PartitionLog("t", 0, capacity=4)
+    for n in range(10):
+        log.append(n, n, 0.0)
+    records, next_offset, skipped = log.read(2, 10)
+    assert [r.offset for r in records] == [6, 7, 8, 9] and next_offset == 10 and skipped == 4
+    bus = EventBus(default_partitions=1, default_capacity=8)
+    consumer = bus.subscribe("g", "t")
+    for n in range(20):
+        bus.publish("t", None, n)
+    assert [r.value for r in consumer.poll(100, timeout=0)] == list(range(12, 20)) and consumer.skipped == 12
+
+
+def test_consumer_groups_rebalance_and_resume_from_commits():
+    bus = EventBus(default_partitions=4)
+    for n in range(40):
+        bus.publish("payments", n, n)
+    first = bus.subscribe("ledger", "payments")
+    assert first.assignment == [0, 1, 2, 3]
+    second = bus.subscribe("ledger", "payments")
+    assert first.assignment == [0, 2] and second.assignment == [1, 3]
+    seen = [r.value for r in first.poll(1000, timeout=0)] + [r.value for r in second.poll(1000, timeout=0)]
+    assert sorted(seen) == list(range(40))
+    first.commit()
+    assert sum(bus.lag("ledger", "payments").values()) == sum(1 for n in range(40) if partition_for(n, 4) in (1, 3))
+
+    # second leaves without committing: its partitions are re-read by the survivor
+    bus.leave(second)
+    assert first.assignment == [0, 1, 2, 3]
+    assert sorted(r.value for r in first.poll(1000, timeout=0)) == \
+        sorted(n for n in range(40) if partition_for(n, 4) in (1, 3))
+    first.close()
+    assert sum(bus.lag("ledger", "payments").values()) == 0
+    # A new member of the group starts from the committed offsets; another group from the start or the end
+    bus.publish("payments", 1, "late")
+    assert [r.value for r in bus.subscribe("ledger", "payments").poll(10, timeout=0)] == ["late"]
+    assert len(bus.subscribe("audit", "payments").poll(1000, timeout=0)) == 41
+    assert bus.subscribe("tail", "payments", auto_offset_reset="latest").poll(10, timeout=0) == []
+    assert bus.stats()["topics"]["payments"]["partitions"] == 4
+
+
+def test_poll_wakes_up_on_publish():
+    bus = EventBus()
+    consumer = bus.subscribe("g", "wake")
+    threading.Timer(0.1, bus.publish, args=("wake", "k", "hello")).start()
+    started = time.monotonic()
+    records = consumer.poll(10, timeout=5)
+    assert [r.value for r in records] == ["hello"] and time.monotonic() - started < 2
+    assert consumer.poll(10, timeout=0.05) == []
+
+
+def test_consumers_score_and_forward_ledger_postings():
+    bus = EventBus()
+    hub = NotificationHub()
+    ledger = Ledger(bus, seed=False)
+    ledger.open_account({"id": 5, "balance": 100000})
+    workers = [FraudConsumer(bus, large_amount=5000, velocity_limit=3, poll_timeout=0.05),
+               NotificationConsumer(bus, hub, poll_timeout=0.05),
+               FraudAlertNotificationConsumer(bus, hub, poll_timeout=0.05)]
+    for worker in workers:
+        worker.start()
+    try:
+        ledger.post(5, -6000, "Wire")
+        for _ in range(3):
+            ledger.post(5, -10)
+        fraud, notifications, alerts = workers
+        assert wait_for(lambda: notifications.processed == fraud.processed == 4 and alerts.processed == 2)
+        assert [(a["reasons"], a["risk_level"]) for a in fraud.alerts] == \
+            [(["large_debit"], "high"), (["high_velocity"], "high")]
+        # Two frames per posting plus one per alert
+        assert hub.snapshot()["published"] == 4 * 2 + 2
+        assert wait_for(lambda: sum(bus.lag("fraud-service", TOPIC_LEDGER_POSTINGS).values()) == 0)
+        assert bus.stats()["topics"][TOPIC_FRAUD_ALERTS]["end_offsets"] != [0, 0, 0, 0]
+    finally:
+        for worker in workers:
+            worker.stop()
+
+
+def test_large_debit_threshold_is_in_base_currency():
+    bus = EventBus()
+    ledger = Ledger(bus, seed=False, fx=FxRateTable({"JPY": "150", "KWD": "0.3"}))
+    ledger.open_account({"id": 6, "balance": 10000000, "currency": "JPY"})
+    ledger.open_account({"id": 7, "balance": 10000, "currency": "KWD"})
+    fraud = FraudConsumer(bus, large_amount=5000, fx=ledger.fx, poll_timeout=0.05).start()
+    try:
+        # 600,000 yen is 4,000 USD; 1,800 dinars is 6,000 USD
+        ledger.post(6, -600000)
+        ledger.post(7, -1800)
+        assert wait_for(lambda: fraud.processed == 2)
+        assert [(a["account_id"], a["reasons"]) for a in fraud.alerts] == [(7, ["large_debit"])]
+    finally:
+        fraud.stop()
+    assert fraud.base_amount({"amount": -1800, "currency": "KWD"}) == -6000
+    # Without an FX table (or a rate) the raw amount is scored
+    assert FraudConsumer(bus).base_amount({"amount": -1800, "currency": "KWD"}) == -1800
+    assert fraud.base_amount({"amount": -10, "currency": "GBP"}) == -10
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Event Bus")
+    print("=" * 35)
+    for test in (test_partitioning_and_per_key_order, test_ring_buffer_skips_overwritten_records,
+                 test_consumer_groups_rebalance_and_resume_from_commits, test_poll_wakes_up_on_publish,
+                 test_consumers_score_and_forward_ledger_postings, test_large_debit_threshold_is_in_base_currency):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Fault injection tests for the mock backend
+Covers latency distributions, non-blocking delays, error/timeout injection,
+bandwidth throttling and switching profiles at runtime
+"""
+
+import http.client
+import json
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from fault_injection import FaultInjector, FaultProfileError, sample_latency
+from local_server import LocalServer
+
+PROFILES = {
+    "active": "none",
+    "profiles": {
+        "slow": {"rules": [{"prefix": "/api/v1/compliance/", "latency": {"distribution": "fixed", "ms": 300}}]},
+        "errors": {"rules": [{"prefix": "/api/v1/fraud/", "error_rate": 1.0, "error_status": 503}]},
+        "hang": {"rules": [{"prefix": "/api/v1/kms/", "timeout_rate": 1.0, "timeout_ms": 200}]},
+        "throttled": {"rules": [{"prefix": "/api/v1/transactions", "bandwidth_kbps": 8}]},
+    },
+}
+
+
+class MockServer(LocalServer):
+    """mock_backend server on a free port with the test fault profiles installed"""
+
+    def __enter__(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "profiles.json"
+        self.path.write_text(json.dumps(PROFILES))
+        self.overrides = {"fault_injector": FaultInjector(str(self.path)).start()}
+        self.injector = self.overrides["fault_injector"]
+        return super().__enter__()
+
+    def __exit__(self, *exc_info):
+        super().__exit__(*exc_info)
+        self.injector.stop()
+        self.tmp.cleanup()
+
+    def request(self, method, path, body=None, timeout=5):
+        reply = super().request(method, path, body, timeout=timeout)
+        return reply.status, reply.body
+
+
+def test_latency_distributions():
+    rng = random.Random(7)
+    fixed = [sample_latency({"distribution": "fixed", "ms": 50}, rng) for _ in range(100)]
+    normal = [sample_latency({"distribution": "normal", "mean_ms": 100, "stddev_ms": 10}, rng) for _ in range(5000)]
+    pareto = sorted(sample_latency({"distribution": "pareto", "scale_ms": 10, "alpha": 1.2, "max_ms": 5000}, rng)
+                    for _ in range(20000))
+    assert set(fixed) == {0.05}
+    assert abs(sum(normal) / len(normal) - 0.1) < 0.005
+    p50, p99 = pareto[len(pareto) // 2], pareto[int(len(pareto) * 0.99)]
+    assert 0.01 <= p50 < 0.03 and p99 > 10 * p50, (p50, p99)
+    assert pareto[-1] <= 5.0
+
+
+def test_delays_do_not_hold_worker_threads():
+    with MockServer() as mock:
+        mock.injector.set_profile("slow")
+        results, peak_threads = [], []
+        baseline = threading.active_count()
+
+        def client():
+            results.append(mock.request("GET", "/api/v1/compliance/status"))
+
+        clients = [threading.Thread(target=client) for _ in range(50)]
+        start = time.monotonic()
+        for c in clients:
+            c.start()
+        time.sleep(0.15)
+        # 50 clients are waiting; server-side, only the fault writer thread should be holding them
+        peak_threads.append(threading.active_count() - baseline - len(clients))
+        for c in clients:
+            c.join()
+        elapsed = time.monotonic() - start
+
+    print(f"   50 delayed requests in {elapsed * 1000:.0f} ms, {peak_threads[0]} extra server threads mid-delay")
+    assert all(status == 200 and json.loads(body)["status"] == "compliant" for status, body in results)
+    assert 0.3 <= elapsed < 1.5
+    assert peak_threads[0] <= 5
+
+
+def test_error_and_timeout_injection():
+    with MockServer() as mock:
+        mock.injector.set_profile("errors")
+        status, body = mock.request("GET", "/api/v1/fraud/score")
+        assert status == 503 and json.loads(body)["code"] == "FAULT_INJECTED"
+
+        mock.injector.set_profile("hang")
+        start = time.monotonic()
+        try:
+            mock.request("GET", "/api/v1/kms/metrics")
+            answered = True
+        except (http.client.HTTPException, ConnectionError):
+            answered = False
+        hung_for = time.monotonic() - start
+        assert not answered and 0.18 <= hung_for < 1.0, hung_for
+
+
+def test_bandwidth_throttling():
+    with MockServer() as mock:
+        mock.injector.set_profile("throttled")
+        start = time.monotonic()
+        status, body = mock.request("GET", "/api/v1/transactions")
+        elapsed = time.monotonic() - start
+    # 8 kbps = 1000 bytes/s; headers add a couple of hundred bytes on top of the body
+    assert status == 200
+    assert elapsed >= len(body) / 1000 * 0.8, (len(body), elapsed)
+
+
+def test_switch_profile_at_runtime():
+    with MockServer() as mock:
+        status, body = mock.request("POST", "/api/v1/faults/profile", {"profile": "errors"})
+        assert status == 200 and json.loads(body)["active_profile"] == "errors"
+        assert mock.request("GET", "/api/v1/fraud/score")[0] == 503
+
+        status, _ = mock.request("POST", "/api/v1/faults/profile", {"profile": "missing"})
+        assert status == 404
+        for bad in (["errors"], {"name": "errors"}, 5, None):
+            status, body = mock.request("POST", "/api/v1/faults/profile", {"profile": bad})
+            assert status == 400 and json.loads(body)["code"] == "VALIDATION_ERROR", bad
+        with pytest.raises(FaultProfileError):
+            mock.injector.set_profile(["errors"])
+        assert mock.injector.status()["active_profile"] == "errors"
+        mock.request("POST", "/api/v1/faults/profile", {"profile": "none"})
+        assert mock.request("GET", "/api/v1/fraud/score")[0] == 200
+
+
+def test_bad_profile_edits_keep_the_current_profiles():
+    with MockServer() as mock:
+        mock.injector.check_interval = 0
+        mock.injector.set_profile("errors")
+        broken = {"active": "errors", "profiles": {"errors": {"rules": [{"prefix": "/api/v1/fraud/",
+                                                                         "error_rate": "high"}]}}}
+        for content in (json.dumps(broken), "[1, 2]", json.dumps({"profiles": {"errors": "x"}})):
+            time.sleep(0.01)
+            mock.path.write_text(content)
+            # Live requests keep being served from the last good profiles
+            assert mock.request("GET", "/api/v1/fraud/score")[0] == 503
+            with pytest.raises(FaultProfileError):
+                mock.injector.reload()
+            status, body = mock.request("POST", "/api/v1/faults/reload")
+            assert status == 422 and json.loads(body)["code"] == "PROFILE_INVALID"
+
+        time.sleep(0.01)
+        mock.path.write_text(json.dumps(dict(PROFILES, active="none")))
+        assert mock.request("GET", "/api/v1/fraud/score")[0] == 503
+        assert mock.request("POST", "/api/v1/faults/reload")[0] == 200
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Fault Injection")
+    print("=" * 35)
+    for test in (test_latency_distributions, test_delays_do_not_hold_worker_threads,
+                 test_error_and_timeout_injection, test_bandwidth_throttling, test_switch_profile_at_runtime,
+                 test_bad_profile_edits_keep_the_current_profiles):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+KMS stand-in tests
+Covers single-flight data-key loading, LRU/TTL/usage limits and refresh-ahead
+in the cache, per-derivation nonces, rotation warm-up (and its failure) and the
+key and data-key endpoints
+"""
+
+import threading
+import time
+
+import pytest
+
+from kms import NONCE_BYTES, DataKeyCache, KeyManagementService, KMSError
+from local_server import LocalServer
+
+
+def test_concurrent_misses_share_one_load():
+    cache = DataKeyCache()
+    loads, gate = [], threading.Event()
+
+    def loader():
+        loads.append(1)
+        gate.wait(5)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("k", loader))) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    gate.set()
+    for thread in threads:
+        thread.join()
+    stats = cache.stats()
+    assert results == ["value"] * 20 and len(loads) == 1
+    assert stats["misses"] == 1 and stats["coalesced"] == 19
+
+    def unavailable():
+        raise RuntimeError("vault down")
+
+    with pytest.raises(RuntimeError):
+        cache.get("broken", unavailable)
+    assert cache.stats()["load_errors"] == 1 and cache.peek("broken") is None
+    cache.shutdown()
+
+
+def test_lru_ttl_usage_limit_and_refresh_ahead():
+    cache = DataKeyCache(max_entries=2, ttl=0.5, refresh_ahead=0.5, max_uses=3)
+    versions = iter(range(100))
+    loader = lambda: next(versions)
+    assert [cache.get("a", loader), cache.get("b", loader), cache.get("a", loader)] == [0, 1, 0]
+    cache.get("c", loader)
+    assert sorted(cache.keys()) == ["a", "c"] and cache.stats()["evictions"] == 1
+    # max_uses hits after the load, then the next lookup reloads
+    assert [cache.get("a", loader) for _ in range(2)] == [0, 0] and cache.get("a", loader) == 3
+    assert cache.peek("a") == 3
+
+    # Past refresh_ahead * ttl the old value is served while a reload replaces it
+    time.sleep(0.3)
+    assert cache.get("a", loader) == 3
+    time.sleep(0.1)
+    assert cache.peek("a") == 4 and cache.stats()["refreshes"] == 1
+    time.sleep(0.6)
+    assert cache.get("a", loader) == 5 and cache.stats()["expirations"] >= 2
+    cache.shutdown()
+
+
+def test_each_derivation_issues_a_distinct_key():
+    kms = KeyManagementService(cache=DataKeyCache(max_uses=1), derivation_iterations=1000)
+    kms.create_key("pii")
+    first, again, fresh = (kms.data_key("pii", "customer:1") for _ in range(3))
+    assert first is again and fresh.key != first.key and fresh.nonce != first.nonce
+    assert len(first.nonce) == NONCE_BYTES and first.version == fresh.version == 1
+    # The version and nonce stored with a ciphertext bring back its key, cached or not
+    assert kms.data_key("pii", "customer:1", 1, first.nonce).key == first.key
+    assert kms.data_key("pii", "customer:1", 1, fresh.nonce) is fresh
+    assert kms.data_key("pii", "customer:2").key != first.key
+    with pytest.raises(KMSError):
+        kms.data_key("pii", "customer:1", 1, b"short")
+    with pytest.raises(KMSError):
+        kms.data_key("missing", "customer:1")
+    kms.stop()
+
+
+def test_rotation_warms_hot_contexts_first():
+    kms = KeyManagementService(derivation_iterations=1000, warm_contexts=2)
+    kms.create_key("pii")
+    old = {context: kms.data_key("pii", context) for context in ("a", "b", "c")}
+    assert kms.rotate("pii", background=False) == {"key_id": "pii", "version": 2, "state": "active"}
+    described = kms.describe_key("pii")
+    assert described["active_version"] == 2 and [v["state"] for v in described["versions"]] == ["retired", "active"]
+    # The two most recently used contexts were derived under v2 during warm-up
+    assert {ctx for kid, ver, ctx in kms.cache.keys() if ver == 2} == {"b", "c"}
+    misses = kms.cache.stats()["misses"]
+    assert kms.data_key("pii", "c").version == 2 and kms.cache.stats()["misses"] == misses
+    # Retired versions still decrypt
+    assert kms.data_key("pii", "a", 1, old["a"].nonce).key == old["a"].key
+    with pytest.raises(KMSError):
+        kms.data_key("pii", "a", 3)
+    kms.stop()
+
+
+def test_failed_warm_up_still_activates_the_version():
+    kms = KeyManagementService(derivation_iterations=1000)
+    kms.create_key("pii")
+    kms.data_key("pii", "a")
+    derive = kms._derive
+
+    def unavailable(*args):
+        raise RuntimeError("vault down")
+
+    kms._derive = unavailable
+    assert kms.rotate("pii", background=False)["state"] == "active"
+    assert kms.metrics()["rotation_warmup_failures"] == 1 and kms.describe_key("pii")["active_version"] == 2
+    kms._derive = derive
+    # Nothing is left pending, so later rotations (and the scheduled loop) keep working
+    assert kms.rotate("pii", background=False)["version"] == 3 and kms.data_key("pii", "a").version == 3
+    kms.stop()
+
+
+def test_data_key_endpoint():
+    with LocalServer() as server:
+        status, issued = server.call("POST", "/api/v1/kms/data-key", {"key_id": "pii-fields", "context": "user:7"})
+        assert status == 200 and len(bytes.fromhex(issued["nonce"])) == NONCE_BYTES
+        status, again = server.call("POST", "/api/v1/kms/data-key", {"key_id": "pii-fields", "context": "user:7",
+                                                                     "version": issued["version"],
+                                                                     "nonce": issued["nonce"]})
+        assert status == 200 and again["fingerprint"] == issued["fingerprint"]
+        for nonce in ("zz", "00", ["00"]):
+            assert server.call("POST", "/api/v1/kms/data-key", {"context": "user:7", "nonce": nonce})[0] == 400
+        assert server.call("POST", "/api/v1/kms/data-key", {"key_id": "nope"})[1]["code"] == "KEY_NOT_FOUND"
+        for bad in ({"key_id": ["x"]}, {"key_id": {}}, {"key_id": 5}, {"key_id": ""},
+                    {"version": "1"}, {"version": 1.0}, {"version": True}, {"version": [1]}):
+            status, rejected = server.call("POST", "/api/v1/kms/data-key", dict({"context": "user:7"}, **bad))
+            assert status == 400 and rejected["code"] == "VALIDATION_ERROR", bad
+        for key_id in (["x"], {"a": 1}, 5):
+            status, rejected = server.call("POST", "/api/v1/kms/keys", {"key_id": key_id})
+            assert status == 400 and rejected["code"] == "VALIDATION_ERROR", key_id
+        status, created = server.call("POST", "/api/v1/kms/keys", {"key_id": "kms-endpoint-test"})
+        assert status == 200 and server.call("GET", "/api/v1/kms/keys/kms-endpoint-test")[1] == created
+
+
+if __name__ == "__main__":
+    print("🧪 Testing KMS")
+    print("=" * 35)
+    for test in (test_concurrent_misses_share_one_load, test_lru_ttl_usage_limit_and_refresh_ahead,
+                 test_each_derivation_issues_a_distinct_key, test_rotation_warms_hot_contexts_first,
+                 test_failed_warm_up_still_activates_the_version, test_data_key_endpoint):
+        test()
+        print(f"✅ {test.__name__}")
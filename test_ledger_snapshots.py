@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Ledger snapshot tests
+Covers point-in-time views that ignore later postings, as-of reads, garbage
+collection around pinned snapshots, torn-read freedom under concurrent
+transfers and the as_of query and error answers of the accounts endpoints
+"""
+
+import random
+import threading
+import time
+
+import pytest
+
+import ledger as ledger_module
+from ledger import Ledger, LedgerError, SnapshotTooOldError, parse_as_of
+from local_server import LocalServer
+
+
+def test_snapshot_is_a_fixed_point_in_time():
+    ledger = Ledger()
+    with ledger.snapshot() as before:
+        ledger.transfer(1, 2, 750.50, "Savings")
+        ledger.post(1, -20)
+        ledger.open_account({"id": 3, "balance": 5})
+        assert [(a["id"], a["balance"]) for a in before.accounts()] == [(1, 15750.50), (2, 5280.75)]
+        assert before.balance(2) == 5280.75 and len(before.transactions()) == 4
+        with pytest.raises(LedgerError):
+            before.balance(3)
+    assert [(a["id"], a["balance"]) for a in ledger.accounts()] == [(1, 14980.0), (2, 6031.25), (3, 5.0)]
+    with ledger.snapshot() as after:
+        assert after.version > before.version and len(after.transactions(1)) == 6
+        assert after.to_dict([2, 1])["total_balance"] == 21011.25
+
+
+def test_as_of_reads_and_retention():
+    ledger = Ledger(seed=False, retention=0.2)
+    ledger.open_account({"id": 1, "balance": 100})
+    opened = time.time()
+    time.sleep(0.02)
+    ledger.post(1, 50)
+    assert ledger.balance(1, as_of=opened) == 100 and ledger.balance(1) == 150
+    assert ledger.accounts(as_of=time.time() + 60)[0]["balance"] == 150
+    with pytest.raises(SnapshotTooOldError):
+        ledger.accounts(as_of=opened - 60)
+
+    time.sleep(0.25)
+    ledger.post(1, 1)
+    assert ledger.collect_versions() == 1
+    # The version in effect at the retention cutoff stays readable; anything older is gone
+    assert ledger.balance(1, as_of=time.time() - 0.1) == 150
+    with pytest.raises(SnapshotTooOldError):
+        ledger.balance(1, as_of=opened)
+
+    assert parse_as_of("1700000000") == 1700000000.0
+    assert parse_as_of("2023-11-14T22:13:20Z") == parse_as_of("2023-11-14T22:13:20") == 1700000000.0
+    for bad in ("yesterday", "nan", "inf", "-inf", "1e400"):
+        with pytest.raises(LedgerError):
+            parse_as_of(bad)
+
+
+def test_gc_keeps_versions_pinned_snapshots_need():
+    ledger = Ledger(seed=False, retention=0)
+    ledger.open_account({"id": 1, "balance": 10})
+    ledger.open_account({"id": 2, "balance": 0})
+    pinned = ledger.snapshot()
+    for _ in range(3 * ledger_module.GC_INTERVAL):
+        ledger.transfer(1, 2, 0.01)
+    ledger.collect_versions()
+    assert [a["balance"] for a in pinned.accounts()] == [10.0, 0.0]
+    stats = ledger.version_stats()
+    assert stats["open_snapshots"] == 1 and stats["oldest_pinned_version"] == pinned.version
+    assert stats["retained_versions"] > 2 * 3 * ledger_module.GC_INTERVAL
+    pinned.close()
+    ledger.collect_versions()
+    stats = ledger.version_stats()
+    assert stats["open_snapshots"] == 0 and stats["retained_versions"] == 2
+    assert [a["balance"] for a in ledger.accounts()] == [2.32, 7.68]
+
+
+def test_readers_never_see_half_a_transfer():
+    ledger = Ledger(seed=False, retention=0)
+    for account_id in range(1, 21):
+        ledger.open_account({"id": account_id, "balance": 100})
+    stop = threading.Event()
+    torn = []
+
+    def writer(seed):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            source, target = rng.sample(range(1, 21), 2)
+            try:
+                ledger.transfer(source, target, rng.randint(1, 3000) / 100)
+            except LedgerError:
+                pass
+
+    def reader():
+        while not stop.is_set():
+            total = round(sum(a["balance"] for a in ledger.accounts()), 2)
+            if total != 2000:
+                torn.append(total)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(3)]
+    threads += [threading.Thread(target=reader) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(1.0)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert torn == [] and ledger.version_stats()["collected_versions"] > 0
+
+
+def test_accounts_endpoints_as_of():
+    import mock_backend
+    with LocalServer() as server:
+        status, latest = server.call("GET", "/api/v1/accounts/snapshot")
+        assert status == 200 and [a["id"] for a in latest["accounts"]][:2] == [1, 2]
+        mock_backend.ledger.post(2, 1.25, "Interest")
+        status, accounts = server.call("GET", "/api/v1/accounts")
+        assert status == 200 and next(a for a in accounts if a["id"] == 2)["balance"] == \
+            next(a for a in latest["accounts"] if a["id"] == 2)["balance"] + 1.25
+        status, past = server.call("GET", f"/api/v1/accounts/snapshot?ids=2&as_of={latest['as_of']}")
+        assert status == 200 and past["version"] == latest["version"]
+        assert [a["id"] for a in past["accounts"]] == [2] and past["total_balance"] == past["accounts"][0]["balance"]
+        assert server.call("GET", "/api/v1/accounts?as_of=0")[1]["code"] == "SNAPSHOT_TOO_OLD"
+        assert server.call("GET", "/api/v1/accounts?as_of=soon")[0] == 400 and server.call("GET", "/api/v1/accounts?ids=a")[0] == 400
+        for bad in ("nan", "inf", "1e400"):
+            status, rejected = server.call("GET", f"/api/v1/accounts/snapshot?as_of={bad}")
+            assert status == 400 and rejected["code"] == "VALIDATION_ERROR", bad
+        status, versions = server.call("GET", "/api/v1/ledger/versions")
+        assert status == 200 and versions["mvcc"] and versions["version"] >= latest["version"] + 1
+
+
+
+def test_missing_fx_rate_is_not_reported_as_bad_ids(monkeypatch):
+    import mock_backend
+    from currency import FxRateTable
+    # A USD-only table cannot value the JPY account in the USD total
+    ledger = Ledger(seed=False, fx=FxRateTable({}))
+    ledger.open_account({"id": 945, "balance": 1000, "currency": "JPY"})
+    monkeypatch.setattr(mock_backend, "ledger", ledger)
+    with LocalServer() as server:
+        status, rejected = server.call("GET", "/api/v1/accounts/snapshot?ids=945")
+        assert status == 422 and rejected["code"] == "FX_RATE_MISSING" and "JPY" in rejected["error"]
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Ledger Snapshots")
+    print("=" * 35)
+    for test in (test_snapshot_is_a_fixed_point_in_time, test_as_of_reads_and_retention,
+                 test_gc_keeps_versions_pinned_snapshots_need, test_readers_never_see_half_a_transfer,
+                 test_accounts_endpoints_as_of):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+SSE notification hub tests
+Covers replay after reconnects, the reset frame past the replay window,
+disconnecting slow subscribers, heartbeats, publishing before the hub runs,
+id order under concurrent publishers, metered replay and the stream endpoint
+"""
+
+import re
+import socket
+import threading
+import time
+
+from local_server import LocalServer
+from notification_hub import HEARTBEAT_FRAME, NotificationHub
+
+
+def read_until(sock, predicate, timeout=3.0):
+    """Bytes received on sock until predicate(data) holds (or the peer closes / time runs out)"""
+    sock.settimeout(0.05)
+    data = b""
+    deadline = time.monotonic() + timeout
+    while not predicate(data) and time.monotonic() < deadline:
+        try:
+            chunk = sock.recv(65536)
+        except socket.timeout:
+            continue
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def event_ids(data):
+    return [int(i) for i in re.findall(rb"^id: (\d+)$", data, re.M)]
+
+
+def subscribe(hub, last_event_id=None):
+    server_side, client = socket.socketpair()
+    hub.subscribe(server_side, last_event_id)
+    return client
+
+
+def test_replay_after_reconnect():
+    hub = NotificationHub(replay_size=4).start()
+    try:
+        for n in range(6):
+            hub.publish("transaction.posted", {"n": n})
+        client = subscribe(hub, last_event_id=3)
+        data = read_until(client, lambda d: b"id: 6\n" in d)
+        assert data.startswith(b"retry: 3000\n\n") and event_ids(data) == [4, 5, 6]
+
+        # Events 2 and 3 fell out of the window: the client is told to resync, then gets what is left
+        stale = subscribe(hub, last_event_id=1)
+        data = read_until(stale, lambda d: b"id: 6\n" in d)
+        assert b"event: stream.reset" in data and b'"oldest_event_id":3' in data
+        assert event_ids(data) == [1, 3, 4, 5, 6]
+
+        live = hub.publish("fraud.alert", {"score": 0.9})
+        assert event_ids(read_until(client, lambda d: b"fraud.alert" in d)) == [live]
+    finally:
+        hub.stop()
+
+
+def test_slow_subscriber_is_disconnected():
+    hub = NotificationHub(max_pending_bytes=8 * 1024).start()
+    try:
+        slow = subscribe(hub)
+        slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        fast = subscribe(hub)
+        time.sleep(0.05)
+        received = b""
+        for n in range(400):
+            hub.publish("balance.changed", {"n": n, "padding": "x" * 1000})
+            if n % 20 == 0:
+                received += read_until(fast, lambda d: False, timeout=0.01)
+        received += read_until(fast, lambda d: b"id: 400\n" in d)
+        assert event_ids(received) == list(range(1, 401))
+        assert hub.snapshot()["slow_consumer_disconnects"] == 1 and hub.subscriber_count == 1
+        # The slow client gets what was already sent, then the end of the stream
+        assert len(event_ids(read_until(slow, lambda d: False))) < 400 and slow.recv(1) == b""
+    finally:
+        hub.stop()
+
+
+def test_heartbeats_keep_idle_streams_alive():
+    hub = NotificationHub(heartbeat_interval=0.05).start()
+    try:
+        client = subscribe(hub)
+        data = read_until(client, lambda d: d.count(HEARTBEAT_FRAME) >= 2)
+        assert data.count(HEARTBEAT_FRAME) >= 2 and hub.snapshot()["heartbeats"] >= 2
+        client.close()
+        # A closed client is noticed and dropped
+        deadline = time.monotonic() + 2
+        while hub.subscriber_count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert hub.subscriber_count == 0 and hub.snapshot()["client_disconnects"] == 1
+    finally:
+        hub.stop()
+
+
+def test_events_before_start_are_only_kept_for_replay():
+    hub = NotificationHub(replay_size=16)
+    for n in range(1000):
+        hub.publish("transaction.posted", {"n": n})
+    assert len(hub._ops) == 0 and hub.snapshot()["replay_buffered"] == 16
+    try:
+        # The first subscriber starts the hub and can still catch up on the recent events
+        client = subscribe(hub, last_event_id=990)
+        assert event_ids(read_until(client, lambda d: b"id: 1000\n" in d)) == list(range(991, 1001))
+    finally:
+        hub.stop()
+
+
+def test_concurrent_publishers_keep_id_order():
+    hub = NotificationHub(replay_size=4096, max_pending_bytes=1024 * 1024).start()
+    try:
+        client = subscribe(hub)
+        barrier = threading.Barrier(8)
+
+        def publisher():
+            barrier.wait()
+            for n in range(250):
+                hub.publish("transaction.posted", {"n": n})
+
+        threads = [threading.Thread(target=publisher) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert event_ids(read_until(client, lambda d: b"id: 2000\n" in d)) == list(range(1, 2001))
+        assert [event_id for event_id, _ in hub._replay] == list(range(1, 2001))
+    finally:
+        hub.stop()
+
+
+def test_large_replay_is_not_a_slow_consumer():
+    hub = NotificationHub(max_pending_bytes=8 * 1024).start()
+    try:
+        for n in range(300):
+            hub.publish("balance.changed", {"n": n, "padding": "x" * 1000})
+        # 300 KB of replay against an 8 KB backlog limit: it is metered out as the client reads
+        client = subscribe(hub, last_event_id=0)
+        client.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        time.sleep(0.05)
+        live = hub.publish("fraud.alert", {"score": 0.9})
+        data = read_until(client, lambda d: f"id: {live}\n".encode() in d)
+        assert event_ids(data) == list(range(1, live + 1))
+        assert hub.snapshot()["slow_consumer_disconnects"] == 0 and hub.subscriber_count == 1
+    finally:
+        hub.stop()
+
+
+def test_notification_stream_endpoint():
+    with LocalServer() as server:
+        hub = server.mb.notification_hub
+        first = hub.publish("balance.changed", {"account_id": 1})
+        client = socket.create_connection(("localhost", server.port), timeout=5)
+        try:
+            client.sendall(f"GET /api/v1/notifications/stream HTTP/1.1\r\nHost: localhost\r\n"
+                           f"Last-Event-ID: {first - 1}\r\n\r\n".encode())
+            data = read_until(client, lambda d: f"id: {first}\n".encode() in d)
+            assert data.startswith(b"HTTP/1.0 200") and b"Content-type: text/event-stream" in data
+            assert b'"account_id":1' in data
+        finally:
+            client.close()
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Notification Hub")
+    print("=" * 35)
+    for test in (test_replay_after_reconnect, test_slow_subscriber_is_disconnected,
+                 test_heartbeats_keep_idle_streams_alive, test_events_before_start_are_only_kept_for_replay,
+                 test_concurrent_publishers_keep_id_order, test_large_replay_is_not_a_slow_consumer,
+                 test_notification_stream_endpoint):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Password hasher tests
+Covers hash/verify round trips, rehash detection, shedding load once the
+queue is full, the process pool, calibration and the login/register endpoints
+"""
+
+import threading
+
+import pytest
+
+from local_server import LocalServer
+from password_hasher import HasherBusyError, PasswordHasher, calibrate, parse_hash
+
+
+def cheap_hasher(**kwargs):
+    kwargs.setdefault("executor", "thread")
+    return PasswordHasher(workers=2, algorithm="pbkdf2_sha256", cost=1000, **kwargs)
+
+
+def test_hash_and_verify():
+    hasher = cheap_hasher()
+    try:
+        encoded = hasher.hash("correct horse")
+        assert parse_hash(encoded) == ("pbkdf2_sha256", 1000) and encoded != hasher.hash("correct horse")
+        assert hasher.verify("correct horse", encoded) and not hasher.verify("wrong horse", encoded)
+        # Malformed hashes and unknown users fail verification instead of raising
+        for bad in ("", "pbkdf2_sha256$x$a$b", "md5$1$AAAA$AAAA"):
+            assert hasher.verify("correct horse", bad) is False
+        assert hasher.verify("correct horse", None) is False
+        assert not hasher.needs_rehash(encoded)
+        hasher.cost = 2000
+        assert hasher.needs_rehash(encoded) and hasher.verify("correct horse", encoded)
+        stats = hasher.stats()
+        assert stats["hashed"] == 2 and stats["verified"] == 7 and stats["errors"] == 0
+        assert stats["latency"]["count"] == 9
+    finally:
+        hasher.shutdown()
+    with pytest.raises(ValueError):
+        PasswordHasher(algorithm="md5")
+
+
+def test_full_queue_is_rejected():
+    hasher = PasswordHasher(workers=1, max_queue=1, algorithm="pbkdf2_sha256", cost=1000, executor="thread")
+    release = threading.Event()
+    try:
+        # One job running and one queued fill every slot
+        blockers = [hasher._submit("hashed", release.wait) for _ in range(2)]
+        with pytest.raises(HasherBusyError):
+            hasher.hash("shed me")
+        assert hasher.stats()["rejected"] == 1
+        release.set()
+        for blocker in blockers:
+            blocker.result(5)
+        # Slots are handed back once the work finishes
+        assert hasher.verify("pw", hasher.hash("pw", timeout=5), timeout=5)
+    finally:
+        release.set()
+        hasher.shutdown()
+
+
+def test_process_pool():
+    hasher = cheap_hasher(executor="process").start()
+    try:
+        encoded = hasher.hash("in another process", timeout=30)
+        assert hasher.verify("in another process", encoded, timeout=30)
+        assert hasher.stats()["executor"] == "process" and hasher.stats()["hashed"] == 1
+    finally:
+        hasher.shutdown()
+
+
+def test_calibration():
+    assert 1000 <= calibrate(0.001, "pbkdf2_sha256", max_cost=50000) <= 50000
+    cost = calibrate(10, "scrypt", max_cost=2 ** 11)
+    assert cost == 2 ** 11
+    with pytest.raises(ValueError):
+        calibrate(0.01, "md5")
+
+
+def test_login_and_register_endpoints():
+    hasher = cheap_hasher()
+    try:
+        with LocalServer(password_hasher=hasher) as server:
+            body = {"email": "hasher.user@example.com", "password": "s3cret", "firstName": "Hash", "lastName": "Er"}
+            assert server.call("POST", "/api/v1/auth/register", body)[0] == 200
+            assert server.mb.user_store.get_by_email(body["email"]).password_hash.startswith("pbkdf2_sha256$")
+            status, login = server.call("POST", "/api/v1/auth/login", {"email": body["email"], "password": "s3cret"})
+            assert status == 200 and login["user"]["email"] == body["email"]
+            for email, password in ((body["email"], "wrong"), ("nobody@example.com", "s3cret")):
+                status, rejected = server.call("POST", "/api/v1/auth/login", {"email": email, "password": password})
+                assert status == 401 and rejected["code"] == "INVALID_CREDENTIALS"
+
+            # With every slot taken, logins are shed with a 503 rather than queued
+            release = threading.Event()
+            blockers = [hasher._submit("hashed", release.wait) for _ in range(hasher.workers + hasher.max_queue)]
+            try:
+                status, busy = server.call("POST", "/api/v1/auth/login", {"email": body["email"], "password": "s3cret"})
+                assert status == 503 and busy == server.mb.AUTH_BUSY_RESPONSE
+            finally:
+                release.set()
+                for blocker in blockers:
+                    blocker.result(5)
+    finally:
+        hasher.shutdown()
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Password Hasher")
+    print("=" * 35)
+    for test in (test_hash_and_verify, test_full_queue_is_rejected, test_process_pool, test_calibration,
+                 test_login_and_register_endpoints):
+        test()
+        print(f"✅ {test.__name__}")
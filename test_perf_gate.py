@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Performance regression gate tests
+Covers the Welch interval, regression/improvement/noise verdicts and the
+baseline store round trip and removal of the --against reference baselines
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+import perf_gate
+from perf_gate import (SCENARIOS, compare_metric, compare_suite, failed, load_baseline, save_baseline,
+                       scenario_key, welch_interval)
+
+
+def test_welch_interval():
+    diff, low, high = welch_interval([10.0, 10.2, 9.8, 10.1, 9.9], [20.0, 20.3, 19.7, 20.1, 19.9])
+    assert abs(diff - 10.0) < 1e-9 and 9.5 < low < diff < high < 10.5
+    assert welch_interval([1.0, 1.0], [1.0, 1.0]) == (0.0, 0.0, 0.0)
+
+
+def test_verdicts():
+    baseline = [1.00, 1.05, 0.95, 1.02, 0.98]
+    assert compare_metric(baseline, [3.0, 3.1, 2.9, 3.05, 2.95], False, 0.15)["verdict"] == "regressed"
+    assert compare_metric(baseline, [0.5, 0.52, 0.48, 0.51, 0.49], False, 0.15)["verdict"] == "improved"
+    # 20% worse on average but too noisy to be significant
+    assert compare_metric(baseline, [0.6, 1.8, 0.9, 1.6, 1.1], False, 0.15)["verdict"] == "unchanged"
+    # Significant but under the threshold
+    assert compare_metric(baseline, [1.08, 1.1, 1.06, 1.09, 1.07], False, 0.15)["verdict"] == "unchanged"
+    # Throughput: lower is worse
+    assert compare_metric([1000, 1010, 990], [300, 310, 290], True, 0.15)["verdict"] == "regressed"
+
+
+def test_baseline_round_trip_and_gate():
+    scenario = next(s for s in SCENARIOS if scenario_key(s) == "accounts_transactions/single_client")
+    runs = [{"p50_ms": 0.5 + i * 0.01, "p95_ms": 0.7, "rps": 2000 - i * 10} for i in range(5)]
+    with tempfile.TemporaryDirectory() as tmp:
+        save_baseline(scenario, runs, 300, tmp, env={"host": "test"})
+        assert load_baseline(scenario, tmp)["runs"][0] == runs[0]
+        assert load_baseline(SCENARIOS[0], tmp) is None
+
+        slower = {scenario_key(scenario): [dict(run, p50_ms=run["p50_ms"] * 3, rps=run["rps"] / 3) for run in runs]}
+        rows = compare_suite([scenario], slower, 0.15, tmp)
+        assert sorted(metric for _, metric in failed(rows)) == ["p50_ms", "rps"]
+
+        same = {scenario_key(scenario): runs}
+        assert failed(compare_suite([scenario], same, 0.15, tmp)) == []
+
+
+
+def test_against_reference_dir_is_always_removed(monkeypatch):
+    directories = []
+
+    def record_reference(ref, scenarios, runs, requests_per_client, directory):
+        directories.append(directory)
+        if ref == "broken":
+            raise subprocess.CalledProcessError(128, "git worktree add")
+
+    def crash(args, scenarios):
+        assert args.baseline_dir == directories[-1] and os.path.isdir(args.baseline_dir)
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(perf_gate, "record_reference", record_reference)
+    monkeypatch.setattr(perf_gate, "run_gate", crash)
+    monkeypatch.setattr(sys, "argv", ["perf_gate.py", "compare", "--against", "broken", "--runs", "2"])
+    assert perf_gate.main() == 2
+    monkeypatch.setattr(sys, "argv", ["perf_gate.py", "compare", "--against", "HEAD~1", "--runs", "2"])
+    with pytest.raises(KeyboardInterrupt):
+        perf_gate.main()
+    assert len(directories) == 2 and not any(os.path.exists(directory) for directory in directories)
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Performance Regression Gate")
+    print("=" * 40)
+    for test in (test_welch_interval, test_verdicts, test_baseline_round_trip_and_gate):
+        test()
+        print(f"✅ {test.__name__}")
@@ -5,6 +5,7 @@
 
 import requests
 import json
+import time
 
 def test_registration():
     base_url = "http://localhost:8080"
@@ -12,11 +13,12 @@ def test_registration():
     print("🧪 Testing Registration Endpoint")
     print("=" * 35)
     
-    # Test registration
+    # Test registration (emails are unique per backend, so use a fresh one on every run)
+    email = f"john.doe+{int(time.time() * 1000)}@example.com"
     registration_data = {
         "firstName": "John",
         "lastName": "Doe", 
-        "email": "john.doe@example.com",
+        "email": email,
         "password": "SecurePassword123!"
     }
     
@@ -40,7 +42,7 @@ def test_registration():
     
     # Test login
     login_data = {
-        "email": "john.doe@example.com",
+        "email": email,
         "password": "SecurePassword123!"
     }
     
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Saga orchestrator tests
+Covers parallel steps, compensation after declines and timeouts, late
+blocking results, crash recovery from the state log and fraud limits on
+payments in other currencies
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+from currency import FxRateTable
+from fault_injection import FaultPlan
+from ledger import Ledger
+from payments import PAYMENT_SAGA, PaymentFlow
+from saga import COMPENSATED, COMPLETED, SagaDefinition, SagaLog, SagaOrchestrator, Step
+
+
+class SlowDownstream:
+    """FaultInjector stand-in: fixed latency for every downstream call"""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def plan(self, method, path):
+        return FaultPlan(path, self.delay, None, None, None)
+
+
+def sleeper(seconds, result=True):
+    async def step(state):
+        await asyncio.sleep(seconds)
+        return result
+    return step
+
+
+def test_independent_steps_run_concurrently():
+    orchestrator = SagaOrchestrator()
+    orchestrator.register(SagaDefinition("fan-out", [
+        Step("a", sleeper(0)),
+        Step("b", sleeper(0.15), after=("a",)),
+        Step("c", sleeper(0.15), after=("a",)),
+        Step("d", sleeper(0), after=("b", "c")),
+    ]))
+    try:
+        started = time.perf_counter()
+        outcome = orchestrator.run("fan-out", {})
+        elapsed = time.perf_counter() - started
+    finally:
+        orchestrator.stop()
+    assert outcome["status"] == COMPLETED and list(outcome["results"])[-1] == "d"
+    assert elapsed < 0.25, elapsed
+
+
+def test_payment_decline_releases_hold():
+    ledger = Ledger(seed=False)
+    ledger.open_account({"id": 7, "balance": 30000})
+    ledger.open_account({"id": 8, "balance": 100})
+    orchestrator = SagaOrchestrator()
+    orchestrator.register(PaymentFlow(ledger, screen=lambda name: name == "Blocked Ltd").definition())
+    try:
+        declined = orchestrator.run(PAYMENT_SAGA, {"account_id": 7, "amount": -25000})
+        assert declined["status"] == COMPENSATED and declined["code"] == "FRAUD_DECLINED"
+        assert declined["compensated"] == ["reserve_funds"]
+        hit = orchestrator.run(PAYMENT_SAGA, {"account_id": 7, "amount": -10, "counterparty": "Blocked Ltd"})
+        assert hit["code"] == "COMPLIANCE_HIT"
+        for amount in ("NaN", "-inf", "1e400", "0.001", None, [5]):
+            invalid = orchestrator.run(PAYMENT_SAGA, {"account_id": 7, "amount": amount})
+            assert invalid["code"] == "VALIDATION_ERROR" and invalid["failed_step"] == "validate", amount
+        short = orchestrator.run(PAYMENT_SAGA, {"account_id": 8, "amount": -150})
+        assert short["code"] == "INSUFFICIENT_FUNDS" and short["compensated"] == []
+        # Every hold was released, so the whole balance can still be spent
+        paid = orchestrator.run(PAYMENT_SAGA, {"account_id": 7, "amount": -4000})
+        assert paid["status"] == COMPLETED and paid["results"]["post"]["amount"] == -4000
+        assert ledger.balance(7) == 26000 and ledger.in_doubt() == []
+    finally:
+        orchestrator.stop()
+
+
+def test_timeouts_compensate_in_reverse_order():
+    undone = []
+
+    def undo(name):
+        async def compensate(state, result):
+            undone.append(name)
+        return compensate
+
+    def undo_write(state, result):
+        undone.append("write")
+
+    def slow_write(state):
+        time.sleep(0.2)
+        return "written"
+
+    orchestrator = SagaOrchestrator()
+    orchestrator.register(SagaDefinition("slow", [
+        Step("first", sleeper(0), undo("first")),
+        Step("second", sleeper(0), undo("second"), after=("first",)),
+        Step("stuck", sleeper(5), undo("stuck"), after=("second",), timeout=0.05),
+    ]))
+    orchestrator.register(SagaDefinition("late", [
+        Step("write", slow_write, undo_write, timeout=0.05),
+    ]))
+    try:
+        outcome = orchestrator.run("slow", {})
+        assert outcome["code"] == "STEP_TIMEOUT" and outcome["failed_step"] == "stuck"
+        assert undone == ["second", "first"]
+        # The blocking call finished after its timeout; its result must still be undone
+        outcome = orchestrator.run("late", {})
+        assert outcome["status"] == COMPENSATED and undone[-1] == "write"
+        assert orchestrator.stats()["counters"]["timeouts"] == 2
+    finally:
+        orchestrator.stop()
+
+
+def test_critical_path_latency():
+    ledger = Ledger(seed=False)
+    ledger.open_account({"id": 1, "balance": 100})
+    orchestrator = SagaOrchestrator()
+    orchestrator.register(PaymentFlow(ledger, downstream=SlowDownstream(0.1)).definition())
+    try:
+        started = time.perf_counter()
+        assert orchestrator.run(PAYMENT_SAGA, {"account_id": 1, "amount": -5})["status"] == COMPLETED
+        elapsed = time.perf_counter() - started
+        saga = orchestrator.stats()["sagas"][PAYMENT_SAGA]
+    finally:
+        orchestrator.stop()
+    # fraud ∥ compliance, then notify: two downstream round trips on the critical path out of three
+    assert 0.2 <= elapsed < 0.28, elapsed
+    assert saga["sum_of_steps_ms"] > 290 and saga["critical_path_ms"] < 230
+
+
+def test_crash_recovery_from_log():
+    ledger = Ledger(seed=False)
+    ledger.open_account({"id": 1, "balance": 100})
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sagas.jsonl")
+        # What a process killed mid-flight leaves behind: one saga holding funds before the pivot,
+        # one posted but not yet notified, one finished
+        log = SagaLog(path)
+        for saga_id, amount in (("held", -60), ("posted", -30), ("done", -1)):
+            log.record(saga_id, "started", definition=PAYMENT_SAGA, payload={"account_id": 1, "amount": amount},
+                       t=time.time())
+            log.record(saga_id, "step_done", step="validate", result={"balance": 100})
+            log.record(saga_id, "step_done", step="reserve_funds",
+                       result={"hold_id": ledger.hold(1, amount, hold_id=saga_id)})
+        for saga_id in ("posted", "done"):
+            log.record(saga_id, "step_done", step="post", result=ledger.capture(1, saga_id))
+        log.record("done", "status", status=COMPLETED)
+        log.close()
+        assert ledger.balance(1) == 69 and ledger.in_doubt() == ["held"]
+
+        restarted = SagaOrchestrator(SagaLog(path))
+        restarted.register(PaymentFlow(ledger).definition())
+        restarted.start()
+        try:
+            counters = restarted.stats()["counters"]
+        finally:
+            restarted.stop()
+        # The held payment is compensated, the posted one rolls forward without posting twice
+        assert counters["recovered"] == 2 and counters[COMPLETED] == 1 and counters[COMPENSATED] == 1
+        assert ledger.in_doubt() == [] and ledger.balance(1) == 69
+        assert SagaLog(path).replay() == []
+
+
+def test_fraud_limits_apply_in_base_currency():
+    ledger = Ledger(seed=False, fx=FxRateTable({"JPY": "150", "KWD": "0.3"}))
+    ledger.open_account({"id": 7, "balance": 10000000, "currency": "JPY"})
+    ledger.open_account({"id": 8, "balance": 10000, "currency": "KWD"})
+    orchestrator = SagaOrchestrator()
+    orchestrator.register(PaymentFlow(ledger, fx=ledger.fx).definition())
+    try:
+        # 1,000,000 yen is 6,667 USD: flagged but under four times the limit
+        paid = orchestrator.run(PAYMENT_SAGA, {"account_id": 7, "amount": -1000000})
+        assert paid["status"] == COMPLETED and paid["results"]["fraud_check"]["reasons"] == ["large_debit"]
+        small = orchestrator.run(PAYMENT_SAGA, {"account_id": 7, "amount": -500000})
+        assert small["results"]["fraud_check"]["reasons"] == []
+        # 6,000 dinars is 20,000 USD
+        declined = orchestrator.run(PAYMENT_SAGA, {"account_id": 8, "amount": -6000})
+        assert declined["code"] == "FRAUD_DECLINED" and ledger.balance(8) == 10000
+    finally:
+        orchestrator.stop()
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Saga Orchestrator")
+    print("=" * 35)
+    for test in (test_independent_steps_run_concurrently, test_payment_decline_releases_hold,
+                 test_timeouts_compensate_in_reverse_order, test_critical_path_latency,
+                 test_crash_recovery_from_log, test_fraud_limits_apply_in_base_currency):
+        test()
+        print(f"✅ {test.__name__}")
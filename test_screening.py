@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Sanctions screening tests
+Covers name normalization, exact matches inside free text, fuzzy matches for
+misspelt, transliterated and reordered names, and the compliance endpoints
+"""
+
+import tempfile
+from pathlib import Path
+
+from local_server import LocalServer
+from screening import DEFAULT_LISTS, Screener, WatchlistIndex, edit_distance, load_watchlist, phonetic_key, tokenize
+
+ENTRIES = [
+    {"id": "A1", "name": "Orion Maritime Shipping LLC", "list": "TEST", "aliases": ["Orion Shipping"]},
+    {"id": "A2", "name": "Hassan Abdelrahim Qaderi", "list": "TEST", "aliases": []},
+    {"id": "A3", "name": "Dmitri Pavlovich Sokolenko", "list": "TEST", "aliases": []},
+]
+
+
+def test_normalization_and_keys():
+    assert tokenize("  Ørion  MARITIME-Shipping, L.L.C. ") == ["ørion", "maritime", "shipping", "l", "l", "c"]
+    assert tokenize("Acme Trading Ltd") == ["acme", "trading"]
+    assert tokenize("The Company") == ["the", "company"]
+    assert tokenize("José Müller") == ["jose", "muller"]
+    assert phonetic_key("qaddafi") == phonetic_key("gaddafi") == phonetic_key("kadhafi")
+    assert phonetic_key("usama") == phonetic_key("osama") != phonetic_key("hassan")
+    assert edit_distance("sokolenko", "sokolenco") == 1 and edit_distance("kitten", "sitting") == 3
+
+
+def test_exact_matches_inside_text():
+    index = WatchlistIndex(ENTRIES)
+    hits = index.screen("Wire to ORION MARITIME SHIPPING L.L.C ref 881 / orion shipping")
+    assert [(h["entry_id"], h["match_type"], h["score"]) for h in hits] == [("A1", "exact", 1.0)]
+    # Partial names are not exact hits, and unrelated text never matches
+    assert index.exact(tokenize("Orion Maritime")) == set()
+    assert index.screen("Quarterly rent for Oriel Marine Ltd") == []
+
+
+def test_fuzzy_matches_typos_and_reordering():
+    index = WatchlistIndex(ENTRIES)
+    for query in ("Hasan Abdelrahim Qadery", "Qaderi Hassan Abdelrahim", "Dmitry Pavlovich Sokolenco"):
+        hits = index.screen(query)
+        assert hits and hits[0]["match_type"] == "fuzzy" and hits[0]["score"] >= 0.8, query
+    assert index.screen("Qaderi Hassan Abdelrahim")[0]["score"] == 1.0
+    assert index.screen("Hassan Qaderi")[0]["entry_id"] == "A2"
+    assert index.screen("Hassan Qaderi", threshold=0.95) == []
+    assert index.screen("Hassan Smith") == [] and index.screen("") == []
+
+
+def test_load_watchlist_and_synthetic_scale():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "ofac.csv"
+        path.write_text("id,name,aliases\nX1,Kestrel Dynamics,Kestrel Dyn; KD Export\n,Nameless Row,\n,,\n")
+        entries = load_watchlist(path)
+    assert entries[0] == {"id": "X1", "name": "Kestrel Dynamics", "list": "ofac",
+                          "aliases": ["Kestrel Dyn", "KD Export"]}
+    assert entries[1]["id"] == "ofac-2" and len(entries) == 2
+
+    screener = Screener()
+    build = screener.load_files([DEFAULT_LISTS], synthetic=20000, measure_memory=True)
+    assert build["entries"] > 20000 and build["memory_mb"] > 0 and len(build["sources"]) == 2
+    results = screener.screen_batch(["Payment for Blue Lantern Trading FZE", "Farid Tavakoli", "Jane Doe"])
+    assert [r["match"] for r in results] == [True, True, False]
+    assert screener.stats()["screened"] == 3 and screener.stats()["matched"] == 2
+
+
+def test_compliance_endpoints_and_payment_screening():
+    with LocalServer() as server:
+        status, single = server.call("POST", "/api/v1/compliance/screen", {"name": "Orion Maritime Shipping"})
+        assert status == 200 and single["match"] and single["hits"][0]["entry_id"] == "QB-0002"
+        status, batch = server.call("POST", "/api/v1/compliance/screen/batch",
+                                    {"names": ["Hasan Kaderi", "Quantum Bakery", "Redstone Aviation Services"]})
+        assert status == 200 and [r["match"] for r in batch["results"]] == [True, False, True]
+        assert batch["screened"] == 3 and batch["matches"] == 2
+        assert server.call("POST", "/api/v1/compliance/screen/batch", {"names": "Hasan"})[0] == 400
+        assert server.call("POST", "/api/v1/compliance/screen", {"name": "x", "threshold": 2})[0] == 400
+        status, payment = server.call("POST", "/api/v1/transactions", {"account_id": 1, "amount": -10,
+                                                                       "counterparty": "Northwind Petroleum Holdings"})
+        assert status == 400 and payment["code"] == "COMPLIANCE_HIT"
+        stats = server.call("GET", "/api/v1/compliance/screening")[1]
+        assert stats["index"]["entries"] >= 20 and stats["screened"] >= 5
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Sanctions Screening")
+    print("=" * 35)
+    for test in (test_normalization_and_keys, test_exact_matches_inside_text, test_fuzzy_matches_typos_and_reordering,
+                 test_load_watchlist_and_synthetic_scale, test_compliance_endpoints_and_payment_screening):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Sharded ledger tests
+Covers slot routing, cross-shard two-phase commit (all-or-nothing, total
+balance conserved), in-doubt recovery, unacknowledged commits and
+rebalancing under load
+"""
+
+import random
+import threading
+
+from ledger import LedgerError
+from sharded_ledger import NUM_SLOTS, ShardedLedger, TransferInDoubtError, even_slot_map, plan_rebalance, slot_for
+
+
+def open_accounts(ledger, count, balance=100):
+    for account_id in range(1, count + 1):
+        ledger.open_account({"id": account_id, "balance": balance})
+
+
+def total(ledger):
+    return round(sum(account["balance"] for account in ledger.accounts()), 2)
+
+
+def test_plan_rebalance_moves_few_slots():
+    old = even_slot_map(4)
+    new = plan_rebalance(old, 5)
+    assert sorted(new.count(shard) for shard in range(5)) == [51, 51, 51, 51, 52]
+    # Growing 4 -> 5 only needs to hand the new shard its share
+    assert sum(a != b for a, b in zip(old, new)) == new.count(4)
+    assert set(plan_rebalance(new, 2)) == {0, 1} and len(plan_rebalance(new, 2)) == NUM_SLOTS
+
+
+def test_routing_and_seed_data():
+    ledger = ShardedLedger(shards=3).start()
+    try:
+        assert [a["id"] for a in ledger.accounts()] == [1, 2]
+        assert ledger.balance(1) == 15750.50 and len(ledger.transactions(1)) == 4
+        stats = ledger.stats()
+        assert [s["slots"] for s in stats["per_shard"]] == [86, 85, 85]
+        owner = stats["per_shard"][even_slot_map(3)[slot_for(1)]]
+        assert owner["accounts"] >= 1
+    finally:
+        ledger.close()
+
+
+def test_cross_shard_transfers_are_atomic():
+    ledger = ShardedLedger(shards=4, seed=False).start()
+    try:
+        open_accounts(ledger, 40)
+        source, target = next((a, b) for a in range(1, 41) for b in range(1, 41)
+                              if ledger.shard_for(a) != ledger.shard_for(b))
+        result = ledger.transfer(source, target, 60)
+        assert result["debit"]["amount"] == -60 and result["credit"]["transfer_id"] == result["transfer_id"]
+        assert (ledger.balance(source), ledger.balance(target)) == (40, 160)
+        try:
+            ledger.transfer(source, target, 41)
+            assert False, "overdraft accepted"
+        except LedgerError as e:
+            assert "Insufficient funds" in str(e)
+        # The rejected transfer leaves no trace on either side
+        assert (ledger.balance(source), ledger.balance(target)) == (40, 160)
+        assert isinstance(ledger.transfer_batch([(source, 999, 1, "")])[0], LedgerError)
+        assert ledger.balance(source) == 40
+
+        rng = random.Random(7)
+        items = [(rng.randint(1, 40), rng.randint(1, 40), rng.randint(1, 80), "") for _ in range(2000)]
+        results = ledger.transfer_batch(items)
+        assert any(isinstance(r, LedgerError) for r in results) and any(isinstance(r, dict) for r in results)
+        assert total(ledger) == 4000
+        assert min(account["balance"] for account in ledger.accounts()) >= 0
+        assert ledger.recover() == {"commit": 0, "abort": 0}
+    finally:
+        ledger.close()
+
+
+def test_recover_aborts_unlogged_prepares():
+    ledger = ShardedLedger(shards=2, seed=False).start()
+    try:
+        open_accounts(ledger, 4)
+        shard = ledger.shard_for(1)
+        # Prepared on one shard but the coordinator never logged a decision (crashed mid-transfer)
+        ledger._clients[shard].call("prepare", "lost-xid", [(1, -5000, "", "transfer")])
+        assert isinstance(ledger.transfer_batch([(1, 2, 60, "")])[0], LedgerError)
+        assert ledger.recover() == {"commit": 0, "abort": 1}
+        assert ledger.transfer(1, 2, 60)["transfer_id"]
+    finally:
+        ledger.close()
+
+
+def test_unacknowledged_commit_is_in_doubt():
+    ledger = ShardedLedger(shards=2, seed=False).start()
+    try:
+        open_accounts(ledger, 10)
+        source, target = next((a, b) for a in range(1, 11) for b in range(1, 11)
+                              if ledger.shard_for(a) != ledger.shard_for(b))
+        lost_shard = ledger.shard_for(target)
+        send_batches = ledger._send_batches
+
+        def lose_commit(batches):
+            # The target shard never receives phase two, as if its pipe broke after the vote
+            if any(op == "commit" for ops in batches.values() for op, _ in ops):
+                lost = batches.pop(lost_shard)
+                replies = send_batches(batches)
+                replies[lost_shard] = [("error", f"Ledger shard {lost_shard} exited")] * len(lost)
+                return replies
+            return send_batches(batches)
+
+        ledger._send_batches = lose_commit
+        result = ledger.transfer_batch([(source, target, 30, "")])[0]
+        del ledger._send_batches
+        assert isinstance(result, TransferInDoubtError) and result.transfer_id
+        counters = ledger.stats()["counters"]
+        assert counters["in_doubt"] == 1 and counters["cross_shard_transfers"] == 0 and counters["rejected"] == 0
+        assert (ledger.balance(source), ledger.balance(target)) == (70, 100)
+        # The logged commit decision finishes the transfer
+        assert ledger.recover() == {"commit": 1, "abort": 0}
+        assert (ledger.balance(source), ledger.balance(target)) == (70, 130)
+    finally:
+        ledger.close()
+
+
+def test_rebalance_under_load_keeps_balances():
+    ledger = ShardedLedger(shards=2, seed=False).start()
+    try:
+        open_accounts(ledger, 200)
+        stop = threading.Event()
+        errors = []
+
+        def load():
+            rng = random.Random(3)
+            try:
+                while not stop.is_set():
+                    items = [(rng.randint(1, 200), rng.randint(1, 200), rng.randint(1, 30), "") for _ in range(50)]
+                    errors.extend(str(r) for r in ledger.transfer_batch(items)
+                                  if isinstance(r, LedgerError) and "moved" in str(r))
+            except Exception as e:
+                # A shard removed while a batch was being routed must not kill the caller
+                errors.append(repr(e))
+
+        thread = threading.Thread(target=load)
+        thread.start()
+        try:
+            grown = ledger.rebalance(5)
+            shrunk = ledger.rebalance(3)
+        finally:
+            stop.set()
+            thread.join()
+        assert grown["slots_moved"] == 153 and shrunk["to_shards"] == 3
+        assert errors == []
+        assert total(ledger) == 20000
+        assert sum(s["accounts"] for s in ledger.stats()["per_shard"]) == 200
+    finally:
+        ledger.close()
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Sharded Ledger")
+    print("=" * 35)
+    for test in (test_plan_rebalance_moves_few_slots, test_routing_and_seed_data,
+                 test_cross_shard_transfers_are_atomic, test_recover_aborts_unlogged_prepares,
+                 test_unacknowledged_commit_is_in_doubt, test_rebalance_under_load_keeps_balances):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Smoke runner tests
+Covers result order and failures in serial and parallel runs, the timing
+report, the command line flags and the pooled session against the mock backend
+"""
+
+import argparse
+import threading
+import time
+
+from local_server import LocalServer
+from smoke_runner import add_arguments, pooled_session, print_timings, run_checks
+
+
+def make_check(name, delay, result=True):
+    def check():
+        time.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    check.__name__ = name
+    return check
+
+
+def test_results_keep_the_given_order():
+    checks = [make_check("slow", 0.2), make_check("broken", 0, RuntimeError("boom")),
+              make_check("fast", 0.01, None), make_check("failed", 0, False)]
+    for parallel in (False, True):
+        timings, wall = run_checks(checks, parallel=parallel, workers=4)
+        assert [(name, result) for name, result, _ in timings] == \
+            [("slow", True), ("broken", False), ("fast", None), ("failed", False)]
+        assert timings[0][2] >= 0.2 and wall >= 0.2
+
+
+def test_parallel_checks_overlap():
+    threads = set()
+
+    def check():
+        threads.add(threading.current_thread().name)
+        time.sleep(0.1)
+        return True
+
+    checks = [check] * 8
+    _, serial_wall = run_checks(checks)
+    assert serial_wall >= 0.8 and threads == {threading.current_thread().name}
+    threads.clear()
+    timings, wall = run_checks(checks, parallel=True, workers=8)
+    assert wall < 0.5 and sum(seconds for _, _, seconds in timings) >= 0.8
+    assert len(threads) == 8 and all(name.startswith("smoke") for name in threads)
+
+
+def test_timing_report(capsys):
+    print_timings([("quick", True, 0.001), ("slow", False, 0.5), ("skipped", None, 0.1)], 0.3)
+    lines = capsys.readouterr().out.splitlines()
+    rows = [line for line in lines if line.strip().startswith(("✅", "❌"))]
+    assert [row.split()[1] for row in rows] == ["slow", "skipped", "quick"]
+    assert rows[0].strip().startswith("❌") and rows[1].strip().startswith("✅")
+    assert "Sum of checks: 601.0 ms, wall clock: 300.0 ms (2.0x)" in lines[-1]
+
+
+def test_arguments():
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    args = parser.parse_args([])
+    assert args.parallel is False and args.workers == 8
+    args = parser.parse_args(["--parallel", "--workers", "3"])
+    assert args.parallel is True and args.workers == 3
+
+
+def test_pooled_session_is_shared_by_threads():
+    with LocalServer() as server:
+        session = pooled_session(pool_size=4)
+        url = f"http://localhost:{server.port}/api/v1/health"
+
+        def health():
+            return session.get(url, timeout=5).status_code == 200
+
+        try:
+            timings, _ = run_checks([health] * 20, parallel=True, workers=4)
+            assert all(result for _, result, _ in timings)
+            # One adapter (and so one pool of pool_size connections) serves both schemes
+            adapter = session.get_adapter(url)
+            assert adapter is session.get_adapter("https://localhost/") and adapter._pool_maxsize == 4
+        finally:
+            session.close()
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Smoke Runner")
+    print("=" * 35)
+    for test in (test_results_keep_the_given_order, test_parallel_checks_overlap, test_arguments,
+                 test_pooled_session_is_shared_by_threads):
+        test()
+        print(f"✅ {test.__name__}")
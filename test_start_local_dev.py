@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Local development launcher tests
+Covers restart backoff and crash-loop detection, readiness polling, the
+service list built from the command line, stopping a child's process group
+and the signal handlers that still run the cleanup
+"""
+
+import argparse
+import importlib.util
+import os
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from local_server import LocalServer
+
+# The launcher's file name is not importable as a module name
+_spec = importlib.util.spec_from_file_location("start_local_dev",
+                                               Path(__file__).resolve().parent / "start-local-dev.py")
+start_local_dev = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(start_local_dev)
+Service = start_local_dev.Service
+
+
+def launcher_args(**overrides):
+    args = dict(backend_only=False, backend_port=18080, frontend_port=13000, startup_timeout=5.0)
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def test_schedule_restart_backs_off_and_gives_up():
+    service = Service("api", [], "http://localhost:1/")
+    for delay in (1, 2, 4):
+        before = time.monotonic()
+        assert start_local_dev.schedule_restart(service, max_restarts=3, window=60)
+        assert before + delay <= service.restart_at <= time.monotonic() + delay
+    assert not start_local_dev.schedule_restart(service, max_restarts=3, window=60)
+
+    # Crashes older than the window are forgotten, so the backoff starts over
+    service.crash_times = [time.monotonic() - 120] * 10
+    assert start_local_dev.schedule_restart(service, max_restarts=3, window=60)
+    assert len(service.crash_times) == 1 and service.restart_at - time.monotonic() <= 1
+
+
+def test_wait_until_ready():
+    with LocalServer() as server:
+        service = Service("api", [], f"http://localhost:{server.port}/api/v1/health", startup_timeout=5.0)
+        service.started_at = time.monotonic()
+        ready = start_local_dev.wait_until_ready(service)
+        assert ready is not None and service.ready_after == ready and ready < 5.0
+
+    # Nothing listening: gives up at the startup timeout
+    service = Service("api", [], f"http://localhost:{free_port()}/", startup_timeout=0.3)
+    service.started_at = time.monotonic()
+    assert start_local_dev.wait_until_ready(service) is None and service.ready_after is None
+    assert time.monotonic() - service.started_at < 2
+
+    # A child that exits is reported at once instead of waiting out the timeout
+    service = Service("api", [sys.executable, "-c", "pass"], f"http://localhost:{free_port()}/", startup_timeout=30)
+    service.start()
+    service.process.wait()
+    assert start_local_dev.wait_until_ready(service) is None and time.monotonic() - service.started_at < 5
+
+
+def test_build_services(tmp_path, monkeypatch, capsys):
+    services = start_local_dev.build_services(launcher_args(backend_only=True))
+    assert [service.name for service in services] == ["Mock Backend"]
+    assert services[0].env == {"MOCK_BACKEND_PORT": "18080"}
+    assert services[0].health_url == "http://localhost:18080/api/v1/health"
+
+    monkeypatch.setattr(start_local_dev, "ROOT", tmp_path)
+    monkeypatch.setattr(start_local_dev.shutil, "which", lambda name: "/usr/bin/npm")
+    assert len(start_local_dev.build_services(launcher_args())) == 1
+    assert "Skipping frontend: frontend/ directory not found" in capsys.readouterr().out
+
+    (tmp_path / "frontend").mkdir()
+    backend, frontend = start_local_dev.build_services(launcher_args())
+    assert frontend.cwd == tmp_path / "frontend" and frontend.health_url == "http://localhost:13000/"
+    assert frontend.command[:3] == ["/usr/bin/npm", "run", "dev"] and "13000" in frontend.command
+
+    monkeypatch.setattr(start_local_dev.shutil, "which", lambda name: None)
+    assert len(start_local_dev.build_services(launcher_args())) == 1
+    assert "Skipping frontend: npm not found" in capsys.readouterr().out
+
+
+def test_stop_ends_the_process_group():
+    service = Service("sleeper", [sys.executable, "-c", "import time; time.sleep(30)"], "http://localhost:1/")
+    service.start()
+    try:
+        assert not service.exited()
+        service.stop(timeout=5)
+        assert service.exited() and service.process.returncode == -signal.SIGTERM
+    finally:
+        service.stop()
+
+
+def test_termination_signals_interrupt_the_launcher():
+    previous = {signum: signal.getsignal(signum) for signum in (signal.SIGTERM, signal.SIGHUP)}
+    try:
+        start_local_dev.install_signal_handlers()
+        for signum in previous:
+            with pytest.raises(KeyboardInterrupt):
+                os.kill(os.getpid(), signum)
+                time.sleep(1)
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Local Dev Launcher")
+    print("=" * 35)
+    for test in (test_schedule_restart_backs_off_and_gives_up, test_wait_until_ready, test_stop_ends_the_process_group,
+                 test_termination_signals_interrupt_the_launcher):
+        test()
+        print(f"✅ {test.__name__}")
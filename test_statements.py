@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Statement job tests
+Covers statement balances and rendering, priority order on the worker pool,
+deduplication and caching of identical requests, and the job endpoints
+"""
+
+import csv
+import io
+import threading
+import time
+
+import pytest
+
+from ledger import Ledger
+from local_server import LocalServer
+from statements import (COMPLETED, FAILED, StatementError, StatementQueue, StatementQueueFullError,
+                        UnknownAccountError, build_statement, parse_period, render_csv, render_pdf)
+
+
+class GatedLedger(Ledger):
+    """Holds statement reads until the gate opens, so jobs pile up in the queue"""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+
+    def snapshot(self, as_of=None):
+        self.gate.wait(5)
+        return super().snapshot(as_of)
+
+
+class BrokenLedger(Ledger):
+    def snapshot(self, as_of=None):
+        raise RuntimeError("snapshot store unavailable")
+
+
+def test_statement_balances_and_rendering():
+    ledger = Ledger()
+    ledger.post(1, -10.01, "Later purchase", "food")
+    statement = build_statement(ledger, 1, "2024-10")
+    # Seeded October postings: +2500 salary, -45.99, -120, -89.99; today's posting belongs to a later month
+    assert statement["closing_cents"] == 1575050 and statement["opening_cents"] == 1575050 - 224402
+    assert [row[1] for row in statement["rows"]] == [4, 2, 3, 1]
+    assert statement["rows"][-1][5] == statement["closing_cents"]
+    assert statement["credits_cents"] == 250000 and statement["debits_cents"] == 25598
+    assert statement["categories"] == {"food": -4599, "income": 250000, "shopping": -12000, "transport": -8999}
+
+    rows = list(csv.reader(io.StringIO(render_csv(statement).decode())))
+    assert rows[0][:4] == ["account", "QB-001-2024", "period", "2024-10"]
+    assert rows[3] == ["2024-10-24T08:20:00Z", "4", "Gas Station", "transport", "-89.99", "13416.49"]
+    pdf = render_pdf(statement)
+    assert pdf.startswith(b"%PDF-1.4") and pdf.rstrip().endswith(b"%%EOF") and b"(Closing balance" in pdf
+
+    assert parse_period("2024-12")[1:] == ("2024-12-01T00:00:00Z", "2025-01-01T00:00:00Z")
+    assert parse_period(now=1704067200)[0] == "2023-12"
+    with pytest.raises(StatementError):
+        parse_period("2024-13")
+    assert build_statement(ledger, 2, "2023-01")["rows"] == []
+
+
+def test_priority_order_dedup_and_cache():
+    ledger = GatedLedger()
+    queue = StatementQueue(ledger, workers=1, max_queue=4).start()
+    try:
+        first = queue.submit(1, "2024-01")
+        time.sleep(0.05)
+        low = queue.submit(1, "2024-02", priority="low")
+        normal = queue.submit(1, "2024-03")
+        high = queue.submit(2, "2024-04", priority="high")
+        promoted = queue.submit(1, "2024-05", priority="low")
+        # Same request again: joins the queued job and lifts it to high priority
+        assert queue.submit(1, "2024-05", priority="high") is promoted
+        assert queue.stats()["queued_by_priority"] == {"high": 2, "normal": 1, "low": 1}
+        with pytest.raises(StatementQueueFullError):
+            queue.submit(2, "2024-06")
+        ledger.gate.set()
+        jobs = [queue.wait(job.id, 5) for job in (first, low, normal, high, promoted)]
+        assert all(job.status == COMPLETED for job in jobs)
+        finished = [job.finished_at for job in jobs]
+        assert finished[0] <= finished[3] <= finished[4] <= finished[2] <= finished[1]
+
+        cached = queue.submit(1, "2024-03")
+        assert cached.cached and cached.status == COMPLETED and cached.document == normal.document
+        pdf = queue.wait(queue.submit(1, "2024-03", fmt="pdf").id, 5)
+        assert not pdf.cached and pdf.document.startswith(b"%PDF")
+        with pytest.raises(UnknownAccountError):
+            queue.submit(99, "2024-03")
+        for bad in ({"fmt": "docx"}, {"fmt": ["csv"]}, {"priority": []}, {"priority": None}):
+            with pytest.raises(StatementError):
+                queue.submit(1, "2024-03", **bad)
+        counters = queue.stats()["counters"]
+        assert counters == {"submitted": 9, "deduplicated": 1, "cache_hits": 1, "completed": 6, "failed": 0,
+                            "rejected": 1}
+        assert queue.stats()["queue_wait"]["count"] == 6
+    finally:
+        queue.stop()
+
+
+def test_failed_jobs_report_the_error():
+    queue = StatementQueue(BrokenLedger(), workers=1).start()
+    try:
+        job = queue.wait(queue.submit(2, "2024-10").id, 5)
+        assert job.status == FAILED and job.error == "RuntimeError: snapshot store unavailable"
+        # Failures are not cached: the next request runs again
+        retry = queue.submit(2, "2024-10")
+        assert retry is not job and not retry.cached
+        assert queue.wait(retry.id, 5).status == FAILED and queue.stats()["counters"]["failed"] == 2
+    finally:
+        queue.stop()
+
+
+def test_statement_endpoints():
+    with LocalServer() as server:
+        status, job = server.call("POST", "/api/v1/accounts/1/statements", {"period": "2024-10", "priority": "high"})
+        assert status in (200, 202) and job["account_id"] == 1 and job["format"] == "csv"
+        for _ in range(100):
+            status, progress = server.call("GET", job["status_url"])
+            if progress["status"] == COMPLETED:
+                break
+            time.sleep(0.02)
+        assert progress["queue_ms"] is not None
+        document = server.request("GET", job["result_url"])
+        assert document.status == 200 and document.headers["Content-type"] == "text/csv"
+        assert b"Salary Deposit" in document.body
+
+        status, body = server.call("POST", "/api/v1/accounts/1/statements", {"period": "2024-10"})
+        assert status == 200 and body["cached"]
+        assert server.call("POST", "/api/v1/accounts/404/statements", {})[0] == 404
+        assert server.call("POST", "/api/v1/accounts/1/statements", {"period": "October"})[0] == 400
+        assert server.call("POST", "/api/v1/accounts/x/statements", {})[0] == 400
+        for bad in ({"priority": []}, {"format": {"pdf": 1}}, {"priority": 1}):
+            assert server.call("POST", "/api/v1/accounts/1/statements", bad)[0] == 400, bad
+        assert server.call("GET", "/api/v1/statements/jobs/nope")[0] == 404
+        status, stats = server.call("GET", "/api/v1/statements/stats")
+        assert status == 200 and stats["counters"]["cache_hits"] >= 1 and "p99_ms" in stats["queue_wait"]
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Statement Jobs")
+    print("=" * 35)
+    for test in (test_statement_balances_and_rendering, test_priority_order_dedup_and_cache,
+                 test_failed_jobs_report_the_error, test_statement_endpoints):
+        test()
+        print(f"✅ {test.__name__}")
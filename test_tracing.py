@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Request tracing tests for the mock backend
+Covers traceparent parsing and propagation, handler phase spans, head/tail
+sampling decisions and the batched OTLP JSON export
+"""
+
+import json
+import tempfile
+from pathlib import Path
+
+from local_server import LocalServer
+from tracing import BatchSpanExporter, Tracer, parse_traceparent
+
+TRACEPARENT = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+def test_parse_traceparent():
+    assert parse_traceparent(TRACEPARENT) == ("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7", True)
+    assert parse_traceparent(TRACEPARENT[:-1] + "0")[2] is False
+    for invalid in (None, "", "garbage", "ff" + TRACEPARENT[2:],
+                    "00-00000000000000000000000000000000-00f067aa0ba902b7-01"):
+        assert parse_traceparent(invalid) is None
+
+
+def test_head_and_tail_sampling():
+    exporter = BatchSpanExporter()
+    tracer = Tracer(exporter, sample_rate=0.0, tail_latency=0.05)
+
+    def request(status, traceparent=None, duration_ns=0):
+        trace = tracer.start("GET /x", traceparent)
+        trace.start_ns -= duration_ns
+        trace.set_status(status)
+        trace.finish()
+        return trace
+
+    request(200)                                   # fast, healthy, unsampled: dropped
+    request(503)                                   # tail: server error
+    request(200, duration_ns=60_000_000)           # tail: slower than 50 ms
+    request(200, TRACEPARENT)                      # head: caller sampled it
+    request(200, TRACEPARENT[:-1] + "0")           # caller said no
+    exporter.flush()
+    assert tracer.counters == {"started": 5, "head_sampled": 1, "tail_sampled": 2, "discarded": 2}
+    assert exporter.counters["exported_traces"] == 3
+
+    quiet = Tracer(exporter, sample_rate=0.0, tail_latency=None, tail_errors=False).start("GET /x")
+    quiet.phase("route")
+    assert not quiet.recording and quiet.spans == []
+
+
+def test_request_spans_and_export_file():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "traces.jsonl"
+        tracer = Tracer(BatchSpanExporter(str(path)), sample_rate=1.0)
+        try:
+            with LocalServer(tracer=tracer) as server:
+                response = server.request("POST", "/api/v1/transactions", {"account_id": 1, "amount": -1.5},
+                                          headers={"traceparent": TRACEPARENT}, timeout=5)
+            echoed = parse_traceparent(response.headers["traceparent"])
+        finally:
+            tracer.stop()
+
+        assert response.status == 200
+        assert echoed[0] == "4bf92f3577b34da6a3ce929d0e0e4736" and echoed[1] != "00f067aa0ba902b7"
+
+        batches = [json.loads(line) for line in path.read_text().splitlines()]
+        spans = [span for batch in batches for span in batch["resourceSpans"][0]["scopeSpans"][0]["spans"]]
+        root = spans[0]
+        assert root["name"] == "POST /api/v1/transactions" and root["parentSpanId"] == "00f067aa0ba902b7"
+        assert root["spanId"] == echoed[1]
+        names = [span["name"] for span in spans[1:]]
+        assert names[:3] == ["parse", "route", "payment.saga"] and names[-3:] == ["logic", "serialize", "write"], names
+        # Saga steps run on the orchestrator loop and are attached to the request afterwards
+        assert {"saga.validate", "saga.fraud_check", "saga.compliance_check", "saga.post"} <= set(names)
+        assert all(span["parentSpanId"] == root["spanId"] for span in spans[1:])
+        assert all(int(s["startTimeUnixNano"]) <= int(s["endTimeUnixNano"]) for s in spans)
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Request Tracing")
+    print("=" * 35)
+    for test in (test_parse_traceparent, test_head_and_tail_sampling, test_request_spans_and_export_file):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+User store tests
+Covers case-folded email lookup, race-free registration, credential ownership,
+bulk seeding around existing users, field validation and the register endpoint
+"""
+
+import threading
+
+import pytest
+
+from local_server import LocalServer
+from user_store import DuplicateCredentialError, DuplicateEmailError, InvalidUserError, UserStore, UserStoreError
+
+
+def test_register_and_lookup():
+    store = UserStore()
+    ada = store.register("  Ada.Lovelace@Example.com ", "Ada", "Lovelace", kyc_status="verified")
+    assert ada.id == 1 and ada.email == "Ada.Lovelace@Example.com"
+    assert store.get_by_email("ada.lovelace@example.COM") is ada and store.get("1") is ada
+    assert store.get(2) is None and store.get("x") is None and store.get_by_email(None) is None
+    with pytest.raises(DuplicateEmailError):
+        store.register("ADA.LOVELACE@example.com", "Other", "Person")
+    assert ada.to_dict() == {"id": "1", "email": "Ada.Lovelace@Example.com", "firstName": "Ada",
+                             "lastName": "Lovelace", "kycStatus": "verified", "isActive": True, "lastLogin": None}
+    assert store.update_last_login(1, "2024-10-27T10:30:00Z").last_login == "2024-10-27T10:30:00Z"
+
+
+def test_concurrent_registration_of_one_email():
+    store = UserStore()
+    barrier = threading.Barrier(20)
+    winners, losers = [], []
+
+    def register(i):
+        barrier.wait()
+        try:
+            winners.append(store.register(f"user{i % 2}@example.com", "U", str(i)))
+        except DuplicateEmailError:
+            losers.append(i)
+
+    threads = [threading.Thread(target=register, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(winners) == 2 and len(losers) == 18 and len(store) == 2
+    assert sorted(user.id for user in winners) == [1, 2]
+
+
+def test_credentials_and_bulk_seed():
+    store = UserStore()
+    first = store.register("loadtest2@quantumbank.test", "Pre", "Existing")
+    store.add_credential(first.id, "cred-a")
+    store.add_credential(first.id, "cred-a")
+    assert store.get_by_credential("cred-a") is first and first.credential_ids == ("cred-a",)
+    assert store.get_by_credential(["cred-a"]) is None
+    with pytest.raises(UserStoreError):
+        store.add_credential(99, "cred-b")
+    # Generated emails continue from the current size and skip ones already taken
+    assert store.bulk_seed(5, chunk_size=2) == 4 and len(store) == 5
+    second = store.get(2)
+    with pytest.raises(DuplicateCredentialError):
+        store.add_credential(second.id, "cred-a")
+    assert store.stats()["credentials"] == 1 and store.memory_report()["users"] == 5
+
+
+def test_fields_must_be_strings():
+    store = UserStore()
+    for fields in ((["a@b.c"], "A", "B"), ("a@b.c", None, "B"), ("a@b.c", "A", {"x": 1}), (5, "A", "B")):
+        with pytest.raises(InvalidUserError):
+            store.register(*fields)
+    with pytest.raises(InvalidUserError):
+        store.register("a@b.c", "A", "B", kyc_status=1)
+    user = store.register("a@b.c", "A", "B")
+    for credential_id in ("", None, ["x"]):
+        with pytest.raises(InvalidUserError):
+            store.add_credential(user.id, credential_id)
+    assert len(store) == 1 and store.stats()["credentials"] == 0
+
+
+def test_register_endpoint_validation():
+    with LocalServer() as server:
+        body = {"email": "endpoint.user@example.com", "password": "pw", "firstName": "End", "lastName": "Point"}
+        status, created = server.call("POST", "/api/v1/auth/register", body)
+        assert status == 200 and created["user"]["email"] == body["email"]
+        assert server.call("POST", "/api/v1/auth/register", body)[1]["code"] == "EMAIL_EXISTS"
+        for bad in ({"email": ["x@example.com"]}, {"firstName": {"a": 1}}, {"lastName": 7}):
+            status, rejected = server.call("POST", "/api/v1/auth/register",
+                                           {**body, "email": "other.user@example.com", **bad})
+            assert status == 400 and rejected["code"] == "VALIDATION_ERROR", bad
+
+
+if __name__ == "__main__":
+    print("🧪 Testing User Store")
+    print("=" * 35)
+    for test in (test_register_and_lookup, test_concurrent_registration_of_one_email, test_credentials_and_bulk_seed,
+                 test_fields_must_be_strings, test_register_endpoint_validation):
+        test()
+        print(f"✅ {test.__name__}")
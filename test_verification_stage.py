@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Signature verification stage tests
+Covers micro-batching of concurrent verifies, invalid signatures and the
+transaction endpoints when verdicts are late, the verifier fails or the
+batch is malformed
+"""
+
+import base64
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+from crypto_pipeline import CryptoPipeline
+from local_server import LocalServer
+from verification_stage import VerificationStage
+
+
+class StalledStage:
+    """VerificationStage stand-in whose verdicts never arrive"""
+
+    def submit(self, public_key, message, signature):
+        return Future()
+
+
+class BrokenStage:
+    """VerificationStage stand-in whose verifier pool has died"""
+
+    def submit(self, public_key, message, signature):
+        future = Future()
+        future.set_exception(BrokenProcessPool("A process in the process pool was terminated abruptly"))
+        return future
+
+
+def test_concurrent_verifies_are_batched():
+    pipeline = CryptoPipeline(workers=2)
+    stage = VerificationStage(pipeline, max_batch_size=16, max_latency=0.01).start()
+    try:
+        public_key, secret_key = pipeline.generate_signing_keypair()
+        messages = [f"txn-{i}".encode() for i in range(48)]
+        signatures = pipeline.sign_batch(secret_key, messages)
+        results = {}
+
+        def client(i):
+            message = messages[i] if i % 6 else messages[i] + b"-tampered"
+            results[i] = stage.verify(public_key, message, signatures[i], timeout=10)
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(48)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert [i for i, ok in sorted(results.items()) if not ok] == list(range(0, 48, 6))
+        stats = stage.stats()
+        assert stats["items"] == 48 and stats["batches"] < 48 and stats["queued"] == 0
+        assert stage.verify_many([(public_key, messages[1], signatures[1])] * 3, timeout=10) == [True] * 3
+    finally:
+        stage.stop()
+        pipeline.shutdown()
+
+
+def test_transaction_endpoints_answer_503_when_the_verifier_fails():
+    signed = {"account_id": 1, "amount": -5, "public_key": base64.b64encode(b"k").decode(),
+              "signature": base64.b64encode(b"s").decode()}
+    with LocalServer(verification_stage=BrokenStage()) as server:
+        status, busy = server.call("POST", "/api/v1/transactions", signed)
+        assert status == 503 and busy["code"] == "SERVICE_BUSY"
+        status, busy = server.call("POST", "/api/v1/transactions/batch", {"transactions": [signed, signed]})
+        assert status == 503 and busy["code"] == "SERVICE_BUSY"
+
+
+def test_transaction_endpoints_time_out_and_validate():
+    signed = {"account_id": 1, "amount": -5, "public_key": base64.b64encode(b"k").decode(),
+              "signature": base64.b64encode(b"s").decode()}
+    with LocalServer(verification_stage=StalledStage(), verification_timeout=0.05) as server:
+        status, busy = server.call("POST", "/api/v1/transactions", signed)
+        assert status == 503 and busy["code"] == "SERVICE_BUSY"
+        assert server.call("POST", "/api/v1/transactions/batch", {"transactions": [signed]})[0] == 503
+        for transactions in ({"account_id": 1}, "x", None, 5):
+            status, rejected = server.call("POST", "/api/v1/transactions/batch", {"transactions": transactions})
+            assert status == 400 and rejected["code"] == "VALIDATION_ERROR", transactions
+        status, empty = server.call("POST", "/api/v1/transactions/batch", {"transactions": []})
+        assert status == 200 and empty == {"results": [], "accepted": 0, "rejected": 0}
+        # Unsigned payments never wait for the stage
+        status, batch = server.call("POST", "/api/v1/transactions/batch",
+                                    {"transactions": [{"account_id": 1, "amount": -1}, "nope"]})
+        assert status == 200 and batch["accepted"] == 1 and batch["results"][1]["code"] == "VALIDATION_ERROR"
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Signature Verification Stage")
+    print("=" * 35)
+    for test in (test_concurrent_verifies_are_batched, test_transaction_endpoints_time_out_and_validate,
+                 test_transaction_endpoints_answer_503_when_the_verifier_fails):
+        test()
+        print(f"✅ {test.__name__}")
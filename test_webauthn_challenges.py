@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+WebAuthn challenge store tests
+Covers single use under racing consumers, expiry, purpose checks, the cap on
+outstanding challenges and the challenge, verify and enroll endpoints
+"""
+
+import base64
+import json
+import threading
+import time
+
+from local_server import LocalServer
+from webauthn_challenges import ChallengeStore
+
+
+def client_data(challenge):
+    raw = json.dumps({"type": "webauthn.get", "challenge": challenge}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def test_challenge_is_accepted_once():
+    store = ChallengeStore()
+    challenge, _ = store.issue("login", user_id=7)
+    winners = []
+    barrier = threading.Barrier(16)
+
+    def racer():
+        barrier.wait()
+        if store.consume(challenge, "login") is not None:
+            winners.append(1)
+
+    threads = [threading.Thread(target=racer) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(winners) == 1 and store.outstanding() == 0
+    assert store.stats()["consumed"] == 1 and store.stats()["rejected"] == 15
+
+    login, _ = store.issue("login")
+    assert store.consume(login, "register") is None and store.consume(login, "login") is None
+    for bad in (None, "", 42, ["x"]):
+        assert store.consume(bad) is None
+    register, _ = store.issue("register", user_id=3)
+    assert store.consume(register) == {"purpose": "register", "user_id": 3}
+
+
+def test_expiry_and_outstanding_cap():
+    store = ChallengeStore(ttl=0.05, max_outstanding=64, shards=4)
+    stale, _ = store.issue()
+    time.sleep(0.06)
+    assert store.consume(stale) is None and store.stats()["expired"] == 1
+
+    flood = [store.issue()[0] for _ in range(1000)]
+    stats = store.stats()
+    assert store.outstanding() <= 64 and stats["evicted"] + stats["expired"] >= 1000 - 64
+    # The newest challenges survive eviction
+    assert store.consume(flood[-1]) is not None
+
+
+def test_webauthn_endpoints():
+    with LocalServer() as server:
+        status, issued = server.call("GET", "/api/v1/auth/webauthn/challenge")
+        assert status == 200 and issued["allowCredentials"]
+        body = {"id": issued["allowCredentials"][0]["id"],
+                "response": {"clientDataJSON": client_data(issued["challenge"])}}
+        status, login = server.call("POST", "/api/v1/auth/webauthn/verify", body)
+        assert status == 200 and login["token"] == f"mock_webauthn_token_{server.mb.demo_user.id}"
+        assert server.call("POST", "/api/v1/auth/webauthn/verify", body)[1]["code"] == "CHALLENGE_INVALID"
+
+        # Malformed credentials are rejected like any other bad challenge, never with a dropped connection
+        for bad in ({"response": "x"}, {"response": {"clientDataJSON": 5}}, {"response": {"clientDataJSON": "!!"}},
+                    {"response": {"clientDataJSON": client_data(None)}}, {"challenge": ["x"]}, {"response": []}):
+            status, rejected = server.call("POST", "/api/v1/auth/webauthn/verify", bad)
+            assert status == 400 and rejected["code"] == "CHALLENGE_INVALID", bad
+
+        challenge = server.call("GET", "/api/v1/auth/webauthn/challenge?type=register")[1]["challenge"]
+        assert server.call("POST", "/api/v1/auth/webauthn/verify", {"challenge": challenge})[0] == 400
+        challenge = server.call("GET", "/api/v1/auth/webauthn/challenge?type=register&user_id=1")[1]["challenge"]
+        enroll = {"challenge": challenge, "id": "cred-webauthn-test"}
+        status, _ = server.call("POST", "/api/v1/auth/webauthn/enroll", enroll)
+        assert status == 200 and server.mb.user_store.get_by_credential("cred-webauthn-test").id == 1
+        body = {"id": "cred-webauthn-test", "response": {"clientDataJSON": client_data(
+            server.call("GET", "/api/v1/auth/webauthn/challenge?user_id=1")[1]["challenge"])}}
+        assert server.call("POST", "/api/v1/auth/webauthn/verify", body)[1]["token"] == "mock_webauthn_token_1"
+
+        # A credential is required, and it must belong to the user the challenge was issued for
+        challenge = server.call("GET", "/api/v1/auth/webauthn/challenge")[1]["challenge"]
+        status, rejected = server.call("POST", "/api/v1/auth/webauthn/verify", {"challenge": challenge})
+        assert status == 400 and rejected["code"] == "VALIDATION_ERROR"
+        other = server.mb.user_store.register("webauthn-other@example.com", "Other", "User")
+        server.mb.user_store.add_credential(other.id, "cred-webauthn-other")
+        challenge = server.call("GET", "/api/v1/auth/webauthn/challenge?user_id=1")[1]["challenge"]
+        status, rejected = server.call("POST", "/api/v1/auth/webauthn/verify",
+                                       {"challenge": challenge, "credentialId": "cred-webauthn-other"})
+        assert status == 400 and rejected["code"] == "CHALLENGE_USER_MISMATCH"
+        challenge = server.call("GET", "/api/v1/auth/webauthn/challenge")[1]["challenge"]
+        status, login = server.call("POST", "/api/v1/auth/webauthn/verify",
+                                    {"challenge": challenge, "credentialId": "cred-webauthn-other"})
+        assert status == 200 and login["token"] == f"mock_webauthn_token_{other.id}"
+
+
+if __name__ == "__main__":
+    print("🧪 Testing WebAuthn Challenges")
+    print("=" * 35)
+    for test in (test_challenge_is_accepted_once, test_expiry_and_outstanding_cap, test_webauthn_endpoints):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Request tracing for the Quantum Banking mock backend
+W3C traceparent propagation, per-phase span timings, head/tail sampling and
+batched export of OTLP-compatible JSON to a file and an in-memory collector
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+
+from metrics import MetricsRegistry
+
+TRACEPARENT_RE = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+INVALID_TRACE_ID = "0" * 32
+INVALID_SPAN_ID = "0" * 16
+
+# OTLP enum values
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+
+def parse_traceparent(header):
+    """(trace_id, parent_span_id, sampled) from a traceparent header, or None if absent/invalid"""
+    if not header:
+        return None
+    match = TRACEPARENT_RE.match(header.strip().lower())
+    if match is None:
+        return None
+    version, trace_id, span_id, flags = match.groups()
+    if version == "ff" or trace_id == INVALID_TRACE_ID or span_id == INVALID_SPAN_ID:
+        return None
+    return trace_id, span_id, bool(int(flags, 16) & 1)
+
+
+def _new_id(bits):
+    return random.randbytes(bits // 8).hex()
+
+
+class _SpanScope:
+    __slots__ = ("trace", "name", "attributes", "start_ns")
+
+    def __init__(self, trace, name, attributes):
+        self.trace = trace
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        attributes = self.attributes
+        if exc_type is not None:
+            attributes = dict(attributes or {}, error=exc_type.__name__)
+        self.trace.spans.append((self.name, self.start_ns, time.time_ns(), attributes))
+        return False
+
+
+class _NoopScope:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SCOPE = _NoopScope()
+
+
+class Trace:
+    """One server request: a root span plus child spans.
+
+    Handler phases are sequential, so phase(name) closes the running phase
+    and opens the next one; span(name) adds an extra child span around a
+    block. Child span IDs are only generated at export time. A trace that
+    is neither head-sampled nor subject to tail sampling records nothing.
+    """
+
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "sampled", "recording",
+                 "start_ns", "end_ns", "status", "attributes", "spans", "_phase", "_phase_start")
+
+    def __init__(self, tracer, name, trace_id, span_id, parent_id, sampled, recording, start_ns):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.recording = recording
+        self.start_ns = start_ns
+        self.end_ns = None
+        self.status = None
+        self.attributes = {}
+        self.spans = []
+        self._phase = None
+        self._phase_start = start_ns
+
+    @property
+    def traceparent(self):
+        """Header value for propagating this request's context downstream or back to the caller"""
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def phase(self, name):
+        if not self.recording:
+            return
+        now = time.time_ns()
+        if self._phase is not None:
+            self.spans.append((self._phase, self._phase_start, now, None))
+        self._phase = name
+        self._phase_start = now
+
+    def span(self, name, **attributes):
+        if not self.recording:
+            return _NOOP_SCOPE
+        return _SpanScope(self, name, attributes or None)
+
+    def add_span(self, name, start_ns, end_ns, **attributes):
+        """Child span timed elsewhere (e.g. on another thread) and attached afterwards"""
+        if self.recording:
+            self.spans.append((name, start_ns, end_ns, attributes or None))
+
+    def set(self, key, value):
+        if self.recording:
+            self.attributes[key] = value
+
+    def set_status(self, status):
+        self.status = status
+
+    def finish(self):
+        if self.end_ns is not None or not self.recording:
+            return
+        self.end_ns = time.time_ns()
+        if self._phase is not None:
+            self.spans.append((self._phase, self._phase_start, self.end_ns, None))
+            self._phase = None
+        self.tracer._finished(self)
+
+
+class _NoopTrace:
+    """Stand-in used while tracing is disabled (and before a request line is parsed)"""
+
+    traceparent = None
+    sampled = False
+    recording = False
+
+    def phase(self, name):
+        pass
+
+    def span(self, name, **attributes):
+        return _NOOP_SCOPE
+
+    def add_span(self, name, start_ns, end_ns, **attributes):
+        pass
+
+    def set(self, key, value):
+        pass
+
+    def set_status(self, status):
+        pass
+
+    def finish(self):
+        pass
+
+
+NOOP_TRACE = _NoopTrace()
+
+
+class Tracer:
+    """Creates request traces and decides which ones are exported.
+
+    Head sampling: an incoming traceparent's sampled flag is honoured,
+    otherwise sample_rate of new traces are sampled. Tail sampling: traces
+    not head-sampled are still timed when tail rules are set and exported
+    anyway if they failed with a 5xx or took longer than tail_latency.
+    """
+
+    def __init__(self, exporter=None, sample_rate=0.01, tail_latency=None, tail_errors=True, enabled=True):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.tail_latency_ns = int(tail_latency * 1e9) if tail_latency else None
+        self.tail_errors = tail_errors
+        self.enabled = enabled
+        self._random = random.random
+        self.counters = {"started": 0, "head_sampled": 0, "tail_sampled": 0, "discarded": 0}
+
+    @property
+    def tail_sampling(self):
+        return self.tail_latency_ns is not None or self.tail_errors
+
+    def start(self, name, traceparent=None, start_ns=None):
+        if not self.enabled:
+            return NOOP_TRACE
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+            span_id = _new_id(64)
+        else:
+            # One random draw for both IDs; this runs on every request
+            ids = _new_id(192)
+            trace_id, span_id, parent_id = ids[:32], ids[32:], None
+            sampled = self.sample_rate > 0 and self._random() < self.sample_rate
+        trace = Trace(self, name, trace_id, span_id, parent_id, sampled, sampled or self.tail_sampling,
+                      start_ns or time.time_ns())
+        trace.phase("parse")
+        # Counters are approximate under contention by design; a lock here would cost more than the trace
+        self.counters["started"] += 1
+        return trace
+
+    def _finished(self, trace):
+        if trace.sampled:
+            self.counters["head_sampled"] += 1
+        elif ((self.tail_errors and trace.status is not None and trace.status >= 500)
+              or (self.tail_latency_ns is not None and trace.end_ns - trace.start_ns >= self.tail_latency_ns)):
+            self.counters["tail_sampled"] += 1
+        else:
+            self.counters["discarded"] += 1
+            return
+        if self.exporter is not None:
+            self.exporter.export(trace)
+
+    def start_exporter(self):
+        if self.exporter is not None:
+            self.exporter.start()
+        return self
+
+    def stop(self):
+        if self.exporter is not None:
+            self.exporter.stop()
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "tail_latency_ms": self.tail_latency_ns / 1e6 if self.tail_latency_ns is not None else None,
+            "tail_errors": self.tail_errors,
+            "counters": dict(self.counters),
+            "exporter": self.exporter.stats() if self.exporter is not None else None,
+        }
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+
+def encode_spans(trace):
+    """OTLP JSON span dicts for a finished trace (root first)"""
+    attributes = dict(trace.attributes)
+    if trace.status is not None:
+        attributes["http.status_code"] = trace.status
+    root = {
+        "traceId": trace.trace_id,
+        "spanId": trace.span_id,
+        "parentSpanId": trace.parent_id or "",
+        "name": trace.name,
+        "kind": SPAN_KIND_SERVER,
+        "startTimeUnixNano": str(trace.start_ns),
+        "endTimeUnixNano": str(trace.end_ns),
+        "attributes": [_attribute(k, v) for k, v in attributes.items()],
+        "status": {"code": STATUS_ERROR if trace.status is not None and trace.status >= 500 else STATUS_UNSET},
+    }
+    spans = [root]
+    for name, start_ns, end_ns, span_attributes in trace.spans:
+        spans.append({
+            "traceId": trace.trace_id,
+            "spanId": _new_id(64),
+            "parentSpanId": trace.span_id,
+            "name": name,
+            "kind": SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(start_ns),
+            "endTimeUnixNano": str(end_ns),
+            "attributes": [_attribute(k, v) for k, v in span_attributes.items()] if span_attributes else [],
+            "status": {"code": STATUS_ERROR if span_attributes and "error" in span_attributes else STATUS_UNSET},
+        })
+    return spans
+
+
+class BatchSpanExporter:
+    """Queues finished traces and exports them in batches from a background thread.
+
+    Each batch becomes one OTLP ExportTraceServiceRequest written as a JSON
+    line to path (the layout of the OpenTelemetry file exporter). The most
+    recent traces are also kept in memory as a collector stand-in. The
+    queue is bounded; traces arriving while it is full are dropped and
+    counted rather than slowing requests down.
+    """
+
+    def __init__(self, path=None, service_name="mock-backend", max_batch=512, flush_interval=1.0,
+                 max_queue=20000, keep_recent=1000):
+        self.path = path
+        self.service_name = service_name
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.keep_recent = keep_recent
+        self.phase_metrics = MetricsRegistry()
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._recent = OrderedDict()
+        self._recent_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._running = False
+        self._thread = None
+        self.counters = {"queued": 0, "exported_traces": 0, "exported_spans": 0, "batches": 0,
+                         "dropped": 0, "write_errors": 0}
+
+    def start(self):
+        with self._cond:
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+    def export(self, trace):
+        # deque.append is atomic; the condition is only touched when a batch is ready
+        if len(self._queue) >= self.max_queue:
+            self.counters["dropped"] += 1
+            return
+        self._queue.append(trace)
+        self.counters["queued"] += 1
+        if len(self._queue) >= self.max_batch:
+            with self._cond:
+                self._cond.notify()
+
+    def flush(self):
+        """Export everything queued so far on the calling thread"""
+        with self._flush_lock:
+            while self._queue:
+                batch = []
+                while self._queue and len(batch) < self.max_batch:
+                    batch.append(self._queue.popleft())
+                self._write(batch)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._running and len(self._queue) < self.max_batch:
+                    self._cond.wait(self.flush_interval)
+                if not self._running:
+                    return
+            self.flush()
+
+    def _write(self, traces):
+        spans = []
+        for trace in traces:
+            encoded = encode_spans(trace)
+            spans.extend(encoded)
+            for name, start_ns, end_ns, _ in trace.spans:
+                self.phase_metrics.record(name, (end_ns - start_ns) / 1e9)
+            self.phase_metrics.record("request", (trace.end_ns - trace.start_ns) / 1e9)
+            with self._recent_lock:
+                self._recent[trace.trace_id] = self._recent.get(trace.trace_id, []) + encoded
+                self._recent.move_to_end(trace.trace_id)
+                while len(self._recent) > self.keep_recent:
+                    self._recent.popitem(last=False)
+        if self.path:
+            request = {"resourceSpans": [{
+                "resource": {"attributes": [_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{"scope": {"name": "quantum-banking.tracing"}, "spans": spans}],
+            }]}
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(request, separators=(",", ":")) + "\n")
+            except OSError:
+                self.counters["write_errors"] += 1
+        self.counters["batches"] += 1
+        self.counters["exported_traces"] += len(traces)
+        self.counters["exported_spans"] += len(spans)
+
+    def pending(self):
+        return len(self._queue)
+
+    def get_trace(self, trace_id):
+        with self._recent_lock:
+            spans = self._recent.get(trace_id)
+        return list(spans) if spans is not None else None
+
+    def recent_trace_ids(self, limit=20):
+        with self._recent_lock:
+            return list(self._recent)[-limit:][::-1]
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "pending": self.pending(),
+            "counters": dict(self.counters),
+            "phases": self.phase_metrics.snapshot(),
+        }
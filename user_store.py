@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Indexed in-memory user store for the Quantum Banking mock backend
+O(1) lookup by ID, case-folded email and WebAuthn credential ID with
+race-free registration and bulk seeding for load tests
+"""
+
+import sys
+import threading
+
+
+class UserStoreError(Exception):
+    pass
+
+
+class DuplicateEmailError(UserStoreError):
+    pass
+
+
+class DuplicateCredentialError(UserStoreError):
+    pass
+
+
+class InvalidUserError(UserStoreError):
+    pass
+
+
+def normalize_email(email):
+    return email.strip().casefold()
+
+
+def _email_and_key(email):
+    """Stripped email and its index key, sharing one string object when they are equal"""
+    email = email.strip()
+    key = email.casefold()
+    return email, (email if key == email else key)
+
+
+class UserRecord:
+    """Compact user record; __slots__ avoids a per-instance __dict__"""
+
+    __slots__ = ("id", "email", "first_name", "last_name", "password_hash",
+                 "kyc_status", "is_active", "last_login", "credential_ids")
+
+    def __init__(self, user_id, email, first_name, last_name, password_hash=None,
+                 kyc_status="pending", is_active=True, last_login=None):
+        self.id = user_id
+        self.email = email
+        self.first_name = first_name
+        self.last_name = last_name
+        self.password_hash = password_hash
+        self.kyc_status = kyc_status
+        self.is_active = is_active
+        self.last_login = last_login
+        self.credential_ids = ()
+
+    def to_dict(self):
+        return {
+            "id": str(self.id),
+            "email": self.email,
+            "firstName": self.first_name,
+            "lastName": self.last_name,
+            "kycStatus": self.kyc_status,
+            "isActive": self.is_active,
+            "lastLogin": self.last_login,
+        }
+
+
+class UserStore:
+    """Users indexed by ID (list slot), case-folded email and credential ID.
+
+    IDs are allocated monotonically from 1, so the ID index is a plain list
+    where user N lives at position N - 1. Writes take one lock for the
+    uniqueness check, ID allocation and index updates; reads are lock-free
+    single dict/list lookups.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_id = []
+        self._by_email = {}
+        self._by_credential = {}
+
+    def __len__(self):
+        return len(self._by_id)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def register(self, email, first_name, last_name, password_hash=None, kyc_status="pending"):
+        for field, value in (("email", email), ("first_name", first_name), ("last_name", last_name),
+                             ("kyc_status", kyc_status)):
+            if not isinstance(value, str):
+                raise InvalidUserError(f"{field} must be a string")
+        email, key = _email_and_key(email)
+        with self._lock:
+            if key in self._by_email:
+                raise DuplicateEmailError(f"Email already registered: {email}")
+            record = UserRecord(len(self._by_id) + 1, email, first_name, last_name,
+                                password_hash, sys.intern(kyc_status))
+            self._by_id.append(record)
+            self._by_email[key] = record
+        return record
+
+    def add_credential(self, user_id, credential_id):
+        if not isinstance(credential_id, str) or not credential_id:
+            raise InvalidUserError("credential_id must be a non-empty string")
+        record = self.get(user_id)
+        if record is None:
+            raise UserStoreError(f"Unknown user: {user_id}")
+        with self._lock:
+            owner = self._by_credential.get(credential_id)
+            if owner is not None and owner is not record:
+                raise DuplicateCredentialError(f"Credential already registered: {credential_id}")
+            self._by_credential[credential_id] = record
+            if credential_id not in record.credential_ids:
+                record.credential_ids = record.credential_ids + (credential_id,)
+        return record
+
+    def bulk_seed(self, count, email_pattern="loadtest{n}@quantumbank.test", first_name="Load",
+                  last_name="Tester", password_hash=None, kyc_status="verified", chunk_size=50000):
+        """Append count generated users quickly; returns the number actually added.
+
+        Users are built outside the lock and inserted a chunk at a time, so
+        concurrent registrations are only held up for one chunk at most.
+        Generated emails that collide with existing users are skipped.
+        """
+        first_name, last_name = sys.intern(first_name), sys.intern(last_name)
+        kyc_status = sys.intern(kyc_status)
+        added = 0
+        start = len(self._by_id)
+        for base in range(0, count, chunk_size):
+            emails = [email_pattern.format(n=start + n + 1) for n in range(base, min(count, base + chunk_size))]
+            with self._lock:
+                by_id, by_email = self._by_id, self._by_email
+                for email in emails:
+                    email, key = _email_and_key(email)
+                    if key in by_email:
+                        continue
+                    record = UserRecord(len(by_id) + 1, email, first_name, last_name, password_hash, kyc_status)
+                    by_id.append(record)
+                    by_email[key] = record
+                    added += 1
+        return added
+
+    def update_last_login(self, user_id, timestamp):
+        record = self.get(user_id)
+        if record is not None:
+            record.last_login = timestamp
+        return record
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def get(self, user_id):
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+        if 1 <= user_id <= len(self._by_id):
+            return self._by_id[user_id - 1]
+        return None
+
+    def get_by_email(self, email):
+        if not isinstance(email, str):
+            return None
+        return self._by_email.get(normalize_email(email))
+
+    def get_by_credential(self, credential_id):
+        if not isinstance(credential_id, str):
+            return None
+        return self._by_credential.get(credential_id)
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+    def memory_report(self, sample=1000):
+        """Estimated bytes per user: sampled record + owned strings + amortized index slots"""
+        users = len(self._by_id)
+        if not users:
+            return {"users": 0, "bytes_per_user": 0, "estimated_total_bytes": 0}
+        step = max(1, users // sample)
+        records = self._by_id[::step][:sample]
+        seen = set()
+        record_bytes = 0
+        for record in records:
+            record_bytes += sys.getsizeof(record)
+            for value in (record.email, record.first_name, record.last_name,
+                          record.password_hash, record.credential_ids):
+                if value is not None and id(value) not in seen:
+                    # Interned/shared strings are only counted once across the sample
+                    seen.add(id(value))
+                    record_bytes += sys.getsizeof(value)
+        per_record = record_bytes / len(records)
+        index_bytes = (sys.getsizeof(self._by_id) + sys.getsizeof(self._by_email)
+                       + sys.getsizeof(self._by_credential))
+        # Index keys only cost extra when the case-folded email differs from the stored one
+        key_bytes = sum(sys.getsizeof(normalize_email(r.email)) for r in records
+                        if normalize_email(r.email) != r.email) / len(records)
+        per_user = per_record + key_bytes + index_bytes / users
+        return {
+            "users": users,
+            "bytes_per_user": round(per_user, 1),
+            "record_bytes": round(per_record, 1),
+            "index_bytes_per_user": round(key_bytes + index_bytes / users, 1),
+            "estimated_total_bytes": int(per_user * users),
+        }
+
+    def stats(self):
+        return {
+            "users": len(self._by_id),
+            "credentials": len(self._by_credential),
+            "memory": self.memory_report(),
+        }
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Micro-batching signature verification stage for the Quantum Banking mock backend
+Collects signed transactions from many request threads into small batches
+and verifies them in parallel on the crypto pipeline's worker pool
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from metrics import LatencyStats
+
+
+class VerificationStage:
+    """Batches concurrent verify requests.
+
+    A batch is dispatched as soon as it holds max_batch_size items or its
+    oldest item has waited max_latency seconds, whichever comes first. Each
+    batch is split across the pool's workers; at most max_inflight chunks
+    are outstanding, which pushes back on the collector under overload.
+    """
+
+    def __init__(self, pipeline, max_batch_size=64, max_latency=0.002, max_inflight=None):
+        self.pipeline = pipeline
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self._inflight = threading.BoundedSemaphore(max_inflight or pipeline.workers * 2)
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+        self.batches = 0
+        self.items = 0
+        self.queue_wait = LatencyStats()
+
+    def start(self):
+        with self._cond:
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(target=self._run, name="verification-stage", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def submit(self, public_key, message, signature):
+        """Queue one verification; the returned future resolves to True/False"""
+        future = Future()
+        if not self._running:
+            self.start()
+        with self._cond:
+            self._queue.append((time.monotonic(), (public_key, message, signature), future))
+            if len(self._queue) == 1 or len(self._queue) >= self.max_batch_size:
+                self._cond.notify()
+        return future
+
+    def verify(self, public_key, message, signature, timeout=None):
+        return self.submit(public_key, message, signature).result(timeout)
+
+    def verify_many(self, items, timeout=None):
+        """Verify (public_key, message, signature) triples; returns a bool per item"""
+        futures = [self.submit(*item) for item in items]
+        return [f.result(timeout) for f in futures]
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": (self.items / self.batches) if self.batches else 0.0,
+            "queued": len(self._queue),
+            "max_batch_size": self.max_batch_size,
+            "max_latency_ms": self.max_latency * 1000,
+            "queue_wait": self.queue_wait.snapshot(),
+        }
+
+    # ------------------------------------------------------------------
+    # Collector thread
+    # ------------------------------------------------------------------
+    def _next_batch(self):
+        with self._cond:
+            while self._running and not self._queue:
+                self._cond.wait()
+            if not self._running and not self._queue:
+                return None
+            deadline = self._queue[0][0] + self.max_latency
+            while self._running and len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            count = min(len(self._queue), self.max_batch_size)
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            now = time.monotonic()
+            self.queue_wait.record_many([now - enqueued for enqueued, _, _ in batch])
+            self.batches += 1
+            self.items += len(batch)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        chunk_size = max(1, math.ceil(len(batch) / self.pipeline.workers))
+        for i in range(0, len(batch), chunk_size):
+            chunk = batch[i:i + chunk_size]
+            self._inflight.acquire()
+            try:
+                future = self.pipeline.verify_async([item for _, item, _ in chunk])
+            except Exception as e:
+                self._inflight.release()
+                for _, _, item_future in chunk:
+                    item_future.set_exception(e)
+                continue
+            future.add_done_callback(lambda f, chunk=chunk: self._resolve(f, chunk))
+
+    def _resolve(self, future, chunk):
+        self._inflight.release()
+        error = future.exception()
+        if error is not None:
+            for _, _, item_future in chunk:
+                item_future.set_exception(error)
+            return
+        results, _ = future.result()
+        for (_, _, item_future), ok in zip(chunk, results):
+            item_future.set_result(ok)
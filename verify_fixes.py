@@ -3,81 +3,103 @@
 Verification script to test all the fixes applied to the Quantum Banking app
 """
 
-import requests
-import json
+import argparse
 import time
 
-def test_all_endpoints():
+from smoke_runner import add_arguments, pooled_session, print_timings, report, run_checks
+
+def test_all_endpoints(parallel=False, workers=8):
     base_url = "http://localhost:3000"
     api_url = "http://localhost:8080"
-    
+    session = pooled_session(workers)
+
     print("🔍 Verifying Quantum Banking Application Fixes")
     print("=" * 50)
-    
+
     # Test 1: Frontend availability
-    try:
-        response = requests.get(base_url, timeout=5)
-        print(f"✅ Frontend (React): {response.status_code} - Available at {base_url}")
-    except Exception as e:
-        print(f"❌ Frontend: Not accessible - {e}")
-    
+    def check_frontend():
+        try:
+            response = session.get(base_url, timeout=5)
+            report(f"✅ Frontend (React): {response.status_code} - Available at {base_url}")
+        except Exception as e:
+            report(f"❌ Frontend: Not accessible - {e}")
+            return False
+
     # Test 2: Backend health
-    try:
-        response = requests.get(f"{api_url}/api/v1/health")
-        data = response.json()
-        print(f"✅ Backend Health: {response.status_code} - {data['status']}")
-    except Exception as e:
-        print(f"❌ Backend Health: Failed - {e}")
-    
-    # Test 3: Registration endpoint (the main fix)
-    try:
-        registration_data = {
-            "firstName": "Test",
-            "lastName": "User",
-            "email": "test@example.com",
-            "password": "TestPassword123!"
-        }
-        response = requests.post(
-            f"{api_url}/api/v1/auth/register/",
-            json=registration_data,
-            headers={"Content-Type": "application/json"}
-        )
-        if response.status_code == 200:
+    def check_backend_health():
+        try:
+            response = session.get(f"{api_url}/api/v1/health", timeout=5)
             data = response.json()
-            print(f"✅ Registration Fix: Working - User {data['user']['firstName']} {data['user']['lastName']} created")
-        else:
-            print(f"❌ Registration: {response.status_code} - {response.text}")
-    except Exception as e:
-        print(f"❌ Registration: Failed - {e}")
-    
+            report(f"✅ Backend Health: {response.status_code} - {data['status']}")
+        except Exception as e:
+            report(f"❌ Backend Health: Failed - {e}")
+            return False
+
+    # Test 3: Registration endpoint (the main fix)
+    def check_registration():
+        try:
+            registration_data = {
+                "firstName": "Test",
+                "lastName": "User",
+                "email": f"test+{int(time.time() * 1000)}@example.com",
+                "password": "TestPassword123!"
+            }
+            response = session.post(
+                f"{api_url}/api/v1/auth/register/",
+                json=registration_data,
+                headers={"Content-Type": "application/json"},
+                timeout=5
+            )
+            if response.status_code == 200:
+                data = response.json()
+                report(f"✅ Registration Fix: Working - User {data['user']['firstName']} {data['user']['lastName']} created")
+            else:
+                report(f"❌ Registration: {response.status_code} - {response.text}")
+                return False
+        except Exception as e:
+            report(f"❌ Registration: Failed - {e}")
+            return False
+
     # Test 4: Auth endpoints
-    try:
-        response = requests.get(f"{api_url}/api/v1/auth/me/")
-        print(f"✅ Auth Me Endpoint: {response.status_code} - Fixed missing endpoint")
-    except Exception as e:
-        print(f"❌ Auth Me: Failed - {e}")
-    
+    def check_auth_me():
+        try:
+            response = session.get(f"{api_url}/api/v1/auth/me/", timeout=5)
+            report(f"✅ Auth Me Endpoint: {response.status_code} - Fixed missing endpoint")
+        except Exception as e:
+            report(f"❌ Auth Me: Failed - {e}")
+            return False
+
     # Test 5: WebAuthn challenge (biometric fix)
-    try:
-        response = requests.get(f"{api_url}/api/v1/auth/webauthn/challenge/?type=register")
-        if response.status_code == 200:
-            print(f"✅ WebAuthn Challenge: {response.status_code} - Biometric auth fixed")
-        else:
-            print(f"⚠️  WebAuthn Challenge: {response.status_code}")
-    except Exception as e:
-        print(f"❌ WebAuthn: Failed - {e}")
-    
+    def check_webauthn_challenge():
+        try:
+            response = session.get(f"{api_url}/api/v1/auth/webauthn/challenge/?type=register", timeout=5)
+            if response.status_code == 200:
+                report(f"✅ WebAuthn Challenge: {response.status_code} - Biometric auth fixed")
+            else:
+                report(f"⚠️  WebAuthn Challenge: {response.status_code}")
+        except Exception as e:
+            report(f"❌ WebAuthn: Failed - {e}")
+            return False
+
     # Test 6: Account data
-    try:
-        response = requests.get(f"{api_url}/api/v1/accounts/")
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✅ Account Data: {response.status_code} - {len(data)} accounts available")
-        else:
-            print(f"❌ Account Data: {response.status_code}")
-    except Exception as e:
-        print(f"❌ Account Data: Failed - {e}")
-    
+    def check_account_data():
+        try:
+            response = session.get(f"{api_url}/api/v1/accounts/", timeout=5)
+            if response.status_code == 200:
+                data = response.json()
+                report(f"✅ Account Data: {response.status_code} - {len(data)} accounts available")
+            else:
+                report(f"❌ Account Data: {response.status_code}")
+                return False
+        except Exception as e:
+            report(f"❌ Account Data: Failed - {e}")
+            return False
+
+    timings, wall = run_checks([check_frontend, check_backend_health, check_registration,
+                                check_auth_me, check_webauthn_challenge, check_account_data],
+                               parallel, workers)
+    print_timings(timings, wall)
+
     print("\n" + "=" * 50)
     print("🎯 VERIFICATION SUMMARY")
     print("=" * 50)
@@ -89,4 +111,7 @@ def test_all_endpoints():
     print("📝 If issues persist, check browser console (F12) for detailed errors")
 
 if __name__ == "__main__":
-    test_all_endpoints()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Verify Quantum Banking application fixes")
+    add_arguments(parser)
+    args = parser.parse_args()
+    test_all_endpoints(args.parallel, args.workers)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+One-time WebAuthn challenge store for the Quantum Banking mock backend
+Issues random challenges and consumes each exactly once, with TTL expiry
+and a hard cap on outstanding challenges
+"""
+
+import secrets
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+
+class _Shard:
+    __slots__ = ("lock", "entries")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # challenge -> (expires_at, purpose, user_id); insertion order == expiry order
+        self.entries = OrderedDict()
+
+
+class ChallengeStore:
+    """Sharded store of outstanding challenges.
+
+    Every challenge lives in one shard chosen by its crc32, so issue and
+    consume only contend with traffic on the same shard. Because the TTL
+    is fixed, each shard's insertion order is also its expiry order:
+    expired entries are purged from the head on every issue, and when a
+    shard is full its oldest challenge is evicted, so a flood of
+    unanswered challenges can never grow memory past max_outstanding.
+    """
+
+    def __init__(self, ttl=120.0, max_outstanding=100000, shards=16, challenge_bytes=32):
+        self.ttl = ttl
+        self.max_outstanding = max_outstanding
+        self.challenge_bytes = challenge_bytes
+        self._shards = [_Shard() for _ in range(shards)]
+        self._per_shard = max(1, max_outstanding // shards)
+        self._counter_lock = threading.Lock()
+        self.counters = {"issued": 0, "consumed": 0, "rejected": 0, "expired": 0, "evicted": 0}
+
+    def _shard(self, challenge):
+        return self._shards[zlib.crc32(challenge.encode()) % len(self._shards)]
+
+    def _count(self, name, n=1):
+        with self._counter_lock:
+            self.counters[name] += n
+
+    def _purge(self, shard, now):
+        entries = shard.entries
+        expired = 0
+        while entries:
+            challenge, (expires_at, _, _) = next(iter(entries.items()))
+            if expires_at > now:
+                break
+            entries.popitem(last=False)
+            expired += 1
+        evicted = 0
+        while len(entries) >= self._per_shard:
+            entries.popitem(last=False)
+            evicted += 1
+        return expired, evicted
+
+    def issue(self, purpose="login", user_id=None):
+        """Create a challenge; returns (challenge, expires_at)"""
+        challenge = secrets.token_urlsafe(self.challenge_bytes)
+        now = time.monotonic()
+        expires_at = now + self.ttl
+        shard = self._shard(challenge)
+        with shard.lock:
+            expired, evicted = self._purge(shard, now)
+            shard.entries[challenge] = (expires_at, purpose, user_id)
+        with self._counter_lock:
+            self.counters["issued"] += 1
+            self.counters["expired"] += expired
+            self.counters["evicted"] += evicted
+        return challenge, time.time() + self.ttl
+
+    def consume(self, challenge, purpose=None):
+        """Atomically remove a challenge; returns its user_id record or None if not valid.
+
+        A challenge is accepted at most once even when several requests race
+        to present it; expired or wrong-purpose challenges are still removed.
+        """
+        if not isinstance(challenge, str) or not challenge:
+            self._count("rejected")
+            return None
+        shard = self._shard(challenge)
+        with shard.lock:
+            record = shard.entries.pop(challenge, None)
+        if record is None:
+            self._count("rejected")
+            return None
+        expires_at, issued_purpose, user_id = record
+        if expires_at <= time.monotonic():
+            self._count("expired")
+            return None
+        if purpose is not None and purpose != issued_purpose:
+            self._count("rejected")
+            return None
+        self._count("consumed")
+        return {"purpose": issued_purpose, "user_id": user_id}
+
+    def outstanding(self):
+        return sum(len(shard.entries) for shard in self._shards)
+
+    def stats(self):
+        with self._counter_lock:
+            counters = dict(self.counters)
+        counters.update({
+            "outstanding": self.outstanding(),
+            "max_outstanding": self._per_shard * len(self._shards),
+            "ttl_seconds": self.ttl,
+        })
+        return counters